@@ -220,16 +220,23 @@ function startMemoryWatcher(context) {
     const memoryFile = config.get('memoryFile', './PROJECT_MEMORY.md');
     const memoryPath = path.join(vscode.workspace.rootPath, memoryFile);
 
-    if (!fs.existsSync(memoryPath)) {
-        return; // File doesn't exist yet
+    const memoryDir = path.dirname(memoryPath);
+    const memoryName = path.basename(memoryPath);
+
+    if (!fs.existsSync(memoryDir)) {
+        return;
     }
 
     const autoShow = config.get('autoShowMemory', true);
 
-    memoryWatcher = fs.watch(memoryPath, (eventType) => {
-        if (eventType === 'change' && autoShow) {
-            // Debounce updates
-            setTimeout(() => {
+    // Watch the directory, not the file: rotation replaces PROJECT_MEMORY.md with a
+    // fresh file, which would silently end a watch on the old one
+    let pendingNotice = null;
+    memoryWatcher = fs.watch(memoryDir, (eventType, filename) => {
+        if (filename === memoryName && autoShow) {
+            // Debounce updates: a rotation raises several events for one entry
+            clearTimeout(pendingNotice);
+            pendingNotice = setTimeout(() => {
                 vscode.window.showInformationMessage(
                     'Shared memory updated',
                     'View'
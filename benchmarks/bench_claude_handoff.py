@@ -0,0 +1,114 @@
+"""
+OUTLAW EXOTIX // CLAUDE HANDOFF BENCHMARK
+
+Measures the per-turn cost of handing the prompt and persona to the Claude CLI:
+the old way (both written to NamedTemporaryFiles, passed as @file, unlinked) against
+war_room.run_claude (prompt over stdin, persona in a memfd where available).
+
+Two numbers per mode:
+    prep      building and cleaning up the handoff alone, no process started
+    turn      a full turn against a stub CLI that reads its stdin and @file arguments
+              (/bin/sh, so interpreter startup does not drown the difference)
+
+Usage:
+    python benchmarks/bench_claude_handoff.py
+    python benchmarks/bench_claude_handoff.py --turns 500 --prompt-kb 32
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools")
+sys.path.insert(0, TOOLS_DIR)
+
+import war_room
+
+STUB = """#!/bin/sh
+cat > /dev/null
+for arg in "$@"; do
+    case "$arg" in @*) cat "${arg#@}" > /dev/null ;; esac
+done
+"""
+
+
+def legacy_prep(prompt, system_prompt):
+    """The pre-stdin handoff: two temp files, @file arguments. Returns (cmd, cleanup paths)."""
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as pf:
+        pf.write(prompt)
+        prompt_file = pf.name
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as sf:
+        sf.write(system_prompt)
+        system_file = sf.name
+    cmd = [war_room.CLAUDE_EXE, "-p", f"@{prompt_file}", "--dangerously-skip-permissions",
+           "--system-prompt", f"@{system_file}"]
+    return cmd, (prompt_file, system_file)
+
+
+def legacy_turn(prompt, system_prompt):
+    cmd, paths = legacy_prep(prompt, system_prompt)
+    try:
+        subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    finally:
+        for path in paths:
+            war_room.remove_temp_file(path)
+
+
+def legacy_prep_only(prompt, system_prompt):
+    _, paths = legacy_prep(prompt, system_prompt)
+    for path in paths:
+        war_room.remove_temp_file(path)
+
+
+def stdin_prep_only(prompt, system_prompt):
+    path, fd = war_room.write_system_prompt(system_prompt)
+    war_room.claude_command(path)
+    war_room.release_system_prompt(path, fd)
+
+
+def measure(fn, turns, *args):
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claude handoff benchmark")
+    parser.add_argument("--turns", type=int, default=200, help="Turns per mode")
+    parser.add_argument("--prompt-kb", type=int, default=8, help="Prompt size in KB")
+    parser.add_argument("--persona-kb", type=int, default=4, help="Persona size in KB")
+    args = parser.parse_args()
+
+    prompt = "REQUEST: " + "x" * (args.prompt_kb * 1024)
+    persona = "# PERSONA\n" + "y" * (args.persona_kb * 1024)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = os.path.join(tmpdir, "claude")
+        with open(stub, "w") as f:
+            f.write(STUB)
+        os.chmod(stub, 0o755)
+        war_room.CLAUDE_EXE = stub
+
+        print(f"turns={args.turns} prompt={args.prompt_kb}KB persona={args.persona_kb}KB "
+              f"memfd={'yes' if war_room.claude_session.HAS_MEMFD else 'no'}")
+        print(f"{'mode':<24}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        rows = [
+            ("prep: temp files", legacy_prep_only),
+            ("prep: stdin + memfd", stdin_prep_only),
+            ("turn: temp files", legacy_turn),
+            ("turn: stdin + memfd", war_room.run_claude),
+        ]
+        for label, fn in rows:
+            mean, p50, p99 = measure(fn, args.turns, prompt, persona)
+            print(f"{label:<24}{mean * 1000:>10.3f}{p50 * 1000:>10.3f}{p99 * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
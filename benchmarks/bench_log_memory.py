@@ -0,0 +1,84 @@
+"""
+OUTLAW EXOTIX // LOG_MEMORY APPEND BENCHMARK
+
+Measures PROJECT_MEMORY.md append throughput (entries/sec) with 1, 8 and 32
+concurrent writer processes, with group commit off (one fsync per entry) and on
+(one fsync per batch).
+
+Usage:
+    python benchmarks/bench_log_memory.py
+    python benchmarks/bench_log_memory.py --writers 1 8 32 --entries 100
+    python benchmarks/bench_log_memory.py --fsync-ms 5    # emulate a disk with real fsync cost
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import multiprocessing
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools")
+sys.path.insert(0, TOOLS_DIR)
+
+
+def _writer(workdir, group_commit, entries, barrier, fsync_latency):
+    import log_memory
+    os.chdir(workdir)
+    log_memory.GROUP_COMMIT = group_commit and log_memory.HAS_FCNTL
+    if fsync_latency:
+        # Emulate a disk without a volatile write cache (VM and tmpfs fsyncs are nearly free)
+        real_fsync = log_memory.os.fsync
+
+        def slow_fsync(fd):
+            real_fsync(fd)
+            time.sleep(fsync_latency)
+
+        log_memory.os.fsync = slow_fsync
+    barrier.wait()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(entries):
+            log_memory.log_entry(f"[pid {os.getpid()}] benchmark entry {i}")
+
+
+def run(writers, entries, group_commit, fsync_latency=0.0, directory=None):
+    """Entries/sec for `writers` processes each appending `entries` entries."""
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        barrier = multiprocessing.Barrier(writers + 1)
+        procs = [
+            multiprocessing.Process(target=_writer, args=(workdir, group_commit, entries, barrier, fsync_latency))
+            for _ in range(writers)
+        ]
+        for p in procs:
+            p.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        with open(os.path.join(workdir, "PROJECT_MEMORY.md"), "r", encoding="utf-8") as f:
+            written = f.read().count("\n## [")
+        if written != writers * entries:
+            raise RuntimeError(f"Expected {writers * entries} entries, found {written}")
+
+    return writers * entries / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="log_memory append throughput benchmark")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 32], help="Concurrent writer processes")
+    parser.add_argument("--entries", type=int, default=50, help="Entries appended by each writer")
+    parser.add_argument("--fsync-ms", type=float, default=0.0,
+                        help="Extra latency added to each fsync, to emulate a disk without write cache")
+    parser.add_argument("--dir", help="Directory to benchmark in (default: system temp dir)")
+    args = parser.parse_args()
+
+    # Keep rotation out of the measurement
+    os.environ["OUTLAW_MEMORY_ROTATE"] = "off"
+
+    print(f"{'writers':>8} {'direct (entries/s)':>20} {'group commit (entries/s)':>26} {'speedup':>8}")
+    for writers in args.writers:
+        direct = run(writers, args.entries, False, args.fsync_ms / 1000, args.dir)
+        grouped = run(writers, args.entries, True, args.fsync_ms / 1000, args.dir)
+        print(f"{writers:>8} {direct:>20.0f} {grouped:>26.0f} {grouped / direct:>7.1f}x")
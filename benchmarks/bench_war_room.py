@@ -0,0 +1,437 @@
+"""
+OUTLAW EXOTIX // WAR ROOM LATENCY BENCHMARK
+
+Where a War Room turn spends its time. Runs the real advisor -> Claude pipeline
+(war_room.run_task, the same path batch mode takes) against local stand-ins:
+
+    gemini / openai   stub SDK packages put first on the bridges' PYTHONPATH, so the real
+                      gemini_bridge.py / codex_bridge.py run end to end (spawn, imports,
+                      context build, packing, streaming) and only the network call is faked
+    claude            a stub CLI that reads its prompt from stdin
+
+Each stub waits --*-latency seconds, then streams --*-bytes of output. A sitecustomize
+on the same path timestamps interpreter start, which splits the advisor phase into:
+
+    spawn     war_room launching the bridge until its interpreter is up
+    context   bridge imports, workspace context build and packing, until the provider call
+    advisor   the whole advisor round trip (spawn + context + provider + streaming)
+    claude    the Claude CLI round trip
+    total     the whole turn
+
+A second part measures the memory paths at each --memory-sizes size (default 1 KB,
+1 MB, 100 MB; the log is laid out in sealed segments and indexed as log_memory would
+leave it): log_memory.log_entry appends, and context_builder.get_context reads, both
+cold (in-memory caches cleared, as in each bridge process) and cached (daemon / War Room).
+
+Every metric is reported as p50/p95/p99 in ms. --json writes the results, stamped with
+the git commit, and --compare prints the change against an earlier --json file.
+
+Usage:
+    python benchmarks/bench_war_room.py
+    python benchmarks/bench_war_room.py --turns 50 --advisor council --advisor-latency 0.2
+    python benchmarks/bench_war_room.py --memory-sizes 1KB 1MB --json after.json --compare before.json
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import datetime
+import platform
+import tempfile
+import contextlib
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.join(BENCH_DIR, "..", "tools")
+sys.path.insert(0, TOOLS_DIR)
+
+import war_room
+import log_memory
+import memory_index
+import memory_reader
+import context_builder
+import context_packer
+
+PERCENTILES = (50, 95, 99)
+TURN_PHASES = ("spawn", "context", "advisor", "claude", "total")
+
+# Stub provider output: shared by the SDK stubs and the Claude CLI stub
+STUB_COMMON = '''
+import os, json, time
+
+def trace(event):
+    path = os.environ.get("BENCH_TRACE")
+    if path:
+        with open(path, "a") as f:
+            f.write(json.dumps({"event": event, "t": time.time(), "pid": os.getpid()}) + "\\n")
+
+def respond(prefix):
+    """Waits BENCH_LATENCY seconds, then yields BENCH_BYTES of text in BENCH_CHUNKS chunks."""
+    trace("request")
+    time.sleep(float(os.environ.get("BENCH_LATENCY", "0")))
+    size = int(os.environ.get("BENCH_BYTES", "1024"))
+    chunks = max(1, int(os.environ.get("BENCH_CHUNKS", "16")))
+    body = (prefix + " " + "x" * size)[:size]
+    step = max(1, -(-size // chunks))
+    for i in range(0, size, step):
+        yield body[i:i + step]
+'''
+
+STUBS = {
+    "sitecustomize.py": '''
+import os, json, time
+if os.environ.get("BENCH_TRACE"):
+    with open(os.environ["BENCH_TRACE"], "a") as f:
+        f.write(json.dumps({"event": "start", "t": time.time(), "pid": os.getpid()}) + "\\n")
+''',
+    "bench_stub.py": STUB_COMMON,
+    "google/auth/__init__.py": '''
+def default():
+    return object(), "bench-project"
+''',
+    "google/generativeai/__init__.py": '''
+import os
+from bench_stub import respond
+
+def configure(**kwargs):
+    pass
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class GenerativeModel:
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, contents, stream=False):
+        os.environ["BENCH_LATENCY"] = os.environ.get("BENCH_ADVISOR_LATENCY", "0")
+        os.environ["BENCH_BYTES"] = os.environ.get("BENCH_ADVISOR_BYTES", "1024")
+        return (_Chunk(text) for text in respond("GEMINI ADVICE"))
+''',
+    "openai/__init__.py": '''
+import os
+from types import SimpleNamespace
+from bench_stub import respond
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+class _Completions:
+    def create(self, model, messages, stream=False, **kwargs):
+        os.environ["BENCH_LATENCY"] = os.environ.get("BENCH_ADVISOR_LATENCY", "0")
+        os.environ["BENCH_BYTES"] = os.environ.get("BENCH_ADVISOR_BYTES", "1024")
+        return (_chunk(text) for text in respond("CODEX BLUEPRINT"))
+
+class OpenAI:
+    def __init__(self, api_key=None, **kwargs):
+        self.chat = SimpleNamespace(completions=_Completions())
+''',
+}
+
+CLAUDE_STUB = '''#!{python} -S
+import os, sys
+sys.path.insert(0, {stubs!r})
+from bench_stub import respond
+sys.stdin.read()
+os.environ["BENCH_LATENCY"] = os.environ.get("BENCH_CLAUDE_LATENCY", "0")
+os.environ["BENCH_BYTES"] = os.environ.get("BENCH_CLAUDE_BYTES", "2048")
+for chunk in respond("CLAUDE OUTPUT"):
+    sys.stdout.write(chunk)
+    sys.stdout.flush()
+'''
+
+WORDS = ("auth endpoint token session cache refactor login database migration index query api "
+         "handler router deploy docker config secret rotate timeout retry latency bridge memory "
+         "segment manifest advisor persona claude gemini codex workspace logging audit vuln "
+         "injection sanitize schema test fixture benchmark build release rollback patch").split()
+
+QUERIES = [
+    "fix the auth token refresh bug",
+    "why is the database migration slow",
+    "audit the api handler for injection",
+    "add retry with timeout to the bridge",
+    "rotate the deploy secret and update config",
+]
+
+
+def percentiles(samples):
+    """{"p50", "p95", "p99", "mean", "n"} in milliseconds (nearest-rank percentiles)."""
+    ordered = sorted(samples)
+    stats = {f"p{p}": round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 3)
+             for p in PERCENTILES}
+    stats["mean"] = round(sum(ordered) / len(ordered) * 1000, 3)
+    stats["n"] = len(ordered)
+    return stats
+
+
+def parse_size(text):
+    """'1KB' / '1MB' / '100MB' / '512' -> bytes."""
+    match = re.fullmatch(r"(\d+)\s*([KMG]?)B?", text.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Bad size '{text}': use e.g. 1KB, 1MB, 100MB")
+    return int(match.group(1)) * {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[match.group(2)]
+
+
+def size_label(size):
+    for unit, scale in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= scale and size % scale == 0:
+            return f"{size // scale}{unit}"
+    return f"{size}B"
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def install_stubs(root):
+    """Writes the stub SDKs and Claude CLI under `root`. Returns (stub package dir, Claude stub path)."""
+    stubs = os.path.join(root, "stubs")
+    for name, source in STUBS.items():
+        path = os.path.join(stubs, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+    claude = os.path.join(root, "claude")
+    with open(claude, "w", encoding="utf-8") as f:
+        f.write(CLAUDE_STUB.format(python=sys.executable, stubs=stubs))
+    os.chmod(claude, 0o755)
+    return stubs, claude
+
+
+def write_memory(path, size, seed=7):
+    """
+    A memory log of about `size` bytes laid out as log_memory leaves it: sealed
+    segments of SEGMENT_BYTES listed in the manifest, the rest in the active file,
+    and a complete search index.
+    """
+    rng = random.Random(seed)
+    header = memory_reader.FILE_HEADER.decode("utf-8")
+    start = datetime.datetime(2025, 1, 1)
+    written, number = 0, 0
+    with log_memory.memory_lock(path):
+        while written < size:
+            chunk = []
+            chunk_bytes = len(header)
+            budget = size - written if log_memory.ROTATE == "off" else min(log_memory.SEGMENT_BYTES, size - written)
+            while chunk_bytes < budget:
+                stamp = (start + datetime.timedelta(minutes=number)).strftime("%Y-%m-%d %H:%M:%S")
+                text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 40)))
+                entry = f"\n## [{stamp}]\nStep {number}: {text}.\n"
+                chunk.append(entry)
+                chunk_bytes += len(entry)
+                number += 1
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(header + "".join(chunk))
+            written += chunk_bytes
+            if written < size and log_memory.ROTATE != "off":
+                log_memory.seal_segment(path)
+        if memory_index.enabled():
+            memory_index.rebuild(path)
+    return number
+
+
+@contextlib.contextmanager
+def workspace(root, memory_size, source=None):
+    """A temp workspace holding a copy of the tools source and a memory log of `memory_size`."""
+    directory = os.path.join(root, f"workspace-{memory_size}")
+    shutil.copytree(source or TOOLS_DIR, os.path.join(directory, "tools"),
+                    ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        start = time.perf_counter()
+        entries = write_memory(memory_reader.MEMORY_FILE, memory_size) if memory_size else 0
+        yield directory, entries, time.perf_counter() - start
+    finally:
+        os.chdir(previous)
+        context_builder.clear_cache()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def read_trace(path):
+    events = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.strip()]
+    return events
+
+
+def bench_turns(args, root, claude):
+    """Per-phase samples (seconds) for args.turns War Room turns."""
+    war_room.CLAUDE_EXE = claude
+    samples = {phase: [] for phase in TURN_PHASES}
+    trace = os.path.join(root, "trace.jsonl")
+
+    with workspace(root, args.turn_memory):
+        for turn in range(args.warmup + args.turns):
+            if os.path.exists(trace):
+                os.unlink(trace)
+            task = {"id": f"turn-{turn}", "prompt": QUERIES[turn % len(QUERIES)], "persona": args.persona,
+                    "advisor": args.advisor, "execute": True}
+            launched = time.time()
+            result = war_room.run_task(task)
+            if result["status"] != "ok":
+                raise RuntimeError(f"Turn {turn} failed: {result['error']}")
+            if turn < args.warmup:
+                continue
+
+            # One bridge process per advisor: the slowest one bounds the turn
+            events = read_trace(trace)
+            starts = {e["pid"]: e["t"] for e in events if e["event"] == "start"}
+            requests = {e["pid"]: e["t"] for e in events if e["event"] == "request" and e["pid"] in starts}
+            if requests:
+                samples["spawn"].append(max(starts[pid] for pid in requests) - launched)
+                samples["context"].append(max(requests[pid] - starts[pid] for pid in requests))
+            samples["advisor"].append(result["timings"]["advisor"])
+            samples["claude"].append(result["timings"]["claude"])
+            samples["total"].append(result["timings"]["total"])
+    return {phase: values for phase, values in samples.items() if values}
+
+
+def bench_memory(args, root, size):
+    """Append and read samples (seconds) against a memory log of `size` bytes."""
+    with workspace(root, size) as (_, entries, setup):
+        samples = {"append": [], "get_context_cold": [], "get_context_cached": []}
+        budget = context_packer.budget_for("gemini")
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for i in range(args.appends):
+                start = time.perf_counter()
+                log_memory.log_entry(f"Benchmark append {i}: refactored the auth token cache.")
+                samples["append"].append(time.perf_counter() - start)
+
+        for i in range(args.reads):
+            query = QUERIES[i % len(QUERIES)]
+            context_builder.clear_cache()
+            start = time.perf_counter()
+            context_builder.get_context(query, budget=budget)
+            samples["get_context_cold"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            context_builder.get_context(query, budget=budget)
+            samples["get_context_cached"].append(time.perf_counter() - start)
+    return samples, entries, setup
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"  {'metric':<28}" + "".join(f"{f'p{p} ms':>12}" for p in PERCENTILES) + f"{'mean ms':>12}")
+    for name, stats in rows:
+        print(f"  {name:<28}" + "".join(f"{stats[f'p{p}']:>12.2f}" for p in PERCENTILES) + f"{stats['mean']:>12.2f}")
+
+
+def flatten(results):
+    """{"turn.advisor.p50": ms, ...} for comparing two runs."""
+    flat = {}
+    for phase, stats in results.get("turn", {}).items():
+        for key in (f"p{p}" for p in PERCENTILES):
+            flat[f"turn.{phase}.{key}"] = stats[key]
+    for size, metrics in results.get("memory", {}).items():
+        for metric, stats in metrics["metrics"].items():
+            for key in (f"p{p}" for p in PERCENTILES):
+                flat[f"memory.{size}.{metric}.{key}"] = stats[key]
+    return flat
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    before, after = flatten(baseline), flatten(results)
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit') or '?'})")
+    print(f"  {'metric':<44}{'before ms':>12}{'after ms':>12}{'change':>10}")
+    common = sorted(set(before) & set(after))
+    if not common:
+        print("  (no metrics in common: different phases or memory sizes)")
+    for key in common:
+        change = (after[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+        print(f"  {key:<44}{before[key]:>12.2f}{after[key]:>12.2f}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="War Room end-to-end latency benchmark")
+    parser.add_argument("--turns", type=int, default=20, help="Measured War Room turns")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured turns first")
+    parser.add_argument("--advisor", default="gemini", choices=["gemini", "codex", "council", "none"])
+    parser.add_argument("--persona", default="overwatch", help="Persona for the Claude phase ('' for none)")
+    parser.add_argument("--advisor-latency", type=float, default=0.05, help="Stub advisor latency (s)")
+    parser.add_argument("--advisor-bytes", type=parse_size, default="2KB", help="Stub advisor output size")
+    parser.add_argument("--claude-latency", type=float, default=0.05, help="Stub Claude latency (s)")
+    parser.add_argument("--claude-bytes", type=parse_size, default="4KB", help="Stub Claude output size")
+    parser.add_argument("--turn-memory", type=parse_size, default="64KB", help="Memory log size for the turns")
+    parser.add_argument("--memory-sizes", type=parse_size, nargs="*", default=[1024, 1024 ** 2, 100 * 1024 ** 2],
+                        help="Memory log sizes for the append / read benchmark (none to skip)")
+    parser.add_argument("--appends", type=int, default=50, help="log_memory appends per memory size")
+    parser.add_argument("--reads", type=int, default=20, help="get_context calls per memory size")
+    parser.add_argument("--no-turns", action="store_true", help="Skip the War Room turn benchmark")
+    parser.add_argument("--json", metavar="FILE", help="Write machine-readable results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="Print the change against an earlier --json FILE")
+    args = parser.parse_args()
+    args.persona = args.persona or None
+
+    with tempfile.TemporaryDirectory(prefix="outlaw-bench-") as root:
+        stubs, claude = install_stubs(root)
+        # Bridges and stubs see this environment; nothing touches the real caches or providers
+        os.environ.update({
+            "PYTHONPATH": os.pathsep.join(filter(None, [stubs, os.environ.get("PYTHONPATH")])),
+            "OUTLAW_CACHE_DIR": os.path.join(root, "cache"),
+            "OUTLAW_NO_CACHE": "1",
+            "BENCH_TRACE": os.path.join(root, "trace.jsonl"),
+            "BENCH_ADVISOR_LATENCY": str(args.advisor_latency),
+            "BENCH_ADVISOR_BYTES": str(args.advisor_bytes),
+            "BENCH_CLAUDE_LATENCY": str(args.claude_latency),
+            "BENCH_CLAUDE_BYTES": str(args.claude_bytes),
+            "GOOGLE_API_KEY": "bench",
+            "OPENAI_API_KEY": "bench",
+        })
+        os.environ.pop("OUTLAW_SESSION", None)
+
+        results = {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("json", "compare")},
+        }
+
+        if not args.no_turns:
+            print(f"War Room turns: {args.turns} x advisor={args.advisor} "
+                  f"(stub latency {args.advisor_latency * 1000:.0f} ms / {size_label(args.advisor_bytes)}), "
+                  f"claude (stub latency {args.claude_latency * 1000:.0f} ms / {size_label(args.claude_bytes)})")
+            samples = bench_turns(args, root, claude)
+            results["turn"] = {phase: percentiles(values) for phase, values in samples.items()}
+            print_table("War Room turn", results["turn"].items())
+
+        results["memory"] = {}
+        for size in args.memory_sizes:
+            label = size_label(size)
+            print(f"\nBuilding a {label} memory log...", flush=True)
+            samples, entries, setup = bench_memory(args, root, size)
+            results["memory"][label] = {
+                "bytes": size,
+                "entries": entries,
+                "setup_s": round(setup, 3),
+                "metrics": {name: percentiles(values) for name, values in samples.items()},
+            }
+            print_table(f"Memory {label} ({entries} entries, built and indexed in {setup:.1f}s)",
+                        results["memory"][label]["metrics"].items())
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,15 @@ if ($Name -match '[/\\.]') {
     exit 1
 }
 
+# Prefer the compiled persona registry: one cached file read instead of re-reading
+# the template and the memory protocol on every launch
+$Registry = "C:\Users\penne\.claude\tools\persona_registry.py"
+$Python = Get-Command python -ErrorAction SilentlyContinue
+if ((Test-Path $Registry) -and $Python) {
+    & $Python.Source $Registry --base "C:\Users\penne\.claude" --launch $Name @RemainingArgs
+    exit $LASTEXITCODE
+}
+
 $TemplatePath = "C:\Users\penne\.claude\templates\$Name.md"
 $MemoryProtocolPath = "C:\Users\penne\.claude\memory_protocol.md"
 
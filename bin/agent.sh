@@ -1,7 +1,6 @@
 #!/bin/bash
 AGENT_NAME=$1
 shift
-REMAINING_ARGS="$@"
 
 # Input validation: prevent path traversal
 if [[ "$AGENT_NAME" =~ [/.\\] ]]; then
@@ -15,7 +14,14 @@ if [ -z "$AGENT_NAME" ]; then
     exit 1
 fi
 
-# Resolve paths
+# Prefer the compiled persona registry: one cached file read instead of re-reading
+# the template and the memory protocol on every launch
+REGISTRY="${OUTLAW_TOOLS_DIR:-$HOME/.claude/tools}/persona_registry.py"
+if [ -f "$REGISTRY" ] && command -v python3 &> /dev/null; then
+    exec python3 "$REGISTRY" --base "$HOME/.claude" --launch "$AGENT_NAME" "$@"
+fi
+
+# Fallback without Python: resolve paths
 TEMPLATE_PATH="$HOME/.claude/templates/${AGENT_NAME}.md"
 MEMORY_PATH="$HOME/.claude/memory_protocol.md"
 
@@ -35,5 +41,5 @@ SYSTEM_PROMPT=$(cat "$TEMPLATE_PATH" "$MEMORY_PATH")
 
 echo -e "\e[36mDeploying Agent: $AGENT_NAME (with Mnemosyne Memory)\e[0m"
 
-# Execute Claude
-claude --system-prompt "$SYSTEM_PROMPT" $REMAINING_ARGS
+# Execute Claude: "$@" keeps each argument whole, so a multi-word -p prompt stays one
+claude --system-prompt "$SYSTEM_PROMPT" "$@"
@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+import context_builder
+
+
+@pytest.fixture(autouse=True)
+def isolated_advisor_cache(tmp_path, monkeypatch):
+    """Keep every test's advisor cache out of ~/.claude and away from other tests"""
+    monkeypatch.setenv('OUTLAW_CACHE_DIR', str(tmp_path / 'advisor_cache'))
+    monkeypatch.delenv('OUTLAW_NO_CACHE', raising=False)
+    monkeypatch.delenv('OUTLAW_SESSION', raising=False)
+    for name in ('OUTLAW_TRACE', 'OUTLAW_TRACE_ID', 'OUTLAW_TRACE_PARENT', 'OUTLAW_TRACE_FILE', 'OUTLAW_TRACE_SPAWNED',
+                 'OUTLAW_PROFILE', 'OUTLAW_PROFILE_DIR', 'OUTLAW_METRICS_TEXTFILE', 'OUTLAW_RATE_LIMITS',
+                 'OUTLAW_NO_RATE_LIMIT'):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_context_cache():
+    """Tests mock the filesystem under an unchanged directory; never serve them a cached context"""
+    context_builder.clear_cache()
+    yield
+    context_builder.clear_cache()
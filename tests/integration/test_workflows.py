@@ -89,10 +89,11 @@ class TestMemoryPersistence:
 class TestContextSharing:
     """Integration tests for context sharing between components"""
 
-    @patch('os.listdir')
-    def test_directory_context_available_to_all(self, mock_listdir):
+    def test_directory_context_available_to_all(self, tmp_path, monkeypatch):
         """Test directory context is consistent across bridges"""
-        mock_listdir.return_value = ['main.py', 'utils.py', 'config.json']
+        monkeypatch.chdir(tmp_path)
+        for name in ['main.py', 'utils.py', 'config.json']:
+            (tmp_path / name).write_text('')
 
         gemini_context = gemini_bridge.get_context()
         codex_context = codex_bridge.get_context()
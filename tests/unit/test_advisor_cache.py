@@ -0,0 +1,130 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import advisor_cache
+
+
+class TestMakeKey:
+    """Test cache key derivation"""
+
+    def test_key_is_deterministic(self):
+        """Test identical requests share a key"""
+        a = advisor_cache.make_key("gemini", "m", "sys", "prompt", "ctx")
+        b = advisor_cache.make_key("gemini", "m", "sys", "prompt", "ctx")
+        assert a == b
+
+    @pytest.mark.parametrize("field", range(5))
+    def test_every_field_changes_key(self, field):
+        """Test provider, model, system prompt, prompt and context all affect the key"""
+        base = ["gemini", "m", "sys", "prompt", "ctx"]
+        changed = list(base)
+        changed[field] = changed[field] + "-changed"
+        assert advisor_cache.make_key(*base) != advisor_cache.make_key(*changed)
+
+
+class TestGetPut:
+    """Test storing and retrieving responses"""
+
+    def test_miss_then_hit(self):
+        """Test a stored response is returned on the next lookup"""
+        assert advisor_cache.get("k") is None
+        advisor_cache.put("k", "cached answer 🚀")
+        assert advisor_cache.get("k") == "cached answer 🚀"
+
+    def test_counters(self):
+        """Test hits and misses are counted"""
+        advisor_cache.get("k")
+        advisor_cache.put("k", "v")
+        advisor_cache.get("k")
+        advisor_cache.get("k")
+
+        stats = advisor_cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_empty_response_not_stored(self):
+        """Test failed (empty) uplinks are not cached"""
+        advisor_cache.put("k", "")
+        assert advisor_cache.stats()["entries"] == 0
+
+    def test_ttl_expiry(self):
+        """Test entries past the TTL are treated as misses and removed"""
+        advisor_cache.put("k", "v")
+        with patch('advisor_cache.time.time', return_value=time.time() + 10):
+            with patch.dict(os.environ, {'OUTLAW_CACHE_TTL': '5'}):
+                assert advisor_cache.get("k") is None
+        assert advisor_cache.stats()["entries"] == 0
+
+    def test_bypass_env(self):
+        """Test OUTLAW_NO_CACHE disables reads and writes"""
+        with patch.dict(os.environ, {'OUTLAW_NO_CACHE': '1'}):
+            advisor_cache.put("k", "v")
+            assert advisor_cache.get("k") is None
+        assert advisor_cache.get("k") is None
+
+    def test_clear(self):
+        """Test clear drops entries and counters"""
+        advisor_cache.put("k", "v")
+        advisor_cache.get("k")
+        advisor_cache.clear()
+        stats = advisor_cache.stats()
+        assert stats["entries"] == 0
+        assert stats["hits"] == 0
+
+
+class TestEviction:
+    """Test LRU eviction under size bounds"""
+
+    def test_entry_limit_evicts_least_recently_used(self):
+        """Test the oldest-accessed entry is evicted first"""
+        with patch.dict(os.environ, {'OUTLAW_CACHE_MAX_ENTRIES': '2'}):
+            now = time.time()
+            with patch('advisor_cache.time.time', return_value=now):
+                advisor_cache.put("a", "1")
+            with patch('advisor_cache.time.time', return_value=now + 1):
+                advisor_cache.put("b", "2")
+            with patch('advisor_cache.time.time', return_value=now + 2):
+                advisor_cache.get("a")  # "a" is now more recent than "b"
+            with patch('advisor_cache.time.time', return_value=now + 3):
+                advisor_cache.put("c", "3")
+
+            assert advisor_cache.get("a") == "1"
+            assert advisor_cache.get("b") is None
+            assert advisor_cache.get("c") == "3"
+            assert advisor_cache.stats()["evictions"] == 1
+
+    def test_byte_limit(self):
+        """Test total stored bytes stay under the bound"""
+        with patch.dict(os.environ, {'OUTLAW_CACHE_MAX_BYTES': '100'}):
+            for i in range(10):
+                advisor_cache.put(f"k{i}", "X" * 30)
+            assert advisor_cache.stats()["bytes"] <= 100
+
+    def test_oversized_response_skipped(self):
+        """Test a single response larger than the bound is never stored"""
+        with patch.dict(os.environ, {'OUTLAW_CACHE_MAX_BYTES': '10'}):
+            advisor_cache.put("big", "X" * 50)
+        assert advisor_cache.get("big") is None
+
+
+class TestFailureIsolation:
+    """Test cache failures never break an uplink"""
+
+    def test_unwritable_cache_dir(self, tmp_path):
+        """Test an unusable cache location degrades to a miss"""
+        blocker = tmp_path / 'blocker'
+        blocker.write_text('not a directory')
+        with patch.dict(os.environ, {'OUTLAW_CACHE_DIR': str(blocker / 'cache')}):
+            advisor_cache.put("k", "v")
+            assert advisor_cache.get("k") is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
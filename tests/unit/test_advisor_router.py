@@ -0,0 +1,262 @@
+import pytest
+import os
+import sys
+import json
+import time
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import advisor_router
+import metrics
+
+
+@pytest.fixture
+def router(tmp_path):
+    return advisor_router.Router(str(tmp_path / "advisor_routes.json"))
+
+
+def advisor(output, delay=0.0, chunks=True, error=None):
+    """A provider call that answers `output` after `delay` seconds, streaming it when `chunks` is set"""
+    def call(on_chunk):
+        time.sleep(delay)
+        if error:
+            raise error
+        if chunks:
+            on_chunk(output)
+        return output
+    return call
+
+
+class TestProfiles:
+    """Test the moving latency and error profile"""
+
+    def test_ewma_and_p95(self, router):
+        """Test latency is smoothed and the p95 needs enough samples"""
+        router.record("gemini", 1.0, True)
+        router.record("gemini", 2.0, True)
+        profile = router.profiles["gemini"]
+        assert profile.ewma == pytest.approx(1.3)
+        assert profile.p95() is None
+
+        for latency in range(1, 21):
+            router.record("codex", float(latency), True)
+        assert router.profiles["codex"].p95() == 20.0
+
+    def test_breaker_benches_after_consecutive_failures(self, router):
+        """Test three failures in a row bench a provider and a success clears the count"""
+        for _ in range(2):
+            router.record("gemini", 1.0, False)
+        router.record("gemini", 1.0, True)
+        router.record("gemini", 1.0, False)
+        assert router.profiles["gemini"].benched_until == 0.0
+
+        router.record("codex", 1.0, False)
+        router.record("codex", 1.0, False)
+        router.record("codex", 1.0, False)
+        profile = router.profiles["codex"]
+        assert not profile.healthy(time.time())
+        assert profile.benched_until - time.time() == pytest.approx(advisor_router.BENCH_SECONDS, abs=1)
+
+    def test_persisted(self, router):
+        """Test a new router starts from the saved profiles"""
+        router.record("codex", 0.5, True)
+        reloaded = advisor_router.Router(router.path)
+        assert reloaded.profiles["codex"].ewma == 0.5
+        assert json.load(open(router.path))["codex"]["samples"] == [0.5]
+
+    def test_corrupt_file_ignored(self, tmp_path):
+        """Test a torn profile file starts every provider unmeasured"""
+        path = tmp_path / "advisor_routes.json"
+        path.write_text("{not json")
+        assert advisor_router.Router(str(path)).profiles == {}
+
+    def test_failed_output(self):
+        """Test bridge error text counts as a failure"""
+        assert advisor_router.advisor_failed("GEMINI UPLINK ERROR: 503")
+        assert advisor_router.advisor_failed("ERROR: GEMINI_API_KEY not found")
+        assert advisor_router.advisor_failed("  ")
+        assert not advisor_router.advisor_failed("Use a queue.")
+
+
+class TestRoute:
+    """Test provider ordering"""
+
+    def test_unmeasured_first_then_fastest(self, router):
+        """Test an unmeasured provider is explored, then the fastest wins"""
+        router.record("gemini", 3.0, True)
+        assert router.route(["gemini", "codex"]) == ["codex", "gemini"]
+
+        router.record("codex", 5.0, True)
+        assert router.route(["gemini", "codex"]) == ["gemini", "codex"]
+
+    def test_benched_provider_last(self, router):
+        """Test a fast provider that keeps failing is routed around"""
+        router.record("gemini", 0.1, True)
+        router.record("codex", 4.0, True)
+        for _ in range(3):
+            router.record("gemini", 0.1, False)
+        assert router.route(["gemini", "codex"]) == ["codex", "gemini"]
+
+    def test_errors_alone_do_not_demote(self, router):
+        """Test failures short of the breaker leave a fast provider first"""
+        router.record("gemini", 0.1, True)
+        router.record("codex", 4.0, True)
+        router.record("gemini", 0.1, False)
+        router.record("gemini", 0.1, False)
+        assert router.profiles["gemini"].errors > 0.5
+        assert router.route(["gemini", "codex"]) == ["gemini", "codex"]
+
+    def test_recovers_after_bench(self, router, monkeypatch):
+        """Test a benched provider is probed once its bench runs out, and a success restores it"""
+        router.record("gemini", 0.1, True)
+        router.record("codex", 4.0, True)
+        for _ in range(3):
+            router.record("gemini", 0.1, False)
+        assert router.route(["gemini", "codex"]) == ["codex", "gemini"]
+
+        later = time.time() + advisor_router.BENCH_SECONDS + 1
+        monkeypatch.setattr(advisor_router.time, 'time', lambda: later)
+        assert router.route(["gemini", "codex"]) == ["gemini", "codex"]
+        assert "probing" in router.describe(["gemini"])[0]
+
+        router.record("gemini", 0.1, True)
+        assert router.profiles["gemini"].failures == 0
+        assert "healthy" in router.describe(["gemini"])[0]
+
+        # A failed probe benches it again, for twice as long
+        for _ in range(4):
+            router.record("gemini", 0.1, False)
+        assert router.profiles["gemini"].benched_until == pytest.approx(later + 2 * advisor_router.BENCH_SECONDS)
+
+    def test_hedge_delay(self, router, monkeypatch):
+        """Test hedging waits the p95, or the default before there is one"""
+        monkeypatch.setattr(advisor_router, 'HEDGE_DELAY', 7.0)
+        assert router.hedge_delay("gemini") == 7.0
+        for _ in range(10):
+            router.record("gemini", 2.0, True)
+        assert router.hedge_delay("gemini") == 2.0
+
+
+class TestConsult:
+    """Test routed and hedged consults"""
+
+    def test_routes_to_fastest(self, router):
+        """Test the consult goes to the best provider only"""
+        router.record("gemini", 5.0, True)
+        router.record("codex", 1.0, True)
+        called = []
+        calls = {"gemini": lambda chunk: called.append("gemini") or "slow",
+                 "codex": lambda chunk: called.append("codex") or "fast"}
+
+        assert router.consult(calls) == ("codex", "fast", False)
+        assert called == ["codex"]
+
+    def test_fails_over(self, router):
+        """Test a failed provider is replaced by the next at once"""
+        router.record("codex", 1.0, True)
+        router.record("gemini", 2.0, True)
+        calls = {"codex": advisor("CODEX UPLINK ERROR: 500"), "gemini": advisor("advice", chunks=False)}
+
+        assert router.consult(calls) == ("gemini", "advice", False)
+
+    def test_raises_last_error(self, router):
+        """Test an exception is raised when every provider fails"""
+        calls = {"gemini": advisor("", error=ValueError("down")), "codex": advisor("", error=KeyError("gone"))}
+        with pytest.raises((ValueError, KeyError)):
+            router.consult(calls)
+
+    def test_hedge_wins_when_primary_stalls(self, router):
+        """Test a stalled primary is raced after its p95 and the hedge answers"""
+        metrics.reset()
+        for _ in range(10):
+            router.record("gemini", 0.1, True)
+            router.record("codex", 0.2, True)
+        calls = {"gemini": advisor("late", delay=2.0), "codex": advisor("hedged", delay=0.05)}
+
+        start = time.monotonic()
+        provider, output, streamed = router.consult(calls, hedge=True, on_chunk=lambda chunk: None)
+        elapsed = time.monotonic() - start
+
+        assert (provider, output, streamed) == ("codex", "hedged", True)
+        assert elapsed < 1.0
+        assert metrics.ADVISOR_HEDGES.value(provider="gemini") == 1
+
+    def test_no_hedge_when_primary_is_quick(self, router):
+        """Test no second request is sent when the primary beats its p95"""
+        for _ in range(10):
+            router.record("gemini", 1.0, True)
+            router.record("codex", 3.0, True)
+        started = []
+        calls = {"gemini": lambda chunk: started.append("gemini") or "quick",
+                 "codex": lambda chunk: started.append("codex") or "unused"}
+
+        assert router.consult(calls, hedge=True)[1] == "quick"
+        time.sleep(0.05)
+        assert started == ["gemini"]
+
+    def test_no_hedge_once_streaming(self, router, monkeypatch):
+        """Test a provider already streaming past its p95 is not raced by a second request"""
+        monkeypatch.setattr(advisor_router, 'HEDGE_MIN', 0.05)
+        for _ in range(10):
+            router.record("gemini", 0.05, True)
+            router.record("codex", 0.2, True)
+        started = []
+
+        def streaming(on_chunk):
+            on_chunk("part one ")
+            time.sleep(0.3)
+            return "part one part two"
+
+        shown = []
+        calls = {"gemini": streaming, "codex": lambda chunk: started.append("codex") or "unused"}
+        provider, output, streamed = router.consult(calls, hedge=True, on_chunk=shown.append)
+
+        assert (provider, output, streamed) == ("gemini", "part one part two", True)
+        assert shown == ["part one "]
+        assert started == []
+
+    def test_streamer_failure_falls_back(self, router):
+        """Test a provider that fails after streaming hands over to the next, shown in full"""
+        router.record("gemini", 0.1, True)
+        router.record("codex", 0.2, True)
+
+        def breaks(on_chunk):
+            on_chunk("partial ")
+            return "GEMINI UPLINK ERROR: connection reset"
+
+        shown = []
+        provider, output, streamed = router.consult({"gemini": breaks, "codex": advisor("blueprint")},
+                                                    on_chunk=shown.append)
+        assert (provider, output, streamed) == ("codex", "blueprint", False)
+        assert shown == ["partial "]
+
+    def test_held_answer_survives_timeout(self, router, monkeypatch):
+        """Test a hedge that answered in time is returned when the streaming primary overruns"""
+        monkeypatch.setattr(advisor_router, 'HEDGE_MIN', 0.05)
+        for _ in range(10):
+            router.record("gemini", 0.05, True)
+            router.record("codex", 0.2, True)
+
+        def slow_stream(on_chunk):
+            time.sleep(0.15)
+            on_chunk("part one ")
+            time.sleep(2.0)
+            return "part one part two"
+
+        calls = {"gemini": slow_stream, "codex": advisor("hedged", delay=0.2, chunks=False)}
+        start = time.monotonic()
+        result = router.consult(calls, hedge=True, timeout=0.6, on_chunk=lambda chunk: None)
+
+        assert result == ("codex", "hedged", False)
+        assert time.monotonic() - start < 1.5
+
+    def test_timeout(self, router):
+        """Test the consult gives up at its timeout"""
+        calls = {"gemini": advisor("late", delay=2.0), "codex": advisor("late", delay=2.0)}
+        with pytest.raises(TimeoutError):
+            router.consult(calls, timeout=0.2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,181 @@
+import pytest
+import os
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import advisor_session
+import log_memory
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Workspace with a two-entry memory log, next to (not inside) the cache dir"""
+    workspace = tmp_path / 'workspace'
+    workspace.mkdir()
+    (workspace / 'main.py').write_text('print(1)')
+    monkeypatch.chdir(workspace)
+    monkeypatch.setattr(log_memory, 'ROTATE', 'off')
+    log_memory.log_entry("API endpoint is /api/v2")
+    log_memory.log_entry("Refactored the login form")
+    return workspace
+
+
+def bump_mtime(path):
+    """Move a directory's mtime forward so the change is visible on coarse-grained filesystems"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def turn(session_id, provider="codex", budget=8000, reply="ok"):
+    """One completed advisor turn; returns the context that was sent"""
+    session = advisor_session.open_session(provider, session_id)
+    context = session.context(None, budget)
+    session.record(f"CONTEXT:{context}", reply)
+    return context
+
+
+class TestSessionLifecycle:
+    """Test session ids and state"""
+
+    def test_no_session_without_id(self):
+        """Test stand-alone requests get no session"""
+        assert advisor_session.open_session("codex") is None
+
+    def test_session_from_environment(self, monkeypatch):
+        """Test OUTLAW_SESSION selects the session"""
+        monkeypatch.setenv('OUTLAW_SESSION', 'abc')
+        assert advisor_session.open_session("codex").path.endswith(os.path.join('abc', 'codex.json'))
+
+    def test_new_sessions_are_distinct(self):
+        """Test every new session gets its own id"""
+        assert advisor_session.new_session() != advisor_session.new_session()
+
+    def test_end_session_restores_full_context(self, workspace):
+        """Test a reset session resends everything"""
+        first = turn("s1")
+        advisor_session.end_session("s1")
+        assert turn("s1") == first
+
+
+class TestDeltaContext:
+    """Test only unseen context is sent on later turns"""
+
+    def test_first_turn_is_full(self, workspace):
+        """Test the first turn carries the map and the memory"""
+        context = turn("s1")
+        assert 'main.py' in context
+        assert 'Refactored the login form' in context
+
+    def test_unchanged_context_becomes_reference_lines(self, workspace):
+        """Test a repeat turn references what was already sent"""
+        turn("s1")
+        context = turn("s1")
+
+        assert 'main.py' not in context
+        assert 'Refactored the login form' not in context
+        assert '[SHARED DIRECTORY CONTENT]: unchanged since turn 1.' in context
+        assert 'no new entries (2 already shared' in context
+
+    def test_only_new_memory_entries_are_sent(self, workspace):
+        """Test a new log entry is sent without the old ones"""
+        turn("s1")
+        log_memory.log_entry("Switched the queue to redis")
+        context = turn("s1")
+
+        assert '[SHARED PROJECT MEMORY (New Entries)]' in context
+        assert 'Switched the queue to redis' in context
+        assert '/api/v2' not in context
+        assert '(+2 entries already shared' in context
+
+    def test_changed_directory_is_resent(self, workspace):
+        """Test a new file resends the map"""
+        turn("s1")
+        (workspace / 'billing.py').write_text('')
+        bump_mtime(workspace)
+
+        assert 'billing.py' in turn("s1")
+
+    def test_providers_are_tracked_separately(self, workspace):
+        """Test one provider's turns do not count as sent to another"""
+        turn("s1", provider="codex")
+        assert 'Refactored the login form' in turn("s1", provider="gemini")
+
+    def test_unrecorded_turn_is_not_remembered(self, workspace):
+        """Test a failed request (never recorded) leaves the next turn full"""
+        advisor_session.open_session("codex", "s1").context(None, 8000)
+        assert 'Refactored the login form' in turn("s1")
+
+    def test_trimmed_memory_is_not_marked_sent(self, workspace):
+        """Test entries cut by the packer are sent again later"""
+        for i in range(40):
+            log_memory.log_entry(f"Filler entry number {i} about nothing in particular")
+        trimmed = turn("s1", budget=150)
+        full = turn("s2", budget=100000)
+        cut = [f"number {i} " for i in range(40) if f"number {i} " in full and f"number {i} " not in trimmed]
+
+        context = turn("s1", budget=100000)
+        assert cut
+        assert all(entry in context for entry in cut)
+
+
+class TestHistory:
+    """Test the running conversation"""
+
+    def test_history_pairs(self, workspace):
+        """Test turns come back as role-tagged messages"""
+        turn("s1", reply="first answer")
+        history = advisor_session.open_session("codex", "s1").history("user", "model")
+        assert [role for role, _ in history] == ['user', 'model']
+        assert history[1][1] == 'first answer'
+
+    def test_replay_is_bounded(self, workspace, monkeypatch):
+        """Test only the first turn and the latest turns are replayed, with replies cut short"""
+        monkeypatch.setattr(advisor_session, 'HISTORY_TURNS', 2)
+        monkeypatch.setattr(advisor_session, 'REPLY_TOKENS', 50)
+        for _ in range(6):
+            turn("s1", reply="word " * 1000)
+        session = advisor_session.open_session("codex", "s1")
+
+        assert session.turn == 7
+        assert [t["n"] for t in session.state["turns"]] == [1, 5, 6]
+        assert session.history_tokens() < 1000
+        assert 'Refactored the login form' in session.history()[0][1]
+
+    def test_context_from_dropped_turns_is_resent(self, workspace, monkeypatch):
+        """Test a memory entry sent in a turn no longer replayed is sent again"""
+        monkeypatch.setattr(advisor_session, 'HISTORY_TURNS', 1)
+        turn("s1")
+        log_memory.log_entry("Switched the queue to redis")
+        assert 'Switched the queue to redis' in turn("s1")
+        assert 'Switched the queue to redis' not in turn("s1")
+
+        # Turn 2 has now dropped out of the replay
+        context = turn("s1")
+        assert 'Switched the queue to redis' in context
+        assert '/api/v2' not in context
+
+    def test_context_key_is_full_context(self, workspace):
+        """Test the cache key context is the same whether or not the turn is a delta"""
+        keys = []
+        for _ in range(2):
+            session = advisor_session.open_session("codex", "s1")
+            context = session.context(None, 8000)
+            session.record(context, "ok")
+            keys.append(session.context_key)
+        assert keys[0] == keys[1]
+        assert 'Refactored the login form' in keys[1]
+
+    def test_rollover_when_history_outgrows_budget(self, workspace):
+        """Test an oversized conversation is dropped for a full resend"""
+        turn("s1", reply="word " * 2000)
+        session = advisor_session.open_session("codex", "s1")
+        context = session.context(None, 1000)
+
+        assert session.history() == []
+        assert 'Refactored the login form' in context
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -123,6 +123,25 @@ fi
 # Clean up
 rm -f "$TEMP_TEMPLATE"
 
+# Test 8: Fallback launcher passes a multi-word prompt as one argument
+test_start "Fallback launcher keeps a prompt with spaces whole"
+STUB_DIR=$(mktemp -d)
+# Stub claude: prints each argument after the system prompt on its own line
+printf '#!/bin/bash\nshift 2\nprintf "ARG:%%s\\n" "$@"\n' > "$STUB_DIR/claude"
+chmod +x "$STUB_DIR/claude"
+echo "# Test Agent" > "$TEMP_TEMPLATE"
+
+# A tools dir without persona_registry.py forces the shell fallback
+OUTPUT=$(PATH="$STUB_DIR:$PATH" OUTLAW_TOOLS_DIR="$STUB_DIR" bash "$AGENT_SCRIPT" "test-agent-temp" -p "fix the   login bug" 2>&1)
+if echo "$OUTPUT" | grep -qx "ARG:fix the   login bug" && echo "$OUTPUT" | grep -qx "ARG:-p"; then
+    test_pass
+else
+    test_fail "Prompt was split: $OUTPUT"
+fi
+
+rm -rf "$STUB_DIR"
+rm -f "$TEMP_TEMPLATE"
+
 # Summary
 echo "================================"
 echo "TEST SUMMARY"
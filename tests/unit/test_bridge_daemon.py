@@ -0,0 +1,220 @@
+import pytest
+import os
+import sys
+import socket
+import tempfile
+import threading
+from unittest.mock import Mock, patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import bridge_daemon
+
+skip_if_no_unix_sockets = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets not available")
+
+
+class FakeGemini:
+    """Stand-in for gemini_bridge that prints like the real get_intel"""
+
+    @staticmethod
+    def get_intel(prompt, api_key=None, credentials=None, model_name=None, session=None):
+        print(f"GEMINI SAYS: {prompt} ({model_name})")
+
+
+class FakeCodex:
+    """Stand-in for codex_bridge that prints like the real query_codex"""
+
+    @staticmethod
+    def query_codex(prompt, api_key, model="gpt-4o", client=None, session=None):
+        print(f"CODEX SAYS: {prompt} ({model}, client={client})")
+
+
+@pytest.fixture
+def running_daemon():
+    """Start a BridgeServer with fake bridges on a temporary socket"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'bridge.sock')
+
+        def fake_load(self, api_key, key_file):
+            self._gemini = (FakeGemini, "key", None)
+            self._codex = (FakeCodex, "key", "shared-client")
+
+        with patch.object(bridge_daemon.BridgeServer, '_load_bridges', fake_load):
+            server = bridge_daemon.BridgeServer(path)
+        original_stdout = sys.stdout
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield path
+        finally:
+            server.shutdown()
+            server.server_close()
+            sys.stdout = original_stdout
+
+
+class TestSocketPath:
+    """Test per-workspace socket path resolution"""
+
+    def test_path_is_stable_per_directory(self):
+        """Test same directory maps to the same socket"""
+        with patch.dict(os.environ, {}, clear=True):
+            assert bridge_daemon.socket_path('/work/a') == bridge_daemon.socket_path('/work/a')
+
+    def test_path_differs_between_directories(self):
+        """Test each workspace gets its own daemon"""
+        with patch.dict(os.environ, {}, clear=True):
+            assert bridge_daemon.socket_path('/work/a') != bridge_daemon.socket_path('/work/b')
+
+    def test_env_override(self):
+        """Test OUTLAW_BRIDGE_SOCKET overrides the derived path"""
+        with patch.dict(os.environ, {'OUTLAW_BRIDGE_SOCKET': '/tmp/custom.sock'}):
+            assert bridge_daemon.socket_path('/work/a') == '/tmp/custom.sock'
+
+
+@skip_if_no_unix_sockets
+class TestFraming:
+    """Test length-prefixed JSON framing"""
+
+    def test_frame_round_trip(self):
+        """Test a frame sent on one end is decoded on the other"""
+        left, right = socket.socketpair()
+        with left, right:
+            payload = {"op": "consult", "prompt": "héllo 🚀"}
+            bridge_daemon.send_frame(left, payload)
+            assert bridge_daemon.recv_frame(right) == payload
+
+    def test_oversized_frame_rejected(self):
+        """Test frames above MAX_FRAME are refused"""
+        left, right = socket.socketpair()
+        with left, right:
+            left.sendall(bridge_daemon._HEADER.pack(bridge_daemon.MAX_FRAME + 1))
+            with pytest.raises(ValueError):
+                bridge_daemon.recv_frame(right)
+
+    def test_truncated_frame_raises(self):
+        """Test a peer closing mid-frame raises ConnectionError"""
+        left, right = socket.socketpair()
+        with right:
+            left.sendall(bridge_daemon._HEADER.pack(10) + b'{"a"')
+            left.close()
+            with pytest.raises(ConnectionError):
+                bridge_daemon.recv_frame(right)
+
+
+class TestClientFallback:
+    """Test client behaviour when no daemon is running"""
+
+    def test_consult_returns_none_without_daemon(self):
+        """Test missing socket signals the caller to fall back"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'missing.sock')
+            assert bridge_daemon.consult("gemini", "prompt", path=path) is None
+
+    def test_is_running_false_without_daemon(self):
+        """Test ping fails cleanly without a daemon"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert not bridge_daemon.is_running(os.path.join(tmpdir, 'missing.sock'))
+
+
+@pytest.fixture
+def breaking_daemon(tmp_path):
+    """A daemon that streams one chunk, then sends `final` (or drops the connection when None)"""
+    path = str(tmp_path / 'bridge.sock')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    final = {}
+
+    def serve():
+        conn, _ = listener.accept()
+        with conn:
+            bridge_daemon.recv_frame(conn)
+            bridge_daemon.send_frame(conn, {"chunk": "partial "})
+            if final.get("frame"):
+                bridge_daemon.send_frame(conn, final["frame"])
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        yield path, final
+    finally:
+        thread.join(timeout=5)
+        listener.close()
+
+
+@skip_if_no_unix_sockets
+class TestMidStreamFailure:
+    """Test a consult that fails after output was streamed is not retried as a fallback"""
+
+    def test_dropped_connection_raises(self, breaking_daemon):
+        """Test a connection lost after a chunk raises instead of signalling no daemon"""
+        path, _ = breaking_daemon
+        chunks = []
+        with pytest.raises(bridge_daemon.StreamInterrupted):
+            bridge_daemon.consult("gemini", "stream it", path=path, on_chunk=chunks.append)
+        assert chunks == ["partial "]
+
+    def test_error_response_raises(self, breaking_daemon):
+        """Test an ok: false answer after a chunk raises with the daemon's error"""
+        path, final = breaking_daemon
+        final["frame"] = {"ok": False, "error": "provider crashed"}
+        with pytest.raises(bridge_daemon.StreamInterrupted, match="provider crashed"):
+            bridge_daemon.consult("gemini", "stream it", path=path, on_chunk=lambda chunk: None)
+
+    def test_unstreamed_drop_still_falls_back(self, breaking_daemon):
+        """Test a request that showed nothing still returns None for the subprocess fallback"""
+        path, _ = breaking_daemon
+        assert bridge_daemon.consult("gemini", "quiet", path=path) is None
+
+
+@skip_if_no_unix_sockets
+class TestDaemonRoundTrip:
+    """Test requests served by a live daemon"""
+
+    def test_ping(self, running_daemon):
+        """Test daemon answers ping"""
+        assert bridge_daemon.is_running(running_daemon)
+
+    def test_gemini_consult_captures_output(self, running_daemon):
+        """Test bridge prints are returned to the client, not the daemon console"""
+        output = bridge_daemon.consult("gemini", "scan it", path=running_daemon)
+        assert "GEMINI SAYS: scan it" in output
+
+    def test_codex_consult_reuses_client(self, running_daemon):
+        """Test codex requests use the daemon's long-lived client"""
+        output = bridge_daemon.consult("codex", "write it", path=running_daemon)
+        assert "CODEX SAYS: write it" in output
+        assert "shared-client" in output
+
+    def test_streamed_consult_delivers_chunks(self, running_daemon):
+        """Test streamed requests forward each write before the final frame"""
+        chunks = []
+        output = bridge_daemon.consult("gemini", "stream it", path=running_daemon, on_chunk=chunks.append)
+        assert "GEMINI SAYS: stream it" in "".join(chunks)
+        assert "".join(chunks) == output
+
+    def test_unknown_provider_returns_none(self, running_daemon):
+        """Test unknown providers are reported as failures"""
+        assert bridge_daemon.consult("skynet", "hello", path=running_daemon) is None
+
+    def test_concurrent_consults_do_not_mix_output(self, running_daemon):
+        """Test per-thread stdout capture keeps responses separate"""
+        results = {}
+
+        def worker(n):
+            results[n] = bridge_daemon.consult("gemini", f"task {n}", path=running_daemon)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for i in range(8):
+            assert f"task {i} " in results[i]
+            assert results[i].count("GEMINI SAYS") == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,72 @@
+import pytest
+import os
+import sys
+import json
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import cache_store
+
+
+class TestCacheDir:
+    """Test cache paths"""
+
+    def test_env_override(self, tmp_path, monkeypatch):
+        """Test OUTLAW_CACHE_DIR is read on every call"""
+        monkeypatch.setenv('OUTLAW_CACHE_DIR', str(tmp_path))
+        assert cache_store.cache_dir("code_index", "x.sqlite") == str(tmp_path / "code_index" / "x.sqlite")
+
+    def test_digest_is_per_directory(self, tmp_path):
+        """Test the same directory always maps to the same name, and another to a different one"""
+        assert cache_store.path_digest(str(tmp_path)) == cache_store.path_digest(str(tmp_path) + os.sep)
+        assert cache_store.path_digest(str(tmp_path)) != cache_store.path_digest(str(tmp_path / "other"))
+
+
+class TestOpenDb:
+    """Test the shared SQLite helper"""
+
+    def test_commits_on_success(self, tmp_path):
+        """Test a clean exit commits and the schema is created once"""
+        path = str(tmp_path / "db" / "t.sqlite")
+        schema = "CREATE TABLE IF NOT EXISTS t (v INTEGER);"
+        with cache_store.open_db(path, schema) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+        with cache_store.open_db(path, schema) as conn:
+            assert conn.execute("SELECT v FROM t").fetchall() == [(1,)]
+
+    def test_rolls_back_on_error(self, tmp_path):
+        """Test an exception inside the block discards its writes"""
+        path = str(tmp_path / "t.sqlite")
+        schema = "CREATE TABLE IF NOT EXISTS t (v INTEGER);"
+        with pytest.raises(ValueError):
+            with cache_store.open_db(path, schema) as conn:
+                conn.execute("INSERT INTO t VALUES (1)")
+                raise ValueError("abort")
+        with cache_store.open_db(path, schema) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+
+
+class TestWriteJson:
+    """Test atomic JSON replacement"""
+
+    def test_replaces_file(self, tmp_path):
+        """Test the new content lands and no temp file is left"""
+        path = tmp_path / "state" / "s.json"
+        cache_store.write_json(str(path), {"a": 1})
+        cache_store.write_json(str(path), {"a": 2}, indent=2)
+        assert json.loads(path.read_text()) == {"a": 2}
+        assert os.listdir(path.parent) == ["s.json"]
+
+    def test_failed_write_keeps_old_file(self, tmp_path):
+        """Test a failed dump leaves the previous file and no temp file"""
+        path = tmp_path / "s.json"
+        cache_store.write_json(str(path), {"a": 1})
+        with pytest.raises(TypeError):
+            cache_store.write_json(str(path), {"a": object()})
+        assert json.loads(path.read_text()) == {"a": 1}
+        assert os.listdir(tmp_path) == ["s.json"]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,195 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch, PropertyMock
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import claude_session
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="stub executable uses a shebang")
+
+STUB = '''
+import json, os, sys, time
+
+args = sys.argv[1:]
+assert args[args.index("--input-format") + 1] == "stream-json"
+assert args[args.index("--output-format") + 1] == "stream-json"
+persona = None
+if "--system-prompt" in args:
+    persona = open(args[args.index("--system-prompt") + 1][1:]).read()
+
+def emit(event):
+    print(json.dumps(event), flush=True)
+
+emit({"type": "system", "subtype": "init", "pid": os.getpid()})
+history = []
+for line in sys.stdin:
+    text = json.loads(line)["message"]["content"][0]["text"]
+    if text == "CRASH":
+        sys.exit(3)
+    if text == "CRASH_ONCE" and not os.path.exists(os.environ["STUB_MARKER"]):
+        open(os.environ["STUB_MARKER"], "w").close()
+        sys.exit(3)
+    if text == "HANG":
+        time.sleep(60)
+    if text == "FAIL":
+        emit({"type": "result", "subtype": "error_during_execution", "is_error": True, "result": "boom"})
+        continue
+    history.append(text)
+    reply = f"pid={os.getpid()} persona={persona} history={'|'.join(history)}"
+    print("warning: not part of the protocol", flush=True)
+    emit({"type": "assistant", "message": {"role": "assistant", "content": [{"type": "text", "text": reply}]}})
+    emit({"type": "result", "subtype": "success", "is_error": False, "result": reply})
+'''
+
+
+@pytest.fixture
+def stub_exe(tmp_path, monkeypatch):
+    """Executable that speaks the Claude CLI's stream-json protocol"""
+    script = tmp_path / "claude"
+    script.write_text(f"#!{sys.executable}\n{STUB}")
+    script.chmod(0o755)
+    monkeypatch.setenv('STUB_MARKER', str(tmp_path / 'crashed'))
+    return str(script)
+
+
+@pytest.fixture
+def session(stub_exe):
+    """A session on the stub, closed after the test"""
+    session = claude_session.ClaudeSession("# OVERWATCH", exe=stub_exe)
+    yield session
+    session.close()
+
+
+def field(reply, name):
+    """One key=value field of a stub reply"""
+    return reply.split(f"{name}=")[1].split(" ")[0]
+
+
+class TestTurns:
+    """Test turns on one persistent process"""
+
+    def test_process_reused_across_turns(self, session):
+        """Test every turn goes to the same process, which keeps the conversation"""
+        first = session.send("scan the repo")
+        second = session.send("now fix it")
+
+        assert field(first, 'pid') == field(second, 'pid')
+        assert second.endswith("history=scan the repo|now fix it")
+        assert session.restarts == 0
+
+    def test_persona_passed_as_system_prompt(self, session):
+        """Test the persona reaches the process through --system-prompt @file"""
+        assert "persona=# OVERWATCH" in session.send("hello")
+
+    def test_streams_assistant_text(self, session):
+        """Test assistant text is handed to on_chunk as it arrives"""
+        chunks = []
+        reply = session.send("hello", on_chunk=chunks.append)
+        assert chunks == [reply]
+
+    def test_prompt_is_data_not_shell(self, session):
+        """Test prompts travel as JSON on stdin, never through a shell"""
+        assert "history=$(whoami); rm -rf /" in session.send("$(whoami); rm -rf /")
+
+
+class TestRestarts:
+    """Test automatic restarts"""
+
+    def test_persona_switch_restarts(self, session):
+        """Test a new persona gets a new process, the same persona keeps the old one"""
+        first = session.send("hello")
+        session.set_persona("# OVERWATCH")
+        assert field(session.send("again"), 'pid') == field(first, 'pid')
+
+        session.set_persona("# AUDITOR")
+        reply = session.send("hello")
+        assert field(reply, 'pid') != field(first, 'pid')
+        assert "persona=# AUDITOR" in reply
+        assert session.restarts == 1
+
+    def test_dead_process_restarted_on_next_turn(self, session):
+        """Test a process that died between turns is replaced"""
+        first = session.send("hello")
+        session.process.kill()
+        session.process.wait()
+
+        assert field(session.send("hello"), 'pid') != field(first, 'pid')
+
+    def test_crash_mid_turn_is_not_replayed(self, session):
+        """Test a turn interrupted by a crash fails, and only the next turn gets a fresh process"""
+        first = session.send("hello")
+        with pytest.raises(claude_session.SessionError):
+            session.send("CRASH_ONCE")
+        assert not session.alive
+
+        reply = session.send("next")
+        assert field(reply, 'pid') != field(first, 'pid')
+        assert reply.endswith("history=next")
+
+    def test_undelivered_turn_is_retried(self, session):
+        """Test a turn written to a process that already died is sent to a fresh one"""
+        session.send("hello")
+        session.process.kill()
+        session.process.wait()
+        with patch.object(type(session), 'alive', new_callable=PropertyMock, side_effect=[True, False]):
+            session.process.stdin.close()
+            reply = session.send("again")
+        assert reply.endswith("history=again")
+
+    def test_repeated_crash_raises(self, session):
+        """Test a turn that keeps crashing the process is reported"""
+        with pytest.raises(claude_session.SessionError):
+            session.send("CRASH")
+        assert not session.alive
+
+
+class TestErrors:
+    """Test failed turns"""
+
+    def test_error_result_raises_and_keeps_process(self, session):
+        """Test an error result is raised while the process stays up"""
+        pid = field(session.send("hello"), 'pid')
+        with pytest.raises(claude_session.SessionError, match="boom"):
+            session.send("FAIL")
+        assert field(session.send("again"), 'pid') == pid
+
+    def test_timeout_kills_turn(self, session):
+        """Test a stalled turn times out and its process is not reused"""
+        session.send("hello")
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            session.send("HANG", timeout=0.5)
+        assert time.monotonic() - start < 5
+        assert not session.alive
+
+    def test_missing_executable(self):
+        """Test a missing CLI raises instead of hanging"""
+        session = claude_session.ClaudeSession("# P", exe="/nonexistent/claude")
+        with pytest.raises(OSError):
+            session.send("hello")
+        assert session._system == (None, None)
+
+
+class TestClose:
+    """Test shutdown"""
+
+    def test_close_ends_process_and_frees_persona(self, session):
+        """Test close stops the process and releases the persona file"""
+        session.send("hello")
+        process, (path, fd) = session.process, session._system
+        session.close()
+
+        assert process.poll() is not None
+        if fd is not None:
+            with pytest.raises(OSError):
+                os.fstat(fd)
+        else:
+            assert not os.path.exists(path)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
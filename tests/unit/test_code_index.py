@@ -0,0 +1,203 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import Mock, patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import code_index
+
+
+RETRY_SOURCE = '''import time
+
+
+def compute_backoff(attempt, base=0.1):
+    """Exponential backoff for uplink retries"""
+    return base * (2 ** attempt)
+
+
+def call_with_retry(fn, attempts=5):
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except IOError:
+            time.sleep(compute_backoff(attempt))
+'''
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Small workspace with a few source files"""
+    root = tmp_path / 'repo'
+    (root / 'src').mkdir(parents=True)
+    (root / 'src' / 'retry.py').write_text(RETRY_SOURCE)
+    (root / 'src' / 'ui.js').write_text('function renderButton(label) {\n  return `<button>${label}</button>`;\n}\n')
+    (root / 'notes.txt').write_text('compute_backoff is mentioned here but .txt is not source\n')
+    return root
+
+
+def bump_mtime(path):
+    """Move a file's mtime forward so the change is visible on coarse-grained filesystems"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+class TestTrigrams:
+    """Test trigram extraction"""
+
+    def test_identifier_trigrams(self):
+        """Test trigrams come from case-folded identifier runs only"""
+        assert code_index.trigrams("Foo_bar") == {'foo', 'oo_', 'o_b', '_ba', 'bar'}
+
+    def test_short_words_ignored(self):
+        """Test words under three characters contribute nothing"""
+        assert code_index.trigrams("a = b + 12") == set()
+
+    def test_query_terms_drop_stopwords(self):
+        """Test question words are not searched for"""
+        assert code_index.query_terms("Where is the compute_backoff for uplink?") == ['compute_backoff', 'uplink']
+
+
+class TestIndexUpdates:
+    """Test incremental index maintenance"""
+
+    def test_indexes_source_files_only(self, repo):
+        """Test only recognised source extensions are indexed"""
+        assert code_index.update(str(repo)) == 2
+
+    def test_sensitive_files_not_indexed(self, repo):
+        """Test config formats, memory logs and secret-looking names never reach the index"""
+        for name in ('settings.yaml', 'config.json', 'app.ini', 'PROJECT_MEMORY.md',
+                     'PROJECT_MEMORY.0001.md', 'secrets.py', 'aws_credentials.sh'):
+            (repo / name).write_text('compute_backoff = "hunter2"\n')
+        (repo / 'README.md').write_text('compute_backoff doubles each retry\n')
+
+        code_index.update(str(repo))
+        paths = {path for _, path, _, _, _ in code_index.search("compute_backoff", str(repo), limit=20)}
+        assert paths == {'src/retry.py'}
+
+    def test_unchanged_files_not_reread(self, repo):
+        """Test a second update reads nothing"""
+        code_index.update(str(repo))
+        with patch('code_index._read_source', wraps=code_index._read_source) as mock_read:
+            assert code_index.update(str(repo)) == 0
+        assert mock_read.call_count == 0
+
+    def test_edited_file_is_reindexed(self, repo):
+        """Test an in-place edit is picked up by mtime"""
+        code_index.update(str(repo))
+        path = repo / 'src' / 'ui.js'
+        path.write_text('function renderTooltip(text) {}\n')
+        bump_mtime(path)
+
+        assert code_index.update(str(repo)) == 1
+        assert code_index.search("renderTooltip", str(repo))
+        assert not code_index.search("renderButton", str(repo))
+
+    def test_deleted_file_is_forgotten(self, repo):
+        """Test removed files drop out of results"""
+        code_index.update(str(repo))
+        os.remove(repo / 'src' / 'retry.py')
+        bump_mtime(repo / 'src')
+
+        code_index.update(str(repo))
+        assert not code_index.search("compute_backoff", str(repo))
+
+    def test_time_budget_spreads_first_build(self, repo):
+        """Test an exhausted budget leaves the rest for the next call"""
+        assert code_index.update(str(repo), time_budget=-1) == 0
+        assert code_index.update(str(repo), time_budget=10) == 2
+
+    def test_binary_files_skipped(self, repo):
+        """Test files with NUL bytes are never matched"""
+        (repo / 'blob.json').write_bytes(b'compute_backoff\0\0\0')
+        code_index.update(str(repo))
+        assert all(path != 'blob.json' for _, path, _, _, _ in code_index.search("compute_backoff", str(repo)))
+
+
+class TestSearch:
+    """Test snippet retrieval"""
+
+    def test_snippet_around_match(self, repo):
+        """Test the snippet contains the matching code with its line range"""
+        code_index.update(str(repo))
+        score, path, first, last, text = code_index.search("how is compute_backoff calculated", str(repo))[0]
+
+        assert path == 'src/retry.py'
+        assert 'def compute_backoff' in text
+        assert first >= 1 and last >= first
+
+    def test_substring_matches(self, repo):
+        """Test partial identifiers match through trigrams"""
+        code_index.update(str(repo))
+        assert code_index.search("backoff", str(repo))[0][1] == 'src/retry.py'
+
+    def test_trigram_false_positive_is_dropped(self, repo):
+        """Test candidates are confirmed against file contents"""
+        (repo / 'src' / 'decoy.py').write_text('ack = "back"\noff = "kof"\n')
+        code_index.update(str(repo))
+        paths = [path for _, path, _, _, _ in code_index.search("backoff", str(repo))]
+        assert 'src/decoy.py' not in paths
+
+    def test_no_match(self, repo):
+        """Test unknown terms return nothing"""
+        code_index.update(str(repo))
+        assert code_index.search("kubernetes", str(repo)) == []
+
+
+class TestRelevantSnippets:
+    """Test budgeted snippets for advisor prompts"""
+
+    def test_headed_snippets(self, repo):
+        """Test snippets are headed with path and line range"""
+        code_index.update(str(repo))
+        text = code_index.relevant_snippets("fix call_with_retry", str(repo))
+        assert text.startswith('--- src/retry.py:')
+        assert 'def call_with_retry' in text
+
+    def test_respects_token_budget(self, repo):
+        """Test snippets that would exceed the budget are left out"""
+        code_index.update(str(repo))
+        assert code_index.relevant_snippets("call_with_retry", str(repo), budget=5) == ""
+
+    def test_standalone_prompt_catches_up(self, repo):
+        """Test a process with no watcher indexes new and edited files before searching"""
+        assert 'def call_with_retry' in code_index.relevant_snippets("call_with_retry", str(repo))
+
+        (repo / 'src' / 'retry.py').write_text('def call_with_jitter():\n    pass\n')
+        bump_mtime(repo / 'src' / 'retry.py')
+        assert 'call_with_jitter' in code_index.relevant_snippets("call_with_jitter", str(repo))
+
+    def test_unfinished_update_is_reported(self, repo, monkeypatch, capsys):
+        """Test files left over by the time budget are reported in verbose mode"""
+        monkeypatch.setenv('OUTLAW_VERBOSE', '1')
+        assert code_index.update(str(repo), time_budget=-1) == 0
+        assert "2 files not indexed yet" in capsys.readouterr().err
+
+    def test_watched_prompt_only_searches(self, repo, monkeypatch):
+        """Test a process with a background updater does no indexing work on the prompt path"""
+        watcher = Mock(is_alive=Mock(return_value=True))
+        monkeypatch.setitem(code_index._watchers, str(repo), (watcher, None))
+        with patch('code_index.update') as mock_update:
+            code_index.relevant_snippets("call_with_retry", str(repo))
+        mock_update.assert_not_called()
+
+    def test_watch_keeps_index_current(self, repo):
+        """Test the background updater picks up new files"""
+        code_index.watch(str(repo), interval=0.05)
+        try:
+            (repo / 'src' / 'queue.py').write_text('def drain_queue():\n    pass\n')
+            bump_mtime(repo / 'src')
+
+            deadline = time.monotonic() + 5
+            while 'drain_queue' not in code_index.relevant_snippets("drain_queue", str(repo)):
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+        finally:
+            code_index.unwatch(str(repo))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -89,14 +89,145 @@ class TestQueryCodex:
             with patch('builtins.print') as mock_print:
                 # Create a mock OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices = [MagicMock()]
-                mock_response.choices[0].message.content = "Code response"
-                mock_client.chat.completions.create.return_value = mock_response
+                chunks = []
+                for text in ["Code ", "response", None]:
+                    chunk = MagicMock()
+                    chunk.choices = [MagicMock()]
+                    chunk.choices[0].delta.content = text
+                    chunks.append(chunk)
+                mock_client.chat.completions.create.return_value = iter(chunks)
 
                 with patch('codex_bridge.OpenAI', return_value=mock_client):
                     codex_bridge.query_codex("write a function", "test_key", model="gpt-4o")
-                    mock_print.assert_called_with("Code response")
+                    printed = "".join(str(c[0][0]) for c in mock_print.call_args_list if c[0])
+                    assert printed == "Code response"
+                    assert mock_client.chat.completions.create.call_args[1]['stream'] is True
+
+    @skip_if_no_openai
+    def test_shared_client_is_reused(self):
+        """Test a caller-provided client is used instead of building a new one"""
+        with patch('codex_bridge.get_context', return_value="Test context"):
+            mock_client = MagicMock()
+            mock_client.chat.completions.create.return_value = iter([])
+
+            with patch('codex_bridge.OpenAI') as mock_openai:
+                with patch('builtins.print'):
+                    codex_bridge.query_codex("task", "test_key", client=mock_client)
+                mock_openai.assert_not_called()
+                mock_client.chat.completions.create.assert_called_once()
+
+    @skip_if_no_openai
+    def test_cache_hit_skips_uplink(self):
+        """Test a repeated task is answered from the cache"""
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = "Cached code"
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = iter([chunk])
+
+        with patch('codex_bridge.get_context', return_value="Test context"):
+            with patch('builtins.print'):
+                codex_bridge.query_codex("same task", "test_key", client=mock_client)
+            with patch('builtins.print') as mock_print:
+                codex_bridge.query_codex("same task", "test_key", client=mock_client)
+
+        assert mock_client.chat.completions.create.call_count == 1
+        mock_print.assert_called_with("Cached code")
+
+    @skip_if_no_openai
+    def test_usage_and_errors_counted(self):
+        """Test the final usage chunk is counted as tokens and an uplink failure as an error"""
+        content = MagicMock()
+        content.choices = [MagicMock()]
+        content.choices[0].delta.content = "code"
+        content.usage = None
+        usage = MagicMock()
+        usage.choices = []
+        usage.usage = MagicMock(prompt_tokens=1200, completion_tokens=80)
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = iter([content, usage])
+
+        codex_bridge.metrics.reset()
+        with patch('codex_bridge.get_context', return_value="Test context"):
+            with patch('builtins.print'):
+                codex_bridge.query_codex("metered task", "test_key", client=mock_client, use_cache=False)
+                mock_client.chat.completions.create.side_effect = ValueError("bad request")
+                codex_bridge.query_codex("metered task", "test_key", client=mock_client, use_cache=False)
+
+        metrics = codex_bridge.metrics
+        assert mock_client.chat.completions.create.call_args[1]['stream_options'] == {"include_usage": True}
+        assert metrics.TOKENS.value(provider="codex", direction="in") == 1200
+        assert metrics.TOKENS.value(provider="codex", direction="out") == 80
+        assert metrics.ERRORS.value(component="codex", kind="ValueError") == 1
+
+    @skip_if_no_openai
+    def test_rate_limit_is_retried(self, monkeypatch):
+        """Test a 429 is waited out and retried instead of printed as an uplink error"""
+        class RateLimitError(Exception):
+            status_code = 429
+            response = MagicMock(headers={"retry-after-ms": "50"})
+
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = "Recovered"
+        chunk.usage = None
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = [RateLimitError("slow down"), iter([chunk])]
+
+        with patch('codex_bridge.get_context', return_value="Test context"):
+            with patch('builtins.print') as mock_print:
+                codex_bridge.query_codex("busy task", "test_key", client=mock_client, use_cache=False)
+
+        # The retry notice goes to stderr; stdout carries only the answer
+        printed = "".join(str(c[0][0]) for c in mock_print.call_args_list if c[0] and 'file' not in c[1])
+        assert printed == "Recovered"
+        assert mock_client.chat.completions.create.call_count == 2
+
+    @skip_if_no_openai
+    def test_client_leaves_retries_to_rate_limiter(self):
+        """Test the SDK's own retries are off so they cannot bypass the shared quota"""
+        with patch('codex_bridge.OpenAI') as mock_openai:
+            codex_bridge.make_client("key")
+        assert mock_openai.call_args[1]['max_retries'] == 0
+
+    @skip_if_no_openai
+    def test_session_sends_earlier_turns(self, tmp_path, monkeypatch):
+        """Test a session replays its conversation and only sends new context"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'main.py').write_text('')
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = "Answer"
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = lambda **kwargs: iter([chunk])
+
+        with patch('builtins.print'):
+            codex_bridge.query_codex("first task", "test_key", client=mock_client, session="s1")
+            codex_bridge.query_codex("second task", "test_key", client=mock_client, session="s1")
+
+        messages = mock_client.chat.completions.create.call_args[1]['messages']
+        assert [m['role'] for m in messages] == ['system', 'user', 'assistant', 'user']
+        assert 'main.py' in messages[1]['content']
+        assert messages[2]['content'] == "Answer"
+        assert 'unchanged since turn 1' in messages[3]['content']
+        assert 'TASK: second task' in messages[3]['content']
+
+    @skip_if_no_openai
+    def test_session_repeat_hits_cache(self, tmp_path, monkeypatch):
+        """Test a repeated task mid-session is answered from the cache"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'main.py').write_text('')
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = "Answer"
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = lambda **kwargs: iter([chunk])
+
+        with patch('builtins.print'):
+            for _ in range(3):
+                codex_bridge.query_codex("same task", "test_key", client=mock_client, session="s1")
+
+        assert mock_client.chat.completions.create.call_count == 1
 
     @skip_if_no_openai
     def test_api_error_handling(self):
@@ -142,23 +273,37 @@ class TestQueryCodex:
 class TestGetContext:
     """Test context gathering (similar to gemini_bridge)"""
 
-    @patch('os.listdir')
-    def test_directory_listing(self, mock_listdir):
+    def test_directory_listing(self, tmp_path, monkeypatch):
         """Test directory listing in context"""
-        mock_listdir.return_value = ['file1.py', 'file2.py']
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'file1.py').write_text('pass')
+        (tmp_path / 'file2.py').write_text('pass')
         context = codex_bridge.get_context()
 
         assert '[SHARED DIRECTORY CONTENT]' in context
         assert 'file1.py' in context
 
-    @patch('os.path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data='Memory content')
-    def test_memory_reading(self, mock_file, mock_exists):
+    def test_memory_reading(self, tmp_path, monkeypatch):
         """Test PROJECT_MEMORY.md reading"""
-        mock_exists.return_value = True
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'PROJECT_MEMORY.md').write_text('Memory content', encoding='utf-8')
         context = codex_bridge.get_context()
 
         assert '[SHARED PROJECT MEMORY' in context
+        assert 'Memory content' in context
+
+    def test_memory_ranked_by_prompt(self, tmp_path, monkeypatch):
+        """Test a prompt selects relevant entries from the memory index"""
+        monkeypatch.chdir(tmp_path)
+        import log_memory
+        log_memory.log_entry("Database is postgres 15")
+        for i in range(40):
+            log_memory.log_entry(f"routine status update {i} " + "." * 80)
+
+        context = codex_bridge.get_context("migrate the postgres schema")
+
+        assert '[SHARED PROJECT MEMORY (Relevant Entries)]' in context
+        assert 'postgres 15' in context
 
 
 class TestModelSelection:
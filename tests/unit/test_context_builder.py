@@ -0,0 +1,155 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import context_builder
+import log_memory
+import memory_reader
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Workspace with a two-entry memory log, next to (not inside) the cache dir"""
+    workspace = tmp_path / 'workspace'
+    workspace.mkdir()
+    monkeypatch.chdir(workspace)
+    monkeypatch.setattr(log_memory, 'ROTATE', 'off')
+    log_memory.log_entry("API endpoint is /api/v2")
+    log_memory.log_entry("Refactored the login form")
+    return workspace
+
+
+def bump_mtime(path):
+    """Move a file's mtime forward so the change is visible on coarse-grained filesystems"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+class TestContextContents:
+    """Test the assembled context block"""
+
+    def test_lists_directory_and_memory(self, workspace):
+        """Test both sections are present"""
+        (workspace / 'main.py').write_text('print(1)')
+        context = context_builder.get_context()
+
+        assert '[SHARED DIRECTORY CONTENT]' in context
+        assert 'main.py' in context
+        assert '[SHARED PROJECT MEMORY (Recent Activity)]' in context
+
+    def test_prompt_selects_relevant_memory(self, workspace):
+        """Test a prompt routes memory through the relevance index"""
+        context = context_builder.get_context("which api endpoint?")
+        assert '[SHARED PROJECT MEMORY (Relevant Entries)]' in context
+        assert '/api/v2' in context
+
+    def test_no_memory_file(self, tmp_path, monkeypatch):
+        """Test a workspace without a log only gets the listing"""
+        monkeypatch.chdir(tmp_path)
+        assert '[SHARED PROJECT MEMORY' not in context_builder.get_context()
+
+
+    def test_prompt_attaches_relevant_code(self, workspace):
+        """Test a prompt pulls matching source snippets into context"""
+        (workspace / 'billing.py').write_text('def apply_discount(total, pct):\n    return total * (1 - pct)\n')
+        context_builder.code_index.update(str(workspace))
+        context = context_builder.get_context("apply_discount rounds wrong")
+
+        assert '[RELEVANT CODE]' in context
+        assert '--- billing.py:1-2' in context
+
+    def test_code_index_can_be_disabled(self, workspace, monkeypatch):
+        """Test OUTLAW_CODE_INDEX=0 leaves code out of context"""
+        monkeypatch.setenv('OUTLAW_CODE_INDEX', '0')
+        (workspace / 'billing.py').write_text('def apply_discount(total, pct):\n    pass\n')
+        assert '[RELEVANT CODE]' not in context_builder.get_context("apply_discount")
+
+
+class TestBudget:
+    """Test packing the context into a token budget"""
+
+    def test_budget_trims_directory_before_memory(self, workspace):
+        """Test a tight budget cuts the workspace map and keeps the memory"""
+        for i in range(200):
+            (workspace / f'module_{i}.py').write_text('')
+        report = []
+        context = context_builder.get_context(budget=120, report=report)
+
+        rows = {name: (before, after) for name, before, after in report}
+        assert rows['directory'][1] < rows['directory'][0]
+        assert rows['memory'][0] == rows['memory'][1]
+        assert 'Refactored the login form' in context
+
+    def test_no_budget_is_unpacked(self, workspace):
+        """Test callers without a budget get the full context"""
+        report = []
+        assert context_builder.get_context(report=report) == context_builder.get_context(budget=10**6)
+        assert report == []
+
+
+class TestCaching:
+    """Test repeated turns against an unchanged workspace skip filesystem work"""
+
+    def test_unchanged_directory_is_not_rescanned(self, workspace):
+        """Test the workspace map is served from cache while the tree is unchanged"""
+        with patch('os.scandir', wraps=os.scandir) as mock_scandir:
+            first = context_builder.get_context()
+            cold_scans = mock_scandir.call_count
+            second = context_builder.get_context()
+
+        assert first == second
+        assert cold_scans > 0
+        assert mock_scandir.call_count == cold_scans
+
+    def test_new_file_invalidates_listing(self, workspace):
+        """Test adding a file rebuilds the listing"""
+        context_builder.get_context()
+        (workspace / 'new_module.py').write_text('')
+        bump_mtime(workspace)
+
+        assert 'new_module.py' in context_builder.get_context()
+
+    def test_unchanged_memory_is_not_reread(self, workspace):
+        """Test the memory tail is served from cache while the log is unchanged"""
+        with patch('memory_reader.read_tail', wraps=memory_reader.read_tail) as mock_tail:
+            context_builder.get_context()
+            context_builder.get_context()
+
+        assert mock_tail.call_count == 1
+
+    def test_append_invalidates_memory(self, workspace):
+        """Test a new log entry is visible on the next turn"""
+        context_builder.get_context()
+        log_memory.log_entry("Switched the queue to redis")
+
+        assert 'redis' in context_builder.get_context()
+
+    def test_memory_cached_per_prompt(self, workspace):
+        """Test relevance-ranked memory is cached separately for each prompt"""
+        with patch('memory_index.relevant_context', wraps=context_builder.memory_index.relevant_context) as mock_rank:
+            context_builder.get_context("api endpoint")
+            context_builder.get_context("login form")
+            context_builder.get_context("api endpoint")
+
+        assert mock_rank.call_count == 2
+
+    def test_errors_are_not_cached(self, workspace):
+        """Test a failed memory read is retried on the next turn"""
+        with patch('memory_reader.read_tail', side_effect=OSError("disk gone")):
+            assert '[MEMORY READ ERROR]' in context_builder.get_context()
+        assert '[MEMORY READ ERROR]' not in context_builder.get_context()
+
+    def test_cache_is_bounded(self, workspace, monkeypatch):
+        """Test the oldest sections are evicted past MAX_CACHED"""
+        monkeypatch.setattr(context_builder, 'MAX_CACHED', 3)
+        for i in range(10):
+            context_builder.get_context(f"query {i}")
+        assert len(context_builder._cache) == 3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
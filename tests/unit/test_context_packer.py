@@ -0,0 +1,167 @@
+import pytest
+import os
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import context_packer
+from context_packer import Section, REQUIRED, ADVICE, MEMORY, CODE, DIRECTORY
+
+
+def lines(prefix, count):
+    """Numbered lines of filler text"""
+    return "".join(f"{prefix} line {i} with some filler words\n" for i in range(count))
+
+
+class TestEstimateTokens:
+    """Test the offline token estimate"""
+
+    def test_empty(self):
+        """Test empty text costs nothing"""
+        assert context_packer.estimate_tokens("") == 0
+
+    def test_words_digits_and_symbols(self):
+        """Test words, digit runs and punctuation are counted separately"""
+        assert context_packer.estimate_tokens("hello") == 2
+        assert context_packer.estimate_tokens("123456") == 2
+        assert context_packer.estimate_tokens("a.b()") == 5
+
+    def test_grows_with_length(self):
+        """Test longer text never estimates smaller"""
+        short = context_packer.estimate_tokens(lines("x", 10))
+        assert context_packer.estimate_tokens(lines("x", 20)) > short
+
+
+class TestBudgetFor:
+    """Test per-model budgets"""
+
+    def test_model_prefixes(self):
+        """Test the first matching prefix wins"""
+        assert context_packer.budget_for("gpt-4o-mini") == 16000
+        assert context_packer.budget_for("gpt-4-turbo") == 6000
+        assert context_packer.budget_for("gemini-3-pro") == 24000
+
+    def test_unknown_model(self):
+        """Test unknown models get the default"""
+        assert context_packer.budget_for("llama") == context_packer.DEFAULT_BUDGET
+        assert context_packer.budget_for(None) == context_packer.DEFAULT_BUDGET
+
+    def test_env_override(self, monkeypatch):
+        """Test OUTLAW_CONTEXT_BUDGET overrides every model"""
+        monkeypatch.setenv('OUTLAW_CONTEXT_BUDGET', '500')
+        assert context_packer.budget_for("gpt-4o") == 500
+
+
+class TestTruncate:
+    """Test cutting a section down to size"""
+
+    def test_fits_unchanged(self):
+        """Test text within budget is returned as-is"""
+        assert context_packer.truncate("short text", 100) == "short text"
+
+    def test_keep_head(self):
+        """Test head mode keeps the start and marks the cut"""
+        text = context_packer.truncate(lines("row", 100), 80)
+        assert text.startswith("row line 0 ")
+        assert "tokens trimmed ...]" in text
+        assert context_packer.estimate_tokens(text) <= 80
+
+    def test_keep_tail(self):
+        """Test tail mode keeps the most recent lines"""
+        text = context_packer.truncate(lines("row", 100), 80, keep="tail")
+        assert text.startswith("[... ")
+        assert text.endswith("row line 99 with some filler words\n")
+        assert "row line 0 " not in text
+
+    def test_cuts_on_line_boundary(self):
+        """Test the kept part ends on a whole line"""
+        text = context_packer.truncate(lines("row", 100), 80)
+        assert text.split("\n[...")[0].endswith("filler words")
+
+    def test_no_room(self):
+        """Test a budget smaller than the marker drops the text"""
+        assert context_packer.truncate(lines("row", 100), 3) == ""
+
+
+class TestPack:
+    """Test priority-ordered packing"""
+
+    def sections(self):
+        return [
+            Section("request", "REQUEST: fix the build"),
+            Section("directory", lines("dir", 50), DIRECTORY, "head", "\n[DIR]:\n"),
+            Section("memory", lines("mem", 50), MEMORY, "tail", "\n[MEM]:\n"),
+            Section("code", lines("code", 50), CODE, "head", "\n[CODE]:\n"),
+        ]
+
+    def test_within_budget_untouched(self):
+        """Test nothing is trimmed when everything fits"""
+        packed, report = context_packer.pack(self.sections(), 100000)
+        assert packed == self.sections()
+        assert all(before == after for _, before, after in report)
+
+    def test_lowest_priority_trimmed_first(self):
+        """Test the directory map gives way before memory and code"""
+        sections = self.sections()
+        total = sum(context_packer.estimate_tokens(context_packer.render(s)) for s in sections)
+        packed, report = context_packer.pack(sections, total - 100)
+
+        rows = {name: (before, after) for name, before, after in report}
+        assert rows["directory"][1] < rows["directory"][0]
+        assert rows["memory"][0] == rows["memory"][1]
+        assert rows["code"][0] == rows["code"][1]
+        assert context_packer.used(report) <= total - 100
+
+    def test_drops_sections_that_cannot_fit(self):
+        """Test squeezed-out sections are dropped, and the report says so"""
+        packed, report = context_packer.pack(self.sections(), 600)
+        names = [s.name for s in packed]
+        assert "directory" not in names
+        assert ("directory", report[1][1], 0) == report[1]
+        assert context_packer.used(report) <= 600
+
+    def test_required_never_trimmed(self):
+        """Test REQUIRED sections survive even an impossible budget"""
+        packed, _ = context_packer.pack(self.sections(), 1)
+        assert packed == [Section("request", "REQUEST: fix the build")]
+
+    def test_equal_priorities_share_proportionally(self):
+        """Test sections of the same priority give up tokens in proportion to size"""
+        sections = [Section("a", lines("a", 100), ADVICE), Section("b", lines("b", 50), ADVICE)]
+        _, report = context_packer.pack(sections, 600)
+        (_, _, a), (_, _, b) = report
+        assert a > b > 0
+
+    def test_order_preserved(self):
+        """Test packed sections keep their prompt order"""
+        packed, _ = context_packer.pack(self.sections(), 1500)
+        order = [s.name for s in self.sections()]
+        assert [s.name for s in packed] == [name for name in order if name in {s.name for s in packed}]
+
+
+class TestReport:
+    """Test verbose size reports"""
+
+    def test_format(self):
+        """Test trimmed sections show before->after"""
+        report = context_packer.measure(system="be brief") + [("memory", 900, 400)]
+        text = context_packer.format_report("codex/gpt-4o", report, 16000)
+        assert text.startswith("[CONTEXT codex/gpt-4o] 403/16000 tokens | system 3")
+        assert "memory 900->400" in text
+
+    def test_quiet_unless_verbose(self, monkeypatch, capsys):
+        """Test reports only reach stderr in verbose mode"""
+        monkeypatch.delenv('OUTLAW_VERBOSE', raising=False)
+        context_packer.log_report("x", [], 10)
+        assert capsys.readouterr().err == ""
+
+        monkeypatch.setenv('OUTLAW_VERBOSE', '1')
+        context_packer.log_report("x", [], 10)
+        captured = capsys.readouterr()
+        assert captured.err.startswith("[CONTEXT x]")
+        assert captured.out == ""
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -7,39 +7,56 @@ from unittest.mock import Mock, patch, MagicMock, mock_open
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
 
 import gemini_bridge
+import context_builder
 
 
 class TestGetContext:
     """Test context gathering functionality"""
 
-    @patch('os.listdir')
-    def test_get_context_file_listing(self, mock_listdir):
-        """Test directory file listing in context"""
-        mock_listdir.return_value = ['file1.py', 'file2.py', 'file3.py']
+    def test_get_context_file_listing(self, tmp_path, monkeypatch):
+        """Test workspace map of files in context"""
+        monkeypatch.chdir(tmp_path)
+        for name in ['file1.py', 'file2.py', 'file3.py']:
+            (tmp_path / name).write_text('pass')
         context = gemini_bridge.get_context()
 
         assert '[SHARED DIRECTORY CONTENT]' in context
         assert 'file1.py' in context
         assert 'file2.py' in context
 
-    @patch('os.listdir')
-    def test_get_context_file_listing_truncation(self, mock_listdir):
-        """Test file listing truncates at 50 files"""
-        mock_listdir.return_value = [f'file{i}.py' for i in range(100)]
+    def test_get_context_file_listing_truncation(self, tmp_path, monkeypatch):
+        """Test workspace map truncates to its byte budget"""
+        monkeypatch.chdir(tmp_path)
+        for i in range(500):
+            (tmp_path / f'file{i}.py').write_text('pass')
         context = gemini_bridge.get_context()
 
         assert '[SHARED DIRECTORY CONTENT]' in context
-        assert '...' in context  # Truncation indicator
+        assert 'more files)' in context  # Truncation indicator
 
-    @patch('os.path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data='# Project Memory\nTest entry 1\nTest entry 2')
-    def test_get_context_memory_read(self, mock_file, mock_exists):
+    def test_get_context_memory_read(self, tmp_path, monkeypatch):
         """Test reading PROJECT_MEMORY.md"""
-        mock_exists.return_value = True
-        context = gemini_bridge.get_context()
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'PROJECT_MEMORY.md').write_text('# Project Memory\nTest entry 1\nTest entry 2', encoding='utf-8')
+        with patch('memory_reader.read_tail', wraps=context_builder.memory_reader.read_tail) as mock_tail:
+            context = gemini_bridge.get_context()
 
         assert '[SHARED PROJECT MEMORY' in context
-        mock_file.assert_called_with('PROJECT_MEMORY.md', 'r', encoding='utf-8')
+        assert 'Test entry 2' in context
+        mock_tail.assert_called_with('PROJECT_MEMORY.md', 3000)
+
+    def test_get_context_ranks_memory_by_prompt(self, tmp_path, monkeypatch):
+        """Test a prompt selects relevant entries from the memory index"""
+        monkeypatch.chdir(tmp_path)
+        import log_memory
+        log_memory.log_entry("API endpoint is /api/v2")
+        for i in range(40):
+            log_memory.log_entry(f"routine status update {i} " + "." * 80)
+
+        context = gemini_bridge.get_context("which api endpoint?")
+
+        assert '[SHARED PROJECT MEMORY (Relevant Entries)]' in context
+        assert '/api/v2' in context
 
     @patch('os.path.exists')
     def test_get_context_no_memory_file(self, mock_exists):
@@ -169,14 +186,80 @@ class TestGetIntel:
     def test_get_intel_with_api_key(self, mock_context, mock_configure, mock_model):
         """Test get_intel with API key"""
         mock_context.return_value = "Test context"
-        mock_response = Mock()
-        mock_response.text = "Test response"
-        mock_model.return_value.generate_content.return_value = mock_response
+        mock_model.return_value.generate_content.return_value = iter([Mock(text="Test "), Mock(text="response")])
 
         with patch('builtins.print') as mock_print:
             gemini_bridge.get_intel("Test prompt", api_key="test_key")
             mock_configure.assert_called_with(api_key="test_key")
-            mock_print.assert_called_with("Test response")
+            printed = "".join(str(c[0][0]) for c in mock_print.call_args_list if c[0])
+            assert printed == "Test response"
+
+    @patch('gemini_bridge.genai.GenerativeModel')
+    @patch('gemini_bridge.genai.configure')
+    @patch('gemini_bridge.get_context')
+    def test_get_intel_streams_chunks(self, mock_context, mock_configure, mock_model):
+        """Test get_intel requests a stream and flushes every chunk"""
+        mock_context.return_value = "Test context"
+        mock_model.return_value.generate_content.return_value = iter([Mock(text="a"), Mock(text="b")])
+
+        with patch('builtins.print') as mock_print:
+            gemini_bridge.get_intel("Test prompt", api_key="test_key")
+
+        assert mock_model.return_value.generate_content.call_args[1]['stream'] is True
+        chunk_calls = [c for c in mock_print.call_args_list if c[0] and c[0][0] in ("a", "b")]
+        assert len(chunk_calls) == 2
+        assert all(c[1].get('flush') for c in chunk_calls)
+
+    @patch('gemini_bridge.genai.GenerativeModel')
+    @patch('gemini_bridge.genai.configure')
+    @patch('gemini_bridge.get_context', return_value="Test context")
+    def test_get_intel_cache_hit_skips_uplink(self, mock_context, mock_configure, mock_model):
+        """Test a repeated query is answered from the cache"""
+        mock_model.return_value.generate_content.return_value = iter([Mock(text="Fresh answer")])
+        with patch('builtins.print'):
+            gemini_bridge.get_intel("Same prompt", api_key="test_key")
+
+        with patch('builtins.print') as mock_print:
+            gemini_bridge.get_intel("Same prompt", api_key="test_key")
+
+        assert mock_model.return_value.generate_content.call_count == 1
+        mock_print.assert_called_with("Fresh answer")
+
+    @patch('gemini_bridge.genai.GenerativeModel')
+    @patch('gemini_bridge.genai.configure')
+    @patch('gemini_bridge.get_context', return_value="Test context")
+    def test_get_intel_records_metrics(self, mock_context, mock_configure, mock_model):
+        """Test token usage, context size and cache lookups are counted"""
+        class Response:
+            usage_metadata = Mock(prompt_token_count=900, candidates_token_count=40)
+
+            def __iter__(self):
+                return iter([Mock(text="answer")])
+
+        gemini_bridge.metrics.reset()
+        mock_model.return_value.generate_content.return_value = Response()
+        with patch('builtins.print'):
+            gemini_bridge.get_intel("Metered prompt", api_key="test_key")
+            gemini_bridge.get_intel("Metered prompt", api_key="test_key")
+
+        metrics = gemini_bridge.metrics
+        assert metrics.TOKENS.value(provider="gemini", direction="in") == 900
+        assert metrics.TOKENS.value(provider="gemini", direction="out") == 40
+        assert metrics.ADVISOR_CACHE.value(provider="gemini", result="miss") == 1
+        assert metrics.ADVISOR_CACHE.value(provider="gemini", result="hit") == 1
+        assert metrics.CONTEXT_BYTES.count(provider="gemini") == 2
+
+    @patch('gemini_bridge.genai.GenerativeModel')
+    @patch('gemini_bridge.genai.configure')
+    @patch('gemini_bridge.get_context', return_value="Test context")
+    def test_get_intel_cache_bypass(self, mock_context, mock_configure, mock_model):
+        """Test use_cache=False always goes to the provider"""
+        mock_model.return_value.generate_content.side_effect = lambda *a, **k: iter([Mock(text="x")])
+        with patch('builtins.print'):
+            gemini_bridge.get_intel("Same prompt", api_key="test_key", use_cache=False)
+            gemini_bridge.get_intel("Same prompt", api_key="test_key", use_cache=False)
+
+        assert mock_model.return_value.generate_content.call_count == 2
 
     @patch('builtins.print')
     def test_get_intel_no_auth(self, mock_print):
@@ -10,6 +10,7 @@ from unittest.mock import Mock, patch, mock_open
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
 
 import log_memory
+import memory_reader
 
 
 class TestLogEntry:
@@ -159,6 +160,261 @@ class TestLogEntry:
                 os.chdir(original_dir)
 
 
+class TestSegmentRotation:
+    """Test sealing the active log into numbered segments"""
+
+    def test_rotates_when_segment_full(self, tmp_path, monkeypatch):
+        """Test the active file is sealed once it reaches SEGMENT_BYTES"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'SEGMENT_BYTES', 500)
+
+        for i in range(20):
+            log_memory.log_entry(f"Entry {i} " + "X" * 40)
+
+        manifest = memory_reader.load_manifest('PROJECT_MEMORY.md')
+        assert len(manifest['segments']) >= 2
+        assert os.path.getsize('PROJECT_MEMORY.md') < 500 + 100
+        for segment in manifest['segments']:
+            assert os.path.exists(segment['file'])
+            assert segment['entries'] > 0
+            assert segment['first'] <= segment['last']
+
+    def test_no_entries_lost_across_segments(self, tmp_path, monkeypatch):
+        """Test every entry is readable exactly once after rotation"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'SEGMENT_BYTES', 300)
+
+        for i in range(30):
+            log_memory.log_entry(f"Entry {i}")
+
+        texts = [text for _, text in memory_reader.iter_entries('PROJECT_MEMORY.md')]
+        assert len(texts) == 30
+        for i in range(30):
+            assert sum(f"Entry {i}\n" in t + "\n" for t in texts) == 1
+
+    def test_compressed_segments(self, tmp_path, monkeypatch):
+        """Test sealed segments can be zlib-compressed and still read"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'SEGMENT_BYTES', 300)
+        monkeypatch.setattr(log_memory, 'COMPRESS', True)
+
+        for i in range(20):
+            log_memory.log_entry(f"Entry {i}")
+
+        manifest = memory_reader.load_manifest('PROJECT_MEMORY.md')
+        assert all(s['file'].endswith('.md.z') for s in manifest['segments'])
+        assert "Entry 0" in memory_reader.read_entries('PROJECT_MEMORY.md', 20)
+
+    def test_rotation_off(self, tmp_path, monkeypatch):
+        """Test OUTLAW_MEMORY_ROTATE=off keeps a single file"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'SEGMENT_BYTES', 100)
+        monkeypatch.setattr(log_memory, 'ROTATE', 'off')
+
+        for i in range(10):
+            log_memory.log_entry(f"Entry {i}")
+
+        assert memory_reader.load_manifest('PROJECT_MEMORY.md')['segments'] == []
+
+    def test_daily_rotation(self, tmp_path, monkeypatch):
+        """Test daily mode seals a log last written before today"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'ROTATE', 'daily')
+
+        log_memory.log_entry("Yesterday's work")
+        yesterday = time.time() - 86400
+        os.utime('PROJECT_MEMORY.md', (yesterday, yesterday))
+        log_memory.log_entry("Today's work")
+
+        manifest = memory_reader.load_manifest('PROJECT_MEMORY.md')
+        assert len(manifest['segments']) == 1
+        with open('PROJECT_MEMORY.md', 'r', encoding='utf-8') as f:
+            active = f.read()
+        assert "Today's work" in active
+        assert "Yesterday's work" not in active
+
+
+@pytest.mark.skipif(not log_memory.HAS_FCNTL, reason="group commit needs fcntl")
+class TestGroupCommit:
+    """Test coalescing concurrent appends into one write + fsync"""
+
+    def test_leader_commits_queued_entries_in_order(self, tmp_path, monkeypatch):
+        """Test one commit appends every queued entry chronologically"""
+        monkeypatch.chdir(tmp_path)
+        first = log_memory.enqueue_entry('PROJECT_MEMORY.md', "\n## [t1]\nfirst\n")
+        second = log_memory.enqueue_entry('PROJECT_MEMORY.md', "\n## [t2]\nsecond\n")
+
+        with log_memory.memory_lock('PROJECT_MEMORY.md'):
+            committed = log_memory.commit_pending('PROJECT_MEMORY.md', second)
+
+        content = (tmp_path / 'PROJECT_MEMORY.md').read_text(encoding='utf-8')
+        assert committed == 2
+        assert content.index("first") < content.index("second")
+        assert not os.path.exists(first) and not os.path.exists(second)
+
+    def test_follower_does_not_rewrite(self, tmp_path, monkeypatch):
+        """Test a writer whose entry was already committed returns without writing"""
+        monkeypatch.chdir(tmp_path)
+        mine = log_memory.enqueue_entry('PROJECT_MEMORY.md', "\n## [t]\nmine\n")
+        with log_memory.memory_lock('PROJECT_MEMORY.md'):
+            log_memory.commit_pending('PROJECT_MEMORY.md', mine)
+
+        with patch('log_memory.append_durably') as mock_append:
+            with log_memory.memory_lock('PROJECT_MEMORY.md'):
+                assert log_memory.commit_pending('PROJECT_MEMORY.md', mine) == 0
+            mock_append.assert_not_called()
+
+    def test_concurrent_writers_coalesce_fsyncs(self, tmp_path, monkeypatch):
+        """Test concurrent writers need fewer fsyncs than entries and lose nothing"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'COMMIT_WINDOW', 0.01)
+        real_fsync = os.fsync
+        fsyncs = []
+        monkeypatch.setattr(log_memory.os, 'fsync', lambda fd: fsyncs.append(fd) or real_fsync(fd))
+
+        threads = [threading.Thread(target=log_memory.log_entry, args=(f"Writer {i}",)) for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        content = (tmp_path / 'PROJECT_MEMORY.md').read_text(encoding='utf-8')
+        for i in range(16):
+            assert content.count(f"Writer {i}\n") == 1
+        assert len(fsyncs) < 16
+        assert os.listdir(memory_reader.pending_dir('PROJECT_MEMORY.md')) == []
+
+    def test_multiprocess_writers(self, tmp_path):
+        """Test separate processes share the spool and lock file"""
+        tools_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'tools')
+        script = (
+            "import sys; sys.path.insert(0, sys.argv[1]); import log_memory\n"
+            "for i in range(10): log_memory.log_entry(f'proc {sys.argv[2]} entry {i}')\n"
+        )
+        import subprocess
+        procs = [subprocess.Popen([sys.executable, "-c", script, tools_dir, str(p)], cwd=tmp_path,
+                                  stdout=subprocess.DEVNULL) for p in range(4)]
+        for p in procs:
+            assert p.wait() == 0
+
+        content = (tmp_path / 'PROJECT_MEMORY.md').read_text(encoding='utf-8')
+        assert content.count("## [") == 40
+        assert content.count("# PROJECT MEMORY LOG") == 1
+
+    def test_failed_write_removes_pending_entry(self, tmp_path, monkeypatch):
+        """Test an entry reported as failed is not committed later"""
+        monkeypatch.chdir(tmp_path)
+        os.mkdir('PROJECT_MEMORY.md')  # appends will fail
+        monkeypatch.setattr(log_memory.time, 'sleep', lambda s: None)
+        monkeypatch.setattr(log_memory, 'append_uncontended', lambda log_file, entry: False)  # contended
+
+        with pytest.raises(OSError):
+            log_memory.log_entry("doomed")
+        assert os.listdir(memory_reader.pending_dir('PROJECT_MEMORY.md')) == []
+
+    def test_lone_writer_skips_spool(self, tmp_path, monkeypatch):
+        """Test an uncontended append goes straight to the log"""
+        monkeypatch.chdir(tmp_path)
+        with patch('log_memory.enqueue_entry') as mock_enqueue:
+            log_memory.log_entry("alone")
+        mock_enqueue.assert_not_called()
+        assert "alone" in (tmp_path / 'PROJECT_MEMORY.md').read_text(encoding='utf-8')
+
+    def test_queued_entries_keep_their_place(self, tmp_path, monkeypatch):
+        """Test a writer that finds entries queued goes through the spool behind them"""
+        monkeypatch.chdir(tmp_path)
+        log_memory.enqueue_entry('PROJECT_MEMORY.md', "\n## [t1]\nqueued earlier\n")
+        log_memory.log_entry("arrived later")
+
+        content = (tmp_path / 'PROJECT_MEMORY.md').read_text(encoding='utf-8')
+        assert content.index("queued earlier") < content.index("arrived later")
+
+    def crashed_leader(self, appended):
+        """Leave the spool as a leader that died after (or before) its append would"""
+        log = 'PROJECT_MEMORY.md'
+        batch = [log_memory.enqueue_entry(log, f"\n## [t{i}]\ncrashed batch {i}\n") for i in range(2)]
+        with open(os.path.join(memory_reader.pending_dir(log), log_memory.BATCH_MARKER), 'w') as f:
+            f.write("\n".join(os.path.basename(p) for p in batch))
+        if appended:
+            with log_memory.memory_lock(log):
+                log_memory.append_durably(log, "".join(open(p, encoding='utf-8').read() for p in batch))
+
+    @pytest.mark.parametrize("appended", [True, False])
+    def test_crashed_leader_batch_committed_once(self, tmp_path, monkeypatch, appended):
+        """Test the next leader appends a dead leader's batch only if it had not reached the log"""
+        monkeypatch.chdir(tmp_path)
+        self.crashed_leader(appended)
+        log_memory.log_entry("next writer")
+
+        content = (tmp_path / 'PROJECT_MEMORY.md').read_text(encoding='utf-8')
+        assert content.count("crashed batch 0") == 1 and content.count("crashed batch 1") == 1
+        assert content.index("crashed batch 1") < content.index("next writer")
+        assert os.listdir(memory_reader.pending_dir('PROJECT_MEMORY.md')) == []
+
+    def test_disabled_group_commit_appends_directly(self, tmp_path, monkeypatch):
+        """Test OUTLAW_MEMORY_GROUP_COMMIT=0 skips the spool"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'GROUP_COMMIT', False)
+        log_memory.log_entry("direct")
+
+        assert "direct" in (tmp_path / 'PROJECT_MEMORY.md').read_text(encoding='utf-8')
+        assert not os.path.exists(memory_reader.pending_dir('PROJECT_MEMORY.md'))
+
+
+class FakeMsvcrt:
+    """msvcrt.locking stand-in: one process-wide byte lock, LK_NBLCK fails while it is held"""
+    LK_NBLCK = 2
+    LK_UNLCK = 0
+
+    def __init__(self):
+        self.held = threading.Lock()
+        self.calls = []
+
+    def locking(self, fd, mode, nbytes):
+        self.calls.append(mode)
+        if mode == self.LK_UNLCK:
+            self.held.release()
+        elif not self.held.acquire(blocking=False):
+            raise OSError("locked")
+
+
+class TestWindowsLocking:
+    """Test the msvcrt lock used where fcntl is missing"""
+
+    @pytest.fixture
+    def windows(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        fake = FakeMsvcrt()
+        monkeypatch.setattr(log_memory, 'HAS_FCNTL', False)
+        monkeypatch.setattr(log_memory, 'GROUP_COMMIT', False)
+        monkeypatch.setattr(log_memory, 'msvcrt', fake)
+        return fake
+
+    def test_lock_is_taken_and_released(self, windows):
+        """Test every write locks and unlocks"""
+        log_memory.log_entry("windows entry")
+        assert windows.calls == [FakeMsvcrt.LK_NBLCK, FakeMsvcrt.LK_UNLCK]
+        assert not windows.held.locked()
+
+    def test_non_blocking_reports_busy(self, windows):
+        """Test a non-blocking attempt yields False while another writer holds the lock"""
+        with log_memory.memory_lock('PROJECT_MEMORY.md') as first:
+            with log_memory.memory_lock('PROJECT_MEMORY.md', blocking=False) as second:
+                assert first is True and second is False
+
+    def test_concurrent_writers_serialize(self, windows):
+        """Test writers wait for each other instead of interleaving"""
+        threads = [threading.Thread(target=log_memory.log_entry, args=(f"Entry {i}",)) for i in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        content = open('PROJECT_MEMORY.md', encoding='utf-8').read()
+        assert all(f"Entry {i}" in content for i in range(5))
+        assert content.count("# PROJECT MEMORY LOG") == 1
+
+
 class TestMainExecution:
     """Test command-line execution"""
 
@@ -0,0 +1,153 @@
+import pytest
+import os
+import sys
+import sqlite3
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import log_memory
+import memory_index
+import memory_reader
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Memory log in a temporary workspace, with direct appends and no rotation"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(log_memory, 'ROTATE', 'off')
+    return tmp_path
+
+
+class TestTokenize:
+    """Test query / entry tokenization"""
+
+    def test_lowercases_and_splits_paths(self):
+        """Test punctuation splits terms and case is folded"""
+        assert memory_index.tokenize("API endpoint is /api/V2") == ['api', 'endpoint', 'api', 'v2']
+
+    def test_drops_stopwords_and_single_chars(self):
+        """Test filler words carry no weight"""
+        assert memory_index.tokenize("the a x of deploy") == ['deploy']
+
+
+class TestIncrementalUpdate:
+    """Test the index tracks the log as entries are appended"""
+
+    def test_appends_are_indexed(self, workspace):
+        """Test log_entry updates the index next to the log"""
+        log_memory.log_entry("API endpoint is /api/v2")
+        log_memory.log_entry("Refactored the login form")
+
+        assert os.path.exists(workspace / 'PROJECT_MEMORY.index.sqlite')
+        results = memory_index.search("endpoint")
+        assert len(results) == 1
+        assert "/api/v2" in results[0][2]
+
+    def test_update_reads_only_new_entries(self, workspace):
+        """Test a second update does not re-index earlier entries"""
+        log_memory.log_entry("first entry")
+        with log_memory.memory_lock(memory_reader.MEMORY_FILE):
+            assert memory_index.update() == 0
+        log_memory.log_entry("second entry")
+
+        conn = sqlite3.connect(workspace / 'PROJECT_MEMORY.index.sqlite')
+        assert conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == 2
+        conn.close()
+
+    def test_existing_log_is_picked_up(self, workspace):
+        """Test entries written before the index existed are indexed by the next append"""
+        (workspace / 'PROJECT_MEMORY.md').write_text(
+            "# PROJECT MEMORY LOG\n\n\n## [2024-01-01 10:00:00]\nDatabase is postgres 15\n", encoding='utf-8'
+        )
+        log_memory.log_entry("unrelated note")
+        assert "postgres" in memory_index.search("postgres")[0][2]
+
+    def test_entries_survive_rotation(self, workspace, monkeypatch):
+        """Test sealed segments are indexed once, without duplicates"""
+        monkeypatch.setattr(log_memory, 'ROTATE', 'size')
+        monkeypatch.setattr(log_memory, 'SEGMENT_BYTES', 200)
+        for i in range(12):
+            log_memory.log_entry(f"deployment note number {i} " + "x" * 40)
+
+        assert memory_reader.load_manifest()["segments"]
+        conn = sqlite3.connect(workspace / 'PROJECT_MEMORY.index.sqlite')
+        assert conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == 12
+        conn.close()
+
+    def test_rebuild_matches_incremental(self, workspace):
+        """Test a rebuild produces the same entries as incremental updates"""
+        for i in range(5):
+            log_memory.log_entry(f"entry {i}")
+        with log_memory.memory_lock(memory_reader.MEMORY_FILE):
+            assert memory_index.rebuild() == 5
+
+    def test_disabled_index(self, workspace, monkeypatch):
+        """Test OUTLAW_MEMORY_INDEX=0 skips index maintenance"""
+        monkeypatch.setenv('OUTLAW_MEMORY_INDEX', '0')
+        log_memory.log_entry("not indexed")
+        assert not os.path.exists(workspace / 'PROJECT_MEMORY.index.sqlite')
+
+
+class TestRanking:
+    """Test BM25 retrieval"""
+
+    def test_rare_term_outranks_common_term(self, workspace):
+        """Test entries matching rarer query terms score higher"""
+        for i in range(6):
+            log_memory.log_entry(f"worked on the frontend task {i}")
+        log_memory.log_entry("frontend talks to the payments service")
+
+        best = memory_index.search("frontend payments")[0]
+        assert "payments" in best[2]
+
+    def test_unknown_terms_return_nothing(self, workspace):
+        """Test a query with no indexed terms yields no matches"""
+        log_memory.log_entry("something")
+        assert memory_index.search("zebra") == []
+
+    def test_search_without_index(self, workspace):
+        """Test searching before anything was logged"""
+        assert memory_index.search("anything") == []
+
+
+class TestRelevantContext:
+    """Test budgeted context selection for advisor prompts"""
+
+    def test_old_relevant_entry_beats_recent_noise(self, workspace):
+        """Test an old matching entry is kept while the tail would have dropped it"""
+        log_memory.log_entry("API endpoint is /api/v2")
+        for i in range(40):
+            log_memory.log_entry(f"routine status update {i} " + "." * 80)
+
+        context = memory_index.relevant_context("which api endpoint should I call?", budget=600)
+        assert "/api/v2" in context
+        assert "/api/v2" not in memory_reader.read_tail(memory_reader.MEMORY_FILE, 600)
+
+    def test_respects_budget(self, workspace):
+        """Test selection never exceeds the character budget"""
+        for i in range(30):
+            log_memory.log_entry(f"status update {i} " + "." * 80)
+        assert len(memory_index.relevant_context("status", budget=500)) <= 500
+
+    def test_fills_with_recent_entries_oldest_first(self, workspace):
+        """Test leftover budget goes to recent entries, output in log order"""
+        log_memory.log_entry("alpha decision")
+        log_memory.log_entry("beta decision")
+        log_memory.log_entry("gamma decision")
+
+        context = memory_index.relevant_context("beta", budget=3000)
+        assert context.index("alpha") < context.index("beta") < context.index("gamma")
+
+    def test_no_index_returns_none(self, workspace):
+        """Test callers are told to fall back to a tail read"""
+        assert memory_index.relevant_context("anything") is None
+
+    def test_damaged_index_returns_none(self, workspace):
+        """Test an unreadable index is treated like a missing one"""
+        (workspace / 'PROJECT_MEMORY.index.sqlite').write_bytes(b"not a database" * 100)
+        assert memory_index.relevant_context("anything") is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,218 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import memory_reader
+
+
+def write_log(path, entries, header="# PROJECT MEMORY LOG\n\n"):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header)
+        for i, body in enumerate(entries):
+            f.write(f"\n## [2026-01-01 00:00:{i:02d}]\n{body}\n")
+
+
+class TestReadTail:
+    """Test byte-bounded tail reads"""
+
+    def test_small_file_returned_whole(self, tmp_path):
+        """Test files under the limit are returned unchanged"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, ["one", "two"])
+        assert memory_reader.read_tail(str(log), 3000) == log.read_text(encoding='utf-8')
+
+    def test_tail_is_bounded(self, tmp_path):
+        """Test only the last max_bytes are returned from a large log"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, [f"Entry {i} " + "X" * 50 for i in range(500)])
+        tail = memory_reader.read_tail(str(log), 3000)
+
+        assert len(tail.encode('utf-8')) <= 3000
+        assert "Entry 499" in tail
+        assert "Entry 0 " not in tail
+
+    def test_tail_starts_at_entry_header(self, tmp_path):
+        """Test the tail never opens mid-entry"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, [f"Entry {i} " + "X" * 50 for i in range(500)])
+        assert memory_reader.read_tail(str(log), 3000).startswith("## [")
+
+    def test_unaligned_tail(self, tmp_path):
+        """Test align=False keeps the raw byte window"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, ["Y" * 5000])
+        tail = memory_reader.read_tail(str(log), 100, align=False)
+        assert tail.strip() == "Y" * len(tail.strip())
+
+    def test_utf8_boundary(self, tmp_path):
+        """Test a seek landing inside a multi-byte character is repaired"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        log.write_bytes(("🚀" * 1000).encode('utf-8'))
+        for size in (101, 102, 103):
+            tail = memory_reader.read_tail(str(log), size, align=False)
+            assert "�" not in tail
+            assert set(tail) == {"🚀"}
+
+    def test_does_not_read_whole_file(self, tmp_path):
+        """Test I/O is proportional to the tail, not the log"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, ["Z" * 1000 for _ in range(1000)])  # ~1 MB
+        real_open = open
+        read_sizes = []
+
+        class Spy:
+            def __init__(self, f):
+                self._f = f
+            def __enter__(self):
+                return self
+            def __exit__(self, *exc):
+                self._f.close()
+            def read(self, n=-1):
+                data = self._f.read(n)
+                read_sizes.append(len(data))
+                return data
+            def __getattr__(self, name):
+                return getattr(self._f, name)
+
+        with patch('builtins.open', lambda *a, **k: Spy(real_open(*a, **k))):
+            memory_reader.read_tail(str(log), 3000)
+
+        assert sum(read_sizes) <= 3000
+
+
+class TestReadEntries:
+    """Test entry-count tail reads"""
+
+    def test_last_n_entries(self, tmp_path):
+        """Test exactly the last N entries are returned"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, [f"Entry {i}" for i in range(50)])
+        tail = memory_reader.read_entries(str(log), 3)
+
+        assert tail.count("## [") == 3
+        assert "Entry 47" in tail and "Entry 49" in tail
+        assert "Entry 46" not in tail
+
+    def test_fewer_entries_than_requested(self, tmp_path):
+        """Test the whole log is returned when it has fewer entries"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, ["only"])
+        tail = memory_reader.read_entries(str(log), 5)
+        assert "# PROJECT MEMORY LOG" in tail
+        assert "only" in tail
+
+    def test_entries_spanning_chunks(self, tmp_path):
+        """Test entries larger than the read chunk are returned intact"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        big = "B" * (memory_reader.READ_CHUNK * 2)
+        write_log(log, ["small", big, "last"])
+        tail = memory_reader.read_entries(str(log), 2)
+        assert big in tail
+        assert "small" not in tail
+
+    def test_zero_entries(self, tmp_path):
+        """Test count=0 returns nothing"""
+        log = tmp_path / 'PROJECT_MEMORY.md'
+        write_log(log, ["x"])
+        assert memory_reader.read_entries(str(log), 0) == ""
+
+
+class TestSplitEntries:
+    """Test the entry parser shared with memory_index and advisor_session"""
+
+    def test_entries_with_timestamps(self):
+        """Test each header starts an entry and the file header is dropped"""
+        data = b"# PROJECT MEMORY LOG\n\n\n## [2026-01-01 00:00:01]\nfirst\n\n## [2026-01-01 00:00:02]\nsecond\n"
+        assert memory_reader.split_entries(data) == [
+            ("2026-01-01 00:00:01", "## [2026-01-01 00:00:01]\nfirst"),
+            ("2026-01-01 00:00:02", "## [2026-01-01 00:00:02]\nsecond"),
+        ]
+
+    def test_unparsed_header(self):
+        """Test a header without a closing bracket still yields its entry"""
+        assert memory_reader.split_entries(b"\n## [broken\ntext\n") == [("", "## [broken\ntext")]
+
+
+class TestSegmentedReads:
+    """Test reads spanning sealed segments"""
+
+    def make_segmented_log(self, tmp_path, monkeypatch, compress=False):
+        import log_memory
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(log_memory, 'SEGMENT_BYTES', 400)
+        monkeypatch.setattr(log_memory, 'COMPRESS', compress)
+        for i in range(40):
+            log_memory.log_entry(f"Entry {i:02d}")
+        assert len(memory_reader.sealed_segments('PROJECT_MEMORY.md')) >= 3
+        return 'PROJECT_MEMORY.md'
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_tail_spans_segments(self, tmp_path, monkeypatch, compress):
+        """Test a tail larger than the active file continues into older segments"""
+        log = self.make_segmented_log(tmp_path, monkeypatch, compress)
+        tail = memory_reader.read_tail(log, 800)
+
+        assert "Entry 39" in tail
+        assert "Entry 25" in tail
+        assert "Entry 00" not in tail
+        assert tail.count("# PROJECT MEMORY LOG") == 0
+        assert tail.startswith("## [")
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_entries_span_segments(self, tmp_path, monkeypatch, compress):
+        """Test read_entries collects entries from several segments in order"""
+        log = self.make_segmented_log(tmp_path, monkeypatch, compress)
+        text = memory_reader.read_entries(log, 25)
+
+        assert text.count("## [") == 25
+        assert "Entry 15" in text and "Entry 14" not in text
+        assert text.index("Entry 15") < text.index("Entry 39")
+
+    def test_whole_log_when_tail_exceeds_it(self, tmp_path, monkeypatch):
+        """Test a huge tail returns every entry with a single file header"""
+        log = self.make_segmented_log(tmp_path, monkeypatch)
+        tail = memory_reader.read_tail(log, 10 ** 6)
+
+        assert tail.startswith("# PROJECT MEMORY LOG")
+        assert tail.count("# PROJECT MEMORY LOG") == 1
+        assert tail.count("## [") == 40
+
+    def test_range_skips_segments_outside_bounds(self, tmp_path, monkeypatch):
+        """Test range queries only open segments overlapping the window"""
+        log = self.make_segmented_log(tmp_path, monkeypatch)
+        segments = memory_reader.sealed_segments(log)
+        newest = segments[0]
+
+        opened = []
+        real_read = memory_reader.read_segment
+        with patch('memory_reader.read_segment', side_effect=lambda p: opened.append(p) or real_read(p)):
+            entries = list(memory_reader.iter_entries(log, start=newest['first']))
+
+        assert all(ts >= newest['first'] for ts, _ in entries)
+        assert not any(s['path'] in opened for s in segments[1:] if s['last'] < newest['first'])
+
+    def test_cli_reads_across_segments(self, tmp_path, monkeypatch):
+        """Test the command agents run for history sees sealed entries, not just the active file"""
+        import subprocess
+        self.make_segmented_log(tmp_path, monkeypatch)
+        script = os.path.join(os.path.dirname(__file__), '..', '..', 'tools', 'memory_reader.py')
+        result = subprocess.run([sys.executable, script, "--entries", "30"], cwd=tmp_path,
+                                capture_output=True, text=True, timeout=30)
+
+        assert result.returncode == 0
+        assert result.stdout.count("## [") == 30
+        assert "Entry 10" in result.stdout and "Entry 39" in result.stdout
+        assert "Entry 10" not in open(tmp_path / 'PROJECT_MEMORY.md').read()
+
+    def test_missing_log_raises(self, tmp_path):
+        """Test read_tail reports a missing log like open() would"""
+        with pytest.raises(FileNotFoundError):
+            memory_reader.read_tail(str(tmp_path / 'PROJECT_MEMORY.md'))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
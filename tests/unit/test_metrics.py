@@ -0,0 +1,149 @@
+import pytest
+import os
+import sys
+import subprocess
+import urllib.error
+import urllib.request
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import metrics
+import log_memory
+
+TOOLS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'tools')
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    """Every test starts from zero samples"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestRegistry:
+    """Test counters, histograms and the text format"""
+
+    def test_counter(self):
+        """Test counters add per label set"""
+        metrics.ERRORS.inc(component="gemini", kind="TimeoutError")
+        metrics.ERRORS.inc(2, component="gemini", kind="TimeoutError")
+        metrics.count_error("codex", ValueError("bad"))
+
+        assert metrics.ERRORS.value(component="gemini", kind="TimeoutError") == 3
+        assert metrics.ERRORS.value(component="codex", kind="ValueError") == 1
+        assert 'outlaw_errors_total{component="gemini",kind="TimeoutError"} 3' in metrics.render()
+
+    def test_histogram_exposition(self):
+        """Test buckets are cumulative and end with +Inf, sum and count"""
+        latency = metrics.Histogram("test_latency_seconds", "Test.", ("mode",), buckets=(0.1, 1))
+        latency.observe(0.05, mode="a")
+        latency.observe(0.5, mode="a")
+        latency.observe(3, mode="a")
+
+        lines = [f"{series} {metrics._format(value)}" for series, value in latency.samples()]
+        assert lines == [
+            'test_latency_seconds_bucket{mode="a",le="0.1"} 1',
+            'test_latency_seconds_bucket{mode="a",le="1"} 2',
+            'test_latency_seconds_bucket{mode="a",le="+Inf"} 3',
+            'test_latency_seconds_sum{mode="a"} 3.55',
+            'test_latency_seconds_count{mode="a"} 3',
+        ]
+
+    def test_render_headers_and_escaping(self):
+        """Test HELP/TYPE lines precede each family and label values are escaped"""
+        metrics.CLAUDE_LATENCY.observe(0.2, mode='odd"mode')
+        text = metrics.render()
+
+        assert "# TYPE outlaw_claude_latency_seconds histogram" in text
+        assert text.index("# HELP outlaw_claude_latency_seconds") < text.index("outlaw_claude_latency_seconds_bucket")
+        assert 'mode="odd\\"mode"' in text
+        assert "outlaw_errors_total" not in text  # no samples, no family
+
+    def test_timer_observes_on_error(self):
+        """Test Histogram.time records a block that raised"""
+        with pytest.raises(RuntimeError):
+            with metrics.CLAUDE_LATENCY.time(mode="oneshot"):
+                raise RuntimeError("boom")
+        assert metrics.CLAUDE_LATENCY.count(mode="oneshot") == 1
+
+    def test_configurable_buckets(self, monkeypatch):
+        """Test bucket bounds come from the environment, and bad values fall back"""
+        monkeypatch.setenv('OUTLAW_METRICS_BUCKETS', '2, 0.5,1')
+        assert metrics._buckets('OUTLAW_METRICS_BUCKETS', (9,)) == (0.5, 1.0, 2.0)
+        assert metrics.histogram("test_env_bucket_seconds", "Test.").buckets == (0.5, 1.0, 2.0)
+
+        monkeypatch.setenv('OUTLAW_METRICS_BUCKETS', 'fast,slow')
+        assert metrics._buckets('OUTLAW_METRICS_BUCKETS', (9,)) == (9,)
+
+    def test_count_tokens_skips_missing_usage(self):
+        """Test usage fields the SDK did not fill are ignored"""
+        metrics.count_tokens("gemini", 500, None)
+        metrics.count_tokens("gemini", object(), 0)
+
+        assert metrics.TOKENS.value(provider="gemini", direction="in") == 500
+        assert metrics.TOKENS.value(provider="gemini", direction="out") == 0
+
+
+class TestExport:
+    """Test the HTTP endpoint and the textfile dump"""
+
+    def test_http_endpoint(self):
+        """Test GET /metrics returns the text format and other paths 404"""
+        metrics.ADVISOR_CACHE.inc(provider="codex", result="hit")
+        server = metrics.serve(0)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(base + "/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(base + "/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert 'outlaw_advisor_cache_total{provider="codex",result="hit"} 1' in body
+
+    def test_textfile_accumulates_across_runs(self, tmp_path):
+        """Test each dump adds to what earlier runs left in the file"""
+        metrics.MEMORY_APPEND.observe(0.002)
+        metrics.TOKENS.inc(100, provider="codex", direction="in")
+        path = metrics.dump_textfile(str(tmp_path), "codex_bridge")
+        metrics.reset()
+        metrics.TOKENS.inc(50, provider="codex", direction="in")
+        metrics.dump_textfile(str(tmp_path), "codex_bridge")
+
+        assert path == str(tmp_path / "outlaw_codex_bridge.prom")
+        values = metrics.parse(open(path, encoding="utf-8").read())
+        assert values['outlaw_tokens_total{provider="codex",direction="in"}'] == 150
+        assert values['outlaw_memory_append_seconds_count'] == 1
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    def test_textfile_written_at_exit(self, tmp_path):
+        """Test a short-lived run dumps its samples when OUTLAW_METRICS_TEXTFILE is set"""
+        script = ("import sys; sys.path.insert(0, sys.argv[1]); import metrics\n"
+                  "metrics.count_error('memory', OSError())\n")
+        env = dict(os.environ, OUTLAW_METRICS_TEXTFILE=str(tmp_path))
+        subprocess.run([sys.executable, "-c", script, TOOLS_DIR], env=env, check=True, stdin=subprocess.DEVNULL)
+
+        prom, = [name for name in os.listdir(tmp_path) if name.endswith(".prom")]
+        text = (tmp_path / prom).read_text()
+        assert 'outlaw_errors_total{component="memory",kind="OSError"} 1' in text
+
+
+class TestInstrumentation:
+    """Test what the suite records"""
+
+    def test_memory_append_and_lock_wait(self, tmp_path, monkeypatch):
+        """Test a memory write records its latency and lock wait"""
+        monkeypatch.chdir(tmp_path)
+        log_memory.log_entry("metered entry")
+
+        assert metrics.MEMORY_APPEND.count() == 1
+        assert metrics.MEMORY_LOCK_WAIT.count() == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
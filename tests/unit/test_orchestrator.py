@@ -0,0 +1,194 @@
+import pytest
+import os
+import sys
+import json
+import time
+import subprocess
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import orchestrator
+
+TOOLS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'tools')
+
+STUB = '''
+import sys, time
+sys.path.insert(0, {tools!r})
+import log_memory
+
+agent, prompt = sys.argv[1], sys.argv[sys.argv.index("-p") + 1]
+print("\\033[36mDeploying Agent: " + agent + " (with Mnemosyne Memory)\\033[0m", flush=True)
+for word in prompt.split():
+    if word.startswith("SLEEP="):
+        time.sleep(float(word[6:]))
+if "FAIL" in prompt.split():
+    print("agent blew up", file=sys.stderr)
+    sys.exit(3)
+# Like a real agent, log through the shared memory protocol
+log_memory.log_entry(agent + " finished: " + prompt.splitlines()[0])
+print(agent + " REPORT")
+print(prompt)
+'''
+
+
+@pytest.fixture
+def stub_agent(tmp_path, monkeypatch):
+    """Agent launcher stand-in: sleeps on SLEEP=n, fails on FAIL, echoes its prompt and logs to memory"""
+    script = tmp_path / "agent_stub.py"
+    script.write_text(STUB.format(tools=os.path.abspath(TOOLS_DIR)))
+    monkeypatch.setenv('OUTLAW_AGENT_CMD', f"{sys.executable} {script}")
+    monkeypatch.chdir(tmp_path)
+    return str(script)
+
+
+def step(step_id, prompt, needs=(), agent="code-auditor"):
+    return {"id": step_id, "agent": agent, "prompt": prompt, "needs": list(needs)}
+
+
+class TestValidate:
+    """Test mission validation"""
+
+    def test_orders_by_dependency(self):
+        """Test steps come back in an order that respects their needs"""
+        steps = orchestrator.validate([step("fix", "f", ["scan"]), step("scan", "s")])
+        assert [s["id"] for s in steps] == ["scan", "fix"]
+
+    @pytest.mark.parametrize("entries, message", [
+        ([step("a", "x", ["b"]), step("b", "y", ["a"])], "cycle"),
+        ([step("a", "x", ["ghost"])], "unknown step"),
+        ([step("a", "x"), step("a", "y")], "duplicate id"),
+        ([step("a", "x", agent="../etc")], "invalid agent"),
+        ([step("a", " ")], "needs a prompt"),
+        ([], "non-empty"),
+    ])
+    def test_rejects_bad_missions(self, entries, message):
+        """Test a broken graph fails before any agent starts"""
+        with pytest.raises(ValueError, match=message):
+            orchestrator.validate(entries)
+
+    def test_load_mission_json(self, tmp_path):
+        """Test a mission file with a steps list and a bare string dependency"""
+        path = tmp_path / "mission.json"
+        path.write_text(json.dumps({"steps": [step("scan", "s"), {"id": "fix", "agent": "code-auditor",
+                                                                   "prompt": "f", "needs": "scan"}]}))
+        steps = orchestrator.load_mission(str(path))
+        assert steps[1]["needs"] == ["scan"]
+
+
+class TestBuildPrompt:
+    """Test how upstream output reaches a dependent"""
+
+    def test_includes_upstream_output(self):
+        """Test each needed step's output follows the prompt"""
+        results = {"scan": {"agent": "ethical-hacker", "output": "Found SQLi in auth.js\n"}}
+        prompt = orchestrator.build_prompt(step("fix", "Fix it.", ["scan"]), results)
+        assert prompt == "Fix it.\n\n[UPSTREAM: scan (ethical-hacker)]:\nFound SQLi in auth.js"
+
+    def test_trims_to_budget(self):
+        """Test long upstream output keeps its tail and the prompt stays whole"""
+        results = {"scan": {"agent": "ethical-hacker", "output": "noise " * 5000 + "VERDICT: fixed"}}
+        prompt = orchestrator.build_prompt(step("fix", "Fix it.", ["scan"]), results, budget=200)
+        assert prompt.startswith("Fix it.")
+        assert prompt.endswith("VERDICT: fixed")
+        assert orchestrator.context_packer.estimate_tokens(prompt) <= 200
+
+
+class TestRunMission:
+    """Test parallel execution of the task graph"""
+
+    def test_independent_steps_run_concurrently(self, stub_agent):
+        """Test a mission takes its critical path, not the sum of its steps"""
+        steps = orchestrator.validate([step(f"s{i}", "work SLEEP=0.5") for i in range(3)])
+        start = time.monotonic()
+        results = orchestrator.run_mission(steps, parallel=3, log=False)
+        elapsed = time.monotonic() - start
+
+        assert all(r["status"] == "ok" for r in results.values())
+        assert elapsed < 1.3  # serial would be 1.5s plus three interpreter startups
+
+    def test_parallel_limit(self, stub_agent):
+        """Test no more than `parallel` agents run at once"""
+        steps = orchestrator.validate([step(f"s{i}", "work SLEEP=0.3") for i in range(3)])
+        results = orchestrator.run_mission(steps, parallel=1, log=False)
+
+        spans = sorted((r["started"], r["started"] + r["duration"]) for r in results.values())
+        assert all(later[0] >= earlier[1] - 0.05 for earlier, later in zip(spans, spans[1:]))
+
+    def test_dependents_get_upstream_output(self, stub_agent):
+        """Test a dependent starts after its upstream steps and sees their output"""
+        steps = orchestrator.validate([
+            step("scan", "scan it SLEEP=0.2", agent="ethical-hacker"),
+            step("review", "review it"),
+            step("fix", "fix it", ["scan", "review"]),
+        ])
+        results = orchestrator.run_mission(steps, parallel=4, log=False)
+
+        fix = results["fix"]
+        assert fix["started"] >= results["scan"]["started"] + results["scan"]["duration"] - 0.05
+        assert "[UPSTREAM: scan (ethical-hacker)]:\n" in fix["output"]
+        assert "ethical-hacker REPORT\nscan it SLEEP=0.2" in fix["output"]
+        assert "[UPSTREAM: review (code-auditor)]" in fix["output"]
+        assert "Deploying Agent" not in fix["output"]
+
+    def test_failure_skips_dependents_only(self, stub_agent):
+        """Test a failed step skips what needs it while other branches finish"""
+        steps = orchestrator.validate([
+            step("scan", "scan FAIL"),
+            step("fix", "fix", ["scan"]),
+            step("verify", "verify", ["fix"]),
+            step("docs", "write docs"),
+        ])
+        results = orchestrator.run_mission(steps, log=False)
+
+        assert results["scan"]["status"] == "failed"
+        assert "exit code 3: agent blew up" == results["scan"]["error"]
+        assert results["fix"]["status"] == results["verify"]["status"] == "skipped"
+        assert results["docs"]["status"] == "ok"
+
+    def test_timeout(self, stub_agent):
+        """Test a stuck agent is killed and reported"""
+        steps = orchestrator.validate([step("slow", "wait SLEEP=5")])
+        result = orchestrator.run_mission(steps, timeout=0.5, log=False)["slow"]
+        assert result["status"] == "timeout"
+
+    def test_memory_writes_are_serialized(self, stub_agent, tmp_path):
+        """Test parallel agents and the orchestrator all land whole entries in one log"""
+        steps = orchestrator.validate([step(f"s{i}", f"task {i}") for i in range(6)]
+                                      + [step("final", "wrap up", [f"s{i}" for i in range(6)])])
+        orchestrator.run_mission(steps, parallel=6)
+
+        content = (tmp_path / "PROJECT_MEMORY.md").read_text(encoding="utf-8")
+        assert content.count("# PROJECT MEMORY LOG") == 1
+        for i in range(6):
+            assert f"code-auditor finished: task {i}\n" in content
+            assert f"[ORCHESTRATOR] Step 's{i}' (code-auditor): ok" in content
+        # The final step's agent wrote after every upstream step was logged
+        assert content.index("finished: wrap up") > max(content.index(f"Step 's{i}'") for i in range(6))
+
+    def test_critical_path(self):
+        """Test the critical path follows the slowest chain"""
+        steps = orchestrator.validate([step("a", "x"), step("b", "x", ["a"]), step("c", "x", ["a"]),
+                                       step("d", "x", ["b", "c"])])
+        results = {"a": {"duration": 1.0}, "b": {"duration": 5.0}, "c": {"duration": 2.0}, "d": {"duration": 1.0}}
+        assert orchestrator.critical_path(steps, results) == 7.0
+
+
+class TestMain:
+    """Test the command line"""
+
+    def test_cli_runs_mission(self, stub_agent, tmp_path):
+        """Test the CLI reports every step and exits non-zero on a failure"""
+        mission = tmp_path / "mission.json"
+        mission.write_text(json.dumps([step("scan", "scan"), step("fix", "fix FAIL", ["scan"])]))
+        proc = subprocess.run([sys.executable, os.path.join(TOOLS_DIR, "orchestrator.py"), str(mission),
+                               "--no-log", "--quiet", "--out", str(tmp_path / "out")],
+                              capture_output=True, text=True, env=os.environ)
+
+        assert proc.returncode == 1
+        assert "1/2 steps ok" in proc.stdout
+        assert json.loads((tmp_path / "out" / "fix.json").read_text())["status"] == "failed"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,154 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import persona_registry
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Base directory with two personas and the memory protocol"""
+    base = tmp_path / 'claude_home'
+    (base / 'templates').mkdir(parents=True)
+    (base / 'templates' / 'overwatch.md').write_text('# OVERWATCH\nWatch everything.\n')
+    (base / 'templates' / 'code-auditor.md').write_text('# AUDITOR')
+    (base / 'memory_protocol.md').write_text('# MNEMOSYNE PROTOCOL\n')
+    persona_registry.clear_cache()
+    yield str(base)
+    persona_registry.clear_cache()
+
+
+def bump_mtime(path):
+    """Move a path's mtime forward so the change is visible on coarse-grained filesystems"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+class TestLookup:
+    """Test persona lookups"""
+
+    def test_prompt_joins_template_and_protocol(self, base):
+        """Test the compiled prompt is the template followed by the protocol"""
+        persona = persona_registry.get('overwatch', base)
+        assert persona.template == '# OVERWATCH\nWatch everything.\n'
+        assert persona.prompt == '# OVERWATCH\nWatch everything.\n# MNEMOSYNE PROTOCOL\n'
+
+    def test_newline_inserted_when_template_lacks_one(self, base):
+        """Test templates without a trailing newline are still separated"""
+        assert persona_registry.get('code-auditor', base).prompt == '# AUDITOR\n# MNEMOSYNE PROTOCOL\n'
+
+    def test_names(self, base):
+        """Test every template is listed"""
+        assert persona_registry.names(base) == ['code-auditor', 'overwatch']
+
+    def test_unknown_persona(self, base):
+        """Test a missing template returns None"""
+        assert persona_registry.get('ghost', base) is None
+
+    @pytest.mark.parametrize("name", ["../etc/passwd", "a/b", "a\\b", "overwatch.md", ""])
+    def test_invalid_names_rejected(self, base, name):
+        """Test path-like names never reach the filesystem"""
+        assert persona_registry.get(name, base) is None
+
+    def test_missing_protocol(self, base):
+        """Test personas still load without the memory protocol"""
+        os.remove(os.path.join(base, 'memory_protocol.md'))
+        assert not persona_registry.has_protocol(base)
+        assert persona_registry.get('code-auditor', base).prompt == '# AUDITOR'
+
+    def test_fingerprint_is_stable(self, base):
+        """Test the fingerprint only depends on the prompt"""
+        first = persona_registry.get('overwatch', base).fingerprint
+        persona_registry.clear_cache()
+        assert persona_registry.get('overwatch', base).fingerprint == first
+        assert persona_registry.get('code-auditor', base).fingerprint != first
+
+
+class TestCompiledCache:
+    """Test templates are read once and invalidated by mtime"""
+
+    def test_warm_lookups_read_no_templates(self, base):
+        """Test repeated lookups are served without reading templates"""
+        persona_registry.get('overwatch', base)
+        with patch('persona_registry._read', wraps=persona_registry._read) as mock_read:
+            for _ in range(5):
+                persona_registry.get('overwatch', base)
+                persona_registry.names(base)
+        assert mock_read.call_count == 0
+
+    def test_new_process_uses_compiled_file(self, base):
+        """Test a fresh process (empty memory cache) reads only the compiled registry"""
+        persona_registry.get('overwatch', base)
+        persona_registry.clear_cache()
+        assert os.path.exists(persona_registry.cache_path(base))
+
+        with patch('persona_registry._read', wraps=persona_registry._read) as mock_read:
+            assert persona_registry.get('overwatch', base).template.startswith('# OVERWATCH')
+        assert mock_read.call_count == 0
+
+    def test_edited_template_recompiles(self, base):
+        """Test an in-place edit changes the prompt and fingerprint"""
+        before = persona_registry.get('overwatch', base)
+        path = os.path.join(base, 'templates', 'overwatch.md')
+        with open(path, 'w') as f:
+            f.write('# OVERWATCH v2\n')
+        bump_mtime(path)
+
+        after = persona_registry.get('overwatch', base)
+        assert after.template == '# OVERWATCH v2\n'
+        assert after.fingerprint != before.fingerprint
+
+    def test_edited_protocol_recompiles(self, base):
+        """Test a protocol edit reaches every persona"""
+        persona_registry.get('overwatch', base)
+        path = os.path.join(base, 'memory_protocol.md')
+        with open(path, 'w') as f:
+            f.write('# PROTOCOL v2\n')
+        bump_mtime(path)
+
+        assert persona_registry.get('code-auditor', base).prompt.endswith('# PROTOCOL v2\n')
+
+    def test_added_persona_appears(self, base):
+        """Test a new template is picked up through the directory mtime"""
+        persona_registry.names(base)
+        with open(os.path.join(base, 'templates', 'apex-analyst.md'), 'w') as f:
+            f.write('# APEX')
+        bump_mtime(os.path.join(base, 'templates'))
+
+        assert persona_registry.get('apex-analyst', base).template == '# APEX'
+
+
+class TestLaunch:
+    """Test the agent launcher entry point"""
+
+    def test_execs_claude_with_compiled_prompt(self, base):
+        """Test the launcher hands claude the persona prompt and extra args"""
+        with patch('persona_registry.os.execvp') as mock_exec, patch('builtins.print'):
+            persona_registry.launch('overwatch', ['--model', 'opus'], base)
+
+        path, cmd = mock_exec.call_args[0]
+        assert cmd[1:] == ['--system-prompt', persona_registry.get('overwatch', base).prompt, '--model', 'opus']
+
+    def test_unknown_persona_fails(self, base, capsys):
+        """Test a missing template reports where it looked"""
+        assert persona_registry.launch('ghost', [], base) == 1
+        assert "Agent template 'ghost' not found" in capsys.readouterr().out
+
+    def test_invalid_name_fails(self, base, capsys):
+        """Test path traversal attempts are rejected"""
+        assert persona_registry.launch('../x', [], base) == 1
+        assert 'invalid characters' in capsys.readouterr().out
+
+    def test_missing_claude_reported(self, base, capsys):
+        """Test a missing claude binary is an error, not a traceback"""
+        with patch('persona_registry.os.execvp', side_effect=FileNotFoundError("no claude")):
+            assert persona_registry.launch('overwatch', [], base) == 127
+        assert 'could not start claude' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
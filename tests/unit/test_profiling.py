@@ -0,0 +1,134 @@
+import pytest
+import os
+import sys
+import time
+import pstats
+import subprocess
+import threading
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import profiling
+
+TOOLS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'tools')
+
+
+def busy_work(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """Profiling on, into a fresh directory, sampling fast"""
+    out = tmp_path / "profiles"
+    monkeypatch.setenv('OUTLAW_PROFILE', '1')
+    monkeypatch.setenv('OUTLAW_PROFILE_DIR', str(out))
+    monkeypatch.setenv('OUTLAW_PROFILE_INTERVAL', '1')
+    return out
+
+
+class TestDisabled:
+    """Test profiling is free when off"""
+
+    def test_no_profile_no_files(self, tmp_path, monkeypatch):
+        """Test the block runs unprofiled and nothing is written"""
+        monkeypatch.delenv('OUTLAW_PROFILE', raising=False)
+        monkeypatch.setenv('OUTLAW_PROFILE_DIR', str(tmp_path / "profiles"))
+        threads = threading.active_count()
+        with profiling.profile("turn") as session:
+            assert sys.getprofile() is None
+            assert threading.active_count() == threads
+
+        assert session is None
+        assert not (tmp_path / "profiles").exists()
+
+
+class TestProfile:
+    """Test profile output"""
+
+    def test_writes_pstats_and_stacks(self, profile_dir):
+        """Test a profiled block leaves a loadable pstats file and collapsed stacks"""
+        with profiling.profile("war_room") as session:
+            busy_work(0.1)
+
+        stats = pstats.Stats(session.pstats_path)
+        assert any(name == "busy_work" for _, _, name in stats.stats)
+
+        lines = open(session.folded_path, encoding="utf-8").read().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert any("busy_work (test_profiling.py:" in line for line in lines)
+        assert os.path.basename(session.pstats_path).startswith("war_room-")
+
+    def test_inline_report(self, profile_dir, monkeypatch):
+        """Test the summary lists the top-N cumulative functions and the file paths"""
+        monkeypatch.setenv('OUTLAW_PROFILE_TOP', '3')
+        with profiling.profile("gemini_bridge") as session:
+            busy_work(0.05)
+
+        lines = session.summary.splitlines()
+        assert lines[0].startswith("[PROFILE] gemini_bridge:")
+        assert len([line for line in lines if line.startswith("  ") and "(" in line]) == 3
+        assert f"pstats: {session.pstats_path}" in session.summary
+        assert f"stacks: {session.folded_path}" in session.summary
+
+    def test_sampler_sees_worker_threads(self, profile_dir):
+        """Test collapsed stacks include pool threads the cProfile of the caller cannot see"""
+        with profiling.profile("council") as session:
+            worker = threading.Thread(target=busy_work, args=(0.1,), name="advisor-1")
+            worker.start()
+            worker.join()
+
+        folded = open(session.folded_path, encoding="utf-8").read()
+        assert any(line.startswith("advisor-1;") and "busy_work" in line for line in folded.splitlines())
+
+    def test_single_thread_profile(self, profile_dir):
+        """Test all_threads=False keeps other threads out of the stacks"""
+        stop = threading.Event()
+        other = threading.Thread(target=lambda: stop.wait(5), name="bystander")
+        other.start()
+        try:
+            with profiling.profile("task", all_threads=False) as session:
+                busy_work(0.05)
+        finally:
+            stop.set()
+            other.join()
+
+        assert "bystander" not in open(session.folded_path, encoding="utf-8").read()
+
+    def test_unwritable_dir_reported(self, tmp_path, monkeypatch):
+        """Test a profile that cannot be saved does not fail the work"""
+        blocker = tmp_path / "file"
+        blocker.write_text("x")
+        monkeypatch.setenv('OUTLAW_PROFILE', '1')
+        monkeypatch.setenv('OUTLAW_PROFILE_DIR', str(blocker / "profiles"))
+        with profiling.profile("turn") as session:
+            busy_work(0.01)
+
+        assert "Could not write profile" in session.summary
+
+
+class TestScripts:
+    """Test --profile on the command-line tools"""
+
+    def test_log_memory_profile_flag(self, tmp_path, profile_dir, monkeypatch):
+        """Test log_memory.py --profile logs the entry and reports the profile"""
+        monkeypatch.delenv('OUTLAW_PROFILE')
+        result = subprocess.run([sys.executable, os.path.join(TOOLS_DIR, "log_memory.py"), "--profile", "profiled entry"],
+                                cwd=tmp_path, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+
+        assert result.returncode == 0
+        assert "profiled entry" in (tmp_path / "PROJECT_MEMORY.md").read_text(encoding="utf-8")
+        assert "--profile" not in (tmp_path / "PROJECT_MEMORY.md").read_text(encoding="utf-8")
+        assert "[PROFILE] log_memory:" in result.stdout
+        assert sorted(os.path.splitext(name)[1] for name in os.listdir(profile_dir)) == [".folded", ".pstats"]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
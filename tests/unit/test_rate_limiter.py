@@ -0,0 +1,217 @@
+import pytest
+import os
+import sys
+import json
+import time
+import subprocess
+from email.utils import formatdate
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import rate_limiter
+
+TOOLS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'tools')
+
+
+class RateLimitError(Exception):
+    """Shaped like openai.RateLimitError: a status code and the HTTP response"""
+
+    def __init__(self, headers=None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers=headers or {})
+
+
+class ServiceUnavailable(Exception):
+    """Shaped like google.api_core.exceptions.ServiceUnavailable"""
+    code = 503
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    """A 'test' provider at 600 requests/minute (10/s) with a burst of 2"""
+    monkeypatch.setenv('OUTLAW_RATE_LIMITS', 'test=600:2')
+
+
+class TestLimits:
+    """Test limit configuration"""
+
+    def test_defaults_and_overrides(self, monkeypatch):
+        """Test per-provider and per-model limits, bursts and malformed entries"""
+        monkeypatch.setenv('OUTLAW_RATE_LIMITS', 'codex/gpt-4o=120:7, gemini=abc, other=24')
+        assert rate_limiter.limit_for("codex", "gpt-4o") == (120.0, 7)
+        assert rate_limiter.limit_for("codex", "gpt-4o-mini") == (500, 41)
+        assert rate_limiter.limit_for("gemini", "gemini-3-pro") == (60, 5)
+        assert rate_limiter.limit_for("other") == (24.0, 2)
+        assert rate_limiter.limit_for("unknown") is None
+
+    def test_zero_rate_disables(self, monkeypatch):
+        """Test a rate of 0 means unlimited"""
+        monkeypatch.setenv('OUTLAW_RATE_LIMITS', 'gemini=0')
+        assert rate_limiter.limit_for("gemini") is None
+
+
+class TestBucket:
+    """Test the shared token bucket"""
+
+    def test_burst_then_rate(self, limited):
+        """Test the burst is immediate and further requests are paced at the rate"""
+        start = time.monotonic()
+        waits = [rate_limiter.acquire("test", "m") for _ in range(4)]
+        elapsed = time.monotonic() - start
+
+        assert waits[0] < 0.05 and waits[1] < 0.05
+        assert 0.15 <= elapsed < 0.6
+
+    def test_timeout(self, limited):
+        """Test a caller that cannot wait gets RateLimitTimeout"""
+        rate_limiter.acquire("test", "m")
+        rate_limiter.acquire("test", "m")
+        with pytest.raises(rate_limiter.RateLimitTimeout):
+            rate_limiter.acquire("test", "m", timeout=0.01)
+
+    def test_buckets_are_per_model(self, limited):
+        """Test each model has its own bucket"""
+        for _ in range(2):
+            rate_limiter.acquire("test", "a")
+        assert rate_limiter.acquire("test", "b") < 0.05
+
+    def test_penalize_pauses_and_slows(self, limited):
+        """Test a rate-limit pause holds every caller and halves the refill rate"""
+        rate_limiter.penalize("test", "m", 0.3)
+        state = json.load(open(rate_limiter.state_path()))
+        assert state["test/m"]["factor"] == 0.5
+        assert state["test/m"]["tokens"] == 0
+
+        assert rate_limiter.acquire("test", "m") >= 0.3
+
+    def test_rate_recovers(self, limited, monkeypatch):
+        """Test a halved rate climbs back to the quota"""
+        monkeypatch.setattr(rate_limiter, 'RECOVERY', 0.2)
+        rate_limiter.penalize("test", "m", 0)
+        time.sleep(0.25)
+        rate_limiter.acquire("test", "m")
+        assert json.load(open(rate_limiter.state_path()))["test/m"]["factor"] == 1.0
+
+    def test_disabled(self, limited, monkeypatch):
+        """Test OUTLAW_NO_RATE_LIMIT skips the shared state entirely"""
+        monkeypatch.setenv('OUTLAW_NO_RATE_LIMIT', '1')
+        for _ in range(5):
+            assert rate_limiter.acquire("test", "m") == 0.0
+        assert not os.path.exists(rate_limiter.state_path())
+
+    def test_shared_across_processes(self, limited):
+        """Test separate processes draw from one bucket: 4 x 4 requests at 10/s take over a second"""
+        script = ("import sys; sys.path.insert(0, sys.argv[1]); import rate_limiter\n"
+                  "for _ in range(4): rate_limiter.acquire('test', 'm')\n")
+        start = time.monotonic()
+        procs = [subprocess.Popen([sys.executable, "-c", script, TOOLS_DIR], stdin=subprocess.DEVNULL)
+                 for _ in range(4)]
+        for proc in procs:
+            assert proc.wait() == 0
+        elapsed = time.monotonic() - start
+
+        # 16 requests, 2 from the burst, 14 at 10/s
+        assert elapsed >= 1.3
+
+
+class TestErrors:
+    """Test error classification and Retry-After"""
+
+    def test_classification(self):
+        """Test rate limits, transient errors and permanent errors"""
+        assert rate_limiter.rate_limited(RateLimitError())
+        assert rate_limiter.retryable(RateLimitError())
+        assert rate_limiter.retryable(ServiceUnavailable())
+        assert rate_limiter.retryable(ConnectionResetError())
+        assert not rate_limiter.rate_limited(ServiceUnavailable())
+        assert not rate_limiter.retryable(ValueError("bad request"))
+
+    def test_retry_after_forms(self):
+        """Test seconds, milliseconds, HTTP dates and google RetryInfo"""
+        assert rate_limiter.retry_after(RateLimitError({"retry-after": "7"})) == 7
+        assert rate_limiter.retry_after(RateLimitError({"retry-after-ms": "250", "retry-after": "1"})) == 0.25
+        dated = rate_limiter.retry_after(RateLimitError({"retry-after": formatdate(time.time() + 30, usegmt=True)}))
+        assert 25 < dated <= 31
+
+        error = Exception("quota")
+        error.details = [SimpleNamespace(retry_delay=SimpleNamespace(seconds=3, nanos=500000000))]
+        assert rate_limiter.retry_after(error) == 3.5
+        assert rate_limiter.retry_after(RateLimitError()) is None
+
+
+class TestCall:
+    """Test retries around a provider request"""
+
+    def test_retries_transient_with_jittered_backoff(self, monkeypatch):
+        """Test a 503 is retried after a random delay below the exponential cap"""
+        monkeypatch.setenv('OUTLAW_NO_RATE_LIMIT', '1')  # only backoff sleeps
+        outcomes = [ServiceUnavailable(), ServiceUnavailable(), "ok"]
+
+        def request():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with patch('rate_limiter.time.sleep') as mock_sleep, \
+                patch('rate_limiter.random.uniform', side_effect=lambda low, high: high):
+            assert rate_limiter.call("test", "m", request) == "ok"
+
+        assert [c[0][0] for c in mock_sleep.call_args_list] == [1.0, 2.0]
+
+    def test_rate_limit_honours_retry_after(self, limited):
+        """Test a 429 pauses the shared bucket for its Retry-After before the retry"""
+        calls = []
+
+        def request():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise RateLimitError({"retry-after-ms": "300"})
+            return "ok"
+
+        assert rate_limiter.call("test", "m", request) == "ok"
+        assert calls[1] - calls[0] >= 0.3
+
+    def test_permanent_errors_not_retried(self, limited):
+        """Test a non-retryable error is raised at once"""
+        attempts = []
+
+        def request():
+            attempts.append(1)
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            rate_limiter.call("test", "m", request)
+        assert len(attempts) == 1
+
+    def test_gives_up(self, monkeypatch):
+        """Test the last failure is raised after the configured attempts"""
+        monkeypatch.setenv('OUTLAW_NO_RATE_LIMIT', '1')
+        attempts = []
+
+        def request():
+            attempts.append(1)
+            raise ServiceUnavailable()
+
+        with patch('rate_limiter.time.sleep'):
+            with pytest.raises(ServiceUnavailable):
+                rate_limiter.call("test", "m", request, attempts=3)
+        assert len(attempts) == 3
+
+    def test_retry_after_beyond_max_delay_fails(self, limited, monkeypatch):
+        """Test a Retry-After longer than OUTLAW_RETRY_MAX_DELAY is not waited out"""
+        monkeypatch.setattr(rate_limiter, 'MAX_DELAY', 5)
+
+        def request():
+            raise RateLimitError({"retry-after": "3600"})
+
+        with pytest.raises(RateLimitError):
+            rate_limiter.call("test", "m", request)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
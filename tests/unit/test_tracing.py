@@ -0,0 +1,196 @@
+import pytest
+import os
+import sys
+import json
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import tracing
+
+TOOLS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'tools')
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    """Tracing on, into a fresh trace file"""
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv('OUTLAW_TRACE', '1')
+    monkeypatch.setenv('OUTLAW_TRACE_FILE', str(path))
+    monkeypatch.setattr(tracing, '_local', threading.local())
+    return path
+
+
+def records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestDisabled:
+    """Test tracing costs nothing when off"""
+
+    def test_span_is_shared_no_op(self, tmp_path, monkeypatch):
+        """Test span() hands back the same object and writes nothing"""
+        monkeypatch.setenv('OUTLAW_TRACE_FILE', str(tmp_path / "trace.jsonl"))
+        with tracing.span("turn", persona="x") as span:
+            span.set(tokens=1)
+            span.mark("first_chunk_ms")
+
+        assert tracing.span("other") is tracing._NO_SPAN
+        assert not (tmp_path / "trace.jsonl").exists()
+
+    def test_child_env_and_wrap_untouched(self):
+        """Test no trace variables leak to children and functions are not wrapped"""
+        env = tracing.child_env({"PATH": "/bin"})
+        assert env == {"PATH": "/bin"}
+        assert tracing.wrap(len) is len
+
+
+class TestSpans:
+    """Test span records"""
+
+    def test_record_fields(self, trace_file):
+        """Test a span is one JSON line with timing, process and attributes"""
+        with tracing.span("provider", provider="gemini") as span:
+            span.set(model="flash")
+            span.mark("first_chunk_ms")
+
+        record, = records(trace_file)
+        assert record["name"] == "provider"
+        assert record["parent"] is None
+        assert record["status"] == "ok"
+        assert record["pid"] == os.getpid()
+        assert record["ms"] >= record["attrs"]["first_chunk_ms"] >= 0
+        assert record["attrs"]["provider"] == "gemini"
+        assert record["attrs"]["model"] == "flash"
+
+    def test_nesting(self, trace_file):
+        """Test inner spans point at the enclosing span and share its trace"""
+        trace_id = tracing.start_trace()
+        with tracing.span("turn"):
+            with tracing.span("advisor"):
+                pass
+            with tracing.span("claude"):
+                pass
+
+        spans = {record["name"]: record for record in records(trace_file)}
+        assert {record["trace"] for record in spans.values()} == {trace_id}
+        assert spans["advisor"]["parent"] == spans["turn"]["span"]
+        assert spans["claude"]["parent"] == spans["turn"]["span"]
+        assert tracing.current() == (trace_id, None)
+
+    def test_exception_marks_error(self, trace_file):
+        """Test an exception leaving the block is recorded and still raised"""
+        with pytest.raises(ValueError):
+            with tracing.span("provider"):
+                raise ValueError("quota exceeded")
+
+        record, = records(trace_file)
+        assert record["status"] == "error"
+        assert record["attrs"]["error"] == "ValueError: quota exceeded"
+
+    def test_rotation(self, trace_file, monkeypatch):
+        """Test the trace file is rotated past MAX_BYTES and load() still reads both"""
+        monkeypatch.setattr(tracing, 'MAX_BYTES', 300)
+        trace_id = tracing.start_trace()
+        for i in range(5):
+            with tracing.span(f"step{i}"):
+                pass
+
+        assert os.path.exists(str(trace_file) + ".1")
+        assert trace_file.stat().st_size <= 300 or not trace_file.exists()
+        assert len(tracing.load(trace_id)) >= 2
+
+
+class TestPropagation:
+    """Test trace context across threads and processes"""
+
+    def test_wrap_carries_context_to_pool_threads(self, trace_file):
+        """Test spans in worker threads hang under the submitting span"""
+        def advisor():
+            with tracing.span("advisor"):
+                pass
+
+        with tracing.span("council") as council:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                for future in [pool.submit(tracing.wrap(advisor)) for _ in range(2)]:
+                    future.result()
+
+        spans = records(trace_file)
+        advisors = [record for record in spans if record["name"] == "advisor"]
+        assert len(advisors) == 2
+        assert all(record["parent"] == council.id for record in advisors)
+
+    def test_attach_forces_tracing_for_a_request(self, tmp_path, monkeypatch):
+        """Test a daemon thread records spans for a traced request while its own env is untraced"""
+        monkeypatch.setenv('OUTLAW_TRACE_FILE', str(tmp_path / "trace.jsonl"))
+        with tracing.attach(["abc", "parent1"]):
+            assert tracing.enabled()
+            with tracing.span("daemon"):
+                pass
+        assert not tracing.enabled()
+
+        record, = records(tmp_path / "trace.jsonl")
+        assert (record["trace"], record["parent"]) == ("abc", "parent1")
+
+    def test_child_process_joins_trace(self, trace_file):
+        """Test a subprocess records its startup and spans under the span that spawned it"""
+        script = ("import sys; sys.path.insert(0, sys.argv[1]); import tracing\n"
+                  "tracing.record_startup()\n"
+                  "with tracing.span('provider'): pass\n")
+        trace_id = tracing.start_trace()
+        with tracing.span("advisor") as advisor:
+            subprocess.run([sys.executable, "-c", script, TOOLS_DIR], env=tracing.child_env(), check=True,
+                           stdin=subprocess.DEVNULL)
+
+        spans = {record["name"]: record for record in tracing.load(trace_id)}
+        assert spans["startup"]["parent"] == advisor.id
+        assert spans["provider"]["parent"] == advisor.id
+        assert spans["provider"]["pid"] != os.getpid()
+        assert spans["startup"]["ms"] > 0
+
+
+class TestLoadAndFormat:
+    """Test reading traces back"""
+
+    def test_load_defaults_to_latest_trace(self, trace_file):
+        """Test load() without an id returns only the most recent trace"""
+        tracing.start_trace()
+        with tracing.span("old"):
+            pass
+        latest = tracing.start_trace()
+        with tracing.span("new"):
+            pass
+        trace_file.open("a").write("not json\n")
+
+        assert [record["name"] for record in tracing.load()] == ["new"]
+        assert tracing.load()[0]["trace"] == latest
+
+    def test_breakdown_tree(self, trace_file):
+        """Test the breakdown indents children and shows errors"""
+        trace_id = tracing.start_trace()
+        with tracing.span("turn"):
+            with tracing.span("advisor", provider="codex"):
+                pass
+            try:
+                with tracing.span("claude"):
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+
+        text = tracing.format_breakdown(tracing.load(trace_id))
+        lines = text.splitlines()
+        assert lines[0].startswith(f"TRACE {trace_id}")
+        assert any(line.startswith("  turn") for line in lines)
+        assert any(line.startswith("    advisor") and "provider=codex" in line for line in lines)
+        assert any("claude" in line and "[RuntimeError: boom]" in line for line in lines)
+
+    def test_breakdown_empty(self):
+        """Test an unknown trace gives a readable message"""
+        assert "No spans" in tracing.format_breakdown([])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
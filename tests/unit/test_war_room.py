@@ -1,6 +1,9 @@
 import pytest
 import os
 import sys
+import json
+import time
+import threading
 from unittest.mock import Mock, patch, MagicMock, mock_open
 from io import StringIO
 
@@ -121,6 +124,555 @@ class TestAdvisorSelection:
         assert "codex_bridge.py" in codex_bridge
 
 
+class TestRunAdvisor:
+    """Test advisor invocation via daemon or subprocess"""
+
+    @patch('war_room.subprocess.run')
+    @patch('war_room.bridge_daemon.consult', return_value="  daemon advice \n")
+    def test_uses_daemon_when_running(self, mock_consult, mock_run):
+        """Test daemon output is used and no subprocess is spawned"""
+        advice = war_room.run_advisor(war_room.GEMINI_BRIDGE, "Advice for: x")
+        assert advice == "daemon advice"
+        assert mock_consult.call_args[0] == ("gemini", "Advice for: x")
+        mock_run.assert_not_called()
+
+    @patch('war_room.stream_subprocess', return_value="subprocess advice\n")
+    @patch('war_room.bridge_daemon.consult', return_value=None)
+    def test_falls_back_to_subprocess(self, mock_consult, mock_stream):
+        """Test subprocess path is used when no daemon answers"""
+        advice = war_room.run_advisor(war_room.CODEX_BRIDGE, "task")
+        assert advice == "subprocess advice"
+        assert mock_consult.call_args[0] == ("codex", "task")
+        assert mock_stream.call_args[0][0][1] == war_room.CODEX_BRIDGE
+
+    @patch('war_room.stream_subprocess')
+    @patch('war_room.bridge_daemon.consult', side_effect=war_room.bridge_daemon.StreamInterrupted("lost mid-stream"))
+    def test_no_fallback_after_partial_stream(self, mock_consult, mock_subprocess):
+        """Test a daemon failing mid-stream is not re-run as a subprocess"""
+        with pytest.raises(war_room.bridge_daemon.StreamInterrupted):
+            war_room.run_advisor(war_room.GEMINI_BRIDGE, "x", on_chunk=lambda chunk: None)
+        mock_subprocess.assert_not_called()
+
+    @patch('war_room.stream_subprocess', side_effect=war_room.subprocess.TimeoutExpired("gemini", 2))
+    @patch('war_room.bridge_daemon.consult', return_value=None)
+    def test_latency_and_errors_recorded(self, mock_consult, mock_stream):
+        """Test every consult is timed per provider and path, failures included"""
+        war_room.metrics.reset()
+        with pytest.raises(war_room.subprocess.TimeoutExpired):
+            war_room.run_advisor(war_room.GEMINI_BRIDGE, "x", timeout=2)
+
+        assert war_room.metrics.ADVISOR_LATENCY.count(provider="gemini", via="subprocess") == 1
+        assert war_room.metrics.ERRORS.value(component="gemini", kind="TimeoutExpired") == 1
+
+    @patch('war_room.bridge_daemon.consult', return_value="GEMINI UPLINK ERROR: 503 Service Unavailable")
+    def test_consults_feed_router(self, mock_consult, tmp_path, monkeypatch):
+        """Test every consult updates the router, with bridge error text counted as a failure"""
+        monkeypatch.setattr(war_room, '_router', war_room.advisor_router.Router(str(tmp_path / "routes.json")))
+        war_room.run_advisor(war_room.GEMINI_BRIDGE, "Advice for: x")
+
+        profile = war_room.router().profiles["gemini"]
+        assert profile.failures == 1 and profile.ewma is None
+
+    @patch('war_room.stream_subprocess', return_value="advice")
+    @patch('war_room.bridge_daemon.consult', return_value=None)
+    def test_council_advisors_traced_under_turn(self, mock_consult, mock_stream, tmp_path, monkeypatch):
+        """Test each council advisor records a span under the turn, across pool threads"""
+        monkeypatch.setenv('OUTLAW_TRACE', '1')
+        monkeypatch.setenv('OUTLAW_TRACE_FILE', str(tmp_path / "trace.jsonl"))
+        trace_id = war_room.tracing.start_trace()
+        with war_room.tracing.span("turn") as turn:
+            war_room.run_council("harden the api", deadline=5)
+
+        advisors = [span for span in war_room.tracing.load(trace_id) if span["name"] == "advisor"]
+        assert sorted(span["attrs"]["provider"] for span in advisors) == ["codex", "gemini"]
+        assert all(span["parent"] == turn.id and span["attrs"]["via"] == "subprocess" for span in advisors)
+        assert mock_stream.call_count == 2
+
+
+class TestConsole:
+    """Test the interactive loop"""
+
+    @patch('war_room.clear_screen')
+    @patch('war_room.bridge_daemon.consult', side_effect=TimeoutError("daemon stalled"))
+    def test_daemon_timeout_without_speculation(self, mock_consult, mock_clear, monkeypatch, capsys):
+        """Test a stalled daemon reports the request timeout instead of crashing the console"""
+        monkeypatch.setattr(war_room, 'SPECULATIVE', False)
+        monkeypatch.setattr(war_room, 'ROUTING', "off")
+        with patch('builtins.input', side_effect=["/consult harden the api", "exit"]):
+            war_room.main()
+
+        out = capsys.readouterr().out
+        assert f"[ADVISOR TIMEOUT] No advice within {war_room.bridge_daemon.REQUEST_TIMEOUT:g}s" in out
+
+    @patch('war_room.clear_screen')
+    @patch('war_room.ClaudeSession')
+    def test_session_turn_has_timeout(self, mock_session, mock_clear, monkeypatch, capsys):
+        """Test a persistent-session turn cannot block the console forever"""
+        monkeypatch.setattr(war_room, 'SESSION_MODE', True)
+        mock_session.return_value.send.side_effect = TimeoutError("No reply from Claude within 900s")
+        with patch('builtins.input', side_effect=["/execute fix it", "exit"]):
+            war_room.main()
+
+        assert mock_session.return_value.send.call_args[1]['timeout'] == war_room.CLAUDE_TIMEOUT
+        assert "[CLAUDE ERROR] No reply from Claude" in capsys.readouterr().out
+
+
+class TestRouting:
+    """Test latency-aware advisor routing"""
+
+    @pytest.fixture
+    def routes(self, tmp_path, monkeypatch):
+        router = war_room.advisor_router.Router(str(tmp_path / "routes.json"))
+        monkeypatch.setattr(war_room, '_router', router)
+        return router
+
+    def test_routes_to_fastest_advisor(self, routes):
+        """Test a routed consult goes to the faster provider with that provider's input"""
+        routes.record("gemini", 8.0, True)
+        routes.record("codex", 2.0, True)
+        with patch('war_room.run_advisor', return_value="blueprint") as mock_advisor:
+            script, advice, streamed = war_room.route_advisor("add caching", timeout=5)
+
+        assert (script, advice, streamed) == (war_room.CODEX_BRIDGE, "blueprint", False)
+        assert mock_advisor.call_args[0][:3] == (war_room.CODEX_BRIDGE, "add caching", 5)
+
+    def test_batch_auto_advisor(self, routes, tmp_path, fake_pipeline):
+        """Test advisor auto routes a batch task and labels the advice with the provider used"""
+        routes.record("gemini", 1.0, True)
+        routes.record("codex", 6.0, True)
+        result, = war_room.run_batch(tasks_from(tmp_path, [{"prompt": "plan it", "advisor": "auto"}]),
+                                     str(tmp_path / "out"))
+
+        assert result["advice"] == [{"advisor": "GEMINI STRATEGY", "text": "advice for Advice for: plan it"}]
+
+
+class TestStreamSubprocess:
+    """Test incremental reading of advisor output"""
+
+    def test_chunks_arrive_before_process_exits(self):
+        """Test first chunk is delivered while the child is still running"""
+        script = "import sys, time\nprint('first', flush=True)\ntime.sleep(0.5)\nprint('second', flush=True)"
+        arrivals = []
+        start = time.time()
+        output = war_room.stream_subprocess([sys.executable, "-c", script],
+                                            on_chunk=lambda c: arrivals.append((time.time() - start, c)))
+
+        assert output == "first\nsecond\n"
+        assert arrivals[0][1].startswith("first")
+        assert arrivals[0][0] < 0.45
+        assert len(arrivals) >= 2
+
+    def test_multibyte_characters_survive_chunking(self):
+        """Test UTF-8 split across reads is decoded correctly"""
+        script = "import sys\nsys.stdout.buffer.write('🚀 café'.encode('utf-8'))"
+        assert war_room.stream_subprocess([sys.executable, "-c", script]) == "🚀 café"
+
+    def test_timeout_kills_child(self):
+        """Test a stalled advisor is killed at the deadline"""
+        import subprocess
+        script = "import time\ntime.sleep(10)"
+        start = time.time()
+        with pytest.raises(subprocess.TimeoutExpired):
+            war_room.stream_subprocess([sys.executable, "-c", script], timeout=0.3)
+        assert time.time() - start < 5
+
+
+class TestCouncil:
+    """Test concurrent multi-advisor fan-out"""
+
+    def test_council_runs_advisors_concurrently(self):
+        """Test wall clock is the slowest advisor, not the sum"""
+        def slow_advisor(script, advisor_input, timeout=None):
+            time.sleep(0.3)
+            return f"advice from {os.path.basename(script)}"
+
+        with patch('war_room.run_advisor', side_effect=slow_advisor):
+            start = time.time()
+            results = war_room.run_council("harden the api", deadline=5)
+            elapsed = time.time() - start
+
+        assert elapsed < 0.55
+        assert [t for t, _ in results] == ["GEMINI STRATEGY", "CODEX BLUEPRINT"]
+        assert "gemini_bridge.py" in results[0][1]
+        assert "codex_bridge.py" in results[1][1]
+
+    def test_council_passes_deadline_and_inputs(self):
+        """Test each advisor gets its own input format and the deadline"""
+        with patch('war_room.run_advisor', return_value="ok") as mock_run:
+            war_room.run_council("fix it", deadline=7)
+
+        calls = {c[0][0]: c for c in mock_run.call_args_list}
+        assert calls[war_room.GEMINI_BRIDGE][0][1] == "Advice for: fix it"
+        assert calls[war_room.CODEX_BRIDGE][0][1] == "fix it"
+        assert all(c[0][2] == 7 for c in mock_run.call_args_list)
+
+    def test_council_reports_timed_out_advisor(self):
+        """Test a provider past its deadline is dropped, the other is kept"""
+        import subprocess
+
+        def advisor(script, advisor_input, timeout=None):
+            if script == war_room.CODEX_BRIDGE:
+                raise subprocess.TimeoutExpired(cmd="codex", timeout=timeout)
+            return "gemini advice"
+
+        with patch('war_room.run_advisor', side_effect=advisor):
+            results = dict(war_room.run_council("x", deadline=2))
+
+        assert results["GEMINI STRATEGY"] == "gemini advice"
+        assert "NO RESPONSE WITHIN 2s" in results["CODEX BLUEPRINT"]
+
+    def test_merge_advice_includes_every_section(self):
+        """Test merged prompt carries the request and all advisor sections"""
+        prompt = war_room.merge_advice("do it", [("GEMINI STRATEGY", "a"), ("CODEX BLUEPRINT", "b")])
+        assert prompt.startswith("REQUEST: do it")
+        assert "[GEMINI STRATEGY]:\na" in prompt
+        assert "[CODEX BLUEPRINT]:\nb" in prompt
+
+    def test_merge_advice_within_budget(self):
+        """Test long advice is trimmed to the budget while the request survives"""
+        advice = "".join(f"step {i}: do the thing\n" for i in range(500))
+        report = []
+        prompt = war_room.merge_advice("do it", [("GEMINI STRATEGY", advice)], budget=200, report=report)
+
+        assert prompt.startswith("REQUEST: do it\n\n[GEMINI STRATEGY]:\nstep 0")
+        assert "tokens trimmed ...]" in prompt
+        assert war_room.context_packer.used(report) <= 200
+
+
+@pytest.fixture
+def stub_claude(tmp_path):
+    """Executable that echoes its argv, its @file arguments and stdin, standing in for the Claude CLI"""
+    script = tmp_path / "claude"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "print('ARGS:', ' '.join(sys.argv[1:]))\n"
+        "for arg in sys.argv[1:]:\n"
+        "    if arg.startswith('@'):\n"
+        "        print('FILE:', open(arg[1:]).read())\n"
+        "print('STDIN:', sys.stdin.read())\n"
+    )
+    script.chmod(0o755)
+    with patch('war_room.CLAUDE_EXE', str(script)):
+        yield str(script)
+
+
+def fd_is_open(fd):
+    """True while `fd` is an open descriptor in this process"""
+    try:
+        os.fstat(fd)
+        return True
+    except OSError:
+        return False
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="stub executable uses a shebang")
+class TestSpeculativeClaude:
+    """Test Claude spawned ahead of the advisor phase"""
+
+    def test_prompt_is_fed_through_stdin(self, stub_claude):
+        """Test the late prompt reaches the already-running process"""
+        process, handle = war_room.spawn_speculative_claude(None)
+        time.sleep(0.1)  # advisor phase happening meanwhile
+        stdout, _ = war_room.finish_speculative_claude(process, handle, "REQUEST: $(whoami)")
+
+        assert "STDIN: REQUEST: $(whoami)" in stdout
+        assert "$(whoami)" not in stdout.split("STDIN:")[0]
+
+    def test_system_prompt_is_released(self, stub_claude):
+        """Test the persona is passed by reference and released afterwards"""
+        process, (path, fd) = war_room.spawn_speculative_claude("# PERSONA")
+        stdout, _ = war_room.finish_speculative_claude(process, (path, fd), "go")
+
+        assert f"--system-prompt @{path}" in stdout
+        assert "FILE: # PERSONA" in stdout
+        if fd is not None:
+            assert not fd_is_open(fd)
+        else:
+            assert not os.path.exists(path)
+
+    def test_abort_kills_process(self, stub_claude):
+        """Test an interrupted turn does not leave Claude waiting on stdin"""
+        process, (path, fd) = war_room.spawn_speculative_claude("# PERSONA")
+        war_room.abort_speculative_claude(process, (path, fd))
+
+        assert process.poll() is not None
+        assert fd is None or not fd_is_open(fd)
+
+    @patch('war_room.clear_screen')
+    @patch('war_room.run_council', side_effect=RuntimeError("council exploded"))
+    def test_failed_turn_aborts_process(self, mock_council, mock_clear, stub_claude, monkeypatch):
+        """Test an error before the Claude phase kills the speculative Claude and releases its persona"""
+        monkeypatch.setattr(war_room, 'SPECULATIVE', True)
+        monkeypatch.setattr(war_room, 'SESSION_MODE', False)
+        spawned = []
+        real_spawn = war_room.spawn_speculative_claude
+
+        def tracking_spawn(system_prompt):
+            spawned.append(real_spawn(system_prompt))
+            return spawned[-1]
+
+        with patch('war_room.spawn_speculative_claude', side_effect=tracking_spawn):
+            with patch('builtins.input', side_effect=["/council harden the api"]):
+                with pytest.raises(RuntimeError):
+                    war_room.main()
+
+        (process, (path, fd)), = spawned
+        assert process.poll() is not None
+        assert fd is None or not fd_is_open(fd)
+
+    def test_spawn_failure_releases_persona(self):
+        """Test a missing Claude binary does not leak the persona file"""
+        created = []
+        real_write = war_room.write_system_prompt
+
+        def tracking_write(system_prompt):
+            created.append(real_write(system_prompt))
+            return created[-1]
+
+        with patch('war_room.CLAUDE_EXE', '/nonexistent/claude'):
+            with patch('war_room.write_system_prompt', side_effect=tracking_write):
+                with pytest.raises(OSError):
+                    war_room.spawn_speculative_claude("# PERSONA")
+
+        (path, fd), = created
+        assert not fd_is_open(fd) if fd is not None else not os.path.exists(path)
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="stub executable uses a shebang")
+class TestRunClaude:
+    """Test the serial Claude phase hands over prompts without temp files"""
+
+    def test_prompt_over_stdin(self, stub_claude):
+        """Test the prompt is piped, never placed in argv"""
+        stdout, _ = war_room.run_claude("REQUEST: $(whoami)")
+        assert "STDIN: REQUEST: $(whoami)" in stdout
+        assert "$(whoami)" not in stdout.split("STDIN:")[0]
+
+    def test_no_temp_files_on_the_fast_path(self, stub_claude):
+        """Test neither the prompt nor the persona touches a temp file when memfd is available"""
+        with patch('war_room.tempfile.NamedTemporaryFile') as mock_ntf:
+            stdout, _ = war_room.run_claude("go", "# PERSONA")
+
+        assert "FILE: # PERSONA" in stdout
+        assert mock_ntf.call_count == (0 if war_room.claude_session.HAS_MEMFD else 1)
+
+    def test_temp_file_fallback(self, stub_claude):
+        """Test the temp-file path still works and cleans up after itself"""
+        with patch('war_room.PROMPT_VIA_STDIN', False), patch('claude_session.HAS_MEMFD', False):
+            stdout, _ = war_room.run_claude("REQUEST: fallback", "# PERSONA")
+
+        files = [arg[1:] for arg in stdout.split("\n")[0].split() if arg.startswith("@")]
+        assert "FILE: REQUEST: fallback" in stdout
+        assert "FILE: # PERSONA" in stdout
+        assert len(files) == 2 and not any(os.path.exists(f) for f in files)
+
+
+def write_tasks(tmp_path, *tasks, name="tasks.jsonl"):
+    """A JSONL batch file holding `tasks`"""
+    path = tmp_path / name
+    path.write_text("\n".join(json.dumps(task) for task in tasks) + "\n")
+    return str(path)
+
+
+def tasks_from(tmp_path, tasks):
+    """Tasks as load_tasks returns them"""
+    return war_room.load_tasks(write_tasks(tmp_path, *tasks, name="batch.jsonl"))
+
+
+class TestLoadTasks:
+    """Test batch file parsing"""
+
+    def test_jsonl_defaults(self, tmp_path):
+        """Test ids, advisor and execute default sensibly; strings and comments are allowed"""
+        path = write_tasks(tmp_path, {"prompt": "audit auth", "id": "auth svc"}, "audit billing")
+        with open(path, "a") as f:
+            f.write("\n# trailing comment\n")
+
+        tasks = war_room.load_tasks(path)
+        assert [task["id"] for task in tasks] == ["auth_svc", "task-002"]
+        assert tasks[1] == {"id": "task-002", "prompt": "audit billing", "persona": None,
+                            "advisor": "gemini", "execute": True}
+
+    def test_yaml(self, tmp_path):
+        """Test a YAML file with a tasks list"""
+        pytest.importorskip("yaml")
+        path = tmp_path / "tasks.yaml"
+        path.write_text("tasks:\n  - prompt: audit auth\n    advisor: council\n    execute: false\n  - audit billing\n")
+
+        tasks = war_room.load_tasks(str(path))
+        assert tasks[0]["advisor"] == "council" and tasks[0]["execute"] is False
+        assert tasks[1]["prompt"] == "audit billing"
+
+    @pytest.mark.parametrize("task, message", [
+        ({"id": "x"}, "needs a prompt"),
+        ({"prompt": "p", "advisor": "oracle"}, "unknown advisor"),
+        ({"prompt": "p", "persona": "no-such-persona"}, "unknown persona"),
+    ])
+    def test_rejects_bad_tasks(self, tmp_path, task, message):
+        """Test a malformed task fails the whole file before anything runs"""
+        with pytest.raises(ValueError, match=message):
+            war_room.load_tasks(write_tasks(tmp_path, task))
+
+    def test_rejects_duplicate_ids(self, tmp_path):
+        """Test two tasks cannot write the same result file"""
+        with pytest.raises(ValueError, match="duplicate id"):
+            war_room.load_tasks(write_tasks(tmp_path, {"id": "a", "prompt": "1"}, {"id": "a", "prompt": "2"}))
+
+    def test_rejects_bad_json(self, tmp_path):
+        """Test a broken line is reported with its line number"""
+        path = tmp_path / "tasks.jsonl"
+        path.write_text('{"prompt": "ok"}\n{"prompt": \n')
+        with pytest.raises(ValueError, match=":2:"):
+            war_room.load_tasks(str(path))
+
+
+@pytest.fixture
+def fake_pipeline():
+    """Advisor and Claude stand-ins that take `delay` seconds and track concurrency"""
+    state = {"delay": 0.2, "active": 0, "peak": 0, "claude_peak": 0, "claude_active": 0, "calls": []}
+    lock = threading.Lock()
+
+    def busy(key):
+        with lock:
+            state[key] += 1
+            peak = "peak" if key == "active" else "claude_peak"
+            state[peak] = max(state[peak], state[key])
+        time.sleep(state["delay"])
+        with lock:
+            state[key] -= 1
+
+    def advisor(script, advisor_input, timeout=None, on_chunk=None):
+        busy("active")
+        return f"advice for {advisor_input}"
+
+    def claude(prompt, system_prompt=None, timeout=None):
+        state["calls"].append((prompt, system_prompt))
+        busy("claude_active")
+        if "BREAK" in prompt:
+            raise RuntimeError("claude crashed")
+        if "SLOW" in prompt:
+            raise war_room.subprocess.TimeoutExpired("claude", timeout)
+        return f"done: {prompt.splitlines()[0]}", ""
+
+    with patch('war_room.run_advisor', side_effect=advisor), \
+         patch('war_room.run_claude', side_effect=claude):
+        yield state
+
+
+class TestBatch:
+    """Test headless batch runs"""
+
+    def test_workers_run_tasks_concurrently(self, tmp_path, fake_pipeline):
+        """Test throughput scales with the worker pool"""
+        tasks = [{"id": f"t{i}", "prompt": f"audit service {i}"} for i in range(4)]
+        start = time.monotonic()
+        results = war_room.run_batch(tasks_from(tmp_path, tasks), str(tmp_path / "out"), workers=4)
+        elapsed = time.monotonic() - start
+
+        assert [result["status"] for result in results] == ["ok"] * 4
+        # Serial would take 4 x (advisor + claude) = 1.6s
+        assert elapsed < 1.0
+        assert fake_pipeline["peak"] == 4
+
+    def test_result_files(self, tmp_path, fake_pipeline):
+        """Test every task gets a result file with status, advice, output and timings"""
+        out = tmp_path / "out"
+        war_room.run_batch(tasks_from(tmp_path, [{"id": "auth", "prompt": "audit auth"}]), str(out))
+
+        result = json.loads((out / "auth.json").read_text())
+        assert result["status"] == "ok"
+        assert result["advice"] == [{"advisor": "GEMINI STRATEGY", "text": "advice for Advice for: audit auth"}]
+        assert result["output"] == "done: REQUEST: audit auth"
+        assert set(result["timings"]) == {"advisor", "claude", "total"}
+        assert result["timings"]["total"] >= result["timings"]["claude"] > 0
+
+    def test_persona_and_advisor_per_task(self, tmp_path, fake_pipeline):
+        """Test each task gets its own persona, and advisor none goes straight to Claude"""
+        tasks = tasks_from(tmp_path, [{"prompt": "scan", "persona": "overwatch", "advisor": "none"}])
+        result, = war_room.run_batch(tasks, str(tmp_path / "out"))
+
+        prompt, system_prompt = fake_pipeline["calls"][0]
+        assert prompt == "scan"
+        assert system_prompt == war_room.persona_registry.get("overwatch", war_room.PERSONA_BASE).template
+        assert result["advice"] == []
+
+    def test_consult_only(self, tmp_path, fake_pipeline):
+        """Test execute: false stops after the advisors"""
+        tasks = tasks_from(tmp_path, [{"prompt": "plan it", "advisor": "council", "execute": False}])
+        result, = war_room.run_batch(tasks, str(tmp_path / "out"))
+
+        assert fake_pipeline["calls"] == []
+        assert [advice["advisor"] for advice in result["advice"]] == [label for _, _, label in war_room.ADVISORS]
+        assert result["output"] is None
+
+    def test_failures_are_isolated(self, tmp_path, fake_pipeline):
+        """Test a failing or timed-out task does not stop the others"""
+        fake_pipeline["delay"] = 0
+        tasks = tasks_from(tmp_path, [{"id": "good", "prompt": "fine"}, {"id": "bad", "prompt": "BREAK"},
+                                      {"id": "slow", "prompt": "SLOW"}])
+        results = {result["id"]: result for result in war_room.run_batch(tasks, str(tmp_path / "out"))}
+
+        assert results["good"]["status"] == "ok"
+        assert results["bad"]["status"] == "failed" and "claude crashed" in results["bad"]["error"]
+        assert results["slow"]["status"] == "timeout"
+
+    def test_provider_limit(self, tmp_path, fake_pipeline):
+        """Test a provider limit caps concurrent requests below the worker count"""
+        tasks = tasks_from(tmp_path, [{"prompt": f"task {i}", "advisor": "none"} for i in range(4)])
+        war_room.run_batch(tasks, str(tmp_path / "out"), workers=4, limits={"claude": 2})
+        assert fake_pipeline["claude_peak"] == 2
+
+    def test_skip_done(self, tmp_path, fake_pipeline):
+        """Test a rerun only runs tasks that did not succeed"""
+        fake_pipeline["delay"] = 0
+        out = str(tmp_path / "out")
+        tasks = tasks_from(tmp_path, [{"id": "good", "prompt": "fine"}, {"id": "bad", "prompt": "BREAK"}])
+        war_room.run_batch(tasks, out)
+
+        rerun = war_room.run_batch(tasks, out, skip_done=True)
+        assert [result["id"] for result in rerun] == ["bad"]
+
+    def test_task_trace(self, tmp_path, fake_pipeline, monkeypatch):
+        """Test with tracing on, every task gets its own trace and records its id"""
+        fake_pipeline["delay"] = 0
+        monkeypatch.setenv('OUTLAW_TRACE', '1')
+        monkeypatch.setenv('OUTLAW_TRACE_FILE', str(tmp_path / "trace.jsonl"))
+        results = war_room.run_batch(tasks_from(tmp_path, ["one", "two"]), str(tmp_path / "out"), workers=2)
+
+        assert len({result["trace"] for result in results}) == 2
+        spans = {span["name"]: span for span in war_room.tracing.load(results[0]["trace"])}
+        assert spans["task"]["attrs"]["id"] == results[0]["id"]
+        assert spans["merge"]["parent"] == spans["task"]["span"]
+
+    def test_task_profile(self, tmp_path, fake_pipeline, monkeypatch):
+        """Test with profiling on, each task's result points at its own profile files"""
+        fake_pipeline["delay"] = 0
+        monkeypatch.setenv('OUTLAW_PROFILE', '1')
+        monkeypatch.setenv('OUTLAW_PROFILE_DIR', str(tmp_path / "profiles"))
+        results = war_room.run_batch(tasks_from(tmp_path, ["one", "two"]), str(tmp_path / "out"), workers=1)
+
+        paths = [result["profile"]["stacks"] for result in results]
+        assert len(set(paths)) == 2
+        assert all(os.path.exists(path) for path in paths)
+
+    def test_batch_has_no_advisor_session(self, tmp_path, fake_pipeline, monkeypatch):
+        """Test independent tasks never share an advisor conversation"""
+        monkeypatch.setenv('OUTLAW_SESSION', 'interactive')
+        war_room.run_batch(tasks_from(tmp_path, ["one"]), str(tmp_path / "out"))
+        assert 'OUTLAW_SESSION' not in os.environ
+
+    def test_batch_main_exit_codes(self, tmp_path, fake_pipeline, capsys):
+        """Test the CLI exits 0 when all tasks pass, 1 on a failed task, 2 on a bad file"""
+        fake_pipeline["delay"] = 0
+        out = str(tmp_path / "out")
+        assert war_room.batch_main(write_tasks(tmp_path, "fine"), out) == 0
+        assert war_room.batch_main(write_tasks(tmp_path, "BREAK", name="bad.jsonl"), out) == 1
+        assert war_room.batch_main(write_tasks(tmp_path, {"id": "x"}, name="broken.jsonl"), out) == 2
+        assert war_room.batch_main(write_tasks(tmp_path, "fine"), out, limits=["gpu=3"]) == 2
+        assert "1/1 ok" in capsys.readouterr().out
+
+
 class TestClearScreen:
     """Test screen clearing functionality"""
 
@@ -0,0 +1,184 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add tools directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+import workspace_map
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Small source tree outside the cache dir"""
+    root = tmp_path / 'repo'
+    (root / 'src' / 'api').mkdir(parents=True)
+    (root / 'docs').mkdir()
+    (root / 'src' / 'api' / 'routes.py').write_text('x' * 2000)
+    (root / 'src' / 'main.py').write_text('x' * 100)
+    (root / 'docs' / 'guide.md').write_text('x' * 50)
+    (root / 'README.md').write_text('readme')
+    return root
+
+
+def touch(path, age_seconds):
+    """Backdate a file's mtime"""
+    stamp = time.time() - age_seconds
+    os.utime(path, (stamp, stamp))
+
+
+def bump_mtime(path):
+    """Move a directory's mtime forward so the change is visible on coarse-grained filesystems"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+class TestGitignore:
+    """Test .gitignore pattern handling"""
+
+    @pytest.mark.parametrize("path, is_dir, ignored", [
+        ("debug.log", False, True),
+        ("src/trace.log", False, True),
+        ("node_modules", True, True),
+        ("src/node_modules", True, True),
+        ("build", False, False),  # dir-only pattern
+        ("build", True, True),
+        ("dist", True, True),  # anchored
+        ("src/dist", True, False),
+        ("keep.log", False, False),  # negated
+        ("docs/a/b/c.tmp", False, True),  # **
+        (".git", True, True),  # always skipped
+    ])
+    def test_patterns(self, path, is_dir, ignored):
+        """Test common .gitignore forms"""
+        rules = workspace_map.parse_gitignore(
+            "# comment\n*.log\n!keep.log\nnode_modules/\nbuild/\n/dist\ndocs/**/*.tmp\n"
+        )
+        assert workspace_map.is_ignored(path, is_dir, [("", rules)]) is ignored
+
+    def test_nested_gitignore_is_relative_to_its_directory(self, repo):
+        """Test a nested .gitignore only applies inside its own directory"""
+        (repo / 'src' / '.gitignore').write_text('/main.py\n')
+        (repo / 'main.py').write_text('top level')
+
+        text = workspace_map.summary(str(repo), budget=4000)
+        assert '  main.py' not in text  # src/main.py is ignored
+        assert '\nmain.py' in text  # root main.py is not
+
+
+class TestSummary:
+    """Test the rendered map"""
+
+    def test_tree_within_budget(self, repo):
+        """Test output is an indented tree that respects the byte budget"""
+        for i in range(300):
+            (repo / 'src' / f'module{i}.py').write_text('pass')
+
+        text = workspace_map.summary(str(repo), budget=600)
+        assert len(text.encode('utf-8')) <= 600
+        assert text.splitlines()[0].startswith('304 files in 3 dirs')
+        assert 'src/ (302 files)' in text
+        assert 'more files)' in text
+
+    def test_recent_files_ranked_first(self, repo):
+        """Test recently modified files win the budget"""
+        for i in range(100):
+            path = repo / 'docs' / f'old{i}.md'
+            path.write_text('x')
+            touch(path, 30 * 24 * 3600)
+        touch(repo / 'src' / 'api' / 'routes.py', 30 * 24 * 3600)
+
+        text = workspace_map.summary(str(repo), budget=400)
+        assert 'main.py' in text
+        assert 'old42.md' not in text
+
+    def test_ignored_files_are_skipped(self, repo):
+        """Test .gitignore'd trees never show up"""
+        (repo / '.gitignore').write_text('node_modules/\n')
+        (repo / 'node_modules' / 'pkg').mkdir(parents=True)
+        (repo / 'node_modules' / 'pkg' / 'index.js').write_text('')
+
+        text = workspace_map.summary(str(repo), budget=4000)
+        assert 'node_modules' not in text
+        assert 'index.js' not in text
+
+    def test_memory_log_and_secrets_are_skipped(self, repo):
+        """Test the memory log's own files and secret-looking names never show up"""
+        names = ['PROJECT_MEMORY.md', '.PROJECT_MEMORY.lock', 'PROJECT_MEMORY.0001.md.z',
+                 'PROJECT_MEMORY.manifest.json', 'PROJECT_MEMORY.index.sqlite-wal', '.env', 'api_secrets.py']
+        for name in names:
+            (repo / name).write_text('x')
+        (repo / '.PROJECT_MEMORY.pending').mkdir()
+        (repo / '.PROJECT_MEMORY.pending' / '1.entry').write_text('x')
+
+        text = workspace_map.summary(str(repo), budget=4000)
+        assert 'routes.py' in text
+        assert 'MEMORY' not in text
+        assert '.env' not in text and 'secrets' not in text
+
+
+class TestIncrementalCache:
+    """Test warm refreshes only rescan changed directories"""
+
+    def test_warm_refresh_does_not_rescan(self, repo):
+        """Test an unchanged tree is not scanned again"""
+        workspace_map.summary(str(repo))
+        with patch('workspace_map._scan', wraps=workspace_map._scan) as mock_scan:
+            workspace_map.summary(str(repo))
+        assert mock_scan.call_count == 0
+
+    def test_only_changed_directory_is_rescanned(self, repo):
+        """Test a new file rescans just its directory"""
+        workspace_map.summary(str(repo))
+        (repo / 'docs' / 'new.md').write_text('')
+        bump_mtime(repo / 'docs')
+
+        with patch('workspace_map._scan', wraps=workspace_map._scan) as mock_scan:
+            text = workspace_map.summary(str(repo), budget=4000)
+        assert [call.args[1] for call in mock_scan.call_args_list] == ['docs']
+        assert 'new.md' in text
+
+    def test_persisted_across_processes(self, repo):
+        """Test a fresh process (empty memory cache) reuses the on-disk map"""
+        workspace_map.summary(str(repo))
+        workspace_map.clear_cache()
+        assert os.path.exists(workspace_map.cache_path(str(repo)))
+
+        with patch('workspace_map._scan', wraps=workspace_map._scan) as mock_scan:
+            workspace_map.summary(str(repo))
+        assert mock_scan.call_count == 0
+
+    def test_listing_from_older_exclusions_is_rescanned(self, repo):
+        """Test a stored map built under different exclusions is not reused"""
+        (repo / '.PROJECT_MEMORY.lock').write_text('')
+        data, _ = workspace_map.refresh(str(repo))
+        data["excluded"] = [".git"]
+        data["dirs"][""]["files"].append(['.PROJECT_MEMORY.lock', 0, 0])
+
+        data, changed = workspace_map.refresh(str(repo), data)
+        assert changed
+        assert '.PROJECT_MEMORY.lock' not in [name for name, _, _ in data["dirs"][""]["files"]]
+
+    def test_gitignore_edit_rescans_subtree(self, repo):
+        """Test editing a .gitignore in place re-applies the rules"""
+        (repo / '.gitignore').write_text('# nothing yet\n')
+        assert 'guide.md' in workspace_map.summary(str(repo), budget=4000)
+
+        (repo / '.gitignore').write_text('docs/\n')
+        bump_mtime(repo / '.gitignore')
+        assert 'guide.md' not in workspace_map.summary(str(repo), budget=4000)
+
+    def test_removed_directory_is_dropped(self, repo):
+        """Test deleted directories leave the map"""
+        workspace_map.summary(str(repo))
+        os.remove(repo / 'docs' / 'guide.md')
+        os.rmdir(repo / 'docs')
+        bump_mtime(repo)
+
+        assert 'docs/' not in workspace_map.summary(str(repo), budget=4000)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,184 @@
+"""
+OUTLAW EXOTIX // ADVISOR RESPONSE CACHE
+
+SQLite cache of Gemini / Codex answers, shared by every bridge process and keyed on
+provider, model, prompts and a hash of the workspace context. LRU eviction past the
+size bounds; entries older than the TTL are misses.
+
+Environment:
+    OUTLAW_CACHE_DIR        cache directory (default: ~/.claude/cache)
+    OUTLAW_CACHE_TTL        entry lifetime in seconds (default: 21600)
+    OUTLAW_CACHE_MAX_BYTES  total response bytes kept (default: 50 MB)
+    OUTLAW_CACHE_MAX_ENTRIES                           (default: 1000)
+    OUTLAW_NO_CACHE=1       bypass the cache entirely
+
+Usage:
+    python advisor_cache.py --stats
+    python advisor_cache.py --clear
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+
+import cache_store
+
+DEFAULT_TTL = 6 * 60 * 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def enabled():
+    return os.getenv("OUTLAW_NO_CACHE", "0") != "1"
+
+
+def cache_path():
+    return cache_store.cache_dir("advisor_cache.sqlite")
+
+
+def _setting(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def make_key(provider, model, system_prompt, prompt, context):
+    """Cache key for one advisor request. The context is hashed first so keys stay small."""
+    context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+    material = json.dumps([provider, model, system_prompt, prompt, context_hash])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _bump(conn, name):
+    conn.execute(
+        "INSERT INTO stats (name, value) VALUES (?, 1) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+        (name,),
+    )
+
+
+def get(key):
+    """Cached response for `key`, or None on a miss, an expired entry or any cache failure."""
+    if not enabled():
+        return None
+    now = time.time()
+    try:
+        with cache_store.open_db(cache_path(), _SCHEMA) as conn:
+            row = conn.execute("SELECT response, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= _setting("OUTLAW_CACHE_TTL", DEFAULT_TTL):
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+                _bump(conn, "hits")
+                return row[0]
+            if row:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            _bump(conn, "misses")
+    except (sqlite3.Error, OSError):
+        pass
+    return None
+
+
+def put(key, response):
+    """Stores `response` and evicts least-recently-used entries beyond the size bounds."""
+    if not enabled() or not response:
+        return
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    max_bytes = _setting("OUTLAW_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+    max_entries = _setting("OUTLAW_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+    ttl = _setting("OUTLAW_CACHE_TTL", DEFAULT_TTL)
+    if size > max_bytes:
+        return
+
+    try:
+        with cache_store.open_db(cache_path(), _SCHEMA) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            conn.execute("DELETE FROM entries WHERE created < ?", (now - ttl,))
+
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if count > max_entries or total > max_bytes:
+                evicted = 0
+                for old_key, old_size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall():
+                    if count <= max_entries and total <= max_bytes:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    count -= 1
+                    total -= old_size
+                    evicted += 1
+                conn.execute(
+                    "INSERT INTO stats (name, value) VALUES ('evictions', ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                    (evicted, evicted),
+                )
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def stats():
+    """Hit/miss/eviction counters plus current entry count and size."""
+    result = {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "bytes": 0}
+    if not os.path.exists(cache_path()):
+        return result
+    try:
+        with cache_store.open_db(cache_path(), _SCHEMA) as conn:
+            result.update(dict(conn.execute("SELECT name, value FROM stats").fetchall()))
+            result["entries"], result["bytes"] = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+    except (sqlite3.Error, OSError):
+        pass
+    return result
+
+
+def clear():
+    try:
+        with cache_store.open_db(cache_path(), _SCHEMA) as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM stats")
+    except (sqlite3.Error, OSError) as e:
+        print(f"ERROR: Failed to clear advisor cache: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Advisor Cache")
+    parser.add_argument("--stats", action="store_true", help="Print hit/miss counters and cache size")
+    parser.add_argument("--clear", action="store_true", help="Drop every cached response and reset counters")
+
+    args = parser.parse_args()
+
+    if args.clear:
+        clear()
+        print(f"Advisor cache cleared: {cache_path()}")
+    elif args.stats:
+        s = stats()
+        lookups = s["hits"] + s["misses"]
+        ratio = (s["hits"] / lookups * 100) if lookups else 0.0
+        print(f"Cache:     {cache_path()}")
+        print(f"Entries:   {s['entries']} ({s['bytes']} bytes)")
+        print(f"Hits:      {s['hits']}")
+        print(f"Misses:    {s['misses']}")
+        print(f"Evictions: {s['evictions']}")
+        print(f"Hit ratio: {ratio:.1f}%")
+    else:
+        parser.print_help()
+        sys.exit(1)
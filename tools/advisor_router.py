@@ -0,0 +1,225 @@
+"""
+OUTLAW EXOTIX // ADVISOR ROUTER
+
+Latency-aware choice between the advisors. Every consult, routed or not, feeds a
+moving profile per provider:
+
+    ewma       smoothed latency (seconds)
+    samples    recent latencies, for the p95
+    errors     smoothed error rate (shown by /route; routing goes by the breaker)
+    failures   consecutive failures; BREAKER of them bench the provider, for longer each time
+
+route() orders providers healthy first, then fastest first. A provider with no samples
+goes first so it gets measured. When a bench runs out, the provider is routed again as
+a probe: one success clears it, one more failure benches it again for twice as long.
+
+consult() sends the request to the best provider. With hedging on, if that provider
+has not started answering by its p95 latency, the next one is started as well. The
+first good answer wins, except that a provider already streaming to the console
+keeps it; no hedge is started once one is. A provider that fails is replaced at once
+by the next. The loser is left to finish in the background so that its latency is
+still recorded. Hedging costs
+about one extra request per twenty, since only the slowest 5% of consults are hedged.
+
+Profiles persist in OUTLAW_CACHE_DIR/advisor_routes.json so the next War Room starts
+with what this one learned.
+
+Environment:
+    WAR_ROOM_HEDGE_DELAY    seconds before hedging while a provider has too few samples for a p95 (default: 10)
+"""
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+
+import cache_store
+import metrics
+
+ALPHA = 0.3                 # EWMA weight of the newest sample
+WINDOW = 50                 # latencies kept for the p95
+MIN_SAMPLES = 5             # below this, hedge after HEDGE_DELAY instead of the p95
+HEDGE_DELAY = float(os.getenv("WAR_ROOM_HEDGE_DELAY", "10"))
+HEDGE_MIN = 0.5
+BREAKER = 3                 # consecutive failures that bench a provider
+BENCH_SECONDS = 30.0        # first bench; doubles per further failure, capped at BENCH_MAX
+BENCH_MAX = 300.0
+
+
+def advisor_failed(output):
+    """The bridges report provider failures on stdout rather than through their exit code."""
+    head = (output or "").lstrip()[:200]
+    return not head or "UPLINK ERROR" in head or head.startswith("ERROR:")
+
+
+class Profile:
+    def __init__(self, data=None):
+        data = data or {}
+        self.ewma = data.get("ewma")
+        self.samples = deque(data.get("samples", []), maxlen=WINDOW)
+        self.errors = data.get("errors", 0.0)
+        self.failures = data.get("failures", 0)
+        self.benched_until = data.get("benched_until", 0.0)
+
+    def record(self, latency, ok, now):
+        if ok:
+            self.ewma = latency if self.ewma is None else ALPHA * latency + (1 - ALPHA) * self.ewma
+            self.samples.append(latency)
+            self.failures = 0
+        else:
+            self.failures += 1
+            if self.failures >= BREAKER:
+                self.benched_until = now + min(BENCH_MAX, BENCH_SECONDS * 2 ** (self.failures - BREAKER))
+        self.errors = ALPHA * (0.0 if ok else 1.0) + (1 - ALPHA) * self.errors
+
+    def healthy(self, now):
+        # Only the breaker gates routing: errors decays only when the provider is called,
+        # so gating on it could shut a provider out for good
+        return now >= self.benched_until
+
+    def p95(self):
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def to_dict(self):
+        return {"ewma": self.ewma, "samples": list(self.samples), "errors": self.errors,
+                "failures": self.failures, "benched_until": self.benched_until}
+
+
+class Router:
+    def __init__(self, path=None):
+        self.path = path or cache_store.cache_dir("advisor_routes.json")
+        self._lock = threading.Lock()
+        self.profiles = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.profiles = {name: Profile(data) for name, data in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            pass  # No history yet: every provider starts unmeasured
+
+    def record(self, provider, latency, ok):
+        with self._lock:
+            self.profiles.setdefault(provider, Profile()).record(latency, ok, time.time())
+            snapshot = {name: profile.to_dict() for name, profile in self.profiles.items()}
+        self._save(snapshot)
+
+    def _save(self, snapshot):
+        # Profiles only steer routing: a lost or racing write is never worth failing a consult
+        try:
+            cache_store.write_json(self.path, snapshot)
+        except OSError:
+            pass
+
+    def route(self, providers):
+        """`providers` best first: healthy before benched, unmeasured before measured, then by EWMA latency."""
+        now = time.time()
+        with self._lock:
+            def score(provider):
+                profile = self.profiles.get(provider) or Profile()
+                return (not profile.healthy(now), profile.ewma is not None, profile.ewma or 0.0)
+            return sorted(providers, key=score)
+
+    def hedge_delay(self, provider):
+        with self._lock:
+            profile = self.profiles.get(provider)
+            p95 = profile.p95() if profile else None
+        return max(HEDGE_MIN, p95 if p95 is not None else HEDGE_DELAY)
+
+    def describe(self, providers):
+        """One status line per provider for the console."""
+        now = time.time()
+        lines = []
+        with self._lock:
+            for provider in providers:
+                profile = self.profiles.get(provider) or Profile()
+                p95 = profile.p95()
+                if not profile.healthy(now):
+                    state = f"benched {profile.benched_until - now:.0f}s"
+                else:
+                    state = "probing" if profile.failures >= BREAKER else "healthy"
+                latency = f"ewma {profile.ewma:.2f}s" if profile.ewma is not None else "unmeasured"
+                lines.append(f"{provider:<8}{state:<14}{latency:<16}"
+                             f"{f'p95 {p95:.2f}s' if p95 is not None else 'p95 -':<14}errors {profile.errors:.0%}")
+        return lines
+
+    def consult(self, calls, hedge=False, timeout=None, on_chunk=None):
+        """
+        Runs the consult on the best provider in `calls` ({provider: fn(on_chunk) -> output}).
+        Returns (provider, output, streamed). `streamed` is True when on_chunk already
+        showed the output. Once a provider starts streaming it owns the console, and its
+        answer is preferred over the others unless it is still running at `timeout`.
+        Raises TimeoutError if no answer arrived within `timeout` seconds, and the last
+        error if every provider failed.
+        """
+        order = self.route(list(calls))
+        results = queue.Queue()
+        streamer = []
+        stream_lock = threading.Lock()
+
+        def start(provider):
+            def chunk(text):
+                with stream_lock:
+                    if not streamer:
+                        streamer.append(provider)
+                if streamer[0] == provider and on_chunk:
+                    on_chunk(text)
+
+            def run():
+                try:
+                    results.put((provider, calls[provider](chunk), None))
+                except Exception as e:
+                    results.put((provider, None, e))
+            threading.Thread(target=run, name=f"advisor-{provider}", daemon=True).start()
+
+        start(order[0])
+        waiting = deque(order[1:])
+        running = 1
+        now = time.monotonic()
+        deadline = now + timeout if timeout else None
+        hedge_at = now + self.hedge_delay(order[0]) if hedge and waiting else None
+        held, failure = None, None
+
+        while running:
+            waits = [moment - time.monotonic() for moment in (hedge_at, deadline) if moment is not None]
+            try:
+                provider, output, error = results.get(timeout=max(0.0, min(waits)) if waits else None)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    if held:
+                        return held[0], held[1], False  # The streamer ran out of time; this answer did not
+                    raise TimeoutError(f"No advice within {timeout:g}s")
+                hedge_at = None
+                if streamer and on_chunk:
+                    continue  # Already answering on the console: a hedge could only be thrown away
+                # The primary is slower than its p95: race it with the next provider
+                metrics.ADVISOR_HEDGES.inc(provider=order[0])
+                start(waiting.popleft())
+                running += 1
+                continue
+
+            running -= 1
+            if error is None and not advisor_failed(output):
+                is_streamer = bool(streamer) and streamer[0] == provider
+                if is_streamer or not streamer or not on_chunk:
+                    return provider, output, is_streamer and on_chunk is not None
+                held = held or (provider, output)  # The streaming provider may still finish
+                continue
+
+            failure = (provider, output, error)
+            if streamer and streamer[0] == provider and held:
+                return held[0], held[1], False
+            if waiting:
+                # Fail over now rather than waiting out a hedge timer
+                start(waiting.popleft())
+                running += 1
+                hedge_at = None
+
+        if held:
+            return held[0], held[1], False
+        provider, output, error = failure
+        if error is not None:
+            raise error
+        return provider, output, bool(streamer) and streamer[0] == provider and on_chunk is not None
@@ -0,0 +1,207 @@
+"""
+OUTLAW EXOTIX // ADVISOR SESSION
+
+Delta context for long War Room sessions. Without a session every advisor request is
+stand-alone and carries the full workspace context: the directory map and the same
+memory entries, turn after turn.
+
+Within a session each provider instead gets a running conversation. Its first turn
+carries the full context. Later turns only carry what the replayed conversation does
+not already contain: memory entries not sent before, and the directory map only when it
+changed. What was left out is replaced by a one-line reference.
+
+The replay is bounded. The first turn is always kept, because it holds the context the
+references point to, and it is an unchanged prefix that the providers' prompt caching
+can reuse. After it come only the last HISTORY_TURNS turns, with each reply cut to
+REPLY_TOKENS. Context sent in a turn that has dropped out of the replay counts as
+unsent again. If the conversation still outgrows half of the model's token budget,
+it is dropped and the next turn starts over with full context, as it also does after
+a session reset.
+
+context_key is the full workspace context of the turn, before the delta. The bridges
+key their response cache on it, so that a repeated question still hits the cache
+mid-session.
+
+State lives in OUTLAW_CACHE_DIR/sessions/<session>/<provider>.json, so subprocess
+bridges and the bridge daemon see the same session. War Room sets OUTLAW_SESSION
+when it starts and replaces it on /reset.
+
+Environment:
+    OUTLAW_CACHE_DIR   cache directory (default: ~/.claude/cache)
+    OUTLAW_SESSION     session id; unset means stand-alone requests with full context
+    OUTLAW_SESSION_TURNS         turns replayed after the first (default: 3)
+    OUTLAW_SESSION_REPLY_TOKENS  tokens of each earlier reply that are replayed (default: 400)
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+
+import cache_store
+import memory_reader
+import context_builder
+import context_packer
+from context_packer import REQUIRED
+
+SESSION_TTL = 7 * 24 * 3600  # idle sessions older than this are pruned when a new one starts
+HISTORY_TURNS = int(os.getenv("OUTLAW_SESSION_TURNS", "3"))
+REPLY_TOKENS = int(os.getenv("OUTLAW_SESSION_REPLY_TOKENS", "400"))
+
+
+def current():
+    """The active session id, or None."""
+    return os.getenv("OUTLAW_SESSION") or None
+
+
+def session_dir(session_id):
+    return cache_store.cache_dir("sessions", session_id)
+
+
+def new_session():
+    """A fresh session id. Prunes sessions that have been idle for SESSION_TTL."""
+    root = os.path.dirname(session_dir("x"))
+    if os.path.isdir(root):
+        cutoff = time.time() - SESSION_TTL
+        for entry in os.scandir(root):
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
+    return uuid.uuid4().hex
+
+
+def end_session(session_id):
+    """Forgets everything sent in `session_id`; the next turn resends full context."""
+    if session_id:
+        shutil.rmtree(session_dir(session_id), ignore_errors=True)
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _fresh():
+    # turns: [{"n", "message", "reply", "map": digest sent or None, "memory": [digests sent]}]
+    return {"turns": [], "count": 0}
+
+
+class Session:
+    """One provider's conversation within a session."""
+
+    def __init__(self, session_id, provider):
+        self.path = os.path.join(session_dir(session_id), f"{provider}.json")
+        self.state = _fresh()
+        self._pending_map = None
+        self._pending_memory = []
+        self._sent = {}
+        self.context_key = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            # State from an older layout is dropped: the next turn simply resends full context
+            if "count" in state and all(isinstance(turn, dict) for turn in state["turns"]):
+                self.state = state
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+
+    @property
+    def turn(self):
+        return self.state["count"] + 1
+
+    def history_tokens(self):
+        return sum(context_packer.estimate_tokens(turn["message"]) + context_packer.estimate_tokens(turn["reply"])
+                   for turn in self.state["turns"])
+
+    def history(self, user_role="user", assistant_role="assistant"):
+        """The replayed turns as (role, text) pairs, oldest first."""
+        messages = []
+        for turn in self.state["turns"]:
+            messages.append((user_role, turn["message"]))
+            messages.append((assistant_role, turn["reply"]))
+        return messages
+
+    def _shared(self):
+        """(map digest, turn it was sent in, memory digests) that the replayed turns carry."""
+        map_digest, map_turn, memory = None, 0, set()
+        for turn in self.state["turns"]:
+            if turn["map"]:
+                map_digest, map_turn = turn["map"], turn["n"]
+            memory.update(turn["memory"])
+        return map_digest, map_turn, memory
+
+    def context(self, prompt, budget, report=None):
+        """
+        Context text for this turn: only what the conversation does not already hold,
+        packed into `budget` tokens along with the conversation itself.
+        """
+        # 1. ROLLOVER: an oversized conversation costs more than a full resend
+        history = self.history_tokens()
+        if history > budget // 2:
+            self.state, history = _fresh(), 0
+        if report is not None and history:
+            report.append(("history", history, history))
+
+        # 2. DELTA: replace what was already sent with a reference line
+        self._pending_map, self._pending_memory = None, []
+        full = context_builder.get_sections(prompt)
+        self.context_key = "".join(context_packer.render(section) for section in full)
+        shared = self._shared()
+        sections = [self._delta(section, *shared) for section in full]
+        sections, rows = context_packer.pack(sections, budget - history)
+        if report is not None:
+            report.extend(rows)
+
+        # 3. Only what survived packing intact counts as sent
+        self._sent = {"map": None, "memory": []}
+        for section in sections:
+            if section.name == "directory" and _digest(section.text) == self._pending_map:
+                self._sent["map"] = self._pending_map
+            elif section.name == "memory":
+                self._sent["memory"] = [digest for digest, text in self._pending_memory if text in section.text]
+        return "".join(context_packer.render(s) for s in sections)
+
+    def _delta(self, section, map_digest, map_turn, seen):
+        if section.name == "directory":
+            self._pending_map = _digest(section.text)
+            if self._pending_map == map_digest:
+                self._pending_map = None
+                return section._replace(text="", priority=REQUIRED,
+                                        header=f"\n[SHARED DIRECTORY CONTENT]: unchanged since turn {map_turn}.\n")
+            return section
+
+        if section.name == "memory" and section.text:
+            entries = [(_digest(text), text)
+                       for _, text in memory_reader.split_entries(b"\n" + section.text.encode("utf-8"))]
+            self._pending_memory = [(digest, text) for digest, text in entries if digest not in seen]
+            if len(self._pending_memory) == len(entries):
+                return section
+            shared = len(entries) - len(self._pending_memory)
+            if not self._pending_memory:
+                return section._replace(text="", priority=REQUIRED,
+                                        header=f"\n\n[SHARED PROJECT MEMORY]: no new entries ({shared} already shared earlier in this conversation).\n")
+            text = "\n\n".join(text for _, text in self._pending_memory)
+            return section._replace(text=f"{text}\n(+{shared} entries already shared earlier in this conversation)\n",
+                                    header="\n\n[SHARED PROJECT MEMORY (New Entries)]:\n")
+        return section
+
+    def record(self, message, reply):
+        """Appends a completed turn and marks its context as sent. Failed turns are never recorded."""
+        state = self.state
+        state["count"] = self.turn
+        state["turns"].append({"n": state["count"], "message": message,
+                               "reply": context_packer.truncate(reply, REPLY_TOKENS),
+                               "map": self._sent.get("map"), "memory": self._sent.get("memory", [])})
+        # The first turn holds the full context; after it only the latest turns are replayed
+        state["turns"] = state["turns"][:1] + state["turns"][1:][-HISTORY_TURNS:]
+        self._sent = {}
+
+        cache_store.write_json(self.path, state)
+
+
+def open_session(provider, session_id=None):
+    """The provider's Session for `session_id` (default: OUTLAW_SESSION), or None without one."""
+    session_id = session_id or current()
+    return Session(session_id, provider) if session_id else None
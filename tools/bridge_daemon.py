@@ -0,0 +1,337 @@
+"""
+OUTLAW EXOTIX // BRIDGE DAEMON
+
+Keeps gemini_bridge and codex_bridge loaded in one long-lived process and serves
+advisor requests over a local Unix socket. The War Room talks to it instead of
+spawning a fresh interpreter (and re-importing the SDKs, re-resolving credentials,
+rebuilding HTTP clients) on every uplink.
+
+One daemon serves one workspace: the socket path is derived from the directory it
+was started in, because the bridges read PROJECT_MEMORY.md and the file listing
+relative to the working directory.
+
+Wire format: every frame is a 4-byte big-endian length followed by a UTF-8 JSON
+object.
+    request:  {"op": "consult", "provider": "gemini" | "codex", "prompt": "...", "stream": bool,
+               "session": "..." | null, "trace": [trace_id, parent_span] | null}
+              {"op": "ping"} | {"op": "shutdown"}
+    response: {"ok": true, "output": "..."} | {"ok": false, "error": "..."}
+              streamed consults send {"chunk": "..."} frames before the final response
+
+Usage:
+    python bridge_daemon.py              # serve the current directory
+    python bridge_daemon.py --stop       # stop the daemon for the current directory
+    python bridge_daemon.py --metrics-port 9465   # also serve Prometheus metrics (see metrics.py)
+"""
+import os
+import sys
+import json
+import socket
+import struct
+import hashlib
+import argparse
+import tempfile
+import threading
+import socketserver
+import io
+from contextlib import contextmanager
+
+import tracing
+import metrics
+import code_index
+
+SOCKET_ENV = "OUTLAW_BRIDGE_SOCKET"
+MAX_FRAME = 16 * 1024 * 1024
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 600
+
+_HEADER = struct.Struct(">I")
+
+
+def socket_path(workdir=None):
+    """Socket for the daemon serving `workdir` (default: cwd). OUTLAW_BRIDGE_SOCKET overrides."""
+    override = os.getenv(SOCKET_ENV)
+    if override:
+        return override
+    workdir = os.path.abspath(workdir or os.getcwd())
+    digest = hashlib.sha1(workdir.encode("utf-8")).hexdigest()[:12]
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(tempfile.gettempdir(), f"outlaw-bridge-{uid}-{digest}.sock")
+
+
+# --- FRAMING ---
+
+def _recv_exact(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-frame")
+        data += chunk
+    return data
+
+
+def send_frame(sock, payload):
+    body = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def recv_frame(sock):
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame too large: {length} bytes")
+    return json.loads(_recv_exact(sock, length).decode("utf-8"))
+
+
+# --- CLIENT ---
+
+class StreamInterrupted(ConnectionError):
+    """The request failed after part of its output was already streamed to the caller."""
+
+
+def call(payload, path=None, timeout=REQUEST_TIMEOUT, on_chunk=None):
+    """
+    Sends one request frame. Returns the response dict, or None if no daemon is listening.
+    Streamed chunk frames are handed to `on_chunk` until the final response arrives.
+    Raises TimeoutError if the daemon accepted the request but stalled for `timeout` seconds,
+    and StreamInterrupted if the connection drops after a chunk was handed over.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+
+    streamed = False
+    with sock:
+        try:
+            sock.settimeout(timeout)
+            send_frame(sock, payload)
+            response = recv_frame(sock)
+            while "chunk" in response:
+                if on_chunk:
+                    streamed = True
+                    on_chunk(response["chunk"])
+                response = recv_frame(sock)
+            return response
+        except TimeoutError:
+            raise
+        except (OSError, ValueError, ConnectionError) as e:
+            # Output already shown: a subprocess fallback would print it all a second time
+            if streamed:
+                raise StreamInterrupted(f"Bridge daemon connection lost mid-stream: {e}") from e
+            return None
+
+
+def consult(provider, prompt, path=None, timeout=REQUEST_TIMEOUT, on_chunk=None, session=None):
+    """
+    Advisor output from the daemon, or None so the caller can fall back to a subprocess.
+    With `on_chunk`, output is streamed to the callback as the provider produces it; once
+    any has been, a failure raises StreamInterrupted instead of returning None.
+    `session` continues that advisor session's conversation (see advisor_session.py).
+    """
+    payload = {"op": "consult", "provider": provider, "prompt": prompt, "stream": on_chunk is not None,
+               "session": session, "trace": list(tracing.current()) if tracing.enabled() else None}
+    forwarded = []
+
+    def forward(chunk):
+        forwarded.append(chunk)
+        on_chunk(chunk)
+
+    response = call(payload, path=path, timeout=timeout, on_chunk=forward if on_chunk else None)
+    if response and not response.get("ok") and forwarded:
+        raise StreamInterrupted(f"Bridge daemon failed mid-stream: {response.get('error', 'unknown error')}")
+    if not response or not response.get("ok"):
+        return None
+    return response.get("output", "")
+
+
+def is_running(path=None):
+    try:
+        response = call({"op": "ping"}, path=path, timeout=CONNECT_TIMEOUT)
+    except TimeoutError:
+        return False
+    return bool(response and response.get("ok"))
+
+
+# --- SERVER ---
+
+class _StreamBuffer(io.StringIO):
+    """Accumulates captured output and optionally forwards each write as it happens."""
+
+    def __init__(self, on_write=None):
+        super().__init__()
+        self._on_write = on_write
+
+    def write(self, s):
+        if self._on_write and s:
+            self._on_write(s)
+        return super().write(s)
+
+
+class _ThreadStdout(io.TextIOBase):
+    """sys.stdout replacement that routes prints from a handler thread into that thread's buffer."""
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def install(self):
+        if sys.stdout is not self:
+            self._fallback = sys.stdout
+            sys.stdout = self
+
+    @contextmanager
+    def capture(self, on_write=None):
+        self.install()
+        buffer = _StreamBuffer(on_write)
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def write(self, s):
+        target = getattr(self._local, "buffer", None) or self._fallback
+        return target.write(s)
+
+    def flush(self):
+        target = getattr(self._local, "buffer", None) or self._fallback
+        target.flush()
+
+
+class BridgeServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, gemini_model="gemini-3-pro", codex_model="gpt-4o", api_key=None, key_file=None):
+        self.gemini_model = gemini_model
+        self.codex_model = codex_model
+        self._gemini = None
+        self._codex = None
+        self._load_bridges(api_key, key_file)
+        self.stdout = _ThreadStdout(sys.stdout)
+
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _BridgeHandler)
+        os.chmod(path, 0o600)
+
+    def _load_bridges(self, api_key, key_file):
+        """Imports each bridge and resolves its credentials once for the daemon's lifetime."""
+        try:
+            import gemini_bridge
+            auth_args = argparse.Namespace(api_key=api_key, key_file=key_file)
+            self._gemini = (gemini_bridge,) + gemini_bridge.resolve_auth(auth_args)
+        except (ImportError, SystemExit) as e:
+            print(f"[DAEMON] Gemini bridge unavailable: {e}")
+
+        try:
+            import codex_bridge
+            key = codex_bridge.load_env_key()
+            client = codex_bridge.make_client(key) if codex_bridge.OPENAI_AVAILABLE and key else None
+            self._codex = (codex_bridge, key, client)
+        except ImportError as e:
+            print(f"[DAEMON] Codex bridge unavailable: {e}")
+
+    def consult(self, provider, prompt, on_write=None, session=None):
+        with self.stdout.capture(on_write) as buffer, tracing.span("daemon", provider=provider):
+            if provider == "gemini" and self._gemini:
+                bridge, key, creds = self._gemini
+                bridge.get_intel(prompt, api_key=key, credentials=creds, model_name=self.gemini_model, session=session)
+            elif provider == "codex" and self._codex:
+                bridge, key, client = self._codex
+                bridge.query_codex(prompt, key, self.codex_model, client=client, session=session)
+            else:
+                raise ValueError(f"Provider not loaded: {provider}")
+        return buffer.getvalue()
+
+
+class _BridgeHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            request = recv_frame(self.request)
+        except (ValueError, ConnectionError) as e:
+            print(f"[DAEMON] Bad frame: {e}")
+            return
+
+        op = request.get("op")
+        try:
+            if op == "ping":
+                response = {"ok": True}
+            elif op == "consult":
+                on_write = None
+                if request.get("stream"):
+                    on_write = lambda chunk: send_frame(self.request, {"chunk": chunk})
+                # Spans recorded for this request join the caller's trace
+                with tracing.attach(request.get("trace")):
+                    output = self.server.consult(request.get("provider"), request.get("prompt", ""), on_write,
+                                                 request.get("session"))
+                response = {"ok": True, "output": output}
+            elif op == "shutdown":
+                response = {"ok": True}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                response = {"ok": False, "error": f"Unknown op: {op}"}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+
+        try:
+            send_frame(self.request, response)
+        except OSError:
+            pass
+
+
+def serve(path=None, **kwargs):
+    path = path or socket_path()
+    server = BridgeServer(path, **kwargs)
+    server.stdout.install()
+    print(f"[DAEMON] Bridge daemon listening on {path} for {os.getcwd()}")
+    try:
+        server.serve_forever()
+    finally:
+        sys.stdout = server.stdout._fallback
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Bridge Daemon")
+    parser.add_argument("--socket", "-s", help="Unix socket path (default: derived from the current directory)")
+    parser.add_argument("--gemini-model", default="gemini-3-pro", help="Gemini Model ID served by the daemon")
+    parser.add_argument("--codex-model", default="gpt-4o", help="OpenAI Model ID served by the daemon")
+    parser.add_argument("--api-key", "-k", help="Google API Key (overrides ADC)")
+    parser.add_argument("--key-file", "-f", help="Path to a file containing the Google API Key")
+    parser.add_argument("--stop", action="store_true", help="Stop the daemon serving this directory")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("OUTLAW_METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("ERROR: Unix sockets are not available on this platform.")
+        sys.exit(1)
+
+    if args.stop:
+        if is_running(args.socket) and call({"op": "shutdown"}, path=args.socket, timeout=CONNECT_TIMEOUT):
+            print("[DAEMON] Shutdown requested.")
+        else:
+            print("[DAEMON] No daemon running.")
+        sys.exit(0)
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"[DAEMON] Metrics: http://127.0.0.1:{args.metrics_port}/metrics")
+    # Consults search the code index; it is kept current here, off their path
+    if code_index.enabled():
+        code_index.watch()
+    serve(args.socket, gemini_model=args.gemini_model, codex_model=args.codex_model,
+          api_key=args.api_key, key_file=args.key_file)
@@ -0,0 +1,57 @@
+"""
+OUTLAW EXOTIX // CACHE STORE
+
+Where the tools keep derived state on disk, and how they open and write it.
+
+Environment:
+    OUTLAW_CACHE_DIR   cache directory (default: ~/.claude/cache)
+"""
+import os
+import json
+import hashlib
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache")
+
+
+def cache_dir(*parts):
+    """Path under the cache directory."""
+    return os.path.join(os.getenv("OUTLAW_CACHE_DIR", DEFAULT_DIR), *parts)
+
+
+def path_digest(path):
+    """Short stable name for a directory, for per-workspace cache files."""
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+
+
+@contextmanager
+def open_db(path, schema):
+    """One transaction on the SQLite database at `path`; committed on success, always closed."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(schema)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def write_json(path, data, **dump_args):
+    """Replaces `path` with `data` as JSON; readers see the old file or the new one, never half of either."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_args)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,229 @@
+"""
+OUTLAW EXOTIX // CLAUDE SESSION
+
+One long-lived Claude CLI process per persona, driven through its streaming JSON mode
+(--input-format stream-json --output-format stream-json). Each War Room turn is one
+user message written to the process's stdin; the reply is read back from the event
+stream until that turn's "result" event. CLI startup and session init are paid once
+per persona instead of once per turn, and Claude keeps the conversation across turns.
+
+The process is restarted automatically: on the next turn after it dies, and when the
+persona (system prompt) changes. A turn that could not be delivered to a dead process
+is retried once on a fresh one. A turn interrupted by a crash is reported as failed and
+never replayed, because Claude runs with --dangerously-skip-permissions and may already
+have run some of its tools; the next turn gets a fresh process.
+
+Wire format (one JSON object per line):
+    in:   {"type": "user", "message": {"role": "user", "content": [{"type": "text", "text": "..."}]}}
+    out:  {"type": "system", ...} | {"type": "assistant", "message": {"content": [{"type": "text", ...}]}}
+          {"type": "result", "result": "...", "is_error": bool, ...}   # ends the turn
+"""
+import os
+import json
+import queue
+import shutil
+import tempfile
+import threading
+import subprocess
+
+CLAUDE_EXE = shutil.which("claude") or "claude"
+STOP_TIMEOUT = 5
+
+# Personas go through an in-memory file where the OS supports it (Linux), else a temp file
+HAS_MEMFD = hasattr(os, "memfd_create") and os.path.isdir("/dev/fd")
+
+
+class SessionError(RuntimeError):
+    """Claude reported an error for the turn, or its process could not be kept alive."""
+
+
+def remove_temp_file(path):
+    if path and os.path.exists(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def write_system_prompt(system_prompt):
+    """
+    Makes `system_prompt` readable by the Claude CLI as an @file without touching disk:
+    an anonymous in-memory file (memfd) where the OS has one, a temp file otherwise.
+    Returns (path, fd); pass `fd` to the child and free both with release_system_prompt.
+    """
+    if not system_prompt:
+        return None, None
+    if HAS_MEMFD:
+        fd = os.memfd_create("outlaw-persona")
+        try:
+            data = system_prompt.encode("utf-8")
+            while data:
+                data = data[os.write(fd, data):]
+        except OSError:
+            os.close(fd)
+            raise
+        # The child inherits the descriptor (pass_fds) and opens it by path
+        return f"/dev/fd/{fd}", fd
+
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as sf:
+        sf.write(system_prompt)
+    return sf.name, None
+
+
+def release_system_prompt(path, fd):
+    if fd is not None:
+        os.close(fd)
+    else:
+        remove_temp_file(path)
+
+
+def user_message(text):
+    return {"type": "user", "message": {"role": "user", "content": [{"type": "text", "text": text}]}}
+
+
+def _text_blocks(event):
+    content = (event.get("message") or {}).get("content") or []
+    if isinstance(content, str):
+        return [content]
+    return [block.get("text", "") for block in content if isinstance(block, dict) and block.get("type") == "text"]
+
+
+class ClaudeSession:
+    """A persistent Claude CLI process for one persona."""
+
+    def __init__(self, system_prompt=None, exe=None, extra_args=()):
+        self.system_prompt = system_prompt
+        self.exe = exe or CLAUDE_EXE
+        self.extra_args = list(extra_args)
+        self.process = None
+        self.restarts = 0
+        self._started = False
+        self._events = None
+        self._system = (None, None)
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def command(self):
+        cmd = [self.exe, "-p", "--input-format", "stream-json", "--output-format", "stream-json",
+               "--verbose", "--dangerously-skip-permissions"]
+        if self._system[0]:
+            cmd.extend(["--system-prompt", f"@{self._system[0]}"])
+        return cmd + self.extra_args
+
+    def start(self):
+        self.stop()
+        if self._started:
+            self.restarts += 1
+        self._started = True
+        self._system = write_system_prompt(self.system_prompt)
+        fd = self._system[1]
+        try:
+            self.process = subprocess.Popen(self.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, text=True, encoding='utf-8', bufsize=1,
+                                            pass_fds=(fd,) if fd is not None else ())
+        except Exception:
+            release_system_prompt(*self._system)
+            self._system = (None, None)
+            raise
+
+        # A reader thread turns stdout into events, so a turn can wait with a timeout
+        self._events = queue.Queue()
+        threading.Thread(target=self._read, args=(self.process.stdout, self._events), daemon=True).start()
+
+    @staticmethod
+    def _read(stdout, events):
+        for line in stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.put(json.loads(line))
+            except ValueError:
+                continue  # Non-JSON noise (warnings, banners) is not part of the protocol
+        events.put(None)
+
+    def stop(self):
+        """Ends the process (closing stdin lets the CLI exit cleanly) and frees the persona."""
+        process, self.process = self.process, None
+        if process is not None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            try:
+                process.wait(timeout=STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if self._system != (None, None):
+            release_system_prompt(*self._system)
+            self._system = (None, None)
+
+    def set_persona(self, system_prompt):
+        """Switches persona; the process restarts on the next turn only if the prompt changed."""
+        if system_prompt != self.system_prompt:
+            self.system_prompt = system_prompt
+            self.stop()
+
+    def send(self, prompt, on_chunk=None, timeout=None):
+        """
+        Runs one turn and returns Claude's reply. Assistant text is handed to `on_chunk`
+        as it arrives. Raises SessionError for an error result or a process that died
+        during the turn, TimeoutError if `timeout` seconds pass without an event.
+        """
+        with self._lock:
+            for attempt in (1, 2):
+                if not self.alive:
+                    self.start()
+                try:
+                    return self._turn(prompt, on_chunk, timeout)
+                except TimeoutError:
+                    # Late events from the abandoned turn must not leak into the next one
+                    self.process.kill()
+                    self.stop()
+                    raise
+                except BrokenPipeError as e:
+                    # Died before the turn was delivered: safe to send it to a fresh process
+                    self.stop()
+                    if attempt == 2:
+                        raise SessionError(f"Claude session process exited: {e}")
+                except EOFError as e:
+                    # Died mid-turn: its tools may have run, so the turn is not replayed
+                    self.stop()
+                    raise SessionError(f"Claude session process exited mid-turn ({e}); "
+                                       "a fresh process takes the next turn")
+
+    def _turn(self, prompt, on_chunk, timeout):
+        try:
+            self.process.stdin.write(json.dumps(user_message(prompt)) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as e:
+            raise BrokenPipeError(str(e))
+
+        chunks = []
+        while True:
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No reply from Claude within {timeout:g}s")
+            if event is None:
+                raise EOFError(f"exit code {self.process.wait()}")
+
+            kind = event.get("type")
+            if kind == "assistant":
+                for text in _text_blocks(event):
+                    chunks.append(text)
+                    if on_chunk:
+                        on_chunk(text)
+            elif kind == "result":
+                if event.get("is_error"):
+                    raise SessionError(event.get("result") or event.get("subtype") or "error")
+                result = event.get("result")
+                return result if isinstance(result, str) else "".join(chunks)
+
+    def close(self):
+        with self._lock:
+            self.stop()
@@ -0,0 +1,317 @@
+"""
+OUTLAW EXOTIX // CODE INDEX
+
+Trigram index (SQLite, under the cache dir) over the workspace's source files, so
+advisors get the code a question is about. Hits are confirmed against the live file
+and returned as ranked snippets. Config formats and workspace_map.EXCLUDED_NAMES are
+never indexed. The bridge daemon and the War Room update it in the background
+(watch()); a bridge run on its own catches it up within OUTLAW_CODE_INDEX_BUDGET.
+
+Environment:
+    OUTLAW_CACHE_DIR             cache directory (default: ~/.claude/cache)
+    OUTLAW_CODE_INDEX=0          disable code snippets in advisor context
+    OUTLAW_CODE_INDEX_BUDGET     seconds of indexing work per update() call (default: 2)
+    OUTLAW_CODE_INDEX_INTERVAL   seconds between background updates (default: 30)
+
+Usage:
+    python code_index.py "where is the retry backoff computed"
+    python code_index.py --update
+"""
+import os
+import re
+import sys
+import math
+import time
+import argparse
+import threading
+
+import cache_store
+import workspace_map
+
+DEFAULT_BUDGET = 1000  # tokens of snippets per prompt
+MAX_FILE_BYTES = 256 * 1024
+CONTEXT_LINES = 6
+MAX_CANDIDATES = 20
+UPDATE_INTERVAL = float(os.getenv("OUTLAW_CODE_INDEX_INTERVAL", "30"))
+
+SOURCE_EXTENSIONS = {
+    ".py", ".pyi", ".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".go", ".rs", ".java", ".kt",
+    ".scala", ".swift", ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".rb", ".php", ".lua", ".sh",
+    ".bash", ".ps1", ".psm1", ".sql", ".html", ".css", ".scss", ".vue", ".svelte",
+}
+
+_WORD = re.compile(r"[a-z0-9_]{3,}")
+_QUERY_STOPWORDS = frozenset(
+    "and are the for from has have how its not this that was what when where which who why "
+    "will with you your can does into about should would could there their them then than".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    grams TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grams (
+    gram TEXT NOT NULL,
+    file INTEGER NOT NULL,
+    PRIMARY KEY (gram, file)
+) WITHOUT ROWID;
+"""
+
+
+def enabled():
+    return os.getenv("OUTLAW_CODE_INDEX", "1") != "0"
+
+
+def indexable(path):
+    """True for a source file whose snippets may be sent to an advisor."""
+    name = path.rpartition("/")[2]
+    return "." + name.rpartition(".")[2].lower() in SOURCE_EXTENSIONS and not workspace_map.excluded(name)
+
+
+def index_path(root):
+    return cache_store.cache_dir("code_index", f"{cache_store.path_digest(root)}.sqlite")
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def trigrams(text):
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        for i in range(len(word) - 2):
+            grams.add(word[i:i + 3])
+    return grams
+
+
+def query_terms(prompt):
+    """Distinct searchable terms of a prompt, in order of appearance."""
+    terms = []
+    for word in _WORD.findall(prompt.lower()):
+        if word not in _QUERY_STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def _read_source(path):
+    """Text of a source file, or None for binaries and unreadable files."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return None
+    if len(data) > MAX_FILE_BYTES or b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def _drop(conn, file_id, grams):
+    conn.executemany("DELETE FROM grams WHERE gram = ? AND file = ?", [(g, file_id) for g in grams])
+    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+
+def update(root=".", time_budget=None):
+    """Re-indexes changed source files under `root` for up to `time_budget` seconds. Returns the count."""
+    if time_budget is None:
+        time_budget = float(os.getenv("OUTLAW_CODE_INDEX_BUDGET", "2"))
+    deadline = time.monotonic() + time_budget
+    root = os.path.abspath(root)
+
+    # workspace_map only notices in-place edits when a directory changes, so stat sources directly
+    sources = {}
+    for path, size, _ in workspace_map.list_files(root):
+        if size <= MAX_FILE_BYTES and indexable(path):
+            try:
+                st = os.stat(f"{root}{os.sep}{path}")
+                sources[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+
+    indexed = 0
+    with cache_store.open_db(index_path(root), _SCHEMA) as conn:
+        known = {path: (file_id, mtime, size)
+                 for file_id, path, mtime, size in conn.execute("SELECT id, path, mtime, size FROM files")}
+
+        def forget(file_id):
+            (grams,) = conn.execute("SELECT grams FROM files WHERE id = ?", (file_id,)).fetchone()
+            _drop(conn, file_id, grams.split())
+
+        for path, (file_id, _, _) in known.items():
+            if path not in sources:
+                forget(file_id)
+
+        # Newest first, so an interrupted first build covers what is being worked on
+        stale = [(stamp, path) for path, stamp in sources.items()
+                 if path not in known or known[path][1:] != stamp]
+        for (mtime, size), path in sorted(stale, reverse=True):
+            if time.monotonic() > deadline:
+                break
+            if path in known:
+                forget(known[path][0])
+            text = _read_source(f"{root}{os.sep}{path}")
+            grams = trigrams(text) if text is not None else set()
+            cursor = conn.execute(
+                "INSERT INTO files (path, mtime, size, grams) VALUES (?, ?, ?, ?)",
+                (path, mtime, size, " ".join(sorted(grams))),
+            )
+            conn.executemany("INSERT INTO grams (gram, file) VALUES (?, ?)", [(g, cursor.lastrowid) for g in grams])
+            indexed += 1
+    if indexed < len(stale) and os.getenv("OUTLAW_VERBOSE") == "1":
+        print(f"[code_index] {len(stale) - indexed} files not indexed yet; run code_index.py --update",
+              file=sys.stderr)
+    return indexed
+
+
+def _candidates(conn, term):
+    """Ids of files containing every trigram of `term`."""
+    grams = sorted(trigrams(term))
+    if not grams:
+        return set()
+    rows = conn.execute(
+        f"SELECT file FROM grams WHERE gram IN ({','.join('?' * len(grams))}) GROUP BY file HAVING COUNT(*) = ?",
+        grams + [len(grams)],
+    )
+    return {row[0] for row in rows}
+
+
+def _best_window(lines, weights):
+    """(score, start, end) of the best CONTEXT_LINES-padded window of `lines` for weighted terms."""
+    lowered = [line.lower() for line in lines]
+    hits = [i for i, line in enumerate(lowered) if any(term in line for term in weights)]
+    best = None
+    for i in hits:
+        start, end = max(0, i - CONTEXT_LINES), min(len(lines), i + CONTEXT_LINES + 1)
+        window = "\n".join(lowered[start:end])
+        present = [term for term in weights if term in window]
+        score = sum(weights[term] for term in present) + 0.1 * sum(window.count(term) for term in present)
+        if best is None or score > best[0]:
+            best = (score, start, end)
+    return best
+
+
+def search(prompt, root=".", limit=5):
+    """Best snippets for `prompt` as (score, path, first line, last line, text), best first."""
+    terms = query_terms(prompt)
+    if not terms or not os.path.exists(index_path(root)):
+        return []
+    root = os.path.abspath(root)
+
+    with cache_store.open_db(index_path(root), _SCHEMA) as conn:
+        (total,) = conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        if not total:
+            return []
+        weights, scores = {}, {}
+        for term in terms:
+            files = _candidates(conn, term)
+            if not files:
+                continue
+            weights[term] = math.log(1 + total / len(files))
+            for file_id in files:
+                scores[file_id] = scores.get(file_id, 0.0) + weights[term]
+        best = sorted(scores, key=lambda f: -scores[f])[:MAX_CANDIDATES]
+        paths = dict(conn.execute(
+            f"SELECT id, path FROM files WHERE id IN ({','.join('?' * len(best))})", best
+        ).fetchall()) if best else {}
+
+    snippets = []
+    for file_id in best:
+        path = paths[file_id]
+        if not indexable(path):
+            continue  # Indexed by an older, broader version: never sent
+        # Trigram hits are candidates only: confirm against the live file
+        text = _read_source(os.path.join(root, path))
+        if not text:
+            continue
+        lines = text.splitlines()
+        window = _best_window(lines, weights)
+        if window:
+            score, start, end = window
+            snippets.append((score, path, start + 1, end, "\n".join(lines[start:end])))
+    snippets.sort(key=lambda s: -s[0])
+    return snippets[:limit]
+
+
+def relevant_snippets(prompt, root=".", budget=DEFAULT_BUDGET):
+    """Best snippets for `prompt` within `budget` tokens, headed with path and lines; "" if none."""
+    if not watched(root):
+        update(root)  # No background updater in this process: catch up within the budget
+    blocks, used = [], 0
+    for _, path, first, last, text in search(prompt, root, limit=MAX_CANDIDATES):
+        block = f"--- {path}:{first}-{last}\n{text}"
+        cost = estimate_tokens(block)
+        if used + cost > budget:
+            continue
+        blocks.append(block)
+        used += cost
+    return "\n".join(blocks)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def watch(root=".", interval=None):
+    """Keeps the index for `root` current from one background thread per root; returns it."""
+    root = os.path.abspath(root)
+    interval = UPDATE_INTERVAL if interval is None else interval
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                # Nobody waits on this thread, so a first build runs to completion
+                update(root, time_budget=float("inf"))
+            except Exception:
+                pass  # Derived data: the next pass tries again
+            stop.wait(interval)
+
+    with _watchers_lock:
+        running = _watchers.get(root)
+        if running and running[0].is_alive():
+            return running[0]
+        thread = threading.Thread(target=loop, name="outlaw-code-index", daemon=True)
+        _watchers[root] = (thread, stop)
+        thread.start()
+    return thread
+
+
+def watched(root="."):
+    """True when this process keeps the index for `root` current in the background."""
+    with _watchers_lock:
+        running = _watchers.get(os.path.abspath(root))
+    return bool(running) and running[0].is_alive()
+
+
+def unwatch(root="."):
+    """Stops the background updater for `root`, if there is one."""
+    with _watchers_lock:
+        running = _watchers.pop(os.path.abspath(root), None)
+    if running:
+        running[1].set()
+        running[0].join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Code Index")
+    parser.add_argument("query", nargs="*", help="Show the snippets that best match a query")
+    parser.add_argument("--root", "-r", default=".", help="Workspace root (default: current directory)")
+    parser.add_argument("--update", action="store_true", help="Index new and changed files, without a time limit")
+
+    args = parser.parse_args()
+
+    if args.update:
+        start = time.perf_counter()
+        count = update(args.root, time_budget=float("inf"))
+        print(f"Indexed {count} files in {time.perf_counter() - start:.1f}s -> {index_path(args.root)}")
+    elif args.query:
+        update(args.root)
+        for score, path, first, last, text in search(" ".join(args.query), args.root):
+            print(f"--- {score:.2f} {path}:{first}-{last}")
+            print(text)
+    else:
+        parser.print_help()
+        sys.exit(1)
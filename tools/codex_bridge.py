@@ -3,6 +3,15 @@ import sys
 import argparse
 import logging
 
+import advisor_cache
+import advisor_session
+import context_packer
+import tracing
+import profiling
+import metrics
+import rate_limiter
+from context_builder import get_context
+
 # Try importing openai, handle missing dependency gracefully
 try:
     from openai import OpenAI
@@ -10,30 +19,6 @@ try:
 except ImportError:
     OPENAI_AVAILABLE = False
 
-def get_context():
-    context = ""
-    
-    # 1. SPATIAL AWARENESS: List files in the shared directory
-    try:
-        files = os.listdir('.')
-        # Limit to 50 files to save tokens
-        file_list = ', '.join(files[:50])
-        if len(files) > 50: file_list += "..."
-        context += f"\n[SHARED DIRECTORY CONTENT]: {file_list}"
-    except Exception:
-        pass
-
-    # 2. HISTORICAL AWARENESS: Read the Project Memory Log
-    if os.path.exists("PROJECT_MEMORY.md"):
-        try:
-            with open("PROJECT_MEMORY.md", "r", encoding="utf-8") as f:
-                memory = f.read()[-3000:] 
-                context += f"\n\n[SHARED PROJECT MEMORY (Recent Activity)]:\n{memory}\n"
-        except Exception as e:
-            context += f"\n[MEMORY READ ERROR]: {e}"
-            
-    return context
-
 def load_env_key():
     """Check Env Var, Local .env, and Global Key File for OPENAI_API_KEY."""
     # 1. Environment Variable
@@ -68,7 +53,11 @@ def load_env_key():
 
     return None
 
-def query_codex(prompt, api_key, model="gpt-4o"):
+def make_client(api_key):
+    """OpenAI client without the SDK's own retries: rate_limiter.call retries against the shared quota."""
+    return OpenAI(api_key=api_key, max_retries=0)
+
+def query_codex(prompt, api_key, model="gpt-4o", client=None, use_cache=True, session=None):
     if not OPENAI_AVAILABLE:
         print("ERROR: 'openai' python package is missing. Install with: pip install openai")
         return
@@ -77,9 +66,9 @@ def query_codex(prompt, api_key, model="gpt-4o"):
         print("ERROR: OPENAI_API_KEY not found via Flag, Env, or .env.")
         return
 
-    client = OpenAI(api_key=api_key)
-    
-    context_data = get_context()
+    # Long-lived callers (bridge_daemon) pass their own client to reuse its HTTP pool
+    if client is None:
+        client = make_client(api_key)
     
     system_prompt = (
         "You are CODEX, an elite programming intelligence within the Outlaw Exotix suite. "
@@ -87,20 +76,72 @@ def query_codex(prompt, api_key, model="gpt-4o"):
         "You do not explain trivialities. You output high-performance solutions. "
         "You have access to the current directory context below."
     )
+
+    # Pack the workspace context into what is left of the model's token budget
+    budget = context_packer.budget_for(model)
+    report = context_packer.measure(system=system_prompt, request=prompt)
+    with tracing.span("context", provider="codex") as span:
+        # In a War Room session only context this conversation has not seen yet is sent
+        conversation = advisor_session.open_session("codex", session)
+        if conversation:
+            context_data = conversation.context(prompt, budget - context_packer.used(report), report)
+        else:
+            context_data = get_context(prompt, budget=budget - context_packer.used(report), report=report)
+        span.set(tokens=context_packer.used(report), session=bool(conversation))
+    metrics.CONTEXT_BYTES.observe(len(context_data.encode("utf-8")), provider="codex")
+    context_packer.log_report(f"codex/{model}", report, budget)
     
     user_message = f"CONTEXT:{context_data}\n\nTASK: {prompt}"
+    history = [{"role": role, "content": text} for role, text in conversation.history()] if conversation else []
+
+    # Identical task against an unchanged workspace: answer from the local cache
+    # Keyed on the full workspace context, not the conversation, so repeats hit mid-session too
+    cache_key = advisor_cache.make_key("codex", model, system_prompt, prompt,
+                                       conversation.context_key if conversation else context_data)
+    if use_cache:
+        with tracing.span("cache", provider="codex") as span:
+            cached = advisor_cache.get(cache_key)
+            span.set(hit=cached is not None)
+        metrics.ADVISOR_CACHE.inc(provider="codex", result="miss" if cached is None else "hit")
+        if cached is not None:
+            print(cached)
+            if conversation:
+                conversation.record(user_message, cached)
+            return
 
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.2 # Low temp for precise coding
-        )
-        print(response.choices[0].message.content)
+        with tracing.span("provider", provider="codex", model=model) as span:
+            # Shared with every other agent's bridges: waits for quota, retries 429s and 5xx
+            response = rate_limiter.call("codex", model, lambda: client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    *history,
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.2, # Low temp for precise coding
+                stream=True,
+                stream_options={"include_usage": True}  # usage arrives in a final chunk with no choices
+            ))
+            # Print deltas as they arrive so callers see the first tokens immediately
+            chunks = []
+            for chunk in response:
+                usage = getattr(chunk, "usage", None)
+                if usage is not None:
+                    metrics.count_tokens("codex", getattr(usage, "prompt_tokens", None),
+                                         getattr(usage, "completion_tokens", None))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not chunks:
+                        span.mark("first_chunk_ms")
+                    chunks.append(chunk.choices[0].delta.content)
+                    print(chunk.choices[0].delta.content, end="", flush=True)
+            print()
+        if use_cache:
+            advisor_cache.put(cache_key, "".join(chunks))
+        if conversation:
+            conversation.record(user_message, "".join(chunks))
     except Exception as e:
+        metrics.count_error("codex", e)
         print(f"CODEX UPLINK ERROR: {e}")
 
 if __name__ == "__main__":
@@ -109,8 +150,16 @@ if __name__ == "__main__":
     parser.add_argument("prompt", nargs="*", help="The coding task for Codex")
     parser.add_argument("--api-key", "-k", help="Directly provide the OpenAI API Key")
     parser.add_argument("--model", "-m", default="gpt-4o", help="OpenAI Model ID (default: gpt-4o)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the advisor response cache")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Report packed context sizes on stderr")
+    parser.add_argument("--profile", action="store_true", help="Profile this run; see tools/profiling.py")
 
+    tracing.record_startup()
     args = parser.parse_args()
+    if args.verbose:
+        os.environ["OUTLAW_VERBOSE"] = "1"
+    if args.profile:
+        os.environ[profiling.ENABLE_ENV] = "1"
     
     if not args.prompt:
         print("Usage: python codex_bridge.py [OPTIONS] <prompt>")
@@ -118,7 +167,12 @@ if __name__ == "__main__":
 
     prompt_text = " ".join(args.prompt)
     
-    # Resolve Key
-    resolved_key = args.api_key if args.api_key else load_env_key()
-    
-    query_codex(prompt_text, resolved_key, args.model)
+    with profiling.profile("codex_bridge") as run_profile:
+        # Resolve Key
+        with tracing.span("auth", provider="codex"):
+            resolved_key = args.api_key if args.api_key else load_env_key()
+
+        query_codex(prompt_text, resolved_key, args.model, use_cache=not args.no_cache)
+    # stdout carries the advice: the report goes to stderr
+    if run_profile:
+        print(run_profile.summary, file=sys.stderr)
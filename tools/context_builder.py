@@ -0,0 +1,135 @@
+"""
+OUTLAW EXOTIX // CONTEXT BUILDER
+
+The workspace context block the advisors see: workspace map, project memory and, for
+a prompt, relevant source snippets. Each section is cached per workspace and keyed on
+the mtime and size of what it was built from, so asking again about an unchanged
+workspace only costs stat() calls.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import memory_reader
+import memory_index
+import workspace_map
+import code_index
+import context_packer
+import tracing
+from context_packer import Section, REQUIRED, MEMORY, CODE, DIRECTORY
+
+MEMORY_BUDGET = 3000
+CODE_BUDGET = code_index.DEFAULT_BUDGET
+MAX_CACHED = 128
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _stamp(*paths):
+    """(mtime_ns, size) of each path, None for missing ones. Any change invalidates a section."""
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def _cached(key, stamp, build):
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] == stamp:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    value = build()
+
+    with _cache_lock:
+        _cache[key] = (stamp, value)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return value
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+    workspace_map.clear_cache()
+
+
+def directory_section(directory="."):
+    """Ranked, .gitignore-aware map of `directory` (see workspace_map.py), within its byte budget."""
+    # workspace_map keeps its own incremental cache keyed on every directory's mtime
+    return Section("directory", workspace_map.summary(directory), DIRECTORY, "head",
+                   "\n[SHARED DIRECTORY CONTENT]:\n")
+
+
+def memory_section(prompt=None, path=memory_reader.MEMORY_FILE):
+    """Project memory for `prompt` within MEMORY_BUDGET: best-matching entries, else the latest."""
+    def build():
+        # Entries most relevant to the query (BM25)
+        memory = memory_index.relevant_context(prompt, path, MEMORY_BUDGET) if prompt else None
+        if memory:
+            return Section("memory", f"{memory}\n", MEMORY, "tail",
+                           "\n\n[SHARED PROJECT MEMORY (Relevant Entries)]:\n")
+        # No index yet: seek-read only the tail to keep context fresh but concise
+        memory = memory_reader.read_tail(path, MEMORY_BUDGET)
+        return Section("memory", f"{memory}\n", MEMORY, "tail",
+                       "\n\n[SHARED PROJECT MEMORY (Recent Activity)]:\n")
+
+    stamp = _stamp(path, memory_reader.manifest_path(path), memory_reader.index_path(path))
+    return _cached(("memory", os.path.abspath(path), prompt), stamp, build)
+
+
+def code_section(prompt, root="."):
+    """Source snippets relevant to `prompt` from the trigram index (code_index.py), within CODE_BUDGET tokens."""
+    # code_index re-reads only files whose mtime changed, so it needs no cache here
+    snippets = code_index.relevant_snippets(prompt, root, CODE_BUDGET)
+    return Section("code", f"{snippets}\n" if snippets else "", CODE, "head", "\n\n[RELEVANT CODE]:\n")
+
+
+def get_sections(prompt=None):
+    """The workspace context as context_packer Sections, in prompt order."""
+    sections = []
+
+    # 1. SPATIAL AWARENESS: Map the shared directory
+    try:
+        with tracing.span("context.map"):
+            sections.append(directory_section("."))
+    except Exception:
+        pass
+
+    # 2. HISTORICAL AWARENESS: Read the Project Memory Log
+    # This is the file Claude writes to. The advisors read it too.
+    if os.path.exists(memory_reader.MEMORY_FILE):
+        try:
+            with tracing.span("context.memory"):
+                sections.append(memory_section(prompt))
+        except Exception as e:
+            sections.append(Section("memory", "", REQUIRED, "head", f"\n[MEMORY READ ERROR]: {e}"))
+
+    # 3. CODE AWARENESS: Attach the source the query is most likely about
+    if prompt and code_index.enabled():
+        try:
+            with tracing.span("context.code"):
+                section = code_section(prompt)
+            if section.text:
+                sections.append(section)
+        except Exception:
+            pass
+
+    return sections
+
+
+def get_context(prompt=None, budget=None, report=None):
+    """Workspace context for an advisor prompt, packed into `budget` tokens when given (sizes go to `report`)."""
+    sections = get_sections(prompt)
+    if budget is not None:
+        sections, rows = context_packer.pack(sections, budget)
+        if report is not None:
+            report.extend(rows)
+    return "".join(context_packer.render(s) for s in sections)
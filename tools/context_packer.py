@@ -0,0 +1,172 @@
+"""
+OUTLAW EXOTIX // CONTEXT PACKER
+
+Fits prompt sections into a per-model token budget. Every prompt the suite assembles
+(the bridges' advisor prompts, the War Room's Claude prompt) is built from Sections
+with a priority; when the total is over budget the least important sections are
+trimmed first (equal priorities give up tokens in proportion to their size), and
+REQUIRED sections (persona, request) are never touched.
+
+Trimming keeps the useful end of a section: the head of a directory map or advice,
+the tail of the memory log (its most recent entries), and marks the cut. Nothing is
+summarized by a model, since that would cost the round trip this is meant to save.
+
+Token counts come from a fast offline estimate (no tokenizer download, no network):
+roughly one token per four letters of a word, per three digits, and per symbol.
+
+Environment:
+    OUTLAW_CONTEXT_BUDGET  override every model's budget (tokens)
+    OUTLAW_VERBOSE=1       report packed sizes on stderr
+"""
+import os
+import re
+import sys
+from collections import namedtuple
+
+# Priorities: lower is more important. REQUIRED sections are never trimmed.
+REQUIRED = 0
+ADVICE = 1
+MEMORY = 2
+CODE = 3
+DIRECTORY = 4
+
+DEFAULT_BUDGET = 8000
+# Input tokens we are willing to send per request, by model prefix; first match wins.
+# Well under each context window: the point is latency, not filling the window.
+MODEL_BUDGETS = [
+    ("gpt-4o", 16000),
+    ("gpt-4", 6000),
+    ("gpt-3.5", 12000),
+    ("gemini", 24000),
+    ("claude", 24000),
+]
+MIN_SECTION_TOKENS = 24  # below this a trimmed section is dropped rather than kept as a stub
+
+Section = namedtuple("Section", ["name", "text", "priority", "keep", "header"])
+Section.__new__.__defaults__ = (REQUIRED, "head", "")
+
+_WORDS = re.compile(r"[A-Za-z]+")
+_DIGITS = re.compile(r"\d+")
+_SYMBOLS = re.compile(r"[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text):
+    """Approximate BPE token count of `text`. An estimate for budgeting, not an exact count."""
+    if not text:
+        return 0
+    tokens = sum((len(word) + 3) // 4 for word in _WORDS.findall(text))
+    tokens += sum((len(run) + 2) // 3 for run in _DIGITS.findall(text))
+    tokens += len(_SYMBOLS.findall(text))
+    return tokens
+
+
+def budget_for(model=None):
+    override = os.getenv("OUTLAW_CONTEXT_BUDGET")
+    if override:
+        try:
+            return int(override)
+        except ValueError:
+            pass
+    model = (model or "").lower()
+    for prefix, budget in MODEL_BUDGETS:
+        if model.startswith(prefix):
+            return budget
+    return DEFAULT_BUDGET
+
+
+def verbose():
+    return os.getenv("OUTLAW_VERBOSE", "0") == "1"
+
+
+def render(section):
+    return section.header + section.text
+
+
+def truncate(text, tokens, keep="head"):
+    """`text` cut to about `tokens` tokens (marker included), keeping its head or tail, on a line boundary when possible."""
+    if tokens <= 0:
+        return ""
+    size = estimate_tokens(text)
+    if size <= tokens:
+        return text
+
+    marker = f"[... {size - tokens} tokens trimmed ...]"
+    room = tokens - estimate_tokens(marker)
+    if room <= 0:
+        return ""
+    chars = max(1, len(text) * room // size)
+    while True:
+        cut = text[:chars] if keep == "head" else text[-chars:]
+        if estimate_tokens(cut) <= room or chars == 1:
+            break
+        chars = max(1, chars * 9 // 10)
+
+    # Prefer whole lines when that only loses a little
+    if keep == "head":
+        newline = cut.rfind("\n")
+        if newline > len(cut) // 2:
+            cut = cut[:newline]
+        return f"{cut}\n{marker}\n"
+    newline = cut.find("\n")
+    if 0 <= newline < len(cut) // 2:
+        cut = cut[newline + 1:]
+    return f"{marker}\n{cut}"
+
+
+def pack(sections, budget):
+    """
+    Fits `sections` into `budget` tokens. Returns (packed, report): the sections in
+    their original order with trimmed text (empty sections dropped), and one
+    (name, tokens before, tokens after) row per input section.
+    """
+    sizes = [estimate_tokens(render(s)) for s in sections]
+    allowed = list(sizes)
+    total = sum(sizes)
+
+    # Least important first; each priority group gives up tokens in proportion to its size
+    for priority in sorted({s.priority for s in sections if s.priority != REQUIRED}, reverse=True):
+        if total <= budget:
+            break
+        group = [i for i, s in enumerate(sections) if s.priority == priority]
+        group_total = sum(allowed[i] for i in group)
+        keep = max(0, group_total - (total - budget))
+        for i in group:
+            share = allowed[i] * keep // group_total if group_total else 0
+            if share < MIN_SECTION_TOKENS:
+                share = 0
+            total -= allowed[i] - share
+            allowed[i] = share
+
+    packed, report = [], []
+    for section, size, share in zip(sections, sizes, allowed):
+        if share < size:
+            header_tokens = estimate_tokens(section.header)
+            text = truncate(section.text, share - header_tokens, section.keep) if share > header_tokens else ""
+            section = section._replace(text=text)
+        kept = bool(section.text) or section.priority == REQUIRED
+        if kept:
+            packed.append(section)
+        report.append((section.name, size, estimate_tokens(render(section)) if kept else 0))
+    return packed, report
+
+
+def measure(**parts):
+    """Report rows for fixed prompt parts that are sent as-is, e.g. measure(system=..., request=...)."""
+    return [(name, estimate_tokens(text), estimate_tokens(text)) for name, text in parts.items() if text]
+
+
+def used(report):
+    return sum(after for _, _, after in report)
+
+
+def format_report(label, report, budget):
+    parts = []
+    for name, before, after in report:
+        parts.append(f"{name} {before}" if before == after else f"{name} {before}->{after}")
+    return f"[CONTEXT {label}] {used(report)}/{budget} tokens | " + " | ".join(parts)
+
+
+def log_report(label, report, budget):
+    """Prints the packing report on stderr in verbose mode (stdout carries the advice itself)."""
+    if verbose():
+        print(format_report(label, report, budget), file=sys.stderr)
@@ -3,31 +3,16 @@ import sys
 import argparse
 import google.generativeai as genai
 
-def get_context():
-    context = ""
-    
-    # 1. SPATIAL AWARENESS: List files in the shared directory
-    try:
-        files = os.listdir('.')
-        # Limit to 50 files to save tokens, just to give a "sense" of the room
-        file_list = ', '.join(files[:50])
-        if len(files) > 50: file_list += "..."
-        context += f"\n[SHARED DIRECTORY CONTENT]: {file_list}"
-    except Exception:
-        pass
+import advisor_cache
+import advisor_session
+import context_packer
+import tracing
+import profiling
+import metrics
+import rate_limiter
+from context_builder import get_context
 
-    # 2. HISTORICAL AWARENESS: Read the Project Memory Log
-    # This is the file Claude writes to. Now Gemini reads it too.
-    if os.path.exists("PROJECT_MEMORY.md"):
-        try:
-            with open("PROJECT_MEMORY.md", "r", encoding="utf-8") as f:
-                # Read the last 3000 characters to keep context fresh but concise
-                memory = f.read()[-3000:] 
-                context += f"\n\n[SHARED PROJECT MEMORY (Recent Activity)]:\n{memory}\n"
-        except Exception as e:
-            context += f"\n[MEMORY READ ERROR]: {e}"
-            
-    return context
+SYSTEM_PROMPT = "You are sharing a workspace with an autonomous agent named Claude. Below is the shared context of the directory and recent logs."
 
 def load_env_file(filepath=".env"):
     """Manually parses a .env file to find GOOGLE_API_KEY."""
@@ -73,7 +58,39 @@ def get_api_key(args):
 
     return None
 
-def get_intel(prompt, api_key=None, credentials=None, model_name='gemini-1.5-flash'):
+def resolve_auth(args):
+    """Resolves (api_key, credentials) for get_intel. Exits if nothing is found."""
+    creds = None
+    resolved_key = None
+
+    if args.api_key: # Highest priority: Explicit API Key via flag
+        resolved_key = args.api_key
+    else: # Otherwise, attempt ADC as the preferred 'user account' method
+        try:
+            import google.auth
+            creds, _ = google.auth.default()
+            # If ADC successfully loaded, use it.
+            # Otherwise, creds will be None, and we'll fall back to API Key methods.
+        except ImportError:
+            # google-auth not installed, ADC not possible. Log warning, proceed to API Key.
+            print("WARNING: 'google-auth' library is required for ADC. Falling back to API Key methods.")
+            # Note: Do not sys.exit here, allow fallback
+        except Exception as e:
+            # ADC failed for other reasons. Log warning, proceed to API Key.
+            print(f"WARNING: Failed to load Application Default Credentials: {e}. Falling back to API Key methods.")
+            print("Tip: Run 'gcloud auth application-default login' to set up user credentials.")
+            # Note: Do not sys.exit here, allow fallback
+        
+        if not creds: # If ADC wasn't successful or available, try other API key methods
+            resolved_key = get_api_key(args)
+            if not resolved_key:
+                print("ERROR: No authentication method found. Please provide an API key or set up ADC.")
+                print("Tip: Run 'gcloud auth application-default login' to set up user credentials.")
+                sys.exit(1)
+
+    return resolved_key, creds
+
+def get_intel(prompt, api_key=None, credentials=None, model_name='gemini-1.5-flash', use_cache=True, session=None):
     if credentials:
         try:
             genai.configure(credentials=credentials)
@@ -90,14 +107,61 @@ def get_intel(prompt, api_key=None, credentials=None, model_name='gemini-1.5-fla
     # Falls back to specified model if Gemini 3 not available
     model = genai.GenerativeModel(model_name)
     
-    # Inject the Shared Context into the prompt
-    context_data = get_context()
-    full_prompt = f"SYSTEM: You are sharing a workspace with an autonomous agent named Claude. Below is the shared context of the directory and recent logs.\n\nCONTEXT:{context_data}\n\nUSER QUERY: {prompt}"
+    # Inject the Shared Context into the prompt, packed into the model's token budget
+    budget = context_packer.budget_for(model_name)
+    report = context_packer.measure(system=SYSTEM_PROMPT, request=prompt)
+    with tracing.span("context", provider="gemini") as span:
+        # In a War Room session only context this conversation has not seen yet is sent
+        conversation = advisor_session.open_session("gemini", session)
+        if conversation:
+            context_data = conversation.context(prompt, budget - context_packer.used(report), report)
+        else:
+            context_data = get_context(prompt, budget=budget - context_packer.used(report), report=report)
+        span.set(tokens=context_packer.used(report), session=bool(conversation))
+    metrics.CONTEXT_BYTES.observe(len(context_data.encode("utf-8")), provider="gemini")
+    context_packer.log_report(f"gemini/{model_name}", report, budget)
+    full_prompt = f"SYSTEM: {SYSTEM_PROMPT}\n\nCONTEXT:{context_data}\n\nUSER QUERY: {prompt}"
+    history = [{"role": role, "parts": [text]} for role, text in conversation.history("user", "model")] if conversation else []
+    contents = history + [{"role": "user", "parts": [full_prompt]}] if history else full_prompt
+
+    # Identical question against an unchanged workspace: answer from the local cache
+    # Keyed on the full workspace context, not the conversation, so repeats hit mid-session too
+    cache_key = advisor_cache.make_key("gemini", model_name, SYSTEM_PROMPT, prompt,
+                                       conversation.context_key if conversation else context_data)
+    if use_cache:
+        with tracing.span("cache", provider="gemini") as span:
+            cached = advisor_cache.get(cache_key)
+            span.set(hit=cached is not None)
+        metrics.ADVISOR_CACHE.inc(provider="gemini", result="miss" if cached is None else "hit")
+        if cached is not None:
+            print(cached)
+            if conversation:
+                conversation.record(full_prompt, cached)
+            return
     
     try:
-        response = model.generate_content(full_prompt)
-        print(response.text)
+        # Stream tokens to stdout as they arrive so callers see the first words immediately
+        with tracing.span("provider", provider="gemini", model=model_name) as span:
+            # Shared with every other agent's bridges: waits for quota, retries 429s and 5xx
+            response = rate_limiter.call("gemini", model_name, lambda: model.generate_content(contents, stream=True))
+            chunks = []
+            for chunk in response:
+                if not chunks:
+                    span.mark("first_chunk_ms")
+                chunks.append(chunk.text)
+                print(chunk.text, end="", flush=True)
+            print()
+        # Usage is complete once the stream is drained
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            metrics.count_tokens("gemini", getattr(usage, "prompt_token_count", None),
+                                 getattr(usage, "candidates_token_count", None))
+        if use_cache:
+            advisor_cache.put(cache_key, "".join(chunks))
+        if conversation:
+            conversation.record(full_prompt, "".join(chunks))
     except Exception as e:
+        metrics.count_error("gemini", e)
         print(f"GEMINI UPLINK ERROR: {e}")
 
 if __name__ == "__main__":
@@ -110,8 +174,16 @@ if __name__ == "__main__":
     parser.add_argument("--api-key", "-k", help="Directly provide the Google API Key (overrides ADC)")
     parser.add_argument("--key-file", "-f", help="Path to a file containing the Google API Key")
     parser.add_argument("--model", "-m", default="gemini-3-pro", help="Gemini Model ID (default: gemini-3-pro, fallback: gemini-1.5-flash)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the advisor response cache")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Report packed context sizes on stderr")
+    parser.add_argument("--profile", action="store_true", help="Profile this run; see tools/profiling.py")
 
+    tracing.record_startup()
     args = parser.parse_args()
+    if args.verbose:
+        os.environ["OUTLAW_VERBOSE"] = "1"
+    if args.profile:
+        os.environ[profiling.ENABLE_ENV] = "1"
     
     if not args.prompt:
         print("Usage: python gemini_bridge.py [OPTIONS] <prompt>")
@@ -120,32 +192,11 @@ if __name__ == "__main__":
     # Reconstruct prompt from nargs list
     prompt_text = " ".join(args.prompt)
     
-    creds = None
-    resolved_key = None
-
-    if args.api_key: # Highest priority: Explicit API Key via flag
-        resolved_key = args.api_key
-    else: # Otherwise, attempt ADC as the preferred 'user account' method
-        try:
-            import google.auth
-            creds, _ = google.auth.default()
-            # If ADC successfully loaded, use it.
-            # Otherwise, creds will be None, and we'll fall back to API Key methods.
-        except ImportError:
-            # google-auth not installed, ADC not possible. Log warning, proceed to API Key.
-            print("WARNING: 'google-auth' library is required for ADC. Falling back to API Key methods.")
-            # Note: Do not sys.exit here, allow fallback
-        except Exception as e:
-            # ADC failed for other reasons. Log warning, proceed to API Key.
-            print(f"WARNING: Failed to load Application Default Credentials: {e}. Falling back to API Key methods.")
-            print("Tip: Run 'gcloud auth application-default login' to set up user credentials.")
-            # Note: Do not sys.exit here, allow fallback
-        
-        if not creds: # If ADC wasn't successful or available, try other API key methods
-            resolved_key = get_api_key(args)
-            if not resolved_key:
-                print("ERROR: No authentication method found. Please provide an API key or set up ADC.")
-                print("Tip: Run 'gcloud auth application-default login' to set up user credentials.")
-                sys.exit(1)
+    with profiling.profile("gemini_bridge") as run_profile:
+        with tracing.span("auth", provider="gemini"):
+            resolved_key, creds = resolve_auth(args)
 
-    get_intel(prompt_text, api_key=resolved_key, credentials=creds, model_name=args.model)
+        get_intel(prompt_text, api_key=resolved_key, credentials=creds, model_name=args.model, use_cache=not args.no_cache)
+    # stdout carries the advice: the report goes to stderr
+    if run_profile:
+        print(run_profile.summary, file=sys.stderr)
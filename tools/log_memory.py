@@ -1,45 +1,321 @@
 import sys
 import datetime
 import os
+import re
+import json
 import time
+import zlib
+import threading
+from contextlib import contextmanager
 
-# fcntl is Unix-only, not available on Windows
+import memory_reader
+import memory_index
+import tracing
+import profiling
+import metrics
+
+# fcntl is Unix-only, not available on Windows; there msvcrt byte-range locks stand in
 try:
     import fcntl
     HAS_FCNTL = True
 except ImportError:
     HAS_FCNTL = False
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Segment rotation: PROJECT_MEMORY.md stays the small active head, older activity is
+# sealed into PROJECT_MEMORY.000N.md segments listed in PROJECT_MEMORY.manifest.json.
+SEGMENT_BYTES = int(os.getenv("OUTLAW_MEMORY_SEGMENT_BYTES", str(1024 * 1024)))
+ROTATE = os.getenv("OUTLAW_MEMORY_ROTATE", "size")  # size | daily | off
+COMPRESS = os.getenv("OUTLAW_MEMORY_COMPRESS", "0") == "1"
+
+# Group commit: concurrent writers queue entries in a spool directory and whichever one
+# takes the lock first appends and fsyncs the whole batch. Every caller still returns
+# only once its own entry is on disk. A writer that finds the lock free and nothing
+# queued appends directly, so a lone writer never pays for the spool. A leader names
+# its batch in a marker before appending, so one that dies mid-commit is not appended
+# twice by the next (see recover_batch). Needs fcntl locking, so Unix only.
+GROUP_COMMIT = HAS_FCNTL and os.getenv("OUTLAW_MEMORY_GROUP_COMMIT", "1") == "1"
+COMMIT_WINDOW = float(os.getenv("OUTLAW_MEMORY_COMMIT_WINDOW", "0"))
+BATCH_MARKER = "batch.committing"
+
+_TIMESTAMPS = re.compile(rb"^## \[([^\]]+)\]", re.MULTILINE)
+
+@contextmanager
+def memory_lock(log_file, blocking=True):
+    """
+    Exclusive lock shared by every writer of `log_file`, held across rotation and append.
+    Yields False instead of waiting when `blocking` is off and another writer holds it.
+    """
+    with open(memory_reader.lock_path(log_file), "a") as lock:
+        waited = time.perf_counter()
+        if HAS_FCNTL:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        elif msvcrt:
+            # Lock the first byte; parallel agents (orchestrator.py) must not interleave appends
+            lock.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if not blocking:
+                        yield False
+                        return
+                    time.sleep(0.01)
+        if blocking:
+            metrics.MEMORY_LOCK_WAIT.observe(time.perf_counter() - waited)
+        try:
+            yield True
+        finally:
+            if HAS_FCNTL:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+def should_rotate(log_file):
+    if ROTATE == "off" or not os.path.isfile(log_file):
+        return False
+    stat = os.stat(log_file)
+    if stat.st_size <= len(memory_reader.FILE_HEADER):
+        return False
+    if ROTATE == "daily":
+        return datetime.date.fromtimestamp(stat.st_mtime) < datetime.date.today()
+    return stat.st_size >= SEGMENT_BYTES
+
+def _write_durably(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def seal_segment(log_file):
+    """
+    Seals the active log into the next numbered segment and records it in the manifest.
+    Caller must hold memory_lock. The segment and manifest are durable before the active
+    file is removed, so a crash can at worst duplicate entries, never lose them.
+    """
+    with open(log_file, "rb") as f:
+        data = f.read()
+
+    manifest = memory_reader.load_manifest(log_file)
+    number = max([s.get("number", 0) for s in manifest["segments"]] + [0]) + 1
+    name = memory_reader.segment_name(log_file, number, COMPRESS)
+    directory = os.path.dirname(os.path.abspath(log_file))
+
+    _write_durably(os.path.join(directory, name), zlib.compress(data) if COMPRESS else data)
+
+    timestamps = _TIMESTAMPS.findall(data)
+    manifest["segments"].append({
+        "number": number,
+        "file": name,
+        "compressed": COMPRESS,
+        "bytes": len(data),
+        "entries": len(timestamps),
+        "first": timestamps[0].decode("utf-8") if timestamps else None,
+        "last": timestamps[-1].decode("utf-8") if timestamps else None,
+    })
+    _write_durably(memory_reader.manifest_path(log_file), json.dumps(manifest, indent=2).encode("utf-8"))
+
+    os.unlink(log_file)
+    return name
+
+def append_durably(log_file, text):
+    """Appends `text` to the active log and fsyncs it. Caller must hold memory_lock."""
+    # Keep the active head small: seal it once it outgrows its segment
+    if should_rotate(log_file):
+        seal_segment(log_file)
+
+    # Header if new file
+    if not os.path.exists(log_file):
+        with open(log_file, "w", encoding="utf-8") as f:
+            f.write(memory_reader.FILE_HEADER.decode("utf-8"))
+
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())  # Force write to disk
+
+    # Index the new entries while the lock still guarantees they are complete.
+    # The index is derived data (memory_index.py --rebuild), so it never fails a write.
+    if memory_index.enabled():
+        try:
+            memory_index.update(log_file)
+        except Exception:
+            pass
+
+def _spool_empty(log_file):
+    try:
+        return not any(name.endswith(".entry") for name in os.listdir(memory_reader.pending_dir(log_file)))
+    except FileNotFoundError:
+        return True
+
+def append_uncontended(log_file, formatted_entry):
+    """
+    Appends directly when no other writer holds the lock or has an entry queued.
+    Returns False, without writing, when there is contention and the spool should be used.
+    """
+    waited = time.perf_counter()
+    with memory_lock(log_file, blocking=False) as acquired:
+        # Queued entries are older than ours: jumping ahead of them would break the order
+        if not acquired or not _spool_empty(log_file):
+            return False
+        metrics.MEMORY_LOCK_WAIT.observe(time.perf_counter() - waited)
+        append_durably(log_file, formatted_entry)
+        return True
+
+def enqueue_entry(log_file, formatted_entry):
+    """Publishes an entry to the group-commit spool. Returns its pending file path."""
+    spool = memory_reader.pending_dir(log_file)
+    os.makedirs(spool, exist_ok=True)
+    # Name sorts by arrival time, so batches keep chronological order
+    name = f"{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+    pending = os.path.join(spool, f"{name}.entry")
+    with open(os.path.join(spool, f"{name}.tmp"), "w", encoding="utf-8") as f:
+        f.write(formatted_entry)
+    # Atomic rename: a leader never picks up a half-written entry
+    os.replace(os.path.join(spool, f"{name}.tmp"), pending)
+    return pending
+
+def _unlink_quietly(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _log_ends_with(log_file, data):
+    try:
+        with open(log_file, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < len(data):
+                return False
+            f.seek(size - len(data))
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+def recover_batch(log_file, spool):
+    """
+    Settles the batch of a leader that died mid-commit, with memory_lock held. Its batch
+    was appended if any of its spool files is already gone (they are only cleared after
+    the fsync) or if the log ends with it; then it is cleared, otherwise left queued.
+    """
+    marker = os.path.join(spool, BATCH_MARKER)
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            batch = f.read().split()
+    except FileNotFoundError:
+        return
+
+    texts, appended = [], False
+    for name in batch:
+        try:
+            with open(os.path.join(spool, name), "r", encoding="utf-8") as f:
+                texts.append(f.read())
+        except FileNotFoundError:
+            appended = True
+            break
+    if appended or _log_ends_with(log_file, "".join(texts).encode("utf-8")):
+        for name in batch:
+            _unlink_quietly(os.path.join(spool, name))
+    os.unlink(marker)
+
+def commit_pending(log_file, own_pending):
+    """
+    Group-commit step, run with memory_lock held. If our entry is already gone from the
+    spool, an earlier leader wrote and fsynced it. Otherwise we lead: append every
+    queued entry in one write, fsync once, and only then clear their spool files.
+    Returns the number of entries this call committed.
+    """
+    spool = os.path.dirname(own_pending)
+    recover_batch(log_file, spool)
+    if not os.path.exists(own_pending):
+        return 0
+    if COMMIT_WINDOW:
+        time.sleep(COMMIT_WINDOW)
+
+    batch = sorted(f for f in os.listdir(spool) if f.endswith(".entry"))
+    texts = []
+    for name in batch:
+        with open(os.path.join(spool, name), "r", encoding="utf-8") as f:
+            texts.append(f.read())
+
+    # Not fsynced: it guards against a crashed process, not a power cut
+    marker = os.path.join(spool, BATCH_MARKER)
+    with open(f"{marker}.tmp", "w", encoding="utf-8") as f:
+        f.write("\n".join(batch))
+    os.replace(f"{marker}.tmp", marker)
+
+    try:
+        append_durably(log_file, "".join(texts))
+    except OSError:
+        _unlink_quietly(marker)  # The append failed: the batch stays queued for a retry
+        raise
+
+    for name in batch:
+        _unlink_quietly(os.path.join(spool, name))
+    os.unlink(marker)
+    return len(batch)
+
+def wait_for_commit(log_file, pending):
+    """
+    Returns once `pending` is durable. Followers poll instead of queueing on the lock:
+    a blocked flock would hand the lock to waiters one by one, each re-checking a
+    batch that is already on disk. Whoever finds the lock free while its entry is
+    still queued becomes the next leader.
+    """
+    delay = 0.0002
+    start = time.perf_counter()
+    while os.path.exists(pending):
+        with memory_lock(log_file, blocking=False) as acquired:
+            if acquired:
+                metrics.MEMORY_LOCK_WAIT.observe(time.perf_counter() - start)
+                commit_pending(log_file, pending)
+                return
+        time.sleep(delay)
+        delay = min(delay * 2, 0.002)
+    # An earlier leader committed our entry
+    metrics.MEMORY_LOCK_WAIT.observe(time.perf_counter() - start)
 
 def log_entry(entry):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_file = "PROJECT_MEMORY.md"
+    log_file = memory_reader.MEMORY_FILE
 
     # Cross-platform file locking
     max_retries = 5
     retry_delay = 0.1
 
+    formatted_entry = f"\n## [{timestamp}]\n{entry}\n"
+
+    start = time.perf_counter()
+    pending = None
+
     for attempt in range(max_retries):
         try:
-            # Header if new file
-            if not os.path.exists(log_file):
-                with open(log_file, "w", encoding="utf-8") as f:
-                    if HAS_FCNTL:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                    f.write("# PROJECT MEMORY LOG\n\n")
-                    if HAS_FCNTL:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-
-            formatted_entry = f"\n## [{timestamp}]\n{entry}\n"
-
-            with open(log_file, "a", encoding="utf-8") as f:
-                if HAS_FCNTL:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                f.write(formatted_entry)
-                f.flush()
-                os.fsync(f.fileno())  # Force write to disk
-                if HAS_FCNTL:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            if pending:
+                wait_for_commit(log_file, pending)
+            elif not (GROUP_COMMIT and append_uncontended(log_file, formatted_entry)):
+                if GROUP_COMMIT:
+                    try:
+                        pending = enqueue_entry(log_file, formatted_entry)
+                    except OSError:
+                        pending = None  # Spool unavailable: fall back to a direct append
+                if pending:
+                    wait_for_commit(log_file, pending)
+                else:
+                    with memory_lock(log_file):
+                        append_durably(log_file, formatted_entry)
 
+            metrics.MEMORY_APPEND.observe(time.perf_counter() - start)
             print(f"Memory updated in {log_file}")
             return
 
@@ -48,13 +324,29 @@ def log_entry(entry):
                 time.sleep(retry_delay)
                 retry_delay *= 2  # Exponential backoff
             else:
+                # Don't let a later leader commit an entry we reported as failed
+                if pending and os.path.exists(pending):
+                    try:
+                        os.unlink(pending)
+                    except OSError:
+                        pass
+                metrics.count_error("memory", e)
                 print(f"Error: Failed to write to {log_file} after {max_retries} attempts: {e}")
                 raise
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python log_memory.py \"Your log entry here\"")
+    args = sys.argv[1:]
+    if args[:1] == ["--profile"]:
+        os.environ[profiling.ENABLE_ENV] = "1"
+        args = args[1:]
+    if not args:
+        print("Usage: python log_memory.py [--profile] \"Your log entry here\"")
         sys.exit(1)
-    
-    entry = " ".join(sys.argv[1:])
-    log_entry(entry)
+
+    # Agents run this from their shell: a traced launch puts the write in its trace
+    tracing.record_startup()
+    entry = " ".join(args)
+    with profiling.profile("log_memory") as run_profile, tracing.span("log_memory", bytes=len(entry)):
+        log_entry(entry)
+    if run_profile:
+        print(run_profile.summary)
@@ -0,0 +1,211 @@
+"""
+OUTLAW EXOTIX // MEMORY INDEX
+
+BM25 retrieval over PROJECT_MEMORY.md, so advisors get the entries that match the
+query rather than only the newest ones. The index lives in PROJECT_MEMORY.index.sqlite
+and log_memory.py updates it on every append, reading only the new bytes.
+
+Usage:
+    python memory_index.py --search "api endpoint"
+    python memory_index.py --rebuild
+"""
+import os
+import re
+import sys
+import math
+import sqlite3
+import argparse
+
+import cache_store
+import memory_reader
+
+# BM25 parameters (the usual defaults)
+K1 = 1.5
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its of on or that the this "
+    "to was we were will with you your".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    tf INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS postings_term ON postings (term);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def enabled():
+    return os.getenv("OUTLAW_MEMORY_INDEX", "1") != "0"
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def _meta(conn, name):
+    row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_meta(conn, name, value):
+    conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+
+def _add_entries(conn, data):
+    """Indexes every complete entry in a chunk of log bytes. Returns how many were added."""
+    entries = memory_reader.split_entries(data)
+    for timestamp, text in entries:
+        terms = tokenize(text)
+        cursor = conn.execute(
+            "INSERT INTO docs (timestamp, length, text) VALUES (?, ?, ?)",
+            (timestamp, len(terms), text),
+        )
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        conn.executemany(
+            "INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+            [(term, cursor.lastrowid, tf) for term, tf in counts.items()],
+        )
+    return len(entries)
+
+
+def update(path=memory_reader.MEMORY_FILE):
+    """Indexes entries appended since the last update. Caller must hold log_memory.memory_lock."""
+    added = 0
+    with cache_store.open_db(memory_reader.index_path(path), _SCHEMA) as conn:
+        sealed = _meta(conn, "segments")
+        offset = _meta(conn, "active_offset")
+
+        # A sealed segment is the old active file byte for byte: resume the first new one at the old offset
+        segments = list(reversed(memory_reader.sealed_segments(path)))
+        for segment in segments[sealed:]:
+            if os.path.exists(segment["path"]):
+                added += _add_entries(conn, memory_reader.read_segment(segment["path"])[offset:])
+            offset = 0
+        _set_meta(conn, "segments", len(segments))
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                # Active file shrank without a new segment: it was replaced, start over on it
+                if size < offset:
+                    offset = 0
+                f.seek(offset)
+                added += _add_entries(conn, f.read(size - offset))
+                offset = size
+        _set_meta(conn, "active_offset", offset)
+    return added
+
+
+def rebuild(path=memory_reader.MEMORY_FILE):
+    """Drops the index and re-reads the whole log. Caller must hold the memory lock."""
+    with cache_store.open_db(memory_reader.index_path(path), _SCHEMA) as conn:
+        conn.execute("DELETE FROM postings")
+        conn.execute("DELETE FROM docs")
+        conn.execute("DELETE FROM meta")
+    return update(path)
+
+
+def _rank(conn, terms, limit):
+    """(doc id, BM25 score) for the `limit` best-matching entries, best first."""
+    total, average = conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+    if not total:
+        return []
+    average = average or 1
+
+    scores = {}
+    for term in terms:
+        rows = conn.execute(
+            "SELECT p.doc, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc WHERE p.term = ?",
+            (term,),
+        ).fetchall()
+        if not rows:
+            continue
+        idf = math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+        for doc, tf, length in rows:
+            norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average))
+            scores[doc] = scores.get(doc, 0.0) + idf * norm
+
+    # Ties go to the newer entry
+    return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+
+
+def search(query, path=memory_reader.MEMORY_FILE, limit=10):
+    """Top `limit` entries for `query` by BM25, best first, as (score, timestamp, text)."""
+    terms = set(tokenize(query))
+    if not terms or not os.path.exists(memory_reader.index_path(path)):
+        return []
+
+    results = []
+    with cache_store.open_db(memory_reader.index_path(path), _SCHEMA) as conn:
+        for doc, score in _rank(conn, terms, limit):
+            timestamp, text = conn.execute("SELECT timestamp, text FROM docs WHERE id = ?", (doc,)).fetchone()
+            results.append((score, timestamp, text))
+    return results
+
+
+def relevant_context(query, path=memory_reader.MEMORY_FILE, budget=3000, limit=50):
+    """Best BM25 matches for `query` within `budget` characters, oldest first; None without an index."""
+    if not os.path.exists(memory_reader.index_path(path)):
+        return None
+
+    chosen = {}
+    used = 0
+    try:
+        with cache_store.open_db(memory_reader.index_path(path), _SCHEMA) as conn:
+            candidates = [doc for doc, _ in _rank(conn, set(tokenize(query)), limit)]
+            candidates += [row[0] for row in conn.execute("SELECT id FROM docs ORDER BY id DESC LIMIT ?", (limit,))]
+            for doc in candidates:
+                if doc in chosen:
+                    continue
+                (text,) = conn.execute("SELECT text FROM docs WHERE id = ?", (doc,)).fetchone()
+                if used + len(text) + 2 > budget:
+                    continue
+                chosen[doc] = text
+                used += len(text) + 2
+    except sqlite3.Error:
+        return None  # A damaged index must not cost the advisor its memory context
+
+    if not chosen:
+        return None
+    return "\n\n".join(chosen[doc] for doc in sorted(chosen))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Memory Index")
+    parser.add_argument("--search", "-q", help="Show the entries that best match a query")
+    parser.add_argument("--limit", "-n", type=int, default=5, help="Number of results for --search")
+    parser.add_argument("--rebuild", action="store_true", help="Re-index the whole memory log")
+    parser.add_argument("--file", default=memory_reader.MEMORY_FILE, help="Memory log to index")
+
+    args = parser.parse_args()
+
+    if args.rebuild:
+        from log_memory import memory_lock
+        with memory_lock(args.file):
+            count = rebuild(args.file)
+        print(f"Indexed {count} entries into {memory_reader.index_path(args.file)}")
+    elif args.search:
+        for score, timestamp, text in search(args.search, args.file, args.limit):
+            print(f"--- {score:.2f} [{timestamp}]")
+            print(text)
+    else:
+        parser.print_help()
+        sys.exit(1)
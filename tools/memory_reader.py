@@ -0,0 +1,287 @@
+"""
+OUTLAW EXOTIX // MEMORY READER
+
+Tail and range reads of the shared PROJECT_MEMORY.md log. Readers only want the
+most recent activity, so instead of loading whole files we seek from the end in
+binary mode and decode just the tail. Cost per call is O(tail), not O(log size).
+
+Cut points are cleaned up before decoding: a multi-byte UTF-8 character split by the
+seek is dropped, and the tail is advanced to the next entry header (`## [timestamp]`)
+so readers never see half an entry.
+
+The log is segmented (see log_memory.py): PROJECT_MEMORY.md is the active head and
+older activity lives in sealed PROJECT_MEMORY.000N.md segments (`.md.z` when
+zlib-compressed), listed in PROJECT_MEMORY.manifest.json. Every read here walks the
+active file first and then sealed segments newest-first, only as far as it needs.
+Agents read the history through this module rather than opening PROJECT_MEMORY.md,
+which only holds the newest segment's worth.
+
+Usage:
+    python memory_reader.py                  # last 20 entries, across segments
+    python memory_reader.py --entries 50
+    python memory_reader.py --since "2025-01-01 00:00:00" --until "2025-01-31 23:59:59"
+"""
+import os
+import sys
+import argparse
+import re
+import json
+import zlib
+import errno
+
+MEMORY_FILE = "PROJECT_MEMORY.md"
+FILE_HEADER = b"# PROJECT MEMORY LOG\n\n"
+ENTRY_HEADER = b"\n## ["
+READ_CHUNK = 8192
+
+_TIMESTAMP = re.compile(rb"^## \[([^\]]+)\]")
+
+
+# --- SEGMENT LAYOUT ---
+
+def _base(path):
+    return os.path.splitext(path)[0]
+
+
+def manifest_path(path=MEMORY_FILE):
+    return f"{_base(path)}.manifest.json"
+
+
+def lock_path(path=MEMORY_FILE):
+    directory, name = os.path.split(_base(path))
+    return os.path.join(directory, f".{name}.lock")
+
+
+def pending_dir(path=MEMORY_FILE):
+    """Spool directory where group-commit writers queue entries for the next leader."""
+    directory, name = os.path.split(_base(path))
+    return os.path.join(directory, f".{name}.pending")
+
+
+def index_path(path=MEMORY_FILE):
+    """Relevance index over the log's entries, maintained by memory_index.py."""
+    return f"{_base(path)}.index.sqlite"
+
+
+def segment_name(path, number, compressed=False):
+    name = f"{os.path.basename(_base(path))}.{number:04d}.md"
+    return name + ".z" if compressed else name
+
+
+def load_manifest(path=MEMORY_FILE):
+    """Segment manifest for `path`; an empty one if the log has never rotated."""
+    try:
+        with open(manifest_path(path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"segments": []}
+    manifest.setdefault("segments", [])
+    return manifest
+
+
+def sealed_segments(path=MEMORY_FILE):
+    """Manifest records of sealed segments, newest first, with their absolute `path` filled in."""
+    directory = os.path.dirname(os.path.abspath(path))
+    segments = []
+    for record in reversed(load_manifest(path)["segments"]):
+        record = dict(record)
+        record["path"] = os.path.join(directory, record["file"])
+        segments.append(record)
+    return segments
+
+
+def _sources(path):
+    """Active file then sealed segment paths, newest first. Missing files are skipped."""
+    sources = [path] if os.path.exists(path) else []
+    sources += [s["path"] for s in sealed_segments(path) if os.path.exists(s["path"])]
+    return sources
+
+
+def read_segment(source):
+    """Whole contents of one log file or segment as bytes, decompressing `.z` segments."""
+    with open(source, "rb") as f:
+        data = f.read()
+    return zlib.decompress(data) if source.endswith(".z") else data
+
+
+# --- BYTE HELPERS ---
+
+def _skip_partial_char(data):
+    """Drops UTF-8 continuation bytes left at the front of a buffer by a mid-character seek."""
+    i = 0
+    while i < len(data) and i < 4 and (data[i] & 0xC0) == 0x80:
+        i += 1
+    return data[i:]
+
+
+def _strip_file_header(data):
+    return data[len(FILE_HEADER):] if data.startswith(FILE_HEADER) else data
+
+
+def _last_bytes(source, max_bytes):
+    """Last `max_bytes` of one source, and whether that was the whole source."""
+    if source.endswith(".z"):
+        data = read_segment(source)
+        return data[-max_bytes:], len(data) <= max_bytes
+
+    with open(source, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        start = max(0, size - max_bytes)
+        f.seek(start)
+        return f.read(size - start), start == 0
+
+
+def _last_entries(source, count):
+    """Bytes covering at most the last `count` entries of one source, and how many were found."""
+    if source.endswith(".z"):
+        data = read_segment(source)
+    else:
+        with open(source, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0:
+                step = min(READ_CHUNK, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+                # Every entry opens with a header, so `count` headers cover `count` entries
+                if data.count(ENTRY_HEADER) >= count:
+                    break
+
+    cut = len(data)
+    found = 0
+    while found < count:
+        header = data.rfind(ENTRY_HEADER, 0, cut)
+        if header == -1:
+            return data, found
+        cut = header
+        found += 1
+    return data[cut + 1:], found
+
+
+# --- READER API ---
+
+def read_tail(path=MEMORY_FILE, max_bytes=3000, align=True):
+    """
+    Returns at most the last `max_bytes` bytes of the log as text, continuing into
+    sealed segments when the active file is shorter than that.
+    With `align`, the result starts at the first entry header inside the window
+    (when there is one), so it never opens mid-entry.
+    """
+    sources = _sources(path)
+    if not sources:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+    parts = []
+    remaining = max_bytes
+    complete = True
+    for source in sources:
+        if remaining <= 0:
+            complete = False
+            break
+        data, complete = _last_bytes(source, remaining)
+        if parts:
+            parts[0] = _strip_file_header(parts[0])
+        parts.insert(0, data)
+        remaining -= len(data)
+        if not complete:
+            break
+
+    data = b"".join(parts)
+    if not complete:
+        data = _skip_partial_char(data)
+        if align:
+            header = data.find(ENTRY_HEADER)
+            if header != -1:
+                data = data[header + 1:]
+
+    return data.decode("utf-8", errors="replace")
+
+
+def read_entries(path=MEMORY_FILE, count=10):
+    """
+    Returns the last `count` entries of the log as text, reading backwards from the
+    end of the active file and then through sealed segments until enough were found.
+    """
+    if count <= 0:
+        return ""
+
+    parts = []
+    needed = count
+    for source in _sources(path):
+        data, found = _last_entries(source, needed)
+        if parts:
+            parts[0] = _strip_file_header(parts[0])
+        parts.insert(0, data)
+        needed -= found
+        if needed <= 0:
+            break
+
+    return b"".join(parts).decode("utf-8", errors="replace")
+
+
+def split_entries(data):
+    """
+    Splits log bytes into (timestamp, text) pairs, oldest first. An entry starts at each
+    "\n## [" header and runs to the next; anything before the first header (the file
+    header, or a cut-off entry) is dropped. Text is decoded with errors replaced and
+    keeps its header line. Timestamp is "" when the header does not parse.
+    """
+    entries = []
+    for chunk in data.split(ENTRY_HEADER)[1:]:
+        raw = b"## [" + chunk
+        match = _TIMESTAMP.match(raw)
+        timestamp = match.group(1).decode("utf-8", errors="replace") if match else ""
+        entries.append((timestamp, raw.decode("utf-8", errors="replace").rstrip("\n")))
+    return entries
+
+
+def iter_entries(path=MEMORY_FILE, start=None, end=None):
+    """
+    Yields (timestamp, text) for every entry across all segments, oldest first.
+    `start` / `end` are inclusive "YYYY-MM-DD HH:MM:SS" bounds; sealed segments whose
+    manifest range falls outside them are skipped without being opened.
+    """
+    sources = []
+    for segment in reversed(sealed_segments(path)):
+        if start and segment.get("last") and segment["last"] < start:
+            continue
+        if end and segment.get("first") and segment["first"] > end:
+            continue
+        sources.append(segment["path"])
+    sources.append(path)
+
+    for source in sources:
+        if not os.path.exists(source):
+            continue
+        for timestamp, text in split_entries(read_segment(source)):
+            if start and timestamp < start:
+                continue
+            if end and timestamp > end:
+                continue
+            yield timestamp, text
+
+
+def read_range(path=MEMORY_FILE, start=None, end=None):
+    """Entries logged between `start` and `end` (inclusive), oldest first, as text."""
+    return "\n\n".join(text for _, text in iter_entries(path, start, end))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Memory Reader")
+    parser.add_argument("--entries", "-n", type=int, default=20, help="Number of most recent entries to show")
+    parser.add_argument("--since", help="Show every entry from this timestamp (YYYY-MM-DD HH:MM:SS)")
+    parser.add_argument("--until", help="Show every entry up to this timestamp (YYYY-MM-DD HH:MM:SS)")
+    parser.add_argument("--file", default=MEMORY_FILE, help="Memory log to read")
+
+    args = parser.parse_args()
+
+    if not _sources(args.file):
+        print(f"No memory log at {args.file}")
+        sys.exit(1)
+    if args.since or args.until:
+        print(read_range(args.file, args.since, args.until))
+    else:
+        print(read_entries(args.file, args.entries).strip("\n"))
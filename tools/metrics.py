@@ -0,0 +1,329 @@
+"""
+OUTLAW EXOTIX // METRICS
+
+In-process counters and histograms for the suite, exported in the Prometheus text
+format (0.0.4). Long-running processes serve them on a local port; short-lived CLI
+runs (the bridges, log_memory.py) merge theirs into a textfile on exit, for
+node_exporter's textfile collector. Counts in the textfile accumulate across runs.
+
+    python war_room.py --metrics-port 9464          # GET http://127.0.0.1:9464/metrics
+    python bridge_daemon.py --metrics-port 9465
+    OUTLAW_METRICS_TEXTFILE=/var/lib/node_exporter/textfile python gemini_bridge.py "..."
+
+Cache hit ratio is left to the dashboard:
+    rate(outlaw_advisor_cache_total{result="hit"}[5m]) / rate(outlaw_advisor_cache_total[5m])
+
+Environment:
+    OUTLAW_METRICS_PORT          serve /metrics on this port (War Room, bridge daemon)
+    OUTLAW_METRICS_TEXTFILE      directory for <dir>/outlaw_<script>.prom
+    OUTLAW_METRICS_BUCKETS       latency bucket bounds in seconds, comma-separated
+    OUTLAW_METRICS_BYTE_BUCKETS  size bucket bounds in bytes, comma-separated
+"""
+import os
+import re
+import sys
+import time
+import atexit
+import bisect
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+DEFAULT_BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def _buckets(env, default):
+    """Bucket bounds from `env` ("0.1,0.5,1"), else `default`. A malformed value falls back to the default."""
+    value = os.getenv(env)
+    if not value:
+        return tuple(default)
+    try:
+        bounds = sorted({float(bound) for bound in value.split(",") if bound.strip()})
+    except ValueError:
+        return tuple(default)
+    return tuple(bounds) or tuple(default)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value):
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _series(name, labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return name
+    return name + "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield _series(self.name, self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the `with` block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                yield _series(self.name + "_bucket", self.labelnames, key, [("le", _format(bound))]), cumulative
+            yield _series(self.name + "_sum", self.labelnames, key), total
+            yield _series(self.name + "_count", self.labelnames, key), count
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name, help, labelnames=()):
+    return _register(Counter(name, help, labelnames))
+
+
+def histogram(name, help, labelnames=(), buckets=None):
+    return _register(Histogram(name, help, labelnames, buckets or _buckets("OUTLAW_METRICS_BUCKETS", DEFAULT_BUCKETS)))
+
+
+ADVISOR_LATENCY = histogram("outlaw_advisor_latency_seconds", "Advisor consult time as seen by the War Room.",
+                            ("provider", "via"))
+CLAUDE_LATENCY = histogram("outlaw_claude_latency_seconds", "Claude phase time.", ("mode",))
+MEMORY_APPEND = histogram("outlaw_memory_append_seconds", "Time for a memory entry to become durable.")
+MEMORY_LOCK_WAIT = histogram("outlaw_memory_lock_wait_seconds", "Time waiting for the memory lock or a group commit.")
+CONTEXT_BYTES = histogram("outlaw_context_bytes", "Workspace context sent to an advisor.", ("provider",),
+                          buckets=_buckets("OUTLAW_METRICS_BYTE_BUCKETS", DEFAULT_BYTE_BUCKETS))
+TOKENS = counter("outlaw_tokens_total", "Tokens reported by the provider SDKs.", ("provider", "direction"))
+ADVISOR_CACHE = counter("outlaw_advisor_cache_total", "Advisor response cache lookups.", ("provider", "result"))
+ERRORS = counter("outlaw_errors_total", "Errors by component and exception type.", ("component", "kind"))
+RATE_LIMIT_WAIT = histogram("outlaw_rate_limit_wait_seconds", "Time a request waited for its provider bucket.",
+                            ("provider",))
+ADVISOR_HEDGES = counter("outlaw_advisor_hedges_total", "Routed consults that outran their p95 and were hedged.",
+                         ("provider",))
+RETRIES = counter("outlaw_retries_total", "Provider requests retried, by reason.", ("provider", "reason"))
+
+
+def count_tokens(provider, tokens_in, tokens_out):
+    """Adds a response's usage; fields the SDK left empty are skipped."""
+    for direction, tokens in (("in", tokens_in), ("out", tokens_out)):
+        if isinstance(tokens, int) and tokens > 0:
+            TOKENS.inc(tokens, provider=provider, direction=direction)
+
+
+def count_error(component, error):
+    ERRORS.inc(component=component, kind=type(error).__name__ if isinstance(error, BaseException) else str(error))
+
+
+def reset():
+    """Forgets every recorded sample; the metrics stay registered."""
+    for metric in list(_registry.values()):
+        metric.clear()
+
+
+def snapshot():
+    """Every sample in exposition order, as {series: value}."""
+    values = {}
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        values.update(metric.samples())
+    return values
+
+
+def _family(series):
+    name = series.split("{", 1)[0]
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[:-len(suffix)] in _registry:
+            return name[:-len(suffix)]
+    return name
+
+
+def render(values=None):
+    """The registry (or `values`, a snapshot) in the Prometheus text format."""
+    values = snapshot() if values is None else values
+    families = {}
+    for series, value in values.items():
+        families.setdefault(_family(series), []).append((series, value))
+
+    lines = []
+    for name, series in families.items():
+        metric = _registry.get(name)
+        if metric is not None:
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+        lines.extend(f"{key} {_format(value)}" for key, value in series)
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def parse(text):
+    """Samples of a text-format dump as {series: value}; comments and malformed lines are skipped."""
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        try:
+            values[series] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+# --- EXPORT ---
+
+def serve(port, host="127.0.0.1"):
+    """Serves GET /metrics from a background thread. Returns the server (shutdown() stops it)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds must not flood the War Room console
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="outlaw-metrics", daemon=True).start()
+    return server
+
+
+def textfile_path(directory, name=None):
+    name = name or os.path.splitext(os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else "python"))[0]
+    name = re.sub(r"\W", "_", name)
+    return os.path.join(directory, f"outlaw_{name}.prom")
+
+
+def dump_textfile(directory, name=None):
+    """
+    Adds this process's samples to <directory>/outlaw_<name>.prom and returns its path.
+    Concurrent runs are serialized on a lock file; the .prom file is replaced atomically
+    so the collector never reads a partial write.
+    """
+    path = textfile_path(directory, name)
+    os.makedirs(directory, exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        if fcntl:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                previous = parse(f.read())
+        except OSError:
+            previous = {}
+
+        values = snapshot()
+        for series, value in previous.items():
+            values[series] = values.get(series, 0) + value
+
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".outlaw_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(render(values))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return path
+
+
+@atexit.register
+def _dump_at_exit():
+    directory = os.getenv("OUTLAW_METRICS_TEXTFILE")
+    if directory and any(metric._values for metric in list(_registry.values())):
+        try:
+            dump_textfile(directory)
+        except OSError as e:
+            print(f"[METRICS] Could not write {directory}: {e}", file=sys.stderr)
@@ -0,0 +1,301 @@
+"""
+OUTLAW EXOTIX // ORCHESTRATOR
+
+Runs a multi-agent mission as a task graph instead of one `agent` call at a time.
+Each step names an agent (persona), a prompt and the steps it needs. Every step whose
+dependencies have finished is launched at once through the agent launcher
+(bin/agent.sh, or agent.ps1 on Windows), up to a parallelism limit, so a mission
+takes about as long as its critical path rather than the sum of its steps.
+
+A step's prompt is followed by the output of each step it needs, packed into a token
+budget (context_packer.py) so the launcher's argv stays small. When a step fails or
+times out, its dependents are skipped; independent branches keep running.
+
+Memory: agents append to PROJECT_MEMORY.md themselves through log_memory.py, which
+serializes concurrent writers with a file lock. A dependent only starts once its
+upstream step has exited, so everything upstream logged is already on disk when it
+reads the log. The orchestrator records each finished step there too, one at a time
+from its scheduler thread, in completion order.
+
+Mission file (JSON, or YAML with PyYAML installed):
+    {"steps": [
+        {"id": "scan",   "agent": "ethical-hacker", "prompt": "Scan src/ for injection bugs."},
+        {"id": "review", "agent": "code-auditor",   "prompt": "Review src/ for errors."},
+        {"id": "fix",    "agent": "code-auditor",   "prompt": "Fix what was found.", "needs": ["scan", "review"]}
+    ]}
+
+Environment:
+    OUTLAW_AGENT_CMD       agent launcher command (default: `agent` on PATH, else bin/agent.sh)
+    OUTLAW_ORCH_PARALLEL   steps run at once (default: 4)
+
+Usage:
+    python orchestrator.py mission.json
+    python orchestrator.py mission.json --parallel 2 --timeout 600 --out results/
+"""
+import os
+import io
+import re
+import sys
+import json
+import time
+import shlex
+import shutil
+import argparse
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import tracing
+import log_memory
+import cache_store
+import context_packer
+import persona_registry
+from context_packer import Section, REQUIRED, ADVICE
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARALLEL = int(os.getenv("OUTLAW_ORCH_PARALLEL", "4"))
+STEP_TIMEOUT = 1800
+# Upstream outputs travel on the launcher's command line: keep them well under argv limits
+UPSTREAM_BUDGET = 6000
+
+_BANNER = re.compile(r"^(\x1b\[[0-9;]*m)?Deploying Agent: .*\n?", re.MULTILINE)
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def agent_command():
+    """The agent launcher as an argv prefix; `<agent> -p <prompt>` is appended per step."""
+    override = os.getenv("OUTLAW_AGENT_CMD")
+    if override:
+        return shlex.split(override, posix=os.name != "nt")
+    installed = shutil.which("agent")
+    if installed:
+        return [installed]
+    if os.name == "nt":
+        return ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-File",
+                os.path.join(PROJECT_ROOT, "bin", "agent.ps1")]
+    return ["bash", os.path.join(PROJECT_ROOT, "bin", "agent.sh")]
+
+
+def load_mission(path):
+    """
+    Steps from a mission file, checked before anything runs: ids are unique, agents
+    are valid persona names, every dependency exists and the graph has no cycle.
+    Returns the steps in a dependency-respecting order. Raises ValueError otherwise.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML missions need PyYAML (pip install pyyaml); use JSON instead")
+        try:
+            mission = yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path}: {e}")
+    else:
+        try:
+            mission = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}")
+    return validate(mission.get("steps") if isinstance(mission, dict) else mission)
+
+
+def validate(entries):
+    """Normalizes and checks raw step entries (see load_mission)."""
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("A mission needs a non-empty list of steps")
+
+    steps = {}
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Step {number}: expected an object")
+        step_id = str(entry.get("id") or f"step-{number}")
+        if step_id in steps:
+            raise ValueError(f"Step {number}: duplicate id '{step_id}'")
+        if not persona_registry.valid_name(entry.get("agent")):
+            raise ValueError(f"Step '{step_id}': missing or invalid agent name {entry.get('agent')!r}")
+        if not str(entry.get("prompt") or "").strip():
+            raise ValueError(f"Step '{step_id}': needs a prompt")
+        needs = entry.get("needs") or []
+        if isinstance(needs, str):
+            needs = [needs]
+        steps[step_id] = {"id": step_id, "agent": entry["agent"], "prompt": str(entry["prompt"]).strip(),
+                          "needs": [str(need) for need in needs]}
+
+    for step in steps.values():
+        for need in step["needs"]:
+            if need not in steps:
+                raise ValueError(f"Step '{step['id']}' needs unknown step '{need}'")
+
+    # Kahn's algorithm: whatever never becomes ready sits on a cycle
+    ordered = []
+    remaining = dict(steps)
+    while remaining:
+        ready = [step for step in remaining.values() if all(need not in remaining for need in step["needs"])]
+        if not ready:
+            raise ValueError(f"Dependency cycle between steps: {', '.join(sorted(remaining))}")
+        for step in ready:
+            ordered.append(step)
+            del remaining[step["id"]]
+    return ordered
+
+
+def build_prompt(step, results, budget=UPSTREAM_BUDGET):
+    """The step's prompt followed by each upstream step's output, trimmed to `budget` tokens."""
+    sections = [Section("prompt", step["prompt"], REQUIRED)]
+    for need in step["needs"]:
+        upstream = results[need]
+        # The end of an agent's output is where it reports what it did
+        sections.append(Section(need, upstream["output"].strip(), ADVICE, "tail",
+                                f"\n\n[UPSTREAM: {need} ({upstream['agent']})]:\n"))
+    sections, _ = context_packer.pack(sections, budget)
+    return "".join(context_packer.render(section) for section in sections)
+
+
+def run_step(step, prompt, timeout=STEP_TIMEOUT):
+    """Runs one agent through the launcher and returns its result record."""
+    result = {"id": step["id"], "agent": step["agent"], "needs": step["needs"], "status": "ok",
+              "returncode": None, "output": "", "stderr": "", "error": None,
+              "started": time.time(), "duration": 0.0}
+    start = time.perf_counter()
+    try:
+        # The launcher, Claude and its log_memory.py calls all join the mission's trace
+        with tracing.span("step", id=step["id"], agent=step["agent"]):
+            completed = subprocess.run(agent_command() + [step["agent"], "-p", prompt], stdin=subprocess.DEVNULL,
+                                       capture_output=True, text=True, encoding="utf-8", errors="replace",
+                                       timeout=timeout, env=tracing.child_env())
+        result["returncode"] = completed.returncode
+        result["output"] = _BANNER.sub("", completed.stdout)
+        result["stderr"] = completed.stderr
+        if completed.returncode != 0:
+            result["status"] = "failed"
+            detail = (completed.stderr.strip() or _ANSI.sub("", completed.stdout).strip()).splitlines()
+            result["error"] = f"exit code {completed.returncode}" + (f": {detail[-1]}" if detail else "")
+    except subprocess.TimeoutExpired:
+        result["status"], result["error"] = "timeout", f"no result within {timeout:g}s"
+    except OSError as e:
+        result["status"], result["error"] = "failed", f"could not start the agent launcher: {e}"
+    result["duration"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def log_step(result):
+    """Records a finished step in project memory (log_memory.py takes the file lock)."""
+    entry = f"[ORCHESTRATOR] Step '{result['id']}' ({result['agent']}): {result['status']} in {result['duration']:.1f}s"
+    if result["error"]:
+        entry += f" - {result['error']}"
+    # log_entry announces every write on stdout; the mission report is the console output here
+    with contextlib.redirect_stdout(io.StringIO()):
+        log_memory.log_entry(entry)
+
+
+def run_mission(steps, parallel=None, timeout=STEP_TIMEOUT, on_result=None, log=True):
+    """
+    Runs `steps` (from load_mission) with at most `parallel` agents at once. A step
+    starts as soon as everything it needs has succeeded; dependents of a failed step
+    are skipped. Each result is handed to `on_result` as it finishes. Returns the
+    results keyed by step id.
+    """
+    results = {}
+    waiting = list(steps)
+    running = {}
+
+    def finish(result):
+        results[result["id"]] = result
+        # Only this thread writes memory entries: one at a time, in completion order
+        if log and result["status"] != "skipped":
+            try:
+                log_step(result)
+            except Exception:
+                pass  # A full disk must not abort a mission whose agents already ran
+        if on_result:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel or PARALLEL)) as pool:
+        while waiting or running:
+            # 1. Skip everything downstream of a failure
+            for step in list(waiting):
+                failed = [need for need in step["needs"] if need in results and results[need]["status"] != "ok"]
+                if failed:
+                    waiting.remove(step)
+                    finish({"id": step["id"], "agent": step["agent"], "needs": step["needs"], "status": "skipped",
+                            "returncode": None, "output": "", "stderr": "", "error": f"upstream '{failed[0]}' did not succeed",
+                            "started": None, "duration": 0.0})
+
+            # 2. Launch every step whose dependencies are done
+            for step in list(waiting):
+                if all(results.get(need, {}).get("status") == "ok" for need in step["needs"]):
+                    waiting.remove(step)
+                    running[pool.submit(tracing.wrap(run_step), step, build_prompt(step, results), timeout)] = step
+
+            if not running:
+                if waiting and not any(need in results for step in waiting for need in step["needs"]):
+                    raise ValueError("Steps wait on steps that are not in the mission (use load_mission)")
+                continue
+
+            # 3. Wait for the next agent to finish
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                finish(future.result())
+    return results
+
+
+def critical_path(steps, results):
+    """Longest chain of step durations through the graph: the best a mission can do."""
+    finish = {}
+    for step in steps:  # dependency order
+        finish[step["id"]] = results[step["id"]]["duration"] + max((finish[need] for need in step["needs"]), default=0.0)
+    return max(finish.values(), default=0.0)
+
+
+def write_results(out_dir, results):
+    for result in results.values():
+        cache_store.write_json(os.path.join(out_dir, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', result['id'])}.json"),
+                               result, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Orchestrator")
+    parser.add_argument("mission", help="Mission file: JSON (or YAML) list of steps")
+    parser.add_argument("--parallel", "-p", type=int, default=PARALLEL, help="Agents run at once")
+    parser.add_argument("--timeout", "-t", type=float, default=STEP_TIMEOUT, help="Seconds before a step is killed")
+    parser.add_argument("--out", "-o", help="Also write each step's result to OUT/<id>.json")
+    parser.add_argument("--no-log", action="store_true", help="Do not record steps in PROJECT_MEMORY.md")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Print the status lines only, not agent output")
+    args = parser.parse_args()
+
+    try:
+        steps = load_mission(args.mission)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    print(f"[ORCHESTRATOR] {len(steps)} steps, {max(1, args.parallel)} at a time", flush=True)
+    lock = threading.Lock()
+
+    def report(result):
+        with lock:
+            line = f"[{result['status'].upper():<7}] {result['id']} ({result['agent']}) {result['duration']:.1f}s"
+            print(line + (f" - {result['error']}" if result["error"] else ""), flush=True)
+            if not args.quiet and result["output"].strip():
+                print(result["output"].rstrip() + "\n", flush=True)
+
+    start = time.perf_counter()
+    trace_id = tracing.start_trace() if tracing.enabled() else None
+    with tracing.span("mission", steps=len(steps)):
+        results = run_mission(steps, args.parallel, args.timeout, on_result=report, log=not args.no_log)
+    elapsed = time.perf_counter() - start
+    if args.out:
+        write_results(args.out, results)
+
+    ok = sum(1 for result in results.values() if result["status"] == "ok")
+    serial = sum(result["duration"] for result in results.values())
+    print(f"[ORCHESTRATOR] {ok}/{len(steps)} steps ok in {elapsed:.1f}s "
+          f"(critical path {critical_path(steps, results):.1f}s, serial {serial:.1f}s)")
+    if trace_id:
+        print(f"[ORCHESTRATOR] Trace {trace_id}: python tracing.py {trace_id}")
+    sys.exit(0 if ok == len(steps) else 1)
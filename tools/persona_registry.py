@@ -0,0 +1,241 @@
+"""
+OUTLAW EXOTIX // PERSONA REGISTRY
+
+Every persona template, compiled once. The registry reads templates/*.md and
+memory_protocol.md together, pre-joins each persona with the Mnemosyne protocol,
+fingerprints the result and stores it all in one JSON file under the cache dir.
+
+Later lookups (a /mode switch in the War Room, an agent launch) read that one file
+and stat() what it was built from: the templates directory (a persona added or
+removed), the protocol and the requested template (edited in place). Any change
+recompiles the registry; nothing else re-reads or lists the templates. Long-running
+processes also keep the compiled registry in memory.
+
+The base directory holds templates/ and memory_protocol.md: the repo root when run
+from a checkout, ~/.claude once installed (install_kali.sh copies both there).
+
+Environment:
+    OUTLAW_CACHE_DIR   cache directory (default: ~/.claude/cache)
+
+Usage:
+    python persona_registry.py --list
+    python persona_registry.py --show overwatch
+    python persona_registry.py --launch overwatch [claude args...]   # what bin/agent.sh runs
+"""
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+import subprocess
+from collections import namedtuple
+
+import cache_store
+import tracing
+
+DEFAULT_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROTOCOL_FILE = "memory_protocol.md"
+CLAUDE_EXE = shutil.which("claude") or "claude"
+VERSION = 1
+
+Persona = namedtuple("Persona", ["name", "template", "prompt", "fingerprint"])
+
+_INVALID_NAME = re.compile(r"[/.\\]")
+
+_registries = {}
+_lock = threading.Lock()
+
+
+def valid_name(name):
+    """Persona names are bare file stems: no separators or dots (no path traversal)."""
+    return bool(name) and not _INVALID_NAME.search(name)
+
+
+def templates_dir(base=None):
+    return os.path.join(base or DEFAULT_BASE, "templates")
+
+
+def protocol_path(base=None):
+    return os.path.join(base or DEFAULT_BASE, PROTOCOL_FILE)
+
+
+def cache_path(base=None):
+    return cache_store.cache_dir("personas", f"{cache_store.path_digest(base or DEFAULT_BASE)}.json")
+
+
+def _stamp(path):
+    """[mtime_ns, size] of `path`, or None when it is missing."""
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def _read(path):
+    # Some templates were saved from Windows editors; a stray cp1252 byte must not hide the persona
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def combine(template, protocol):
+    """A persona's system prompt: its template followed by the memory protocol."""
+    if not protocol:
+        return template
+    separator = "" if template.endswith("\n") else "\n"
+    return f"{template}{separator}{protocol}"
+
+
+def compile_registry(base=None):
+    """Reads every template and the protocol once and writes the compiled registry."""
+    directory = templates_dir(base)
+    protocol_file = protocol_path(base)
+    protocol = _read(protocol_file) if os.path.isfile(protocol_file) else None
+
+    registry = {
+        "version": VERSION,
+        "templates": _stamp(directory),
+        "protocol": _stamp(protocol_file) if protocol is not None else None,
+        "personas": {},
+    }
+    if os.path.isdir(directory):
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if not entry.name.endswith(".md") or not entry.is_file():
+                continue
+            template = _read(entry.path)
+            prompt = combine(template, protocol)
+            registry["personas"][entry.name[:-3]] = {
+                "stamp": _stamp(entry.path),
+                "template": template,
+                "prompt": prompt,
+                "fingerprint": hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12],
+            }
+
+    try:
+        cache_store.write_json(cache_path(base), registry)
+    except OSError:
+        pass  # An unwritable cache only costs the next caller a recompile
+    return registry
+
+
+def _fresh(registry, base, name=None):
+    """True while nothing the registry was built from has changed (checked with stat() only)."""
+    if not registry or registry.get("version") != VERSION:
+        return False
+    if registry["templates"] != _stamp(templates_dir(base)):
+        return False
+    if registry["protocol"] != _stamp(protocol_path(base)):
+        return False
+    persona = registry["personas"].get(name) if name else None
+    if persona and persona["stamp"] != _stamp(os.path.join(templates_dir(base), f"{name}.md")):
+        return False
+    return True
+
+
+def load(base=None, name=None):
+    """
+    The compiled registry for `base`: from memory, then from the cache file, compiling
+    it when either is stale. `name` also revalidates that one template's mtime.
+    """
+    key = os.path.abspath(base or DEFAULT_BASE)
+    with _lock:
+        registry = _registries.get(key)
+        if not _fresh(registry, base, name):
+            try:
+                with open(cache_path(base), "r", encoding="utf-8") as f:
+                    registry = json.load(f)
+            except (OSError, ValueError):
+                registry = None
+            if not _fresh(registry, base, name):
+                registry = compile_registry(base)
+            _registries[key] = registry
+    return registry
+
+
+def get(name, base=None):
+    """The Persona called `name`, or None when there is no such template."""
+    if not valid_name(name):
+        return None
+    persona = load(base, name)["personas"].get(name)
+    if not persona:
+        return None
+    return Persona(name, persona["template"], persona["prompt"], persona["fingerprint"])
+
+
+def names(base=None):
+    return sorted(load(base)["personas"])
+
+
+def has_protocol(base=None):
+    return load(base)["protocol"] is not None
+
+
+def clear_cache():
+    with _lock:
+        _registries.clear()
+
+
+def launch(name, args, base=None):
+    """
+    Starts Claude with persona `name` (template + memory protocol) as its system prompt.
+    Mirrors bin/agent.sh, which hands launches to this function. Returns an exit code
+    (on Unix a successful launch replaces this process and never returns).
+    """
+    if not valid_name(name):
+        print("Error: Agent name contains invalid characters (path traversal attempt)")
+        return 1
+
+    with tracing.span("launch", agent=name):
+        persona = get(name, base)
+    if persona is None:
+        print(f"Error: Agent template '{name}' not found at {os.path.join(templates_dir(base), name + '.md')}")
+        return 1
+    if not has_protocol(base):
+        print(f"Warning: Memory protocol not found at {protocol_path(base)}")
+
+    print(f"\033[36mDeploying Agent: {name} (with Mnemosyne Memory)\033[0m", flush=True)
+
+    cmd = [CLAUDE_EXE, "--system-prompt", persona.prompt] + list(args)
+    try:
+        if os.name == "nt":
+            return subprocess.call(cmd)
+        os.execvp(cmd[0], cmd)
+    except OSError as e:
+        print(f"Error: could not start claude ({CLAUDE_EXE}): {e}")
+        return 127
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Persona Registry")
+    parser.add_argument("--base", "-b", default=None, help="Directory holding templates/ and memory_protocol.md")
+    parser.add_argument("--list", "-l", action="store_true", help="List personas with their fingerprints")
+    parser.add_argument("--show", "-s", metavar="NAME", help="Print a persona's compiled system prompt")
+    parser.add_argument("--launch", metavar="NAME", help="Start Claude with this persona; later arguments go to claude")
+
+    tracing.record_startup()
+
+    # Everything after `--launch NAME` belongs to claude, even flags like --help
+    argv = sys.argv[1:]
+    claude_args = []
+    if "--launch" in argv:
+        cut = argv.index("--launch") + 2
+        argv, claude_args = argv[:cut], argv[cut:]
+    args = parser.parse_args(argv)
+
+    if args.launch:
+        sys.exit(launch(args.launch, claude_args, args.base))
+    elif args.show:
+        persona = get(args.show, args.base)
+        if persona is None:
+            print(f"Error: Unknown persona '{args.show}'. Available: {names(args.base)}")
+            sys.exit(1)
+        print(persona.prompt)
+    elif args.list:
+        for name in names(args.base):
+            print(f"{name:<24} {get(name, args.base).fingerprint}")
+    else:
+        parser.print_help()
+        sys.exit(1)
@@ -0,0 +1,187 @@
+"""
+OUTLAW EXOTIX // PROFILING
+
+On-demand CPU profiles of a War Room turn or a bridge invocation, for the slow turns
+that are not waiting on the network. Each profiled block writes two files to the
+profiles directory:
+
+    <label>-<time>-<pid>.pstats    cProfile stats of the profiling thread
+                                   (python -m pstats FILE, snakeviz, ...)
+    <label>-<time>-<pid>.folded    collapsed stacks from a sampler that covers every
+                                   thread, advisor pool threads included
+                                   (flamegraph.pl FILE > flame.svg, speedscope)
+
+and returns a short top-N table of cumulative time for the console. A script's module
+imports happen before its profile starts; `python -X importtime` covers those.
+
+Nothing is imported, started or timed unless profiling is on: profile() is an
+environment lookup followed by a no-op context otherwise.
+
+Environment:
+    OUTLAW_PROFILE=1         profile (set by --profile; inherited by the bridges War Room spawns)
+    OUTLAW_PROFILE_DIR       output directory (default: OUTLAW_CACHE_DIR/profiles)
+    OUTLAW_PROFILE_TOP       functions in the inline report (default: 15)
+    OUTLAW_PROFILE_INTERVAL  sampling interval in ms (default: 5)
+"""
+import os
+import re
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+import cache_store
+
+ENABLE_ENV = "OUTLAW_PROFILE"
+DEFAULT_TOP = 15
+DEFAULT_INTERVAL_MS = 5
+
+
+def enabled():
+    return os.environ.get(ENABLE_ENV) == "1"
+
+
+def profiles_dir():
+    return os.getenv("OUTLAW_PROFILE_DIR") or cache_store.cache_dir("profiles")
+
+
+def _env_number(name, default, cast):
+    try:
+        return cast(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """
+    Samples the Python stacks of running threads every `interval` seconds and counts
+    them in collapsed form ("thread;outer;...;inner" -> samples). With `threads`, only
+    those thread idents are sampled.
+    """
+
+    def __init__(self, interval, threads=None):
+        self.interval = interval
+        self.threads = threads
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="outlaw-profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.threads is not None and ident not in self.threads):
+                    continue
+                # Other profiles' samplers are not part of the workload
+                if names.get(ident, "").startswith("outlaw-profile-sampler"):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self):
+        """The samples in collapsed-stack format, one "frames count" line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class Profile:
+    """One profiled block: its output paths and, after the block, the inline report."""
+
+    def __init__(self, label, all_threads=True):
+        self.label = label
+        self.all_threads = all_threads
+        self.pstats_path = None
+        self.folded_path = None
+        self.elapsed = 0.0
+        self.summary = ""
+        self._profiler = None
+        self._sampler = None
+
+    def start(self):
+        import cProfile
+
+        interval = _env_number("OUTLAW_PROFILE_INTERVAL", DEFAULT_INTERVAL_MS, float) / 1000
+        self._sampler = Sampler(interval, None if self.all_threads else {threading.get_ident()})
+        self._sampler.start()
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Another profiler owns the interpreter (e.g. a concurrent batch task on 3.12+)
+            self._profiler = None
+        self._start = time.perf_counter()
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._sampler.stop()
+
+        out_dir = profiles_dir()
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now % 1 * 1000):03d}"
+        name = re.sub(r"[^\w.-]", "_", self.label)
+        stem = os.path.join(out_dir, f"{name}-{stamp}-{os.getpid()}")
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            if self._profiler is not None:
+                self.pstats_path = stem + ".pstats"
+                self._profiler.dump_stats(self.pstats_path)
+            self.folded_path = stem + ".folded"
+            with open(self.folded_path, "w", encoding="utf-8") as f:
+                f.write(self._sampler.collapsed())
+        except OSError as e:
+            self.summary = f"[PROFILE] Could not write profile to {out_dir}: {e}"
+            return
+        self.summary = self.report(_env_number("OUTLAW_PROFILE_TOP", DEFAULT_TOP, int))
+
+    def report(self, top):
+        """Top `top` functions by cumulative time, plus where the full profile went."""
+        lines = [f"[PROFILE] {self.label}: {self.elapsed * 1000:.1f} ms, {self._sampler.samples} samples"]
+        if self._profiler is not None:
+            import pstats
+
+            stats = pstats.Stats(self._profiler).stats
+            rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+            lines.append(f"  {'cum ms':>10}{'own ms':>10}{'calls':>8}  function")
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows:
+                where = f"{os.path.basename(filename)}:{line}" if line else filename
+                lines.append(f"  {cumulative * 1000:>10.1f}{own * 1000:>10.1f}{calls:>8}  {name} ({where})")
+            lines.append(f"  pstats: {self.pstats_path}")
+        lines.append(f"  stacks: {self.folded_path}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile(label, all_threads=True):
+    """
+    Profiles the `with` block when profiling is on; yields the Profile (its .summary is
+    filled in once the block ends), or None when off.
+    """
+    if not enabled():
+        yield None
+        return
+    session = Profile(label, all_threads)
+    session.start()
+    try:
+        yield session
+    finally:
+        session.stop()
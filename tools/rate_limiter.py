@@ -0,0 +1,246 @@
+"""
+OUTLAW EXOTIX // RATE LIMITER
+
+One token bucket per provider/model, shared by every process on the machine through a
+locked state file (OUTLAW_CACHE_DIR/ratelimit.json), so parallel agents do not collapse
+into 429 storms. A 429 pauses the bucket until Retry-After and halves its rate, which
+then recovers linearly; other transient failures are retried with jittered backoff.
+
+Environment:
+    OUTLAW_RATE_LIMITS       requests per minute (and burst) per provider or provider/model:
+                             "gemini=60,codex/gpt-4o=500:20"   (default: gemini=60, codex=500)
+    OUTLAW_RETRY_ATTEMPTS    attempts per call, first included (default: 4)
+    OUTLAW_RETRY_MAX_DELAY   longest wait in seconds; a longer Retry-After fails the call (default: 60)
+    OUTLAW_NO_RATE_LIMIT=1   no shared buckets (retries still apply)
+"""
+import os
+import sys
+import json
+import time
+import random
+import email.utils
+from contextlib import contextmanager
+
+import cache_store
+import metrics
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+DEFAULT_LIMITS = {"gemini": 60, "codex": 500}
+ATTEMPTS = int(os.getenv("OUTLAW_RETRY_ATTEMPTS", "4"))
+MAX_DELAY = float(os.getenv("OUTLAW_RETRY_MAX_DELAY", "60"))
+BASE_DELAY = 1.0
+RECOVERY = 60.0      # a penalized bucket regains half its quota per RECOVERY seconds
+MIN_FACTOR = 0.1
+
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+# SDK exception names (openai, google.api_core) for errors that carry no status code
+RATE_LIMIT_ERRORS = {"RateLimitError", "ResourceExhausted", "TooManyRequests"}
+TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailable",
+                    "DeadlineExceeded", "BadGateway", "GatewayTimeout"}
+
+
+class RateLimitTimeout(TimeoutError):
+    """The bucket could not grant a request within the caller's timeout."""
+
+
+def enabled():
+    return os.getenv("OUTLAW_NO_RATE_LIMIT") != "1"
+
+
+def state_path():
+    return cache_store.cache_dir("ratelimit.json")
+
+
+def limits():
+    """{provider or provider/model: (requests per minute, burst)} from OUTLAW_RATE_LIMITS over the defaults."""
+    table = {name: (rpm, max(1, rpm // 12)) for name, rpm in DEFAULT_LIMITS.items()}
+    for item in os.getenv("OUTLAW_RATE_LIMITS", "").split(","):
+        name, _, value = item.strip().partition("=")
+        rate, _, burst = value.partition(":")
+        try:
+            rpm = float(rate)
+            table[name.strip()] = (rpm, int(burst) if burst else max(1, int(rpm // 12)))
+        except ValueError:
+            continue  # Malformed entries are ignored rather than failing every call
+    return table
+
+
+def limit_for(provider, model=None):
+    table = limits()
+    limit = table.get(f"{provider}/{model}") or table.get(provider)
+    # A rate of 0 turns the limiter off for that provider or model
+    return limit if limit and limit[0] > 0 else None
+
+
+@contextmanager
+def _locked_state():
+    """Yields the shared bucket state under an exclusive lock; changes are saved on exit."""
+    path = state_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        if fcntl:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            lock.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        try:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}  # Missing or torn: buckets simply start full
+            yield state
+            cache_store.write_json(path, state)
+        finally:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _refill(bucket, rpm, burst, now):
+    """Tops the bucket up for the time since its last update, at the (possibly reduced) rate."""
+    if bucket.get("factor", 1.0) < 1.0:
+        bucket["factor"] = min(1.0, bucket["factor"] + (now - bucket.get("penalized", now)) / RECOVERY * 0.5)
+        bucket["penalized"] = now
+    elapsed = max(0.0, now - bucket.get("updated", now))
+    rate = rpm / 60.0 * bucket.get("factor", 1.0)
+    bucket["tokens"] = min(float(burst), bucket.get("tokens", float(burst)) + elapsed * rate)
+    bucket["updated"] = now
+    return rate
+
+
+def acquire(provider, model=None, timeout=None):
+    """Takes one request from the bucket, waiting up to `timeout` seconds. Returns the seconds waited."""
+    limit = limit_for(provider, model)
+    if not enabled() or not limit:
+        return 0.0
+    rpm, burst = limit
+    key = f"{provider}/{model}"
+    start = time.monotonic()
+    while True:
+        with _locked_state() as state:
+            bucket = state.setdefault(key, {})
+            now = time.time()
+            rate = _refill(bucket, rpm, burst, now)
+            paused = bucket.get("paused_until", 0.0) - now
+            if paused > 0:
+                wait = paused
+            elif bucket["tokens"] >= 1.0:
+                bucket["tokens"] -= 1.0
+                waited = time.monotonic() - start
+                metrics.RATE_LIMIT_WAIT.observe(waited, provider=provider)
+                return waited
+            else:
+                wait = (1.0 - bucket["tokens"]) / rate
+
+        if timeout is not None and time.monotonic() - start + wait > timeout:
+            raise RateLimitTimeout(f"{key}: no request slot within {timeout:g}s")
+        # A little jitter keeps waiting processes from re-checking in lockstep
+        time.sleep(wait + random.uniform(0, min(wait, 1.0) * 0.1))
+
+
+def penalize(provider, model=None, delay=0.0):
+    """Pauses the bucket for every process for `delay` seconds and halves its refill rate."""
+    limit = limit_for(provider, model)
+    if not enabled() or not limit:
+        return
+    rpm, burst = limit
+    with _locked_state() as state:
+        bucket = state.setdefault(f"{provider}/{model}", {})
+        now = time.time()
+        _refill(bucket, rpm, burst, now)
+        bucket["paused_until"] = max(bucket.get("paused_until", 0.0), now + delay)
+        bucket["factor"] = max(MIN_FACTOR, bucket.get("factor", 1.0) * 0.5)
+        bucket["penalized"] = now
+        bucket["tokens"] = 0.0
+
+
+def _status(error):
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def rate_limited(error):
+    return _status(error) == 429 or type(error).__name__ in RATE_LIMIT_ERRORS
+
+
+def retryable(error):
+    return (rate_limited(error) or _status(error) in RETRY_STATUS or type(error).__name__ in TRANSIENT_ERRORS
+            or isinstance(error, (ConnectionError, TimeoutError)))
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait (Retry-After / retry-after-ms / RetryInfo), else None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if hasattr(headers, "get"):
+        value = headers.get("retry-after-ms") or headers.get("Retry-After-Ms")
+        if isinstance(value, str):
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if isinstance(value, str):
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+    # google.api_core: google.rpc.RetryInfo in the error details
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        seconds = getattr(delay, "seconds", None)
+        if isinstance(seconds, int):
+            return seconds + getattr(delay, "nanos", 0) / 1e9
+    return None
+
+
+def backoff(attempt):
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+
+def call(provider, model, fn, attempts=None):
+    """Runs `fn()` (one provider request) under the shared rate limit, retrying transient failures."""
+    attempts = attempts or ATTEMPTS
+    for attempt in range(attempts):
+        acquire(provider, model)
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is not None and delay > MAX_DELAY:
+                raise
+            metrics.RETRIES.inc(provider=provider, reason="rate_limit" if rate_limited(e) else type(e).__name__)
+            if delay is None:
+                delay = backoff(attempt)
+            print(f"[{provider.upper()}] {type(e).__name__}; retry {attempt + 2}/{attempts} in {delay:.1f}s",
+                  file=sys.stderr)
+            if rate_limited(e) and enabled() and limit_for(provider, model):
+                # The next acquire() waits out the pause, here and in every other process
+                penalize(provider, model, delay)
+            else:
+                time.sleep(delay)
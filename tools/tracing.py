@@ -0,0 +1,283 @@
+"""
+OUTLAW EXOTIX // TRACING
+
+Timed spans for every phase of a War Room turn, across processes. A span is one
+JSON line appended to a local trace file:
+
+    {"trace": "...", "span": "...", "parent": "..." | null, "name": "provider",
+     "start": 1767225600.123, "ms": 812.4, "pid": 4242, "proc": "gemini_bridge.py",
+     "status": "ok" | "error", "attrs": {...}}
+
+War Room starts a trace per turn. The trace id and the current span travel to child
+processes (bridges, Claude, agent launchers, log_memory.py) in OUTLAW_TRACE_ID and
+OUTLAW_TRACE_PARENT, and to the bridge daemon inside the request frame, so every
+span of a turn can be put back into one tree. A child also receives its spawn time,
+from which it records interpreter startup as its own span.
+
+Disabled (the default), span() hands back one shared no-op object: the cost is an
+environment lookup per call, no clock reads, no allocation, no file access.
+
+Environment:
+    OUTLAW_TRACE=1          record spans
+    OUTLAW_TRACE_FILE       trace file (default: OUTLAW_CACHE_DIR/trace.jsonl)
+    OUTLAW_CACHE_DIR        cache directory (default: ~/.claude/cache)
+
+Usage:
+    python tracing.py               # breakdown of the most recent trace
+    python tracing.py <trace-id>
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+
+import cache_store
+
+ENABLE_ENV = "OUTLAW_TRACE"
+TRACE_ENV = "OUTLAW_TRACE_ID"
+PARENT_ENV = "OUTLAW_TRACE_PARENT"
+SPAWN_ENV = "OUTLAW_TRACE_SPAWNED"
+MAX_BYTES = 8 * 1024 * 1024  # the trace file is rotated to trace.jsonl.1 past this size
+
+_local = threading.local()
+
+
+def enabled():
+    # A daemon thread serving a traced request records spans even if the daemon itself was started untraced
+    return os.environ.get(ENABLE_ENV) == "1" or getattr(_local, "forced", False)
+
+
+def trace_path():
+    return os.getenv("OUTLAW_TRACE_FILE") or cache_store.cache_dir("trace.jsonl")
+
+
+def new_id():
+    return os.urandom(8).hex()
+
+
+def current():
+    """(trace_id, span_id) of this thread's innermost open span, else what the parent process passed down."""
+    stack = getattr(_local, "stack", None)
+    if stack:
+        return stack[-1]
+    return os.environ.get(TRACE_ENV), os.environ.get(PARENT_ENV)
+
+
+def start_trace():
+    """Starts a new trace for this process and every subprocess it starts from now on. Returns its id."""
+    trace_id = new_id()
+    os.environ[TRACE_ENV] = trace_id
+    os.environ.pop(PARENT_ENV, None)
+    _local.stack = []
+    return trace_id
+
+
+@contextmanager
+def attach(context):
+    """
+    Runs the block inside `context`, a (trace_id, span_id) pair from current(): in a
+    worker thread, or in the bridge daemon for a request that carried one.
+    """
+    saved = getattr(_local, "stack", None), getattr(_local, "forced", False)
+    if context and context[0]:
+        _local.stack, _local.forced = [tuple(context)], True
+    try:
+        yield
+    finally:
+        _local.stack, _local.forced = saved
+
+
+def wrap(fn):
+    """`fn` bound to the caller's trace context, for handing to a thread pool."""
+    if not enabled():
+        return fn
+    context = current()
+
+    def traced(*args, **kwargs):
+        with attach(context):
+            return fn(*args, **kwargs)
+    return traced
+
+
+def child_env(env=None):
+    """Environment for a subprocess: carries the trace, the current span and the spawn time."""
+    env = dict(os.environ if env is None else env)
+    if enabled():
+        trace_id, span_id = current()
+        if trace_id:
+            env[ENABLE_ENV] = "1"
+            env[TRACE_ENV] = trace_id
+            env[SPAWN_ENV] = repr(time.time())
+            if span_id:
+                env[PARENT_ENV] = span_id
+    return env
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "trace", "id", "parent", "start", "_clock")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def mark(self, attr):
+        """Stores the time since the span started (ms) as `attr`, e.g. time to first token."""
+        self.attrs[attr] = round((time.perf_counter() - self._clock) * 1000, 3)
+
+    def __enter__(self):
+        self.trace, self.parent = current()
+        self.trace = self.trace or new_id()
+        self.id = new_id()
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append((self.trace, self.id))
+        self.start = time.time()
+        self._clock = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self._clock) * 1000
+        stack = _local.stack
+        if stack and stack[-1][1] == self.id:
+            stack.pop()
+        if exc_type is not None and not issubclass(exc_type, (SystemExit, GeneratorExit)):
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        _write(self.trace, self.id, self.parent, self.name, self.start, ms, self.attrs)
+        return False
+
+
+class _NoSpan:
+    """What span() returns while tracing is off: one shared object that does nothing."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def mark(self, attr):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **attrs):
+    """
+    Times the `with` block as a span of the current trace. `attrs` (and .set() inside
+    the block) are stored with it; an exception leaving the block is recorded as an error.
+    """
+    if not enabled():
+        return _NO_SPAN
+    return _Span(name, attrs)
+
+
+def record_startup(name="startup"):
+    """
+    Records this process's interpreter startup (parent's spawn to now) as a span, when a
+    traced parent passed its spawn time. Call it first thing in a script's __main__.
+    """
+    spawned = os.environ.pop(SPAWN_ENV, None)
+    if spawned and enabled():
+        trace_id, parent = current()
+        try:
+            start = float(spawned)
+        except ValueError:
+            return
+        _write(trace_id, new_id(), parent, name, start, (time.time() - start) * 1000, {})
+
+
+def _write(trace_id, span_id, parent, name, start, ms, attrs):
+    record = {"trace": trace_id, "span": span_id, "parent": parent, "name": name, "start": round(start, 6),
+              "ms": round(ms, 3), "pid": os.getpid(), "proc": os.path.basename(sys.argv[0]) if sys.argv else "",
+              "status": "error" if "error" in attrs else "ok", "attrs": attrs}
+    line = (json.dumps(record, default=str, separators=(",", ":")) + "\n").encode("utf-8")
+    path = trace_path()
+    try:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            # One write per span: O_APPEND keeps lines from concurrent processes whole
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        if size > MAX_BYTES:
+            os.replace(path, path + ".1")
+    except OSError:
+        pass  # Tracing never fails the work it observes
+
+
+def load(trace_id=None, path=None):
+    """Spans of `trace_id` (default: the most recent trace), oldest first."""
+    path = path or trace_path()
+    lines = []
+    for source in (path + ".1", path):
+        try:
+            with open(source, "r", encoding="utf-8", errors="replace") as f:
+                lines.extend(f.readlines())
+        except OSError:
+            pass
+
+    spans = []
+    for line in reversed(lines):
+        if trace_id and trace_id not in line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        trace_id = trace_id or record.get("trace")
+        if record.get("trace") == trace_id:
+            spans.append(record)
+    return sorted(spans, key=lambda record: record["start"])
+
+
+def format_breakdown(spans):
+    """The spans of one trace as an indented tree: offset from the start of the trace, duration, process."""
+    if not spans:
+        return "No spans recorded for this trace."
+    ids = {record["span"] for record in spans}
+    children = {}
+    for record in spans:
+        parent = record["parent"] if record["parent"] in ids else None
+        children.setdefault(parent, []).append(record)
+
+    origin = spans[0]["start"]
+    end = max(record["start"] + record["ms"] / 1000 for record in spans)
+    lines = [f"TRACE {spans[0]['trace']}  {(end - origin) * 1000:.1f} ms",
+             f"  {'span':<34}{'at ms':>10}{'took ms':>10}  process"]
+
+    def walk(parent, depth):
+        for record in children.get(parent, []):
+            attrs = " ".join(f"{key}={value}" for key, value in record["attrs"].items() if key != "error")
+            status = f"  [{record['attrs']['error']}]" if record["status"] == "error" else ""
+            lines.append(f"  {'  ' * depth + record['name']:<34}{(record['start'] - origin) * 1000:>10.1f}"
+                         f"{record['ms']:>10.1f}  {record['proc']}:{record['pid']}"
+                         + (f"  {attrs}" if attrs else "") + status)
+            walk(record["span"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Trace Viewer")
+    parser.add_argument("trace", nargs="?", help="Trace id (default: the most recent trace)")
+    parser.add_argument("--file", "-f", help="Trace file (default: OUTLAW_TRACE_FILE or the cache dir)")
+    args = parser.parse_args()
+    print(format_breakdown(load(args.trace, args.file)))
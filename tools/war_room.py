@@ -1,23 +1,74 @@
 import subprocess
 import sys
 import os
+import re
+import json
 import time
 import shutil
+import codecs
+import argparse
+import threading
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from colorama import Fore, Back, Style, init
 
+import bridge_daemon
+import cache_store
+import advisor_router
+import advisor_session
+import context_builder
+import context_packer
+import code_index
+import persona_registry
+import claude_session
+import tracing
+import profiling
+import metrics
+from claude_session import ClaudeSession, write_system_prompt, release_system_prompt, remove_temp_file
+
 init()
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 GEMINI_BRIDGE = os.path.join(current_dir, "gemini_bridge.py")
 CODEX_BRIDGE = os.path.join(current_dir, "codex_bridge.py")
-TEMPLATES_DIR = os.path.join(project_root, "templates")
+PERSONA_BASE = project_root
+TEMPLATES_DIR = persona_registry.templates_dir(PERSONA_BASE)
 
 if os.name == "nt":
     CLAUDE_EXE = r"C:\Users\penne\.local\bin\claude.exe"
 else:
     CLAUDE_EXE = shutil.which("claude") or "claude"
 
+# Per-advisor budget (seconds) for council turns; a slow provider is dropped, not waited on
+ADVISOR_DEADLINE = float(os.getenv("WAR_ROOM_ADVISOR_DEADLINE", "90"))
+
+# Speculative mode: spawn Claude while the advisor is still thinking (toggle with /speculate)
+SPECULATIVE = os.getenv("WAR_ROOM_SPECULATIVE", "0") == "1"
+
+# Claude gets its prompt over stdin; WAR_ROOM_PROMPT_STDIN=0 falls back to a temp @file
+PROMPT_VIA_STDIN = os.getenv("WAR_ROOM_PROMPT_STDIN", "1") == "1"
+# Session mode: one persistent Claude process per persona, kept across turns (toggle with /session)
+SESSION_MODE = os.getenv("WAR_ROOM_SESSION", "0") == "1"
+
+# Batch mode (--batch FILE): tasks run headless on a pool of workers
+BATCH_WORKERS = int(os.getenv("WAR_ROOM_BATCH_WORKERS", "4"))
+# A batch task's Claude run is killed after this many seconds; a session turn after this long without output
+CLAUDE_TIMEOUT = float(os.getenv("WAR_ROOM_CLAUDE_TIMEOUT", "900"))
+
+# Routing: plain turns go to the fastest healthy advisor instead of Gemini (toggle with /route on|hedge|off).
+# "hedge" also starts a second advisor when the first is slower than its p95; see advisor_router.py
+ROUTING = os.getenv("WAR_ROOM_ROUTING", "off").lower()
+
+# Council roster: (bridge script, display color, section label)
+ADVISORS = [
+    (GEMINI_BRIDGE, Fore.CYAN, "GEMINI STRATEGY"),
+    (CODEX_BRIDGE, Fore.BLUE, "CODEX BLUEPRINT"),
+]
+PROVIDER_SCRIPTS = {"gemini": GEMINI_BRIDGE, "codex": CODEX_BRIDGE}
+_router = None
+
 def clear_screen():
     os.system("cls" if os.name == "nt" else "clear")
 
@@ -29,14 +80,471 @@ def draw_header():
     print("=============================================================")
     print(f"{Style.RESET_ALL}")
 
+def advisor_style(advisor_script):
+    """(display color, section label) of an advisor bridge."""
+    return next((color, label) for script, color, label in ADVISORS if script == advisor_script)
+
+def router():
+    # Created on first use so that it reads the profiles of the cache dir in effect
+    global _router
+    if _router is None:
+        _router = advisor_router.Router()
+    return _router
+
+def build_advisor_input(advisor_script, real_prompt):
+    # Codex takes the prompt directly as a task; Gemini is asked for advice
+    if advisor_script == CODEX_BRIDGE:
+        return real_prompt
+    return f"Advice for: {real_prompt}"
+
+def stream_subprocess(cmd, on_chunk=None, timeout=None):
+    """
+    Runs `cmd` and returns its stdout, handing each chunk to `on_chunk` as soon as the
+    child flushes it. Raises subprocess.TimeoutExpired if `timeout` seconds pass first.
+    """
+    env = tracing.child_env(dict(os.environ, PYTHONUNBUFFERED="1"))
+    # Verbose mode lets the bridges' context reports (stderr) through to the console
+    stderr = None if context_packer.verbose() else subprocess.DEVNULL
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, env=env)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.start()
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = []
+    try:
+        while True:
+            data = process.stdout.read1(4096)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                chunks.append(text)
+                if on_chunk:
+                    on_chunk(text)
+        process.wait()
+    finally:
+        if timer:
+            timer.cancel()
+        process.stdout.close()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return "".join(chunks) + decoder.decode(b"", final=True)
+
+def run_advisor(advisor_script, advisor_input, timeout=None, on_chunk=None):
+    """
+    Runs an advisor bridge, via the bridge daemon when one serves this directory.
+    Output is streamed to `on_chunk` as tokens arrive; the full text is returned.
+    Raises TimeoutError / subprocess.TimeoutExpired if `timeout` seconds pass first.
+    """
+    provider = "codex" if advisor_script == CODEX_BRIDGE else "gemini"
+    via = "daemon"
+    ok = False
+    start = time.perf_counter()
+    with tracing.span("advisor", provider=provider) as span:
+        try:
+            output = bridge_daemon.consult(provider, advisor_input, timeout=timeout or bridge_daemon.REQUEST_TIMEOUT,
+                                           on_chunk=on_chunk, session=advisor_session.current())
+            if output is None:
+                via = "subprocess"
+                output = stream_subprocess([sys.executable, advisor_script, advisor_input], on_chunk, timeout)
+            ok = not advisor_router.advisor_failed(output)
+        except Exception as e:
+            metrics.count_error(provider, e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            span.set(via=via)
+            metrics.ADVISOR_LATENCY.observe(elapsed, provider=provider, via=via)
+            # Every consult, routed or not, keeps the router's profile of the provider current
+            router().record(provider, elapsed, ok)
+    return output.strip()
+
+def route_advisor(real_prompt, hedge=False, timeout=None, on_chunk=None):
+    """
+    Consults the advisor that is currently fastest and healthy. With `hedge`, a second
+    advisor is raced once the first runs past its p95. Returns (advisor_script, advice,
+    streamed), where `streamed` means on_chunk has already shown the advice.
+    """
+    consult = tracing.wrap(run_advisor)
+    calls = {
+        provider: (lambda chunk, script=script: consult(script, build_advisor_input(script, real_prompt), timeout, chunk))
+        for provider, script in PROVIDER_SCRIPTS.items()
+    }
+    with tracing.span("route", hedge=hedge) as span:
+        provider, advice, streamed = router().consult(calls, hedge=hedge, timeout=timeout, on_chunk=on_chunk)
+        span.set(provider=provider)
+    return PROVIDER_SCRIPTS[provider], advice, streamed
+
+def run_council(real_prompt, deadline=None):
+    """
+    Consults every advisor in ADVISORS concurrently, each bounded by `deadline` seconds,
+    so the turn costs the slowest advisor rather than the sum. Returns [(advisor_type, advice)].
+    """
+    deadline = deadline or ADVISOR_DEADLINE
+    with ThreadPoolExecutor(max_workers=len(ADVISORS)) as pool:
+        futures = [
+            (advisor_type, pool.submit(tracing.wrap(run_advisor), script, build_advisor_input(script, real_prompt), deadline))
+            for script, _, advisor_type in ADVISORS
+        ]
+
+    results = []
+    for advisor_type, future in futures:
+        try:
+            advice = future.result()
+        except (TimeoutError, subprocess.TimeoutExpired):
+            advice = f"[NO RESPONSE WITHIN {deadline:g}s]"
+        except Exception as e:
+            advice = f"[ADVISOR ERROR] {e}"
+        results.append((advisor_type, advice))
+    return results
+
+def merge_advice(real_prompt, sections, budget=None, report=None):
+    """
+    Builds the Claude prompt from the request and each (advisor_type, advice) section.
+    With `budget` (tokens), advice is trimmed to fit and sizes are appended to `report`.
+    """
+    with tracing.span("merge", sections=len(sections)):
+        parts = [context_packer.Section("request", f"REQUEST: {real_prompt}")]
+        for advisor_type, advice in sections:
+            parts.append(context_packer.Section(advisor_type, advice, context_packer.ADVICE, "head",
+                                                f"\n\n[{advisor_type}]:\n"))
+        if budget is not None:
+            parts, rows = context_packer.pack(parts, budget)
+            if report is not None:
+                report.extend(rows)
+        return "".join(context_packer.render(part) for part in parts)
+
+def claude_command(system_path=None, prompt_file=None):
+    """Claude CLI argv. The prompt comes from stdin unless `prompt_file` is given."""
+    cmd = [CLAUDE_EXE, "-p"]
+    if prompt_file:
+        cmd.append(f"@{prompt_file}")
+    cmd.append("--dangerously-skip-permissions")
+    if system_path:
+        cmd.extend(["--system-prompt", f"@{system_path}"])
+    return cmd
+
+def run_claude(prompt, system_prompt=None, timeout=None):
+    """
+    Runs Claude once in print mode and returns (stdout, stderr). The prompt is piped
+    over stdin, never through the shell or argv; with PROMPT_VIA_STDIN off it is
+    written to a temp file and passed as @file instead. Raises subprocess.TimeoutExpired
+    (after killing Claude) if `timeout` seconds pass first.
+    """
+    system_path, system_fd = write_system_prompt(system_prompt)
+    prompt_file = None
+    try:
+        if not PROMPT_VIA_STDIN:
+            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as pf:
+                pf.write(prompt)
+                prompt_file = pf.name
+        # Never let the CLI inherit the console's stdin: it would wait on it
+        stdin = {"stdin": subprocess.DEVNULL} if prompt_file else {"input": prompt}
+        with tracing.span("claude", mode="oneshot"), metrics.CLAUDE_LATENCY.time(mode="oneshot"):
+            result = subprocess.run(claude_command(system_path, prompt_file), capture_output=True,
+                                    text=True, encoding='utf-8', timeout=timeout, env=tracing.child_env(),
+                                    pass_fds=(system_fd,) if system_fd is not None else (), **stdin)
+        return result.stdout, result.stderr
+    finally:
+        remove_temp_file(prompt_file)
+        release_system_prompt(system_path, system_fd)
+
+def spawn_speculative_claude(system_prompt):
+    """
+    Starts Claude in print mode before the advisor phase, waiting for its prompt on stdin,
+    so persona loading and CLI startup overlap the advisor round trip.
+    Returns (process, system_prompt_handle); hand both to finish_speculative_claude.
+    """
+    system_path, system_fd = write_system_prompt(system_prompt)
+    try:
+        process = subprocess.Popen(claude_command(system_path), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True, encoding='utf-8', env=tracing.child_env(),
+                                   pass_fds=(system_fd,) if system_fd is not None else ())
+    except Exception:
+        release_system_prompt(system_path, system_fd)
+        raise
+    return process, (system_path, system_fd)
+
+def finish_speculative_claude(process, system_prompt_handle, prompt):
+    """Feeds the final prompt to a speculative Claude process. Returns (stdout, stderr)."""
+    try:
+        with tracing.span("claude", mode="speculative"), metrics.CLAUDE_LATENCY.time(mode="speculative"):
+            return process.communicate(prompt)
+    except BaseException:
+        process.kill()  # Interrupted mid-turn: do not leave Claude running
+        process.communicate()
+        raise
+    finally:
+        release_system_prompt(*system_prompt_handle)
+
+def abort_speculative_claude(process, system_prompt_handle):
+    process.kill()
+    process.communicate()
+    release_system_prompt(*system_prompt_handle)
+
+# --- BATCH MODE ---
+# Advisor choices for a batch task: one advisor, the routed one, the whole council, or straight to Claude
+BATCH_ADVISORS = {
+    "gemini": GEMINI_BRIDGE,
+    "codex": CODEX_BRIDGE,
+    "auto": None,
+    "council": None,
+    "none": None,
+}
+
+def _task_id(raw, number):
+    # Ids name the result files: keep them to safe filename characters
+    task_id = re.sub(r"[^A-Za-z0-9_.-]", "_", str(raw or "")).strip("._")
+    return task_id or f"task-{number:03d}"
+
+def load_tasks(path):
+    """
+    Batch tasks from a JSONL file (one task per line) or a YAML file (a list of tasks,
+    or a mapping with a `tasks` list). A task is a prompt string or an object with
+    `prompt` and optional `id`, `persona`, `advisor` (gemini, codex, auto, council, none)
+    and `execute` (false: advice only). Raises ValueError for anything malformed,
+    so a bad file fails before any provider is called.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML batch files need PyYAML (pip install pyyaml); use JSONL instead")
+        try:
+            entries = yaml.safe_load(raw) or []
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path}: {e}")
+        if isinstance(entries, dict):
+            entries = entries.get("tasks") or []
+        if not isinstance(entries, list):
+            raise ValueError(f"{path}: expected a list of tasks")
+    else:
+        entries = []
+        for line_number, line in enumerate(raw.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: {e}")
+
+    tasks = []
+    seen = set()
+    for number, entry in enumerate(entries, 1):
+        if isinstance(entry, str):
+            entry = {"prompt": entry}
+        if not isinstance(entry, dict) or not str(entry.get("prompt") or "").strip():
+            raise ValueError(f"Task {number}: needs a prompt")
+
+        task = {
+            "id": _task_id(entry.get("id"), number),
+            "prompt": str(entry["prompt"]).strip(),
+            "persona": entry.get("persona") or None,
+            "advisor": str(entry.get("advisor") or "gemini").lower(),
+            "execute": entry.get("execute", True) is not False,
+        }
+        if task["id"] in seen:
+            raise ValueError(f"Task {number}: duplicate id '{task['id']}'")
+        seen.add(task["id"])
+        if task["advisor"] not in BATCH_ADVISORS:
+            raise ValueError(f"Task {task['id']}: unknown advisor '{task['advisor']}' "
+                             f"(choose from {', '.join(BATCH_ADVISORS)})")
+        if task["persona"] and persona_registry.get(task["persona"], PERSONA_BASE) is None:
+            raise ValueError(f"Task {task['id']}: unknown persona '{task['persona']}'. "
+                             f"Available: {persona_registry.names(PERSONA_BASE)}")
+        tasks.append(task)
+    return tasks
+
+def run_task(task, gates=None):
+    """
+    Runs one batch task through the advisor -> Claude pipeline without printing.
+    `gates` maps a provider (gemini, codex, claude) to a semaphore bounding its
+    concurrent requests. Returns the task's result record.
+    """
+    gates = gates or {}
+
+    def gate(*providers):
+        # Always acquired in the same order, so two council tasks cannot deadlock
+        stack = contextlib.ExitStack()
+        for provider in sorted(providers):
+            if provider in gates:
+                stack.enter_context(gates[provider])
+        return stack
+
+    # Each task is a trace of its own; its id goes into the result
+    trace_id = tracing.new_id() if tracing.enabled() else None
+    with tracing.attach((trace_id, None)), tracing.span("task", id=task["id"]), \
+            profiling.profile(f"task-{task['id']}", all_threads=False) as task_profile:
+        result = dict(task, status="ok", advice=[], output=None, stderr=None, error=None,
+                      started=time.time(), timings={}, trace=trace_id)
+        timings = result["timings"]
+        start = time.perf_counter()
+        try:
+            persona = persona_registry.get(task["persona"], PERSONA_BASE) if task["persona"] else None
+            prompt, advisor = task["prompt"], task["advisor"]
+
+            # 1. ADVISOR PHASE
+            sections = []
+            if advisor == "council":
+                with gate("gemini", "codex"):
+                    sections = run_council(prompt)
+            elif advisor != "none":
+                script = BATCH_ADVISORS[advisor] or PROVIDER_SCRIPTS[router().route(list(PROVIDER_SCRIPTS))[0]]
+                # A routed task may reach either provider, and with hedging both
+                with gate(*(PROVIDER_SCRIPTS if advisor == "auto" else [advisor])):
+                    try:
+                        if advisor == "auto":
+                            script, advice, _ = route_advisor(prompt, hedge=ROUTING == "hedge", timeout=ADVISOR_DEADLINE)
+                        else:
+                            advice = run_advisor(script, build_advisor_input(script, prompt), timeout=ADVISOR_DEADLINE)
+                    except (TimeoutError, subprocess.TimeoutExpired):
+                        advice = f"[NO RESPONSE WITHIN {ADVISOR_DEADLINE:g}s]"
+                    except Exception as e:
+                        advice = f"[ADVISOR ERROR] {e}"
+                sections = [(advisor_style(script)[1], advice)]
+            result["advice"] = [{"advisor": advisor_type, "text": advice} for advisor_type, advice in sections]
+            timings["advisor"] = round(time.perf_counter() - start, 3)
+
+            # 2. CLAUDE PHASE
+            if task["execute"]:
+                system_prompt = persona.template if persona else None
+                if sections:
+                    budget = context_packer.budget_for("claude")
+                    report = context_packer.measure(persona=system_prompt)
+                    combined_prompt = merge_advice(prompt, sections, budget=budget - context_packer.used(report),
+                                                   report=report)
+                else:
+                    combined_prompt = prompt
+
+                claude_start = time.perf_counter()
+                with gate("claude"):
+                    stdout, stderr = run_claude(combined_prompt, system_prompt, timeout=CLAUDE_TIMEOUT)
+                timings["claude"] = round(time.perf_counter() - claude_start, 3)
+                result["output"], result["stderr"] = stdout, stderr or None
+                if not stdout.strip():
+                    result["status"] = "failed"
+                    result["error"] = (stderr or "").strip() or "Claude returned no output"
+                    metrics.count_error("claude", "EmptyOutput")
+
+        except subprocess.TimeoutExpired as e:
+            result["status"], result["error"] = "timeout", f"Claude did not finish within {e.timeout:g}s"
+            metrics.count_error("claude", e)
+        except Exception as e:
+            result["status"], result["error"] = "failed", f"{type(e).__name__}: {e}"
+            metrics.count_error("task", e)
+
+        timings["total"] = round(time.perf_counter() - start, 3)
+    if task_profile:
+        result["profile"] = {"pstats": task_profile.pstats_path, "stacks": task_profile.folded_path}
+    return result
+
+def result_path(out_dir, task):
+    return os.path.join(out_dir, f"{task['id']}.json")
+
+def write_result(out_dir, result):
+    cache_store.write_json(result_path(out_dir, result), result, indent=2)
+
+def _done(out_dir, task):
+    try:
+        with open(result_path(out_dir, task), "r", encoding="utf-8") as f:
+            return json.load(f).get("status") == "ok"
+    except (OSError, ValueError):
+        return False
+
+def run_batch(tasks, out_dir, workers=None, limits=None, skip_done=False, on_result=None):
+    """
+    Runs `tasks` on a pool of `workers` threads; each result goes to <out_dir>/<id>.json
+    as soon as its task finishes and is handed to `on_result`. `limits` caps concurrent
+    requests per provider ({"claude": 2}); with `skip_done`, tasks whose result file
+    already says ok are not run again. Returns the results in task order.
+    """
+    # Batch tasks are independent: no shared advisor conversation, full context for each
+    os.environ.pop("OUTLAW_SESSION", None)
+    gates = {provider: threading.BoundedSemaphore(limit) for provider, limit in (limits or {}).items()}
+    pending = [task for task in tasks if not (skip_done and _done(out_dir, task))]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers or BATCH_WORKERS)) as pool:
+        futures = {pool.submit(run_task, task, gates): task for task in pending}
+        for future in as_completed(futures):
+            result = future.result()
+            write_result(out_dir, result)
+            results[result["id"]] = result
+            if on_result:
+                on_result(result)
+    return [results[task["id"]] for task in pending]
+
+def parse_limits(specs):
+    """["claude=2", "gemini=4"] -> {"claude": 2, "gemini": 4}. Raises ValueError for a bad spec."""
+    limits = {}
+    for spec in specs or []:
+        provider, _, limit = spec.partition("=")
+        provider = provider.strip().lower()
+        if provider not in ("gemini", "codex", "claude") or not limit.strip().isdigit() or int(limit) < 1:
+            raise ValueError(f"Bad limit '{spec}': expected gemini=N, codex=N or claude=N")
+        limits[provider] = int(limit)
+    return limits
+
+def batch_main(path, out_dir, workers=None, limits=None, skip_done=False):
+    """Headless entry point: runs a batch file and prints one line per task. Returns an exit code."""
+    try:
+        tasks = load_tasks(path)
+        limits = parse_limits(limits)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}[BATCH ERROR] {e}{Style.RESET_ALL}")
+        return 2
+
+    workers = workers or BATCH_WORKERS
+    print(f"{Fore.YELLOW}[BATCH] {len(tasks)} tasks, {workers} workers -> {out_dir}{Style.RESET_ALL}")
+    colors = {"ok": Fore.GREEN, "timeout": Fore.YELLOW, "failed": Fore.RED}
+    finished = []
+
+    def report(result):
+        finished.append(result)
+        print(f"{colors[result['status']]}[{len(finished):>3}/{len(tasks)}] {result['status']:<7} "
+              f"{result['timings']['total']:>8.1f}s  {result['id']}{Style.RESET_ALL}"
+              + (f"  {result['error'].splitlines()[0]}" if result["error"] else ""))
+
+    start = time.perf_counter()
+    results = run_batch(tasks, out_dir, workers, limits, skip_done, on_result=report)
+    elapsed = time.perf_counter() - start
+
+    ok = sum(1 for result in results if result["status"] == "ok")
+    skipped = len(tasks) - len(results)
+    print(f"{Fore.YELLOW}[BATCH] {ok}/{len(results)} ok in {elapsed:.1f}s"
+          + (f", {skipped} skipped (already done)" if skipped else "") + f"{Style.RESET_ALL}")
+    return 0 if ok == len(results) else 1
+
 def main():
     draw_header()
     print(f"{Fore.GREEN}[SYSTEM] ALL SYSTEMS ONLINE.{Style.RESET_ALL}\n")
     
     current_system_prompt = None
     active_persona_name = "Default"
+    speculative = SPECULATIVE
+    # Advisors see full context on the first turn of a session and only what changed after that
+    os.environ["OUTLAW_SESSION"] = advisor_session.new_session()
+    session_mode = SESSION_MODE
+    routing = ROUTING if ROUTING in ("on", "hedge") else "off"
+    claude = ClaudeSession(exe=CLAUDE_EXE)
+    last_trace = None
 
     while True:
+        speculative_claude = None
+        turn_scope = contextlib.ExitStack()
+        turn_profile = None
         try:
             prompt_color = Fore.RED if active_persona_name == "Default" else Fore.MAGENTA
             user_input = input(f"{prompt_color}COMMANDER [{active_persona_name}] > {Style.RESET_ALL}")
@@ -57,23 +565,105 @@ def main():
                     print(f"{Fore.YELLOW}[SYSTEM] Persona reset to Default.{Style.RESET_ALL}")
                     continue
 
-                template_path = os.path.join(TEMPLATES_DIR, f"{target_mode}.md")
-                if os.path.exists(template_path):
-                    try:
-                        with open(template_path, "r", encoding="utf-8") as f:
-                            current_system_prompt = f.read()
-                        active_persona_name = target_mode.upper()
-                        print(f"{Fore.YELLOW}[SYSTEM] Persona Active: {active_persona_name}{Style.RESET_ALL}")
-                    except Exception as e:
-                        print(f"{Fore.RED}[ERROR] Failed to load template: {e}{Style.RESET_ALL}")
+                # Served from the compiled registry; templates are only re-read after an edit
+                try:
+                    persona = persona_registry.get(target_mode, PERSONA_BASE)
+                except Exception as e:
+                    print(f"{Fore.RED}[ERROR] Failed to load template: {e}{Style.RESET_ALL}")
+                    continue
+                if persona:
+                    current_system_prompt = persona.template
+                    active_persona_name = target_mode.upper()
+                    print(f"{Fore.YELLOW}[SYSTEM] Persona Active: {active_persona_name} ({persona.fingerprint}){Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.RED}[ERROR] Template not found: {os.path.join(TEMPLATES_DIR, target_mode + '.md')}{Style.RESET_ALL}")
+                    print(f"Available: {persona_registry.names(PERSONA_BASE)}")
+                continue
+
+            # SPECULATIVE EXECUTION TOGGLE (/speculate on|off)
+            if cmd_lower.startswith("/speculate"):
+                setting = cmd_lower[10:].strip()
+                speculative = (setting == "on") if setting in ("on", "off") else not speculative
+                print(f"{Fore.YELLOW}[SYSTEM] Speculative execution: {'ON' if speculative else 'OFF'}{Style.RESET_ALL}")
+                continue
+
+            # PERSISTENT CLAUDE TOGGLE (/session on|off): one Claude process kept across turns
+            if cmd_lower.startswith("/session"):
+                setting = cmd_lower[8:].strip()
+                session_mode = (setting == "on") if setting in ("on", "off") else not session_mode
+                if not session_mode:
+                    claude.close()
+                print(f"{Fore.YELLOW}[SYSTEM] Persistent Claude session: {'ON' if session_mode else 'OFF'}{Style.RESET_ALL}")
+                continue
+
+            # SESSION RESET (/reset): advisors get the full context again, Claude a fresh conversation
+            if cmd_lower == "/reset":
+                advisor_session.end_session(advisor_session.current())
+                os.environ["OUTLAW_SESSION"] = advisor_session.new_session()
+                claude.close()
+                print(f"{Fore.YELLOW}[SYSTEM] Session reset. Full context on the next turn.{Style.RESET_ALL}")
+                continue
+
+            # VERBOSE TOGGLE (/verbose on|off): packed prompt sizes for every advisor and Claude
+            if cmd_lower.startswith("/verbose"):
+                setting = cmd_lower[8:].strip()
+                enabled = (setting == "on") if setting in ("on", "off") else not context_packer.verbose()
+                os.environ["OUTLAW_VERBOSE"] = "1" if enabled else "0"
+                print(f"{Fore.YELLOW}[SYSTEM] Verbose: {'ON' if enabled else 'OFF'}{Style.RESET_ALL}")
+                continue
+
+            # TRACE (/trace [on|off]): per-phase timing of the last turn, across every process it touched
+            if cmd_lower == "/trace" or cmd_lower.startswith("/trace "):
+                setting = cmd_lower[6:].strip()
+                if setting in ("on", "off"):
+                    os.environ[tracing.ENABLE_ENV] = "1" if setting == "on" else "0"
+                    print(f"{Fore.YELLOW}[SYSTEM] Tracing: {setting.upper()} ({tracing.trace_path()}){Style.RESET_ALL}")
+                elif last_trace:
+                    print(f"{Fore.YELLOW}{tracing.format_breakdown(tracing.load(last_trace))}{Style.RESET_ALL}")
                 else:
-                    print(f"{Fore.RED}[ERROR] Template not found: {template_path}{Style.RESET_ALL}")
-                    print(f"Available: {[f.replace('.md','') for f in os.listdir(TEMPLATES_DIR) if f.endswith('.md')]}")
+                    state = "No traced turn yet." if tracing.enabled() else "Tracing is off. Enable it with /trace on."
+                    print(f"{Fore.YELLOW}[SYSTEM] {state}{Style.RESET_ALL}")
                 continue
 
+            # PROFILE (/profile [on|off]): cProfile + sampled stacks of every turn, written to the profiles dir
+            if cmd_lower == "/profile" or cmd_lower.startswith("/profile "):
+                setting = cmd_lower[8:].strip()
+                enabled = (setting == "on") if setting in ("on", "off") else not profiling.enabled()
+                os.environ[profiling.ENABLE_ENV] = "1" if enabled else "0"
+                print(f"{Fore.YELLOW}[SYSTEM] Profiling: {'ON' if enabled else 'OFF'} ({profiling.profiles_dir()}){Style.RESET_ALL}")
+                continue
+
+            # ROUTING (/route [on|hedge|off]): plain turns go to the fastest healthy advisor; bare /route shows why
+            if cmd_lower == "/route" or cmd_lower.startswith("/route "):
+                setting = cmd_lower[6:].strip()
+                if setting in ("on", "hedge", "off"):
+                    routing = setting
+                    print(f"{Fore.YELLOW}[SYSTEM] Advisor routing: {routing.upper()}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.YELLOW}[SYSTEM] Advisor routing: {routing.upper()}")
+                    for line in router().describe(router().route(list(PROVIDER_SCRIPTS))):
+                        print(f"  {line}")
+                    print(Style.RESET_ALL, end="")
+                continue
+
+            # CONTEXT PREVIEW (/context [query]): what the advisors will be shown
+            if cmd_lower == "/context" or cmd_lower.startswith("/context "):
+                query = user_input[8:].strip() or None
+                print(f"{Fore.YELLOW}{context_builder.get_context(query) or '[SYSTEM] No workspace context.'}{Style.RESET_ALL}")
+                continue
+
+            # Every turn is one trace; its spans come from this process, the bridges and Claude
+            if tracing.enabled():
+                last_trace = tracing.start_trace()
+                turn_scope.enter_context(tracing.span("turn", persona=active_persona_name))
+            turn_profile = turn_scope.enter_context(profiling.profile("war_room"))
+
             # 2. EXECUTION FLAGS
             skip_advisor = False
             skip_execution = False
+            council = False
+            # Only turns that do not name an advisor are routed
+            routed = routing != "off"
             advisor_script = GEMINI_BRIDGE
             advisor_color = Fore.CYAN
             advisor_type = "GEMINI STRATEGY"
@@ -91,42 +681,76 @@ def main():
                 real_prompt = user_input[9:].strip()
                 # Optional: Consult Codex specific
                 if real_prompt.lower().startswith("codex "):
+                    routed = False
                     advisor_script = CODEX_BRIDGE
                     advisor_color = Fore.BLUE
                     advisor_type = "CODEX BLUEPRINT"
                     real_prompt = real_prompt[6:].strip()
+                # Optional: Consult every advisor at once
+                elif real_prompt.lower().startswith("council "):
+                    council = True
+                    real_prompt = real_prompt[8:].strip()
 
             elif cmd_lower.startswith("/codex "):
                 # Codex Mode: Use Codex Advisor
+                routed = False
                 advisor_script = CODEX_BRIDGE
                 advisor_color = Fore.BLUE
                 advisor_type = "CODEX BLUEPRINT"
                 real_prompt = user_input[7:].strip()
 
+            elif cmd_lower.startswith("/council "):
+                # Council Mode: All advisors in parallel, merged for Claude
+                council = True
+                real_prompt = user_input[9:].strip()
+
+            # --- STEP 0: SPECULATIVE CLAUDE SPAWN ---
+            advisor_timeout = None
+            if speculative and not session_mode and not skip_advisor and not skip_execution:
+                try:
+                    speculative_claude = spawn_speculative_claude(current_system_prompt)
+                    advisor_timeout = ADVISOR_DEADLINE
+                except Exception as e:
+                    print(f"{Fore.RED}[SPECULATIVE ERROR] {e}. Running serially.{Style.RESET_ALL}")
+
             # --- STEP 1: ADVISOR PHASE ---
             advice_content = ""
-            if not skip_advisor:
-                print(f"\n{advisor_color}>>> UPLINKING TO {advisor_type.split()[0]}...{Style.RESET_ALL}")
+            advice_sections = []
+            if not skip_advisor and council:
+                print(f"\n{Fore.CYAN}>>> UPLINKING TO COUNCIL ({len(ADVISORS)} ADVISORS)...{Style.RESET_ALL}")
+                advice_sections = run_council(real_prompt)
+                colors = {advisor_type: color for _, color, advisor_type in ADVISORS}
+                for advisor_type, advice in advice_sections:
+                    print(f"{colors[advisor_type]}[{advisor_type}]\n{advice}{Style.RESET_ALL}")
+
+            elif not skip_advisor:
+                route_note = ""
+                if routed:
+                    advisor_script = PROVIDER_SCRIPTS[router().route(list(PROVIDER_SCRIPTS))[0]]
+                    advisor_color, advisor_type = advisor_style(advisor_script)
+                    route_note = " (ROUTED, HEDGED)" if routing == "hedge" else " (ROUTED)"
+                print(f"\n{advisor_color}>>> UPLINKING TO {advisor_type.split()[0]}{route_note}...{Style.RESET_ALL}")
                 try:
-                    # Construct prompt for advisor
-                    advisor_input = f"Advice for: {real_prompt}"
-                    # If Codex, just pass the prompt directly as a task
-                    if advisor_script == CODEX_BRIDGE:
-                        advisor_input = real_prompt
-                        
-                    advisor_process = subprocess.run(
-                        [sys.executable, advisor_script, advisor_input], 
-                        capture_output=True, text=True
-                    )
-                    advice_content = advisor_process.stdout.strip()
-                    
-                    # Print Advisor Output
-                    print(f"{advisor_color}{advice_content}{Style.RESET_ALL}")
-                    
-                    if advisor_process.stderr:
-                         # Optional: Print stderr if verbose, or just if it looks like a real error
-                         pass 
+                    # Print Advisor Output as it streams in
+                    print(advisor_color, end="")
+                    stream = lambda chunk: print(chunk, end="", flush=True)
+                    if routed:
+                        answered, advice_content, streamed = route_advisor(real_prompt, hedge=routing == "hedge",
+                                                                           timeout=advisor_timeout, on_chunk=stream)
+                        if answered != advisor_script:
+                            advisor_script = answered
+                            advisor_color, advisor_type = advisor_style(answered)
+                            print(f"{Style.RESET_ALL}\n{Fore.YELLOW}[ROUTER] {advisor_type.split()[0]} answered first.{advisor_color}")
+                        if not streamed:
+                            print(advice_content, end="")
+                    else:
+                        advice_content = run_advisor(advisor_script, build_advisor_input(advisor_script, real_prompt),
+                                                     timeout=advisor_timeout, on_chunk=stream)
+                    print(Style.RESET_ALL)
+                    advice_sections = [(advisor_type, advice_content)]
 
+                except (TimeoutError, subprocess.TimeoutExpired):
+                    print(f"{Style.RESET_ALL}\n{Fore.YELLOW}[ADVISOR TIMEOUT] No advice within {advisor_timeout or bridge_daemon.REQUEST_TIMEOUT:g}s. Proceeding without it.{Style.RESET_ALL}")
                 except Exception as e:
                     print(f"{Fore.RED}[ADVISOR ERROR] {e}{Style.RESET_ALL}")
             
@@ -138,54 +762,85 @@ def main():
                 if skip_advisor:
                     combined_prompt = real_prompt
                 else:
-                    combined_prompt = f"REQUEST: {real_prompt}\n\n[{advisor_type}]:\n{advice_content}"
-                
-                # Build Command - Use temp files to avoid shell injection
-                import tempfile
-
-                cmd = []
-                prompt_file = None
-                system_file = None
+                    # The persona travels as the system prompt and is never trimmed; advice gets the rest
+                    budget = context_packer.budget_for("claude")
+                    report = context_packer.measure(persona=current_system_prompt)
+                    combined_prompt = merge_advice(real_prompt, advice_sections or [(advisor_type, advice_content)],
+                                                   budget=budget - context_packer.used(report), report=report)
+                    if context_packer.verbose():
+                        print(f"{Fore.YELLOW}{context_packer.format_report('claude', report, budget)}{Style.RESET_ALL}")
 
-                try:
-                    # Write prompt to temp file for security
-                    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as pf:
-                        pf.write(combined_prompt)
-                        prompt_file = pf.name
-
-                    # Write system prompt to temp file if exists
-                    if current_system_prompt:
-                        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as sf:
-                            sf.write(current_system_prompt)
-                            system_file = sf.name
-
-                    # Build command with file arguments (no shell injection risk)
-                    cmd = [CLAUDE_EXE, "-p", f"@{prompt_file}", "--dangerously-skip-permissions"]
-                    if system_file:
-                        cmd.extend(["--system-prompt", f"@{system_file}"])
-
-                except Exception as e:
-                    print(f"{Fore.RED}[ERROR] Failed to create temp files: {e}{Style.RESET_ALL}")
+                if session_mode:
+                    # Persistent process: restarted only after a crash or a persona switch
+                    try:
+                        claude.set_persona(current_system_prompt)
+                        print(Fore.GREEN, end="")
+                        with tracing.span("claude", mode="session", restarts=claude.restarts), \
+                                metrics.CLAUDE_LATENCY.time(mode="session"):
+                            claude.send(combined_prompt, on_chunk=lambda chunk: print(chunk, end="", flush=True),
+                                        timeout=CLAUDE_TIMEOUT)
+                        print(Style.RESET_ALL)
+                    except Exception as e:
+                        print(f"{Style.RESET_ALL}{Fore.RED}[CLAUDE ERROR] {e}{Style.RESET_ALL}")
+                        metrics.count_error("claude", e)
                     continue
 
+                if speculative_claude:
+                    # From here finish_speculative_claude owns the process
+                    handed, speculative_claude = speculative_claude, None
+                    try:
+                        stdout, stderr = finish_speculative_claude(*handed, combined_prompt)
+                        print(f"{Fore.GREEN}{stdout}{Style.RESET_ALL}")
+                        if stderr: print(f"{Fore.RED}{stderr}{Style.RESET_ALL}")
+                    except Exception as e:
+                        print(f"{Fore.RED}[CLAUDE ERROR] {e}{Style.RESET_ALL}")
+                        metrics.count_error("claude", e)
+                    continue
+                
+                # Prompt over stdin, persona in memory: no shell, no temp files to leak
                 try:
-                    claude_process = subprocess.run(cmd, capture_output=True, text=True)
-                    print(f"{Fore.GREEN}{claude_process.stdout}{Style.RESET_ALL}")
-                    if claude_process.stderr: print(f"{Fore.RED}{claude_process.stderr}{Style.RESET_ALL}")
+                    stdout, stderr = run_claude(combined_prompt, current_system_prompt)
+                    print(f"{Fore.GREEN}{stdout}{Style.RESET_ALL}")
+                    if stderr: print(f"{Fore.RED}{stderr}{Style.RESET_ALL}")
                 except Exception as e:
-                     print(f"{Fore.RED}[CLAUDE ERROR] {e}{Style.RESET_ALL}")
-                finally:
-                    # Cleanup temp files
-                    if prompt_file and os.path.exists(prompt_file):
-                        try:
-                            os.unlink(prompt_file)
-                        except:
-                            pass
-                    if system_file and os.path.exists(system_file):
-                        try:
-                            os.unlink(system_file)
-                        except:
-                            pass
+                    print(f"{Fore.RED}[CLAUDE ERROR] {e}{Style.RESET_ALL}")
+                    metrics.count_error("claude", e)
 
         except KeyboardInterrupt:
             break
+        finally:
+            # A turn that never reached the Claude phase must not leave its Claude behind
+            if speculative_claude:
+                abort_speculative_claude(*speculative_claude)
+            turn_scope.close()
+            if turn_profile:
+                print(f"{Fore.YELLOW}{turn_profile.summary}{Style.RESET_ALL}")
+
+    claude.close()
+    advisor_session.end_session(advisor_session.current())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix War Room")
+    parser.add_argument("--batch", "-b", metavar="FILE", help="Run the tasks in FILE (JSONL or YAML) headless, then exit")
+    parser.add_argument("--out", "-o", default="war_room_results", help="Directory for batch result files")
+    parser.add_argument("--workers", "-w", type=int, default=BATCH_WORKERS, help="Batch tasks run at once")
+    parser.add_argument("--limit", action="append", metavar="PROVIDER=N",
+                        help="Max concurrent requests to gemini, codex or claude (repeatable)")
+    parser.add_argument("--skip-done", action="store_true", help="Skip tasks whose result file already reports ok")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile every turn (or batch task) and the bridges it spawns; see tools/profiling.py")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("OUTLAW_METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics; see tools/metrics.py")
+    args = parser.parse_args()
+    if args.profile:
+        os.environ[profiling.ENABLE_ENV] = "1"
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"[SYSTEM] Metrics: http://127.0.0.1:{args.metrics_port}/metrics")
+    # Advisors search the code index on every consult; it is kept current here, off their path
+    if code_index.enabled():
+        code_index.watch()
+
+    if args.batch:
+        sys.exit(batch_main(args.batch, args.out, args.workers, args.limit, args.skip_done))
+    main()
@@ -0,0 +1,408 @@
+"""
+OUTLAW EXOTIX // WORKSPACE MAP
+
+Compact, ranked tree summary of the workspace for advisor context. Replaces the old
+`os.listdir('.')[:50]`, which only showed top-level names in arbitrary order.
+
+The tree is walked with os.scandir, honouring .gitignore files at every level (names
+in EXCLUDED_NAMES are always skipped), and the per-directory listings are persisted
+under the cache dir. Later calls only stat() each directory: a directory whose mtime
+and .gitignore are unchanged reuses its stored listing, so a warm refresh of a large
+repo costs one stat per directory instead of one per file. Sizes and mtimes of files edited in
+place are picked up the next time their directory changes.
+
+Files are ranked by recency first and size second, and rendered as an indented tree
+inside a byte budget.
+
+Environment:
+    OUTLAW_CACHE_DIR   cache directory (default: ~/.claude/cache)
+    OUTLAW_MAP_BUDGET  default byte budget for the summary (default: 1500)
+
+Usage:
+    python workspace_map.py [path] [--budget BYTES]
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import fnmatch
+import argparse
+import threading
+from functools import lru_cache
+
+import cache_store
+
+DEFAULT_BUDGET = 1500
+# Never mapped or indexed (see code_index.py): VCS internals, the memory log's own files
+# (lock, spool, segments, manifest, index) and names that suggest secrets. Case-insensitive.
+EXCLUDED_NAMES = (".git", "project_memory*", ".project_memory*", ".env*",
+                  "*secret*", "*credential*", "*password*", "*token*", "*.key")
+_EXCLUDED = re.compile("|".join(fnmatch.translate(pattern) for pattern in EXCLUDED_NAMES))
+
+# Ranking: recency halves every RECENCY_HALF_LIFE seconds; size adds up to SIZE_WEIGHT
+RECENCY_HALF_LIFE = 24 * 60 * 60
+SIZE_WEIGHT = 0.25
+
+_maps = {}
+_maps_lock = threading.Lock()
+
+
+def excluded(name):
+    """True for a file or directory name in EXCLUDED_NAMES."""
+    return _EXCLUDED.match(name.lower()) is not None
+
+
+def cache_path(root):
+    return cache_store.cache_dir("workspace_map", f"{cache_store.path_digest(root)}.json")
+
+
+def default_budget():
+    try:
+        return int(os.getenv("OUTLAW_MAP_BUDGET", DEFAULT_BUDGET))
+    except ValueError:
+        return DEFAULT_BUDGET
+
+
+# --- GITIGNORE ---
+
+def _glob_to_regex(pattern):
+    i, out = 0, []
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            out.append("[" + pattern[i + 1:end].replace("!", "^", 1) + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+def parse_gitignore(text):
+    """Rules from one .gitignore as (regex, negate, dir_only, anchored) tuples, in file order."""
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line:
+            rules.append((_glob_to_regex(line), negate, dir_only, anchored))
+    return rules
+
+
+@lru_cache(maxsize=256)
+def _compiled_rules(patterns):
+    return parse_gitignore("\n".join(patterns))
+
+
+def is_ignored(rel_path, is_dir, rule_sets):
+    """
+    Whether `rel_path` (posix, relative to the root) is ignored. `rule_sets` holds
+    (base_dir, rules) pairs from the outermost .gitignore inwards; the last match wins.
+    """
+    if excluded(rel_path.rsplit("/", 1)[-1]):
+        return True
+    ignored = False
+    for base, rules in rule_sets:
+        sub = rel_path[len(base) + 1:] if base else rel_path
+        name = sub.rsplit("/", 1)[-1]
+        for regex, negate, dir_only, anchored in rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(sub if anchored else name):
+                ignored = not negate
+    return ignored
+
+
+# --- INCREMENTAL WALK ---
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def _scan(directory, rel, rule_sets, skip=()):
+    files, dirs = [], []
+    with os.scandir(directory) as it:
+        for entry in it:
+            child = f"{rel}/{entry.name}" if rel else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if is_ignored(child, is_dir, rule_sets) or (is_dir and entry.path in skip):
+                    continue
+                if is_dir:
+                    dirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    files.append([entry.name, st.st_size, st.st_mtime_ns])
+            except OSError:
+                continue
+    return files, dirs
+
+
+def refresh(root=".", data=None):
+    """
+    Brings the directory records for `root` up to date and returns (data, changed).
+    Only directories whose mtime or effective .gitignore changed are rescanned.
+    """
+    root = os.path.abspath(root)
+    # Listings stored under other exclusions may hold names that are now excluded
+    if data and data.get("excluded") != list(EXCLUDED_NAMES):
+        data = None
+    old = (data or {}).get("dirs", {})
+    new = {}
+    changed = False
+    # Our own cache may live inside the workspace; mapping it would invalidate every call
+    skip = {os.path.abspath(cache_store.cache_dir())}
+
+    # (relative dir, inherited rule sets, whether an ancestor's rules changed)
+    stack = [("", [], False)]
+    while stack:
+        rel, rule_sets, rules_changed = stack.pop()
+        directory = f"{root}{os.sep}{rel}" if rel else root
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+
+        record = old.get(rel)
+        unchanged = record is not None and record["mtime"] == mtime
+        # Creating a .gitignore bumps the directory mtime, so only an existing one needs a stat
+        if unchanged and record.get("ignore_stamp") is None:
+            ignore_stamp = None
+        else:
+            ignore_stamp = _stamp(f"{directory}{os.sep}.gitignore")
+        if record and record.get("ignore_stamp") == ignore_stamp:
+            patterns = record.get("ignore", [])
+        else:
+            rules_changed = True
+            patterns = []
+            if ignore_stamp:
+                try:
+                    with open(f"{directory}{os.sep}.gitignore", "r", encoding="utf-8", errors="replace") as f:
+                        patterns = f.read().splitlines()
+                except OSError:
+                    pass
+        if patterns:
+            rule_sets = rule_sets + [(rel, _compiled_rules(tuple(patterns)))]
+
+        if unchanged and not rules_changed:
+            files, dirs = record["files"], record["dirs"]
+        else:
+            try:
+                files, dirs = _scan(directory, rel, rule_sets, skip)
+            except OSError:
+                continue
+            # A touched directory with the same contents (e.g. a temp file come and gone) keeps the summary
+            if not record or record["files"] != files or record["dirs"] != dirs:
+                changed = True
+
+        new[rel] = {"mtime": mtime, "ignore_stamp": ignore_stamp, "ignore": patterns, "files": files, "dirs": dirs}
+        for name in dirs:
+            stack.append((f"{rel}/{name}" if rel else name, rule_sets, rules_changed))
+
+    if set(new) != set(old):
+        changed = True
+    return {"root": root, "excluded": list(EXCLUDED_NAMES), "dirs": new, "summary": None if changed else (data or {}).get("summary")}, changed
+
+
+def _load(root):
+    try:
+        with open(cache_path(root), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(root, data):
+    try:
+        cache_store.write_json(cache_path(root), data, separators=(",", ":"))
+    except OSError:
+        pass  # The map still works, it just starts cold next time
+
+
+# --- RANKING & RENDERING ---
+
+def _human_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _score(size, mtime_ns, now, largest):
+    age = max(0.0, now - mtime_ns / 1e9)
+    recency = 0.5 ** (age / RECENCY_HALF_LIFE)
+    return recency + SIZE_WEIGHT * math.log1p(size) / math.log1p(largest or 1)
+
+
+def render(data, budget):
+    """Indented tree of the top-ranked files (plus top-level dirs) within `budget` bytes."""
+    dirs = data["dirs"]
+    files = [(f"{rel}/{name}" if rel else name, size, mtime)
+             for rel, record in dirs.items() for name, size, mtime in record["files"]]
+    total_bytes = sum(size for _, size, _ in files)
+
+    # Files per subtree, for the directory lines
+    counts = {}
+    for rel, record in dirs.items():
+        parts = rel.split("/") if rel else []
+        for depth in range(len(parts) + 1):
+            key = "/".join(parts[:depth])
+            counts[key] = counts.get(key, 0) + len(record["files"])
+
+    header = f"{counts.get('', 0)} files in {len(dirs) - 1} dirs, {_human_size(total_bytes)} (recent / large first)"
+    more = f"(+{len(files)} more files)"
+    # Keep room for the "more files" line so truncation is always visible
+    used = len(header.encode("utf-8")) + len(more) + 2
+    shown_dirs, shown_files = set(), {}
+
+    def dir_line(rel):
+        depth = rel.count("/")
+        return f"{'  ' * depth}{rel.rsplit('/', 1)[-1]}/ ({counts.get(rel, 0)} files)"
+
+    def file_line(path, size):
+        return f"{'  ' * path.count('/')}{path.rsplit('/', 1)[-1]} {_human_size(size)}"
+
+    def new_dirs(rel):
+        parts = rel.split("/") if rel else []
+        return [d for d in ("/".join(parts[:i + 1]) for i in range(len(parts))) if d not in shown_dirs]
+
+    # Skeleton first: every top-level directory, biggest first
+    for name in sorted(dirs.get("", {}).get("dirs", []), key=lambda n: -counts.get(n, 0)):
+        cost = len(dir_line(name).encode("utf-8")) + 1
+        if used + cost <= budget:
+            shown_dirs.add(name)
+            used += cost
+
+    now = time.time()
+    largest = max((size for _, size, _ in files), default=1)
+    ranked = sorted(files, key=lambda f: -_score(f[1], f[2], now, largest))
+    misses = 0
+    for path, size, _ in ranked:
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        missing = new_dirs(parent)
+        cost = sum(len(dir_line(d).encode("utf-8")) + 1 for d in missing) + len(file_line(path, size).encode("utf-8")) + 1
+        if used + cost > budget:
+            misses += 1
+            if misses > 50:
+                break
+            continue
+        shown_dirs.update(missing)
+        shown_files[path] = size
+        used += cost
+
+    # Render depth-first: files of a directory, then its subdirectories
+    children = {}
+    for d in shown_dirs:
+        children.setdefault(d.rsplit("/", 1)[0] if "/" in d else "", []).append(d)
+    own_files = {}
+    for path in shown_files:
+        own_files.setdefault(path.rsplit("/", 1)[0] if "/" in path else "", []).append(path)
+
+    lines = [header]
+
+    def emit(rel):
+        for path in sorted(own_files.get(rel, [])):
+            lines.append(file_line(path, shown_files[path]))
+        for d in sorted(children.get(rel, [])):
+            lines.append(dir_line(d))
+            emit(d)
+
+    emit("")
+    hidden = len(files) - len(shown_files)
+    if hidden > 0:
+        lines.append(f"(+{hidden} more files)")
+    return "\n".join(lines)
+
+
+# --- API ---
+
+def _refreshed(root):
+    """(key, data, changed) for `root`: the in-memory or on-disk map brought up to date."""
+    key = os.path.abspath(root)
+    with _maps_lock:
+        data = _maps.get(key)
+    if data is None:
+        data = _load(key)
+    data, changed = refresh(key, data)
+    return key, data, changed
+
+
+def _store(key, data, changed):
+    if changed:
+        _save(key, data)
+    with _maps_lock:
+        _maps[key] = data
+
+
+def summary(root=".", budget=None):
+    """Workspace map text for `root`, refreshed incrementally and cached on disk and in memory."""
+    budget = budget or default_budget()
+    key, data, changed = _refreshed(root)
+
+    cached = data.get("summary")
+    if cached and cached.get("budget") == budget:
+        text = cached["text"]
+    else:
+        text = render(data, budget)
+        data["summary"] = {"budget": budget, "text": text}
+        changed = True
+
+    _store(key, data, changed)
+    return text
+
+
+def list_files(root="."):
+    """Every non-ignored file under `root` as (relative posix path, size, mtime_ns)."""
+    key, data, changed = _refreshed(root)
+    _store(key, data, changed)
+    return [(f"{rel}/{name}" if rel else name, size, mtime)
+            for rel, record in data["dirs"].items() for name, size, mtime in record["files"]]
+
+
+def clear_cache():
+    with _maps_lock:
+        _maps.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outlaw Exotix Workspace Map")
+    parser.add_argument("path", nargs="?", default=".", help="Workspace root (default: current directory)")
+    parser.add_argument("--budget", "-b", type=int, default=None, help="Byte budget for the summary")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.path):
+        print(f"ERROR: Not a directory: {args.path}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    text = summary(args.path, args.budget)
+    print(text)
+    print(f"\n[{(time.perf_counter() - start) * 1000:.1f} ms]")